@@ -286,19 +286,20 @@ class CartItem(BaseModel):
 
         # 🚗 Логика для автомобилей
         if self.is_car_product():
+            # 🗂️ Комплектации и опции берем из процессного реестра
+            from products.registry import registry
+
             # Добавляем стоимость комплектации
-            if self.kit_variant and hasattr(self.kit_variant, 'price_modifier'):
-                kit_price = float(self.kit_variant.price_modifier or 0)
+            kit_variant = registry.get_kit_by_uid(self.kit_variant_id)
+            if kit_variant:
+                kit_price = float(kit_variant.price_modifier or 0)
                 total_price += kit_price * self.quantity
 
             # Добавляем стоимость подпятника
             if self.has_podpyatnik:
                 # 🔍 Ищем подпятник в KitVariant как опцию
                 try:
-                    from products.models import KitVariant
-                    podpyatnik_option = KitVariant.objects.filter(
-                        code='podpyatnik', is_option=True
-                    ).first()
+                    podpyatnik_option = registry.get_option('podpyatnik')
                     if podpyatnik_option:
                         podpyatnik_price = float(podpyatnik_option.price_modifier or 0)
                         total_price += podpyatnik_price * self.quantity
@@ -35,6 +35,10 @@ class CategorySitemap(Sitemap):
         """📋 Все категории"""
         return Category.objects.all()
 
+    def lastmod(self, obj):
+        """📅 Дата последнего изменения"""
+        return obj.updated_at
+
     def location(self, obj):
         """🔗 URL категории"""
         return obj.get_absolute_url()
@@ -62,15 +66,5 @@ blog_sitemaps = {
     'blog_static': BlogStaticSitemap,
 }
 
-# 📝 Добавьте в основной urls.py:
-# from django.contrib.sitemaps.views import sitemap
-# from blog.sitemap import blog_sitemaps
-#
-# sitemaps = {
-#     **blog_sitemaps,
-#     # другие карты сайта
-# }
-#
-# urlpatterns = [
-#     path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='sitemap'),
-# ]
\ No newline at end of file
+# 📝 Подключено в common/sitemaps.py вместе с картами товаров и лодок:
+# python manage.py build_sitemaps собирает /sitemap.xml и gzip-страницы разделов
@@ -10,6 +10,7 @@ from django.http import HttpResponseRedirect, HttpResponse
 from django.shortcuts import render
 from django.contrib import messages
 from django.urls import path
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.core.exceptions import ValidationError
@@ -220,14 +221,30 @@ class BoatCategoryAdmin(admin.ModelAdmin):
 
     def activate_categories(self, request, queryset):
         """✅ Активировать выбранные категории"""
-        updated = queryset.update(is_active=True)
+        category_uids = list(queryset.values_list('uid', flat=True))
+        # 🕒 updated_at - водяная отметка ленты изменений (common/change_feed.py)
+        updated = queryset.update(is_active=True, updated_at=timezone.now())
+        self._invalidate_category_pages(category_uids)
         self.message_user(request, f"✅ Активировано категорий: {updated}")
 
     def deactivate_categories(self, request, queryset):
         """❌ Деактивировать выбранные категории"""
-        updated = queryset.update(is_active=False)
+        category_uids = list(queryset.values_list('uid', flat=True))
+        updated = queryset.update(is_active=False, updated_at=timezone.now())
+        self._invalidate_category_pages(category_uids)
         self.message_user(request, f"❌ Деактивировано категорий: {updated}")
 
+    @staticmethod
+    def _invalidate_category_pages(category_uids):
+        """🗄️ queryset.update() не вызывает сигналы - сбрасываем кэш страниц вручную"""
+        from common.page_cache import (
+            invalidate_tags, category_tag, BOATS_CATALOG_TAG, BOAT_CATEGORIES_TAG
+        )
+        invalidate_tags(
+            BOATS_CATALOG_TAG, BOAT_CATEGORIES_TAG,
+            *(category_tag(uid) for uid in category_uids)
+        )
+
     def optimize_seo(self, request, queryset):
         """🔍 Автоматическая SEO оптимизация"""
         optimized = 0
@@ -342,9 +359,14 @@ class BoatProductAdmin(admin.ModelAdmin):
         'export_boats_excel'
     ]
 
+    def get_queryset(self, request):
+        """⚡ Изображения одним запросом на страницу списка"""
+        return super().get_queryset(request).select_related('category').prefetch_related('images')
+
     def get_main_image_preview(self, obj):
         """🖼️ Предпросмотр главного изображения товара"""
-        main_image = obj.images.filter(is_main=True).first()
+        images = list(obj.images.all())
+        main_image = next((image for image in images if image.is_main), None)
         if main_image and main_image.image:
             return format_html(
                 '<img src="{}" style="width: 60px; height: 60px; object-fit: cover; border-radius: 5px; border: 2px solid #f39c12;" title="{}">',
@@ -353,7 +375,7 @@ class BoatProductAdmin(admin.ModelAdmin):
             )
 
         # Если нет главного, берем первое доступное
-        first_image = obj.images.first()
+        first_image = images[0] if images else None
         if first_image and first_image.image:
             return format_html(
                 '<img src="{}" style="width: 60px; height: 60px; object-fit: cover; border-radius: 5px; border: 1px solid #ddd;" title="{}">',
@@ -423,9 +445,10 @@ class BoatProductAdmin(admin.ModelAdmin):
 
     def has_main_image_status(self, obj):
         """🖼️ Статус главного изображения"""
-        if obj.images.filter(is_main=True).exists():
+        images = obj.images.all()
+        if any(image.is_main for image in images):
             return format_html('<span style="color: green;">✅ Есть</span>')
-        elif obj.images.exists():
+        elif images:
             return format_html('<span style="color: orange;">⚠️ Не выбрано</span>')
         return format_html('<span style="color: red;">❌ Нет фото</span>')
 
@@ -435,12 +458,13 @@ class BoatProductAdmin(admin.ModelAdmin):
 
     def mark_as_new(self, request, queryset):
         """🆕 Отметить как новые товары"""
-        updated = queryset.update(newest_product=True)
+        # 🕒 updated_at - водяная отметка ленты изменений (common/change_feed.py)
+        updated = queryset.update(newest_product=True, updated_at=timezone.now())
         self.message_user(request, f"🆕 Отмечено как новые: {updated} товаров")
 
     def mark_as_regular(self, request, queryset):
         """📦 Убрать отметку 'новый'"""
-        updated = queryset.update(newest_product=False)
+        updated = queryset.update(newest_product=False, updated_at=timezone.now())
         self.message_user(request, f"📦 Убрана отметка 'новый': {updated} товаров")
 
     def set_first_image_as_main(self, request, queryset):
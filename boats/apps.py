@@ -12,8 +12,8 @@ class BoatsConfig(AppConfig):
 
     def ready(self):
         """🚀 Инициализация при запуске приложения"""
-        # 📝 В будущем здесь можно добавить специальные сигналы для лодок
-        pass
+        # 🔔 Подключаем сигналы (фото карточек товаров)
+        import boats.signals  # noqa F401
 
 # 📝 ОСОБЕННОСТИ ПРИЛОЖЕНИЯ BOATS:
 #
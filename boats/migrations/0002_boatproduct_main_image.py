@@ -0,0 +1,33 @@
+# 🖼️ Денормализованное фото карточки лодочного товара (BoatProduct.main_image)
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_main_image(apps, schema_editor):
+    """🔄 Заполняет колонку для уже существующих товаров"""
+    BoatProduct = apps.get_model('boats', 'BoatProduct')
+    BoatProductImage = apps.get_model('boats', 'BoatProductImage')
+    first_image = (
+        BoatProductImage.objects.filter(product=OuterRef('pk'))
+        .order_by('-is_main', 'display_order', 'created_at')
+        .values('image')[:1]
+    )
+    BoatProduct.objects.update(main_image=Coalesce(Subquery(first_image), Value('')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='boatproduct',
+            name='main_image',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Обновляется автоматически при сохранении и удалении изображений товара', max_length=255, verbose_name='Фото карточки'),
+        ),
+        migrations.RunPython(fill_main_image, migrations.RunPython.noop),
+    ]
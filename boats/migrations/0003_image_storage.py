@@ -0,0 +1,24 @@
+# 🔐 Выбор хранилища изображений через products.storage.get_image_storage
+
+import products.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boats', '0002_boatproduct_main_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='boatcategory',
+            name='category_image',
+            field=models.ImageField(blank=True, help_text='Логотип бренда лодки. Рекомендуемый размер: 400x300px', null=True, storage=products.storage.get_image_storage, upload_to='boat_categories', verbose_name='Изображение категории'),
+        ),
+        migrations.AlterField(
+            model_name='boatproductimage',
+            name='image',
+            field=models.ImageField(help_text='Фото лодочного коврика. Рекомендуемый размер: 800x600px', storage=products.storage.get_image_storage, upload_to='boat_products', verbose_name='Изображение'),
+        ),
+    ]
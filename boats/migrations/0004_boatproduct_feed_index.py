@@ -0,0 +1,17 @@
+# 🔄 Индекс курсора ленты изменений (updated_at, uid)
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boats', '0003_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='boatproduct',
+            index=models.Index(fields=['updated_at', 'uid'], name='boats_boatproduct_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# 📄 Индексы курсорной пагинации каталога: (ключ сортировки, uid)
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boats', '0004_boatproduct_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='boatproduct',
+            index=models.Index(fields=['created_at', 'uid'], name='boats_boatproduct_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boatproduct',
+            index=models.Index(fields=['price', 'uid'], name='boats_boatproduct_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boatproduct',
+            index=models.Index(fields=['product_name', 'uid'], name='boats_boatproduct_name_idx'),
+        ),
+    ]
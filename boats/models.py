@@ -5,11 +5,13 @@
 
 import uuid
 from django.db import models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
 from django.urls import reverse
 from django_ckeditor_5.fields import CKEditor5Field
 from base.models import BaseModel
-from products.storage import OverwriteStorage
+from products.storage import get_image_storage
 
 
 # 🛥️ Описание каталога лодочных ковриков
@@ -125,7 +127,7 @@ class BoatCategory(BaseModel):
     # 🖼️ Изображение категории
     category_image = models.ImageField(
         upload_to="boat_categories",
-        storage=OverwriteStorage(),
+        storage=get_image_storage,
         null=True,
         blank=True,
         verbose_name="Изображение категории",
@@ -277,6 +279,14 @@ class BoatCategory(BaseModel):
         ordering = ['display_order', 'category_name']
 
 
+class BoatProductQuerySet(models.QuerySet):
+    """🔍 QuerySet лодочных товаров (как products.models.ProductQuerySet)"""
+
+    def cards(self):
+        """🃏 Карточки каталога одним запросом: категория JOIN-ом, фото из main_image"""
+        return self.select_related('category').defer('product_desription')
+
+
 class BoatProduct(BaseModel):
     """
     🛥️ УНИФИЦИРОВАННАЯ модель товаров лодок
@@ -374,6 +384,18 @@ class BoatProduct(BaseModel):
         help_text="SEO описание для поисковых систем"
     )
 
+    # 🖼️ ФОТО ДЛЯ КАРТОЧЕК (как у Product)
+    main_image = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Фото карточки",
+        help_text="Обновляется автоматически при сохранении и удалении изображений товара"
+    )
+
+    objects = BoatProductQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         """🔧 Автогенерация slug и SKU"""
         if not self.slug:
@@ -421,38 +443,61 @@ class BoatProduct(BaseModel):
         return "Цена по запросу"
 
     def get_rating(self):
-        """⭐ Рассчитывает средний рейтинг товара на основе отзывов"""
+        """⭐ Средний рейтинг товара по одобренным отзывам (из денормализованных агрегатов)"""
+        # 📈 Значение уже пришло аннотацией ProductRating.annotate_queryset()
+        if 'rating_avg' in self.__dict__:
+            return self.__dict__['rating_avg'] or 0
         # Импортируем здесь чтобы избежать циклического импорта
-        from django.contrib.contenttypes.models import ContentType
         try:
-            from common.models import ProductReview
-            ct = ContentType.objects.get_for_model(self)
-            reviews = ProductReview.objects.filter(content_type=ct, object_id=self.uid)
-            if reviews.count() > 0:
-                total = sum(int(review.stars) for review in reviews)
-                return total / reviews.count()
+            from common.models import ProductRating
+            rating = ProductRating.for_instance(self)
+            return rating.rating_avg if rating else 0
         except ImportError:
             pass
         return 0
 
     def get_reviews_count(self):
-        """📝 Возвращает количество отзывов"""
-        from django.contrib.contenttypes.models import ContentType
+        """📝 Возвращает количество одобренных отзывов"""
+        if 'rating_count' in self.__dict__:
+            return self.__dict__['rating_count'] or 0
         try:
-            from common.models import ProductReview
-            ct = ContentType.objects.get_for_model(self)
-            return ProductReview.objects.filter(content_type=ct, object_id=self.uid).count()
+            from common.models import ProductRating
+            rating = ProductRating.for_instance(self)
+            return rating.rating_count if rating else 0
         except ImportError:
             pass
         return 0
 
     def get_main_image(self):
-        """🖼️ Получить главное изображение"""
+        """🖼️ Получить главное изображение (из prefetch_related('images') без запроса)"""
+        prefetched = getattr(self, '_prefetched_objects_cache', {})
+        if 'images' in prefetched:
+            images = list(prefetched['images'])
+            return next((image for image in images if image.is_main), images[0] if images else None)
+
         main_image = self.images.filter(is_main=True).first()
         if main_image:
             return main_image
         return self.images.first()
 
+    def get_main_image_url(self):
+        """🖼️ URL фото карточки или заглушки (без запросов к БД)"""
+        if self.main_image:
+            return BoatProductImage._meta.get_field('image').storage.url(self.main_image)
+        return '/media/images/placeholder-product.jpg'
+
+    @classmethod
+    def refresh_main_images(cls, product_ids):
+        """🔄 Пересчитывает колонку main_image одним UPDATE (главное фото, иначе первое в галерее)"""
+        first_image = (
+            BoatProductImage.objects.filter(product=OuterRef('pk'))
+            .order_by('-is_main', 'display_order', 'created_at')
+            .values('image')[:1]
+        )
+        return cls.objects.filter(pk__in=product_ids).update(
+            main_image=Coalesce(Subquery(first_image), Value(''))
+        )
+
     def __str__(self):
         """🛥️ Отображение в админке"""
         dimensions = ""
@@ -468,6 +513,12 @@ class BoatProduct(BaseModel):
             models.Index(fields=['category', 'newest_product']),
             models.Index(fields=['slug']),
             models.Index(fields=['product_sku']),
+            # 🔄 Курсор ленты изменений (common/change_feed.py)
+            models.Index(fields=['updated_at', 'uid'], name='boats_boatproduct_feed_idx'),
+            # 📄 Курсорная пагинация каталога (common/pagination.py)
+            models.Index(fields=['created_at', 'uid'], name='boats_boatproduct_created_idx'),
+            models.Index(fields=['price', 'uid'], name='boats_boatproduct_price_idx'),
+            models.Index(fields=['product_name', 'uid'], name='boats_boatproduct_name_idx'),
         ]
 
 
@@ -486,7 +537,7 @@ class BoatProductImage(BaseModel):
 
     image = models.ImageField(
         upload_to="boat_products",
-        storage=OverwriteStorage(),
+        storage=get_image_storage,
         verbose_name="Изображение",
         help_text="Фото лодочного коврика. Рекомендуемый размер: 800x600px"
     )
@@ -0,0 +1,24 @@
+# 📁 boats/signals.py
+# 🔔 Сигналы приложения boats
+# 🖼️ Поддержка колонки BoatProduct.main_image при изменении изображений
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import BoatProduct, BoatProductImage
+
+
+@receiver(post_save, sender=BoatProductImage)
+@receiver(post_delete, sender=BoatProductImage)
+def refresh_boat_product_main_image(sender, instance, **kwargs):
+    """
+    🖼️ Пересчитывает фото карточки лодочного товара
+
+    Args:
+        sender: Класс модели BoatProductImage
+        instance: Сохраненное или удаленное изображение
+        **kwargs: Дополнительные аргументы сигнала
+    """
+    if kwargs.get('raw'):
+        return
+    BoatProduct.refresh_main_images([instance.product_id])
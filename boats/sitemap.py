@@ -0,0 +1,61 @@
+# 📁 boats/sitemap.py
+# 🗺️ Карта сайта каталога лодок: товары и категории
+# 📄 Разбиение на страницы по 50 000 URL (Sitemap.limit) выполняет common/sitemaps.py
+
+from django.contrib.sitemaps import Sitemap
+from django.urls import reverse
+
+from .models import BoatCategory, BoatProduct
+
+
+class BoatProductSitemap(Sitemap):
+    """🛥️ Карта сайта для товаров лодок (/boats/product/<slug>/)"""
+    changefreq = "weekly"
+    priority = 0.8
+
+    def items(self):
+        """📋 Товары активных категорий; новые - в конце, страницы карты не сдвигаются"""
+        return (
+            BoatProduct.objects.filter(category__is_active=True)
+            .exclude(slug__isnull=True).exclude(slug='')
+            .only('slug', 'updated_at')
+            .order_by('created_at', 'uid')
+        )
+
+    def lastmod(self, obj):
+        """📅 Дата последнего изменения"""
+        return obj.updated_at
+
+    def location(self, obj):
+        """🔗 URL товара лодки"""
+        return reverse('boats:product_detail', kwargs={'slug': obj.slug})
+
+
+class BoatCategorySitemap(Sitemap):
+    """📂 Карта сайта для категорий лодок"""
+    changefreq = "weekly"
+    priority = 0.6
+
+    def items(self):
+        """📋 Активные категории лодок"""
+        return (
+            BoatCategory.objects.filter(is_active=True)
+            .exclude(slug__isnull=True).exclude(slug='')
+            .only('slug', 'updated_at')
+            .order_by('created_at', 'uid')
+        )
+
+    def lastmod(self, obj):
+        """📅 Дата последнего изменения"""
+        return obj.updated_at
+
+    def location(self, obj):
+        """🔗 URL категории лодок"""
+        return reverse('boats:product_list_by_category', kwargs={'slug': obj.slug})
+
+
+# 🗺️ Карты сайта каталога лодок (подключены в common/sitemaps.py)
+boats_sitemaps = {
+    'boats': BoatProductSitemap,
+    'boat-categories': BoatCategorySitemap,
+}
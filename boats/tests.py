@@ -1,3 +1,23 @@
+# 📁 boats/tests.py
+# 🧪 Тесты каталога лодочных ковриков
+
 from django.test import TestCase
 
-# Create your tests here.
+from .models import BoatCategory, BoatProduct
+from .sitemap import BoatCategorySitemap, BoatProductSitemap
+
+
+class BoatSitemapTests(TestCase):
+    """🗺️ Товары и категории лодок в карте сайта (user-018)"""
+
+    def test_hidden_and_slugless_items_are_excluded(self):
+        category = BoatCategory.objects.create(category_name='Yamaha', slug='yamaha')
+        hidden = BoatCategory.objects.create(category_name='Off', slug='off', is_active=False)
+        listed = BoatProduct.objects.create(product_name='Коврик', slug='kovrik', category=category, product_sku='B1')
+        BoatProduct.objects.create(product_name='Скрытый', slug='skrytyi', category=hidden, product_sku='B2')
+        slugless = BoatProduct.objects.create(product_name='Без адреса', slug='bez', category=category,
+                                              product_sku='B3')
+        BoatProduct.objects.filter(pk=slugless.pk).update(slug='')
+
+        self.assertEqual([product.pk for product in BoatProductSitemap().items()], [listed.pk])
+        self.assertEqual([item.pk for item in BoatCategorySitemap().items()], [category.pk])
@@ -5,19 +5,16 @@
 # 🎯 АДАПТИРОВАНО: Все функции products/views.py под специфику лодок (без комплектаций)
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponseRedirect, JsonResponse
+from django.http import HttpResponseRedirect, JsonResponse, Http404
 from django.contrib import messages
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Q
 from django.contrib.contenttypes.models import ContentType
 from django.views.decorators.http import require_POST
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
-from django.core.cache import cache
 from django.views.decorators.csrf import csrf_protect
-from django.views.decorators.cache import cache_page
 import json
 import time
 import logging
@@ -25,11 +22,18 @@ import logging
 # 🛥️ Модели лодок
 from .models import BoatCategory, BoatProduct, BoatProductImage
 
-# 🎨 Цвета из products (общие)
-from products.models import Color
+# 🎨 Цвета из products (общие) - через процессный реестр
+from products.registry import registry
 
 # 🤝 Универсальные модели из common
-from common.models import ProductReview
+from common.models import ProductReview, ProductRating
+from common import rate_limit
+from common.search import search_queryset
+from common.pagination import paginate_catalog, render_cursor_fragment
+from common.product_snapshot import get_product_snapshot
+from common.page_cache import (
+    tagged_cache_page, category_tag, KITS_TAG, BOATS_CATALOG_TAG, BOAT_CATEGORIES_TAG
+)
 
 # 👤 Модели пользователей и корзины
 from accounts.models import Cart, CartItem
@@ -53,32 +57,7 @@ def get_client_ip(request):
     return ip
 
 
-def check_review_rate_limit(ip_address, user=None):
-    """
-    🛡️ Проверка rate limiting для отзывов лодок
-
-    Ограничения:
-    - Анонимные пользователи: 3 отзыва в час с одного IP
-    - Авторизованные пользователи: 5 отзывов в час
-    """
-    if user and user.is_authenticated:
-        cache_key = f"boat_review_limit_user_{user.id}"
-        limit = 5
-    else:
-        cache_key = f"boat_review_limit_ip_{ip_address}"
-        limit = 3
-
-    current_count = cache.get(cache_key, 0)
-
-    if current_count >= limit:
-        return False
-
-    # Увеличиваем счетчик на час
-    cache.set(cache_key, current_count + 1, 3600)
-    return True
-
-
-@cache_page(60 * 15)  # Кэш каталога лодок на 15 минут
+@tagged_cache_page(tags=[BOATS_CATALOG_TAG, BOAT_CATEGORIES_TAG, KITS_TAG])
 def boat_category_list(request):
     """
     🛥️ Главная страница лодок = каталог всех лодок с оптимизацией
@@ -99,15 +78,14 @@ def boat_category_list(request):
     min_width = request.GET.get("min_width", "")
     max_width = request.GET.get("max_width", "")
 
-    # 🚀 Оптимизированный запрос с prefetch
-    products = BoatProduct.objects.all().select_related("category").prefetch_related("images")
+    # 🚀 Карточки одним запросом: фото из колонки main_image, без prefetch изображений
+    products = BoatProduct.objects.cards()
+    # ⭐ Рейтинг из денормализованных агрегатов - без запросов на каждую карточку
+    products = ProductRating.annotate_queryset(products)
 
     if search_query:
-        products = products.filter(
-            Q(product_name__icontains=search_query)
-            | Q(product_desription__icontains=search_query)
-            | Q(product_sku__icontains=search_query)
-        )
+        # 🔍 Полнотекстовый поиск с морфологией и опечатками (вместо icontains)
+        products = search_queryset(products, search_query)
 
     if category_filter:
         products = products.filter(category__slug=category_filter)
@@ -137,6 +115,13 @@ def boat_category_list(request):
         except ValueError:
             pass
 
+    min_rating = request.GET.get("min_rating", "")
+    if min_rating:
+        try:
+            products = products.filter(rating_avg__gte=float(min_rating))
+        except ValueError:
+            pass
+
     sort_options = {
         "name": "product_name",
         "-name": "-product_name",
@@ -144,28 +129,22 @@ def boat_category_list(request):
         "-price": "-price",
         "newest": "-created_at",
         "oldest": "created_at",
+        "rating": ("-rating_avg", "-rating_count"),
+        "popular": ("-rating_count", "-rating_avg"),
     }
-    products = products.order_by(sort_options.get(sort_by, "-created_at"))
-
-    if per_page == "all":
-        total_products = products.count()
-        if total_products > 500:
-            messages.warning(request, f"Показано первые 500 из {total_products} лодочных товаров.")
-            per_page_num = 500
-        else:
-            per_page_num = total_products or 1
-    else:
-        try:
-            per_page_num = int(per_page)
-            if per_page_num not in [12, 24, 48, 96]:
-                per_page_num = 12
-        except (ValueError, TypeError):
-            per_page_num = 12
-
-    # Пагинация
-    paginator = Paginator(products, per_page_num)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    sort_fields = sort_options.get(sort_by, "-created_at")
+    if isinstance(sort_fields, str):
+        sort_fields = (sort_fields,)
+    if search_query and "sort" not in request.GET:
+        # 🎯 При поиске без явной сортировки - по релевантности
+        sort_fields = ("-search_rank",)
+    products = products.order_by(*sort_fields)
+
+    # 📄 Классическая или курсорная пагинация (?pagination=cursor)
+    pagination = paginate_catalog(request, products, sort_by, per_page)
+    if pagination["cursor_page"] and request.GET.get("fragment"):
+        # 🧩 Бесконечная прокрутка: только карточки следующей порции
+        return render_cursor_fragment(request, "boats/product_cards.html", pagination["cursor_page"])
 
     # Активные категории лодок с кэшированием
     categories = (
@@ -174,16 +153,17 @@ def boat_category_list(request):
     )
 
     context = {
-        "page_obj": page_obj,
-        "products": page_obj.object_list,
+        "page_obj": pagination["page_obj"],
+        "products": pagination["products"],
+        "cursor_page": pagination["cursor_page"],
         "categories": categories,
         "search_query": search_query,
         "sort_by": sort_by,
         "category_filter": category_filter,
         "per_page": per_page,
-        "total_products": paginator.count,
-        "current_page": page_obj.number,
-        "total_pages": paginator.num_pages,
+        "total_products": pagination["total_products"],
+        "current_page": pagination["current_page"],
+        "total_pages": pagination["total_pages"],
         # 🛥️ Фильтры размеров лодок
         "min_length": min_length,
         "max_length": max_length,
@@ -198,6 +178,15 @@ def boat_category_list(request):
     return render(request, "boats/category_list.html", context)
 
 
+def _boat_category_page_tags(request, slug):
+    """🏷️ Теги страницы категории лодок (None - категории нет, кэш не нужен)"""
+    category_uid = BoatCategory.objects.filter(slug=slug).values_list("uid", flat=True).first()
+    if category_uid is None:
+        return None
+    return [category_tag(category_uid), BOAT_CATEGORIES_TAG, KITS_TAG]
+
+
+@tagged_cache_page(tags=_boat_category_page_tags)
 def boat_product_list(request, slug):
     """📂 Каталог товаров лодок в выбранной категории"""
     category = get_object_or_404(BoatCategory, slug=slug)
@@ -218,16 +207,13 @@ def boat_product_list(request, slug):
 
     products = (
         BoatProduct.objects.filter(category=category)
-        .select_related("category")
-        .prefetch_related("images")
+        .cards()
     )
+    products = ProductRating.annotate_queryset(products)
 
     if search_query:
-        products = products.filter(
-            Q(product_name__icontains=search_query)
-            | Q(product_desription__icontains=search_query)
-            | Q(product_sku__icontains=search_query)
-        )
+        # 🔍 Полнотекстовый поиск с морфологией и опечатками (вместо icontains)
+        products = search_queryset(products, search_query)
 
     # 📐 Фильтрация по размерам коврика лодки
     if min_length:
@@ -254,6 +240,13 @@ def boat_product_list(request, slug):
         except ValueError:
             pass
 
+    min_rating = request.GET.get("min_rating", "")
+    if min_rating:
+        try:
+            products = products.filter(rating_avg__gte=float(min_rating))
+        except ValueError:
+            pass
+
     sort_options = {
         "name": "product_name",
         "-name": "-product_name",
@@ -261,27 +254,22 @@ def boat_product_list(request, slug):
         "-price": "-price",
         "newest": "-created_at",
         "oldest": "created_at",
+        "rating": ("-rating_avg", "-rating_count"),
+        "popular": ("-rating_count", "-rating_avg"),
     }
-    products = products.order_by(sort_options.get(sort_by, "-created_at"))
-
-    if per_page == "all":
-        total_products = products.count()
-        if total_products > 500:
-            messages.warning(request, f"Показано первые 500 из {total_products} товаров.")
-            per_page_num = 500
-        else:
-            per_page_num = total_products or 1
-    else:
-        try:
-            per_page_num = int(per_page)
-            if per_page_num not in [12, 24, 48, 96]:
-                per_page_num = 12
-        except (ValueError, TypeError):
-            per_page_num = 12
-
-    paginator = Paginator(products, per_page_num)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    sort_fields = sort_options.get(sort_by, "-created_at")
+    if isinstance(sort_fields, str):
+        sort_fields = (sort_fields,)
+    if search_query and "sort" not in request.GET:
+        # 🎯 При поиске без явной сортировки - по релевантности
+        sort_fields = ("-search_rank",)
+    products = products.order_by(*sort_fields)
+
+    # 📄 Классическая или курсорная пагинация (?pagination=cursor)
+    pagination = paginate_catalog(request, products, sort_by, per_page)
+    if pagination["cursor_page"] and request.GET.get("fragment"):
+        # 🧩 Бесконечная прокрутка: только карточки следующей порции
+        return render_cursor_fragment(request, "boats/product_cards.html", pagination["cursor_page"])
 
     categories = (
         BoatCategory.objects.filter(is_active=True)
@@ -297,15 +285,16 @@ def boat_product_list(request, slug):
 
     context = {
         "category": category,
-        "page_obj": page_obj,
-        "products": page_obj.object_list,
+        "page_obj": pagination["page_obj"],
+        "products": pagination["products"],
+        "cursor_page": pagination["cursor_page"],
         "categories": categories,
         "search_query": search_query,
         "sort_by": sort_by,
         "per_page": per_page,
-        "total_products": paginator.count,
-        "current_page": page_obj.number,
-        "total_pages": paginator.num_pages,
+        "total_products": pagination["total_products"],
+        "current_page": pagination["current_page"],
+        "total_pages": pagination["total_pages"],
         # 🛥️ Фильтры размеров
         "min_length": min_length,
         "max_length": max_length,
@@ -334,24 +323,18 @@ def boat_product_detail(request, slug):
     - Анти-спам защита с rate limiting
     """
 
-    product = get_object_or_404(
-        BoatProduct.objects.select_related('category').prefetch_related('images'),
-        slug=slug
-    )
+    # 📸 Снимок страницы из кэша: товар, изображения, отзывы, рейтинг, похожие товары
+    snapshot = get_product_snapshot(BoatProduct, slug)
+    if snapshot is None:
+        raise Http404("Товар не найден")
+    product = snapshot.product
 
     # 🎨 Цвета (используем общие из products)
-    carpet_colors = Color.objects.filter(
-        color_type='carpet',
-        is_available=True
-    ).order_by('display_order')
-
-    border_colors = Color.objects.filter(
-        color_type='border',
-        is_available=True
-    ).order_by('display_order')
+    carpet_colors = registry.get_colors('carpet', available_only=True)
+    border_colors = registry.get_colors('border', available_only=True)
 
-    initial_carpet_color = carpet_colors.first()
-    initial_border_color = border_colors.first()
+    initial_carpet_color = carpet_colors[0] if carpet_colors else None
+    initial_border_color = border_colors[0] if border_colors else None
 
     # 🛒 Проверяем наличие в корзине (для лодок без комплектаций)
     in_cart = False
@@ -369,18 +352,9 @@ def boat_product_detail(request, slug):
 
     # ================== 🔒 ПОЛНАЯ СИСТЕМА ОТЗЫВОВ С МОДЕРАЦИЕЙ ДЛЯ ЛОДОК ==================
 
-    # 👁️ Получаем ТОЛЬКО одобренные отзывы для публичного отображения
-    try:
-        reviews = product.reviews.filter(is_approved=True).order_by('-date_added')
-        has_reviews = product.reviews.filter(is_approved=True).exists()
-    except AttributeError:
-        boat_content_type = ContentType.objects.get_for_model(BoatProduct)
-        reviews = ProductReview.objects.filter(
-            content_type=boat_content_type,
-            object_id=product.uid,
-            is_approved=True
-        ).order_by('-date_added')
-        has_reviews = reviews.exists()
+    # 👁️ Одобренные отзывы (первая страница) - из снимка
+    reviews = snapshot.reviews
+    has_reviews = snapshot.has_reviews
 
     # 📝 Проверяем существующий отзыв пользователя (авторизованного)
     user_existing_review = None
@@ -420,14 +394,17 @@ def boat_product_detail(request, slug):
         # 🛡️ АНТИ-СПАМ: Проверка rate limiting для лодочных отзывов
         client_ip = get_client_ip(request)
 
-        if not check_review_rate_limit(client_ip, request.user):
+        rate_limit_result = rate_limit.hit('review', request)
+        if not rate_limit_result['allowed']:
+            retry_minutes = max(1, rate_limit_result['retry_after'] // 60)
             if request.user.is_authenticated:
                 messages.error(request,
-                               "⚠️ Вы превысили лимит отзывов на лодки. Попробуйте позже (максимум 5 отзывов в час).")
+                               f"⚠️ Вы превысили лимит отзывов (максимум {rate_limit_result['limit']} в час). "
+                               f"Попробуйте через {retry_minutes} мин.")
             else:
                 messages.error(request,
-                               "⚠️ Превышен лимит анонимных отзывов на лодки с вашего IP. "
-                               "Попробуйте позже (максимум 3 отзыва в час).")
+                               f"⚠️ Превышен лимит анонимных отзывов с вашего IP "
+                               f"(максимум {rate_limit_result['limit']} в час). Попробуйте через {retry_minutes} мин.")
             return redirect('boats:product_detail', slug=slug)
 
         if review_form.is_valid():
@@ -506,11 +483,6 @@ def boat_product_detail(request, slug):
             messages.error(request, "❌ Пожалуйста, исправьте ошибки в форме.")
             logger.warning(f"Невалидная форма отзыва для лодки: {review_form.errors}")
 
-    # 🔄 Похожие товары с оптимизацией
-    similar_products = BoatProduct.objects.filter(
-        category=product.category
-    ).exclude(uid=product.uid).select_related('category').prefetch_related('images')[:4]
-
     # ❤️ Проверяем наличие в избранном (только для авторизованных)
     in_wishlist = False
     if request.user.is_authenticated:
@@ -529,7 +501,8 @@ def boat_product_detail(request, slug):
     context = {
         'product': product,
         'reviews': reviews,
-        'similar_products': similar_products,
+        'reviews_count': snapshot.reviews_count,
+        'similar_products': snapshot.similar_products,
 
         # 🛥️ Специфика лодок
         'is_boat_product': True,
@@ -560,7 +533,7 @@ def boat_product_detail(request, slug):
         'user_has_pending_review': user_has_pending_review,
         'form_load_time': time.time(),  # Для анти-спам защиты
         'has_reviews': has_reviews,
-        'rating_percentage': (product.get_rating() / 5) * 100 if has_reviews else 0,
+        'rating_percentage': snapshot.rating_percentage,
 
         # 👤 Информация о пользователе
         'is_anonymous_user': not request.user.is_authenticated,
@@ -585,13 +558,11 @@ def boat_search(request):
             'message': 'Введите запрос для поиска лодочных ковриков'
         })
 
-    # 🔍 Оптимизированный поиск
-    results = BoatProduct.objects.filter(
-        Q(product_name__icontains=query) |
-        Q(product_desription__icontains=query) |
-        Q(product_sku__icontains=query) |
-        Q(category__category_name__icontains=query)
-    ).select_related('category').prefetch_related('images')
+    # 🔍 Полнотекстовый поиск: морфология, опечатки, ранжирование по релевантности
+    results = search_queryset(
+        BoatProduct.objects.cards(),
+        query
+    )
 
     # 📄 Пагинация
     paginator = Paginator(results, 12)
@@ -628,14 +599,18 @@ def boat_add_to_cart(request, uid):
         # Проверяем цвета
         carpet_color = None
         if carpet_color_id:
-            carpet_color = get_object_or_404(Color, uid=carpet_color_id)
+            carpet_color = registry.get_color_by_uid(carpet_color_id)
+            if not carpet_color:
+                raise Http404("Цвет коврика не найден")
             if not carpet_color.is_available:
                 messages.warning(request, f'Цвет коврика "{carpet_color.name}" временно недоступен.')
                 return redirect(request.META.get('HTTP_REFERER'))
 
         border_color = None
         if border_color_id:
-            border_color = get_object_or_404(Color, uid=border_color_id)
+            border_color = registry.get_color_by_uid(border_color_id)
+            if not border_color:
+                raise Http404("Цвет окантовки не найден")
             if not border_color.is_available:
                 messages.warning(request, f'Цвет окантовки "{border_color.name}" временно недоступен.')
                 return redirect(request.META.get('HTTP_REFERER'))
@@ -667,8 +642,8 @@ def boat_add_to_cart(request, uid):
             content_type=boat_content_type,
             object_id=product.uid,
             kit_variant__isnull=True,  # Для лодок всегда None
-            carpet_color=carpet_color,
-            border_color=border_color,
+            carpet_color_id=carpet_color.uid if carpet_color else None,
+            border_color_id=border_color.uid if border_color else None,
             has_podpyatnik=False  # Для лодок всегда False
         ).first()
 
@@ -683,8 +658,8 @@ def boat_add_to_cart(request, uid):
                 content_type=boat_content_type,
                 object_id=product.uid,
                 kit_variant=None,  # Для лодок всегда None
-                carpet_color=carpet_color,
-                border_color=border_color,
+                carpet_color_id=carpet_color.uid if carpet_color else None,
+                border_color_id=border_color.uid if border_color else None,
                 has_podpyatnik=False,  # Для лодок всегда False
                 quantity=quantity
             )
@@ -8,12 +8,16 @@ from django.contrib.contenttypes.models import ContentType
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils import timezone  # ✅ ИСПРАВЛЕНО: Добавлен отсутствующий импорт
-from .models import ProductReview, AdminReply
+from .models import ProductReview, ProductRating, ReviewCounters, AdminReply, SpamTerm, IPRange
 
 
 def approve_reviews(modeladmin, request, queryset):
     """✅ Массовое одобрение отзывов"""
+    # ⭐ queryset.update() не вызывает сигналы - запоминаем товары до обновления
+    rated_objects = ProductRating.get_review_objects(queryset)
     updated = queryset.update(is_approved=True)
+    ProductRating.recalculate_many(rated_objects)
+    ReviewCounters.recalculate()
     modeladmin.message_user(request, f'Одобрено {updated} отзывов.')
 
 
@@ -22,7 +26,10 @@ approve_reviews.short_description = "✅ Одобрить выбранные о
 
 def reject_reviews(modeladmin, request, queryset):
     """❌ Массовое отклонение отзывов"""
+    rated_objects = ProductRating.get_review_objects(queryset)
     updated = queryset.update(is_approved=False)
+    ProductRating.recalculate_many(rated_objects)
+    ReviewCounters.recalculate()
     modeladmin.message_user(request, f'Отклонено {updated} отзывов.')
 
 
@@ -205,6 +212,16 @@ class ProductReviewAdmin(admin.ModelAdmin):
         """🗑️ Разрешить удаление проблемных отзывов"""
         return True
 
+    def changelist_view(self, request, extra_context=None):
+        """📊 Бейдж очереди модерации в заголовке списка (строка ReviewCounters, без COUNT по отзывам)"""
+        stats = ReviewCounters.get_stats()
+        extra_context = {
+            'title': f"Отзывы: ⏳ на модерации {stats['pending']}, 🚨 подозрительных {stats['suspicious']}",
+            'moderation_stats': stats,
+            **(extra_context or {}),
+        }
+        return super().changelist_view(request, extra_context=extra_context)
+
 
 
     def has_change_permission(self, request, obj=None):
@@ -308,6 +325,46 @@ class AdminReplyAdmin(admin.ModelAdmin):
     get_review_link.short_description = "Ссылка на отзыв"
 
 
+
+@admin.register(SpamTerm)
+class SpamTermAdmin(admin.ModelAdmin):
+    """🚫 Админка словаря спам-слов (дополняет SPAM_DETECTION['SPAM_WORDS'] из настроек)"""
+
+    list_display = ('term', 'weight', 'is_active', 'updated_at')
+    list_editable = ('weight', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('term',)
+    ordering = ('term',)
+
+    fieldsets = (
+        ('🚫 Спам-слово', {
+            'fields': ('term', 'weight', 'is_active'),
+            'description': 'Звездочка в конце (кредит*) - совпадение по основе слова: кредиты, кредитов. '
+                           'Изменения применяются к проверке отзывов в течение минуты.'
+        }),
+    )
+
+
+
+@admin.register(IPRange)
+class IPRangeAdmin(admin.ModelAdmin):
+    """🌐 Админка диапазонов IP (блокировка и репутация отзывов)"""
+
+    list_display = ('network', 'category', 'weight', 'is_active', 'note', 'updated_at')
+    list_editable = ('category', 'weight', 'is_active')
+    list_filter = ('category', 'is_active')
+    search_fields = ('network', 'note')
+    ordering = ('category', 'network')
+
+    fieldsets = (
+        ('🌐 Диапазон', {
+            'fields': ('network', 'category', 'weight', 'is_active', 'note'),
+            'description': 'Адрес (203.0.113.7) или сеть CIDR (203.0.113.0/24, 2001:db8::/32). '
+                           'Большие списки удобнее подключать файлом через settings.IP_REPUTATION["FILES"].'
+        }),
+    )
+
+
 # 🔧 КЛЮЧЕВЫЕ ИЗМЕНЕНИЯ В ЭТОМ ФАЙЛЕ:
 #
 # ✅ ИСПРАВЛЕНО:
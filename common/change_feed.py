@@ -0,0 +1,281 @@
+# 📁 common/change_feed.py
+# 🔄 Инкрементальная лента изменений каталога для партнеров и синхронизации с 1С
+# 📋 Категории, товары (авто и лодки) и комплектации с updated_at после водяной отметки + надгробия удаленных
+# 🔑 Страницы - по курсору (updated_at, uid) каждой сущности; курсоры упакованы в подписанный токен продолжения
+#
+# Цены входят в записи товаров (price) и комплектаций (price_modifier): любое
+# изменение цены сдвигает updated_at и попадает в следующую страницу ленты.
+# Записи младше CHANGE_FEED_SAFETY_LAG секунд не отдаются: транзакция, начатая
+# раньше, могла еще не зафиксироваться, и курсор перескочил бы ее строки.
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# ⏱️ Отставание верхней границы ленты от текущего момента (секунды)
+SAFETY_LAG = getattr(settings, 'CHANGE_FEED_SAFETY_LAG', 60)
+
+# 📦 Размер страницы по умолчанию и максимум
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+
+TOKEN_SALT = 'common.change_feed'
+TOKEN_VERSION = 1
+
+# 📋 Сущности ленты в порядке выдачи: тип → (модель, поле внешнего ключа, поля данных)
+FEED_ENTITIES = {
+    'category': (
+        'products.Category', 'category_sku',
+        ['category_name', 'category_sku', 'slug', 'is_active', 'display_order', 'page_title', 'meta_description'],
+    ),
+    'boat_category': (
+        'boats.BoatCategory', 'slug',
+        ['category_name', 'slug', 'is_active', 'display_order', 'page_title', 'meta_description'],
+    ),
+    'product': (
+        'products.Product', 'product_sku',
+        ['product_sku', 'product_name', 'slug', 'price', 'category_id', 'newest_product',
+         'page_title', 'meta_description'],
+    ),
+    'boat_product': (
+        'boats.BoatProduct', 'product_sku',
+        ['product_sku', 'product_name', 'slug', 'price', 'category_id', 'newest_product',
+         'boat_mat_length', 'boat_mat_width', 'page_title', 'meta_description'],
+    ),
+    'kit_variant': (
+        'products.KitVariant', 'code',
+        ['code', 'name', 'price_modifier', 'is_option', 'order'],
+    ),
+}
+
+# 🪦 Курсор журнала удалений в токене
+DELETED_STREAM = 'deleted'
+
+# 📄 Колонки CSV (data - остальные поля записи в JSON)
+CSV_COLUMNS = ['type', 'op', 'uid', 'changed_at', 'key', 'name', 'price', 'category_id', 'data']
+
+
+class ChangeFeedError(ValueError):
+    """❌ Неверная водяная отметка или токен продолжения"""
+
+
+# ==================== ТОКЕН ====================
+
+def encode_token(cursors: Dict[str, List]) -> str:
+    """🔑 Подписанный токен с курсорами потоков [updated_at ISO, uid]"""
+    return signing.dumps({'v': TOKEN_VERSION, 'c': cursors}, salt=TOKEN_SALT, compress=True)
+
+
+def decode_token(token: str) -> Dict[str, List]:
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        raise ChangeFeedError("Неверный токен продолжения")
+    if payload.get('v') != TOKEN_VERSION:
+        raise ChangeFeedError("Устаревший формат токена продолжения")
+    return payload['c']
+
+
+def parse_since(value: str) -> datetime:
+    """📅 Водяная отметка ISO 8601 (без зоны - в текущей зоне сайта)"""
+    parsed = parse_datetime(value or '')
+    if parsed is None:
+        raise ChangeFeedError(f"Неверная дата: {value!r} (ожидается ISO 8601, например 2026-01-31T12:00:00+03:00)")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def initial_cursors(since: datetime) -> Dict[str, List]:
+    """🏁 Курсоры всех потоков на водяной отметке (включительно: повтор записи безопасен, пропуск - нет)"""
+    start = [(since - timedelta(microseconds=1)).isoformat(), None]
+    return {stream: list(start) for stream in [*FEED_ENTITIES, DELETED_STREAM]}
+
+
+# ==================== ЧТЕНИЕ ====================
+
+def _after_cursor(field: str, cursor: Optional[List]) -> Q:
+    """🔍 Строки строго после курсора (field, uid)"""
+    if not cursor:
+        return Q()
+    moment = parse_datetime(cursor[0])
+    if cursor[1] is None:
+        return Q(**{f'{field}__gt': moment})
+    return Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'uid__gt': cursor[1]})
+
+
+def _entity_rows(entity: str, cursor, until, limit: int) -> List[Dict]:
+    model_label, key_field, fields = FEED_ENTITIES[entity]
+    model = apps.get_model(model_label)
+    values = (
+        model._default_manager.filter(_after_cursor('updated_at', cursor), updated_at__lte=until)
+        .order_by('updated_at', 'uid')
+        .values('uid', 'updated_at', *fields)[:limit]
+    )
+    rows = []
+    for item in values:
+        rows.append({
+            'type': entity,
+            'op': 'upsert',
+            'uid': str(item['uid']),
+            'changed_at': item['updated_at'].isoformat(),
+            'key': str(item[key_field] or ''),
+            'data': {field: _plain(item[field]) for field in fields},
+        })
+    return rows
+
+
+def _deleted_rows(cursor, until, limit: int) -> List[Dict]:
+    from .models import DeletionLog
+
+    content_types = ContentType.objects.get_for_models(
+        *[apps.get_model(model_label) for model_label, _, _ in FEED_ENTITIES.values()]
+    )
+    entity_by_type = {
+        content_types[apps.get_model(model_label)].pk: entity
+        for entity, (model_label, _, _) in FEED_ENTITIES.items()
+    }
+    values = (
+        DeletionLog.objects.filter(
+            _after_cursor('created_at', cursor), created_at__lte=until, content_type_id__in=list(entity_by_type)
+        )
+        .order_by('created_at', 'uid')
+        .values('uid', 'created_at', 'content_type_id', 'object_id', 'object_key')[:limit]
+    )
+    return [
+        {
+            'type': entity_by_type[item['content_type_id']],
+            'op': 'delete',
+            'uid': str(item['object_id']),
+            'changed_at': item['created_at'].isoformat(),
+            'key': item['object_key'],
+            'data': {},
+            '_cursor': [item['created_at'].isoformat(), str(item['uid'])],
+        }
+        for item in values
+    ]
+
+
+def _plain(value):
+    """📦 Значение, пригодное для JSON"""
+    if hasattr(value, 'hex') and not isinstance(value, (bytes, str)):
+        return str(value)
+    if isinstance(value, (int, float, str, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def read_changes(token: Optional[str] = None, since: Optional[datetime] = None,
+                 limit: int = DEFAULT_LIMIT) -> Tuple[List[Dict], str, bool]:
+    """
+    🔄 Страница ленты изменений
+
+    Args:
+        token: Токен продолжения из предыдущего ответа
+        since: Водяная отметка для первого запроса (если токена нет)
+        limit: Максимум записей на странице
+
+    Returns:
+        Tuple: (записи, токен следующего запроса, есть ли еще записи)
+    """
+    if token:
+        cursors = decode_token(token)
+    elif since is not None:
+        cursors = initial_cursors(since)
+    else:
+        raise ChangeFeedError("Нужна водяная отметка since или токен продолжения")
+
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    until = timezone.now() - timedelta(seconds=SAFETY_LAG)
+    rows, has_more = [], False
+
+    for stream in [*FEED_ENTITIES, DELETED_STREAM]:
+        remaining = limit - len(rows)
+        if remaining <= 0:
+            has_more = True
+            break
+        cursor = cursors.get(stream)
+        if stream == DELETED_STREAM:
+            page = _deleted_rows(cursor, until, remaining)
+            if page:
+                cursors[stream] = page[-1].pop('_cursor')
+                for row in page[:-1]:
+                    row.pop('_cursor')
+        else:
+            page = _entity_rows(stream, cursor, until, remaining)
+            if page:
+                cursors[stream] = [page[-1]['changed_at'], page[-1]['uid']]
+        rows.extend(page)
+        if len(page) == remaining:
+            has_more = True
+
+    return rows, encode_token(cursors), has_more
+
+
+def iter_all_changes(token: Optional[str] = None, since: Optional[datetime] = None,
+                     limit: int = DEFAULT_LIMIT) -> Iterator[Tuple[List[Dict], str]]:
+    """🔁 Все страницы подряд до конца ленты: (записи, токен после страницы)"""
+    while True:
+        rows, token, has_more = read_changes(token=token, since=since, limit=limit)
+        yield rows, token
+        if not has_more:
+            break
+
+
+# ==================== ФОРМАТЫ ====================
+
+def to_jsonl(rows: Iterable[Dict]) -> str:
+    return ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+
+def to_csv(rows: Iterable[Dict], header: bool = True) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        data = dict(row['data'])
+        name = data.pop('product_name', None) or data.pop('category_name', None) or data.pop('name', '')
+        writer.writerow([
+            row['type'], row['op'], row['uid'], row['changed_at'], row['key'], name or '',
+            data.pop('price', data.pop('price_modifier', '')), data.pop('category_id', ''),
+            json.dumps(data, ensure_ascii=False) if data else '',
+        ])
+    return buffer.getvalue()
+
+
+# ==================== ЖУРНАЛ УДАЛЕНИЙ ====================
+
+# 🏷️ Модель → поле внешнего ключа надгробия
+TOMBSTONE_KEYS = {model_label: key_field for model_label, key_field, _ in FEED_ENTITIES.values()}
+
+
+def record_deletion(instance):
+    """🪦 Надгробие удаленного объекта (вызывается сигналом post_delete)"""
+    from .models import DeletionLog
+
+    key_field = TOMBSTONE_KEYS.get(instance._meta.label)
+    DeletionLog.objects.create(
+        content_type=ContentType.objects.get_for_model(type(instance)),
+        object_id=instance.pk,
+        object_key=str(getattr(instance, key_field, '') or '')[:255] if key_field else '',
+    )
+
+
+def purge_tombstones(older_than_days: int) -> int:
+    """🧹 Удаляет надгробия старше N дней (подписчики должны опрашивать ленту чаще)"""
+    from .models import DeletionLog
+
+    threshold = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = DeletionLog.objects.filter(created_at__lt=threshold).delete()
+    return deleted
@@ -0,0 +1,336 @@
+# 📁 common/image_derivatives.py
+# 🖼️ Адаптивные производные изображений: несколько ширин в WebP (и AVIF, если умеет Pillow)
+# 📂 Файлы лежат рядом с оригиналом: product/_derivatives/<имя>/<ширина>.<формат> + manifest.json
+# ⚙️ Массово - в пуле процессов (generate_image_derivatives), точечно - в фоне после загрузки
+# 🏷️ В шаблонах: {% load image_tags %}{% responsive_image product.main_image product.product_name %}
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# 📏 Ширины производных (px) и качество сжатия
+DERIVATIVE_WIDTHS = tuple(sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (320, 640, 960, 1280))))
+DERIVATIVE_QUALITY = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+
+# ⚡ Генерировать производные сразу после загрузки (в фоновом потоке)
+DERIVATIVES_ON_UPLOAD = getattr(settings, 'IMAGE_DERIVATIVES_ON_UPLOAD', True)
+
+DERIVATIVES_DIR = '_derivatives'
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# ⏱️ Сколько держать манифест в кэше (отсутствие манифеста - меньше)
+MANIFEST_CACHE_TIMEOUT = 60 * 60
+MISSING_MANIFEST_TIMEOUT = 60 * 5
+
+# 📋 Источники изображений: ключ → [(модель, поле)]
+IMAGE_SOURCES = {
+    'product': [('products.ProductImage', 'image')],
+    'boat': [('boats.BoatProductImage', 'image')],
+    'category': [('products.Category', 'category_image'), ('boats.BoatCategory', 'category_image')],
+    'blog': [('blog.Article', 'featured_image'), ('blog.Category', 'image')],
+}
+
+# 🎞️ Расширения и параметры сохранения форматов
+FORMAT_OPTIONS = {
+    'avif': ('AVIF', {'speed': 6}),
+    'webp': ('WEBP', {'method': 4}),
+}
+
+
+def avif_supported() -> bool:
+    """✅ Умеет ли установленный Pillow кодировать AVIF"""
+    try:
+        from PIL import features
+        return bool(features.check('avif'))
+    except Exception:
+        return False
+
+
+def get_formats() -> List[str]:
+    """🎞️ Форматы производных в порядке предпочтения для <picture>"""
+    return ['avif', 'webp'] if avif_supported() else ['webp']
+
+
+# ==================== ПУТИ ====================
+
+def derivatives_dir(name: str) -> str:
+    """📂 Каталог производных для файла (относительно MEDIA_ROOT)"""
+    folder, basename = os.path.split(name)
+    return '/'.join(part for part in (folder, DERIVATIVES_DIR, basename) if part)
+
+
+def is_derivative(name: str) -> bool:
+    return f'/{DERIVATIVES_DIR}/' in f'/{name}'
+
+
+def _manifest_cache_key(name: str) -> str:
+    return 'image_manifest:' + hashlib.md5(name.encode('utf-8')).hexdigest()
+
+
+# ==================== ГЕНЕРАЦИЯ (выполняется в дочерних процессах) ====================
+
+def _atomic_write(path: str, writer):
+    """💾 Запись через временный файл в той же папке + os.replace"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            writer(temp_file)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _read_manifest(path: str) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _target_widths(width: int, widths: Iterable[int]) -> List[int]:
+    """📏 Ширины без увеличения: все меньшие оригинала плюс сам оригинал, если он не шире максимума"""
+    widths = sorted(set(widths))
+    targets = [target for target in widths if target < width]
+    if width <= widths[-1]:
+        targets.append(width)
+    return targets
+
+
+def render_derivatives(media_root: str, name: str, widths: Tuple[int, ...], formats: Tuple[str, ...],
+                       quality: int, force: bool = False) -> Tuple[str, str, Optional[Dict]]:
+    """
+    🏭 Строит производные одного изображения (без обращений к БД - годится для пула процессов)
+
+    Returns:
+        Tuple: (имя, статус 'created'/'skipped'/'missing'/'error', манифест или None)
+    """
+    from PIL import Image, ImageOps
+
+    source_path = os.path.join(media_root, name)
+    try:
+        stat = os.stat(source_path)
+    except OSError:
+        return name, 'missing', None
+
+    target_dir = os.path.join(media_root, derivatives_dir(name))
+    manifest_path = os.path.join(target_dir, MANIFEST_NAME)
+
+    # ♻️ Производные того же файла сохраняются: запрошенные ширины и форматы добавляются к ним,
+    #    а не заменяют (иначе частичный запуск заставил бы следующий полный перестроить все)
+    existing = {}
+    if not force:
+        manifest = _read_manifest(manifest_path)
+        if (manifest and manifest.get('version') == MANIFEST_VERSION
+                and manifest.get('size') == stat.st_size and manifest.get('mtime') == int(stat.st_mtime)):
+            built_widths = set(manifest.get('widths', []))
+            if set(widths) <= built_widths and set(formats) <= set(manifest.get('variants', {})):
+                return name, 'skipped', manifest
+            widths = tuple(sorted(built_widths | set(widths)))
+            for fmt, entries in manifest.get('variants', {}).items():
+                for target_width, variant_name in entries:
+                    if os.path.exists(os.path.join(media_root, variant_name)):
+                        existing[(fmt, target_width)] = variant_name
+
+    all_formats = tuple(dict.fromkeys([*formats, *(fmt for fmt, _ in existing)]))
+
+    try:
+        with Image.open(source_path) as original:
+            image = ImageOps.exif_transpose(original)
+            has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+            width, height = image.size
+
+            variants = {fmt: [] for fmt in all_formats}
+            for target_width in _target_widths(width, widths):
+                resized = None
+                for fmt in all_formats:
+                    if (fmt, target_width) in existing:
+                        variants[fmt].append([target_width, existing[(fmt, target_width)]])
+                        continue
+                    if fmt not in formats:
+                        continue
+                    if resized is None:
+                        target_height = max(1, round(height * target_width / width))
+                        resized = image if target_width == width else image.resize(
+                            (target_width, target_height), Image.LANCZOS
+                        )
+                    pil_format, options = FORMAT_OPTIONS[fmt]
+                    variant_name = f"{derivatives_dir(name)}/{target_width}.{fmt}"
+                    _atomic_write(
+                        os.path.join(media_root, variant_name),
+                        lambda handle: resized.save(handle, pil_format, quality=quality, **options),
+                    )
+                    variants[fmt].append([target_width, variant_name])
+    except Exception as e:
+        return name, 'error', {'error': str(e)}
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'source': name,
+        'size': stat.st_size,
+        'mtime': int(stat.st_mtime),
+        'width': width,
+        'height': height,
+        'widths': list(widths),
+        'variants': variants,
+    }
+    _atomic_write(manifest_path, lambda handle: handle.write(json.dumps(manifest).encode('utf-8')))
+    return name, 'created', manifest
+
+
+# ==================== ЗАПУСК ====================
+
+def iter_source_names(sources: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    📋 Имена файлов изображений из БД (без повторов)
+
+    Args:
+        sources: Ключи IMAGE_SOURCES (по умолчанию - все)
+    """
+    names = set()
+    for key in sources or IMAGE_SOURCES:
+        for model_label, field_name in IMAGE_SOURCES[key]:
+            try:
+                model = apps.get_model(model_label)
+            except LookupError:
+                continue
+            values = model._default_manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            names.update(values.order_by().values_list(field_name, flat=True).distinct().iterator())
+    return sorted(name for name in names if name and not is_derivative(name))
+
+
+def generate_derivatives(names: Iterable[str], workers: Optional[int] = None, force: bool = False,
+                         widths: Optional[Iterable[int]] = None, stdout=None) -> Dict[str, int]:
+    """
+    🏭 Генерирует производные для списка файлов
+
+    Args:
+        names: Имена файлов относительно MEDIA_ROOT
+        workers: Число процессов (по умолчанию - число ядер; 1 - без пула)
+        force: Перестроить даже актуальные производные
+        widths: Ширины вместо DERIVATIVE_WIDTHS (добавляются к уже построенным производным файла)
+
+    Returns:
+        Dict: Счетчики created / skipped / missing / errors
+    """
+    names = [name for name in dict.fromkeys(names) if name and not is_derivative(name)]
+    widths = tuple(sorted(set(widths or DERIVATIVE_WIDTHS)))
+    formats = tuple(get_formats())
+    stats = {'created': 0, 'skipped': 0, 'missing': 0, 'errors': 0}
+    if not names:
+        return stats
+
+    render = partial(render_derivatives, str(settings.MEDIA_ROOT),
+                     widths=widths, formats=formats, quality=DERIVATIVE_QUALITY, force=force)
+    workers = workers or os.cpu_count() or 1
+
+    def handle(result):
+        name, status, manifest = result
+        if status == 'error':
+            stats['errors'] += 1
+            logger.warning(f"⚠️ Не удалось построить производные {name}: {manifest.get('error')}")
+            return
+        stats['missing' if status == 'missing' else status] += 1
+        cache.set(_manifest_cache_key(name), manifest or {},
+                  MANIFEST_CACHE_TIMEOUT if manifest else MISSING_MANIFEST_TIMEOUT)
+        if stdout is not None and status == 'created':
+            stdout.write(f"🖼️ {name}")
+
+    if workers <= 1 or len(names) == 1:
+        for name in names:
+            handle(render(name))
+    else:
+        # 🧵 spawn, а не fork: процесс веб-сервера может держать блокировки в других потоках
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(names)), mp_context=context) as executor:
+            for result in executor.map(render, names, chunksize=8):
+                handle(result)
+
+    logger.info(
+        f"🖼️ Производные изображений: создано {stats['created']}, актуальны {stats['skipped']}, "
+        f"нет файла {stats['missing']}, ошибок {stats['errors']}"
+    )
+    return stats
+
+
+_background_executor = None
+
+
+def _get_background_executor() -> ThreadPoolExecutor:
+    global _background_executor
+    if _background_executor is None:
+        _background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-derivatives')
+    return _background_executor
+
+
+def schedule_derivatives(names: Iterable[str]):
+    """
+    ⏳ Точечная генерация после загрузки или импорта
+
+    Запускается после COMMIT в фоновом потоке: Pillow отпускает GIL на
+    масштабировании и кодировании, ответ админки не ждет конвертации.
+    """
+    names = [name for name in names if name]
+    if not names or not DERIVATIVES_ON_UPLOAD:
+        return
+
+    def report(future):
+        if future.exception() is not None:
+            logger.error(f"❌ Ошибка генерации производных: {future.exception()}")
+
+    def submit():
+        _get_background_executor().submit(generate_derivatives, names, 1).add_done_callback(report)
+
+    transaction.on_commit(submit)
+
+
+def prune_derivatives() -> int:
+    """🧹 Удаляет производные, оригиналы которых больше не существуют"""
+    import shutil
+
+    media_root = str(settings.MEDIA_ROOT)
+    removed = 0
+    for root, dirs, _ in os.walk(media_root):
+        if os.path.basename(root) != DERIVATIVES_DIR:
+            continue
+        source_dir = os.path.dirname(root)
+        for basename in list(dirs):
+            if not os.path.exists(os.path.join(source_dir, basename)):
+                shutil.rmtree(os.path.join(root, basename), ignore_errors=True)
+                removed += 1
+        dirs[:] = []
+    return removed
+
+
+# ==================== ЧТЕНИЕ ====================
+
+def get_manifest(name: str) -> Optional[Dict]:
+    """📋 Манифест производных (из кэша, иначе с диска)"""
+    if not name or is_derivative(name):
+        return None
+    key = _manifest_cache_key(name)
+    manifest = cache.get(key)
+    if manifest is None:
+        path = os.path.join(str(settings.MEDIA_ROOT), derivatives_dir(name), MANIFEST_NAME)
+        manifest = _read_manifest(path) or {}
+        cache.set(key, manifest, MANIFEST_CACHE_TIMEOUT if manifest else MISSING_MANIFEST_TIMEOUT)
+    return manifest or None
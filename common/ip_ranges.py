@@ -0,0 +1,323 @@
+# 📁 common/ip_ranges.py
+# 🌐 Сопоставление IP с диапазонами блокировки и репутации: сжатое префиксное дерево (Patricia) для IPv4 и IPv6
+# 📋 Источники: SPAM_DETECTION['BLOCKED_IPS'/'BLOCKED_IP_RANGES'], settings.IP_REPUTATION (RANGES, FILES), админка (IPRange)
+# ⚡ Поиск - спуск по дереву не глубже длины префикса, время не зависит от числа диапазонов
+# 🔄 Дерево пересобирается, когда меняется источник: настройки, mtime/размер файлов или таблица IPRange
+#
+# Поиск возвращает все диапазоны на пути от общего к частному: адрес из /32 в
+# блок-листе внутри /16 хостинга получает обе записи. IPv4-адреса вида
+# ::ffff:a.b.c.d проверяются по IPv4-дереву.
+
+import hashlib
+import ipaddress
+import logging
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+# ⚖️ Вес категории по умолчанию (баллы репутации в analyze_ip_reputation)
+CATEGORY_WEIGHTS = {
+    'blocked': 100.0,
+    'tor': 30.0,
+    'proxy': 25.0,
+    'vpn': 20.0,
+    'hosting': 15.0,
+    'private': 10.0,
+    'other': 10.0,
+}
+BLOCKED_CATEGORY = 'blocked'
+
+# 🏠 Встроенные диапазоны (раньше - список suspicious_ranges в analyze_ip_reputation)
+BUILTIN_RANGES = [
+    ('10.0.0.0/8', 'private'),
+    ('172.16.0.0/12', 'private'),
+    ('192.168.0.0/16', 'private'),
+]
+
+VERSION_CACHE_KEY = 'ip_ranges:db_version'
+
+_LINE_SPLIT_RE = re.compile(r'[\s,;]+')
+
+
+def get_config() -> Dict:
+    """⚙️ settings.IP_REPUTATION: RANGES (список словарей), FILES (пути или словари), REFRESH_INTERVAL"""
+    config = getattr(settings, 'IP_REPUTATION', {})
+    return {
+        'RANGES': config.get('RANGES', []),
+        'FILES': config.get('FILES', []),
+        'REFRESH_INTERVAL': config.get('REFRESH_INTERVAL', 60),
+    }
+
+
+# ==================== ДЕРЕВО ====================
+
+class _Node:
+    __slots__ = ('prefix', 'length', 'children', 'entries')
+
+    def __init__(self, prefix: int, length: int, entries: Optional[List[Dict]] = None):
+        self.prefix = prefix
+        self.length = length
+        self.children = [None, None]
+        self.entries = entries or []
+
+
+class PrefixTrie:
+    """
+    🌳 Сжатое двоичное префиксное дерево одного семейства адресов
+
+    Узлы хранят только точки ветвления и сами префиксы, поэтому узлов не
+    больше 2N, а спуск ограничен длиной самого длинного подходящего префикса.
+    """
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self.root = _Node(0, 0)
+        self.size = 0
+
+    def _bit(self, value: int, position: int) -> int:
+        """Бит номер position, считая от старшего"""
+        return (value >> (self.bits - position - 1)) & 1
+
+    def _mask(self, value: int, length: int) -> int:
+        if length == 0:
+            return 0
+        shift = self.bits - length
+        return (value >> shift) << shift
+
+    def insert(self, prefix: int, length: int, entry: Dict):
+        prefix = self._mask(prefix, length)
+        self.size += 1
+        node = self.root
+        while True:
+            if node.length == length:
+                node.entries.append(entry)
+                return
+            bit = self._bit(prefix, node.length)
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = _Node(prefix, length, [entry])
+                return
+
+            common = min(length, child.length, self.bits - (prefix ^ child.prefix).bit_length())
+            if common == child.length:
+                node = child
+                continue
+
+            # ✂️ Расщепляем ребро: новый узел на общем префиксе
+            if common == length:
+                middle = _Node(prefix, length, [entry])
+            else:
+                middle = _Node(self._mask(prefix, common), common)
+                middle.children[self._bit(prefix, common)] = _Node(prefix, length, [entry])
+            middle.children[self._bit(child.prefix, common)] = child
+            node.children[bit] = middle
+            return
+
+    def lookup(self, address: int) -> List[Dict]:
+        """🔍 Все записи префиксов, содержащих адрес (от общего к частному)"""
+        matches = []
+        node = self.root
+        bits = self.bits
+        while node is not None:
+            if node.length and (address ^ node.prefix) >> (bits - node.length):
+                break
+            if node.entries:
+                matches.extend(node.entries)
+            if node.length == bits:
+                break
+            node = node.children[(address >> (bits - node.length - 1)) & 1]
+        return matches
+
+
+class IPMatcher:
+    """🌐 Скомпилированные диапазоны IPv4 + IPv6"""
+
+    def __init__(self, entries: Iterable[Dict], version: str = ''):
+        self.version = version
+        self.tries = {4: PrefixTrie(32), 6: PrefixTrie(128)}
+        self.invalid = 0
+        for entry in entries:
+            try:
+                network = ipaddress.ip_network(entry['network'].strip(), strict=False)
+            except (ValueError, AttributeError):
+                self.invalid += 1
+                continue
+            entry['network'] = str(network)
+            self.tries[network.version].insert(int(network.network_address), network.prefixlen, entry)
+
+    def __len__(self):
+        return self.tries[4].size + self.tries[6].size
+
+    def lookup(self, ip) -> List[Dict]:
+        """
+        🔍 Диапазоны, содержащие адрес
+
+        Raises:
+            ValueError: Некорректный адрес
+        """
+        if not isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+            ip = ipaddress.ip_address(str(ip).strip())
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        return self.tries[ip.version].lookup(int(ip))
+
+    def match(self, ip) -> Optional[Dict]:
+        """🎯 Самый узкий диапазон, содержащий адрес"""
+        matches = self.lookup(ip)
+        return matches[-1] if matches else None
+
+
+# ==================== ИСТОЧНИКИ ====================
+
+def _entry(network: str, category: str, weight=None, source: str = 'settings') -> Dict:
+    category = category if category in CATEGORY_WEIGHTS else 'other'
+    return {
+        'network': str(network),
+        'category': category,
+        'weight': float(weight) if weight not in (None, '') else CATEGORY_WEIGHTS[category],
+        'source': source,
+    }
+
+
+def _settings_entries() -> List[Dict]:
+    from .utils import get_spam_config
+
+    spam_config = get_spam_config()
+    entries = [_entry(network, category, source='builtin') for network, category in BUILTIN_RANGES]
+    for network in [*spam_config.get('BLOCKED_IPS', []), *spam_config.get('BLOCKED_IP_RANGES', [])]:
+        entries.append(_entry(network, BLOCKED_CATEGORY))
+    for item in get_config()['RANGES']:
+        entries.append(_entry(item['network'], item.get('category', 'other'), item.get('weight')))
+    return entries
+
+
+def _file_specs() -> List[Dict]:
+    specs = []
+    for item in get_config()['FILES']:
+        spec = {'path': str(item)} if not isinstance(item, dict) else {**item, 'path': str(item['path'])}
+        specs.append(spec)
+    return specs
+
+
+def _file_signature(specs: List[Dict]) -> str:
+    """🔑 mtime и размер файлов-списков (отсутствующий файл - пустая подпись)"""
+    parts = []
+    for spec in specs:
+        try:
+            stat = os.stat(spec['path'])
+            parts.append(f"{spec['path']}:{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            parts.append(f"{spec['path']}:-")
+    return '|'.join(parts)
+
+
+def _file_entries(specs: List[Dict]) -> List[Dict]:
+    """
+    📄 Диапазоны из файлов: строка «CIDR [категория] [вес]», # - комментарий
+
+    Категория и вес строки важнее значений из описания файла в настройках.
+    """
+    entries = []
+    for spec in specs:
+        try:
+            with open(spec['path'], 'r', encoding='utf-8') as source:
+                for line in source:
+                    line = line.split('#', 1)[0].strip()
+                    if not line:
+                        continue
+                    parts = _LINE_SPLIT_RE.split(line)
+                    category = parts[1] if len(parts) > 1 else spec.get('category', BLOCKED_CATEGORY)
+                    weight = parts[2] if len(parts) > 2 else spec.get('weight')
+                    try:
+                        entries.append(_entry(parts[0], category, weight, source=os.path.basename(spec['path'])))
+                    except ValueError:
+                        continue
+        except OSError as e:
+            logger.warning(f"⚠️ Список диапазонов IP недоступен: {spec['path']}: {e}")
+    return entries
+
+
+def _db_version() -> str:
+    """🔑 Версия таблицы IPRange: число и последний updated_at (кэшируется на REFRESH_INTERVAL)"""
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is not None:
+        return version
+
+    from django.db.models import Count, Max
+    from .models import IPRange
+
+    try:
+        stats = IPRange.objects.aggregate(count=Count('pk'), last=Max('updated_at'))
+    except DatabaseError as e:
+        logger.warning(f"⚠️ Диапазоны IP из админки недоступны: {e}")
+        return 'unavailable'
+    version = f"{stats['count']}|{stats['last'].isoformat() if stats['last'] else ''}"
+    cache.set(VERSION_CACHE_KEY, version, get_config()['REFRESH_INTERVAL'])
+    return version
+
+
+def _db_entries() -> List[Dict]:
+    from .models import IPRange
+
+    try:
+        rows = IPRange.objects.filter(is_active=True).values_list('network', 'category', 'weight')
+        return [_entry(network, category, weight, source='admin') for network, category, weight in rows]
+    except DatabaseError:
+        return []
+
+
+# ==================== КЭШ ====================
+
+_state: Dict = {}
+
+
+def get_matcher() -> IPMatcher:
+    """
+    🌐 Дерево текущей версии источников
+
+    Версия сверяется не чаще раза в REFRESH_INTERVAL секунд - между сверками
+    поиск не делает ни обращений к кэшу, ни stat файлов.
+    """
+    now = time.monotonic()
+    if _state.get('matcher') is not None and now < _state.get('next_check', 0):
+        return _state['matcher']
+
+    settings_entries = _settings_entries()
+    specs = _file_specs()
+    version = hashlib.sha1(
+        f"{settings_entries!r}|{_file_signature(specs)}|{_db_version()}".encode('utf-8')
+    ).hexdigest()[:16]
+
+    if _state.get('version') != version:
+        started = time.monotonic()
+        matcher = IPMatcher(settings_entries + _file_entries(specs) + _db_entries(), version=version)
+        _state.update(matcher=matcher, version=version)
+        logger.info(
+            f"🌐 Диапазоны IP скомпилированы: {len(matcher)} (некорректных {matcher.invalid}) "
+            f"за {time.monotonic() - started:.2f} с"
+        )
+    _state['next_check'] = now + get_config()['REFRESH_INTERVAL']
+    return _state['matcher']
+
+
+def invalidate():
+    """🔄 Пересобрать дерево при следующем поиске (сигналы IPRange)"""
+    cache.delete(VERSION_CACHE_KEY)
+    _state['next_check'] = 0
+
+
+def lookup(ip) -> List[Dict]:
+    """🔍 Диапазоны, содержащие адрес (ValueError для некорректного адреса)"""
+    return get_matcher().lookup(ip)
+
+
+def is_blocked(ip) -> bool:
+    """🚫 Адрес входит в диапазон категории blocked"""
+    return any(entry['category'] == BLOCKED_CATEGORY for entry in lookup(ip))
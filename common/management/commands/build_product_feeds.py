@@ -0,0 +1,53 @@
+# 📁 common/management/commands/build_product_feeds.py
+# 🛒 Django команда инкрементальной сборки фидов маркетплейсов (common/product_feeds.py)
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common import product_feeds
+
+
+class Command(BaseCommand):
+    """
+    🛒 Собирает gzip-снимки фидов Яндекс YML и Google Merchant
+
+    Перерисовываются только предложения, у которых изменился товар, его
+    главное фото или категория. Если не изменилось ничего, снимок не
+    переписывается - ETag фида остается прежним и маркетплейс получает 304.
+
+    Использование:
+    python manage.py build_product_feeds                 # 🔄 Все фиды (cron, каждые несколько минут)
+    python manage.py build_product_feeds --feed yml      # 🎯 Только YML
+    python manage.py build_product_feeds --force         # 🔁 Перерисовать все предложения
+    """
+
+    help = '🛒 Инкрементально собирает фиды товаров для маркетплейсов (YML, Google Merchant)'
+
+    def add_arguments(self, parser):
+        """➕ Добавляем опции командной строки"""
+        parser.add_argument(
+            '--feed',
+            action='append',
+            choices=list(product_feeds.FEED_FORMATS),
+            help='🎯 Фид для сборки (можно повторять; по умолчанию все)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='🔁 Игнорировать фрагменты прошлой сборки и переписать снимки',
+        )
+
+    def handle(self, *args, **options):
+        """🚀 Основная логика команды"""
+        try:
+            results = product_feeds.build_feeds(options['feed'], force=options['force'])
+        except product_feeds.FeedError as e:
+            raise CommandError(f"❌ {e}")
+
+        for result in results:
+            status = '💾 снимок обновлен' if result['written'] else '✅ без изменений'
+            self.stdout.write(
+                f"🛒 {product_feeds.FEED_FORMATS[result['feed']]}: предложений {result['offers']} "
+                f"(перерисовано {result['rendered']}, из прошлой сборки {result['reused']}, "
+                f"удалено {result['removed']}, пропущено без цены/адреса {result['skipped']}), "
+                f"{result['size'] / 1024:.1f} КБ - {status}"
+            )
@@ -0,0 +1,70 @@
+# 📁 common/management/commands/build_rollups.py
+# 📈 Django команда пересборки дневных сводок отзывов, заказов и спама (common/rollups.py)
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.rollups import ROLLUP_NAMES, build_rollups, get_config
+
+
+class Command(BaseCommand):
+    """
+    📈 Пересобирает таблицы ReviewDailyStat, OrderDailyStat и SpamDailyStat
+
+    Повторный запуск за те же дни безопасен: строки дня заменяются новым
+    снимком. Без параметров пересобираются последние REFRESH_DAYS дней
+    (settings.ROLLUPS) - так в сводки попадает поздняя модерация и оплата.
+
+    Использование:
+    python manage.py build_rollups                                  # 🔄 Последние дни
+    python manage.py build_rollups --backfill                       # 📅 Вся история
+    python manage.py build_rollups --start 2025-01-01 --end 2025-03-31
+    python manage.py build_rollups --only orders                    # 🛒 Одна сводка
+
+    Рекомендуется запускать по расписанию (например, каждые 15 минут через cron).
+    """
+
+    help = '📈 Пересобирает дневные сводки отзывов, заказов и спама'
+
+    def add_arguments(self, parser):
+        """➕ Добавляем опции командной строки"""
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            help=f"📅 Первый день YYYY-MM-DD (по умолчанию - {get_config()['REFRESH_DAYS']} последних дней)",
+        )
+        parser.add_argument(
+            '--end',
+            type=date.fromisoformat,
+            help='📅 Последний день YYYY-MM-DD (по умолчанию - сегодня)',
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='📅 Начать с первого дня с данными (дозаполнение истории)',
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=ROLLUP_NAMES,
+            default=list(ROLLUP_NAMES),
+            help='🎯 Какие сводки собирать',
+        )
+
+    def handle(self, *args, **options):
+        """🚀 Основная логика команды"""
+        if options['start'] and options['end'] and options['start'] > options['end']:
+            raise CommandError('❌ --start позже --end')
+
+        result = build_rollups(
+            start=options['start'],
+            end=options['end'],
+            names=options['only'],
+            backfill=options['backfill'],
+            stdout=self.stdout,
+        )
+        for name, stats in result.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {name}: дней {stats['days']}, строк {stats['rows']}, удалено устаревших {stats['deleted']}"
+            ))
@@ -0,0 +1,40 @@
+# 📁 common/management/commands/build_sitemaps.py
+# 🗺️ Django команда инкрементальной сборки карты сайта (common/sitemaps.py)
+
+from django.core.management.base import BaseCommand
+
+from common import sitemaps
+
+
+class Command(BaseCommand):
+    """
+    🗺️ Собирает индекс sitemap.xml и gzip-страницы разделов в SITEMAPS_DIR
+
+    Разделы без новых, измененных и удаленных объектов не перечитываются,
+    страницы с прежним содержимым не переписываются. Запускать по cron;
+    краулеры получают готовые файлы без обращений к БД.
+
+    Использование:
+    python manage.py build_sitemaps            # 🔄 Обновить изменившиеся разделы
+    python manage.py build_sitemaps --force    # 🔁 Пересобрать все файлы
+    """
+
+    help = '🗺️ Инкрементально собирает файлы карты сайта (индекс + gzip-страницы по 50 000 URL)'
+
+    def add_arguments(self, parser):
+        """➕ Добавляем опции командной строки"""
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='🔁 Перечитать все разделы и переписать все файлы',
+        )
+
+    def handle(self, *args, **options):
+        """🚀 Основная логика команды"""
+        stats = sitemaps.build_sitemaps(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(
+            f"🗺️ Разделов {stats['sections']} (без изменений {stats['skipped']}), "
+            f"страниц {stats['pages']}: записано {stats['written']}, без изменений {stats['unchanged']}, "
+            f"удалено {stats['removed']}; URL в перечитанных разделах: {stats['urls']}"
+        ))
+        self.stdout.write(f"📁 {sitemaps.SITEMAPS_DIR}")
@@ -0,0 +1,119 @@
+# 📁 common/management/commands/export_changes.py
+# 🔄 Django команда инкрементальной выгрузки изменений каталога (common/change_feed.py)
+
+import os
+import sys
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common import change_feed
+
+
+class Command(BaseCommand):
+    """
+    🔄 Выгружает изменения каталога после водяной отметки
+
+    Первый запуск - с --since, дальше токен продолжения хранится в
+    --state-file и обновляется только после успешной записи выгрузки:
+    упавший запуск повторит те же записи, а не пропустит их.
+
+    Использование:
+    python manage.py export_changes --since 2026-01-01T00:00 --state-file var/1c.token -o changes.jsonl
+    python manage.py export_changes --state-file var/1c.token -o changes.jsonl   # 🔁 Продолжение (cron)
+    python manage.py export_changes --token <...> --format csv                      # 📄 Одна страница в stdout
+    python manage.py export_changes --purge-tombstones 30                           # 🧹 Чистка журнала удалений
+    """
+
+    help = '🔄 Выгружает изменения каталога (JSONL/CSV) с токеном продолжения'
+
+    def add_arguments(self, parser):
+        """➕ Добавляем опции командной строки"""
+        parser.add_argument('--since', help='📅 Водяная отметка ISO 8601 (первый запуск)')
+        parser.add_argument('--token', help='🔑 Токен продолжения')
+        parser.add_argument(
+            '--state-file',
+            help='💾 Файл с токеном: читается при запуске, перезаписывается после выгрузки',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['jsonl', 'csv'],
+            default='jsonl',
+            help='📄 Формат выгрузки (по умолчанию jsonl)',
+        )
+        parser.add_argument('-o', '--output', help='📁 Файл выгрузки (по умолчанию stdout)')
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=change_feed.DEFAULT_LIMIT,
+            help=f'📦 Записей на странице (по умолчанию {change_feed.DEFAULT_LIMIT})',
+        )
+        parser.add_argument(
+            '--single-page',
+            action='store_true',
+            help='1️⃣ Только одна страница (по умолчанию - все страницы до конца ленты)',
+        )
+        parser.add_argument(
+            '--purge-tombstones',
+            type=int,
+            metavar='DAYS',
+            help='🧹 Удалить надгробия старше DAYS дней и выйти',
+        )
+
+    def handle(self, *args, **options):
+        """🚀 Основная логика команды"""
+        if options['purge_tombstones'] is not None:
+            removed = change_feed.purge_tombstones(options['purge_tombstones'])
+            self.stderr.write(self.style.SUCCESS(f"🧹 Удалено надгробий: {removed}"))
+            return
+
+        token = options['token'] or self._read_state(options['state_file'])
+        since = None
+        if not token:
+            if not options['since']:
+                raise CommandError("❌ Укажите --since, --token или существующий --state-file")
+            try:
+                since = change_feed.parse_since(options['since'])
+            except change_feed.ChangeFeedError as e:
+                raise CommandError(f"❌ {e}")
+
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        written = 0
+        try:
+            pages = change_feed.iter_all_changes(token=token, since=since, limit=options['limit'])
+            for page_number, (rows, token) in enumerate(pages):
+                if options['format'] == 'csv':
+                    output.write(change_feed.to_csv(rows, header=page_number == 0))
+                else:
+                    output.write(change_feed.to_jsonl(rows))
+                written += len(rows)
+                if options['single_page']:
+                    break
+            output.flush()
+        except change_feed.ChangeFeedError as e:
+            raise CommandError(f"❌ {e}")
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        if options['state_file']:
+            self._write_state(options['state_file'], token)
+
+        self.stderr.write(self.style.SUCCESS(f"✅ Выгружено изменений: {written}"))
+        if not options['state_file']:
+            self.stderr.write(f"🔑 Токен продолжения: {token}")
+
+    def _read_state(self, path):
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as state:
+            return state.read().strip() or None
+
+    def _write_state(self, path, token):
+        """💾 Атомарная запись токена (временный файл + os.replace)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as state:
+            state.write(token)
+        os.replace(temp_path, path)
@@ -0,0 +1,76 @@
+# 📁 common/management/commands/generate_image_derivatives.py
+# 🖼️ Django команда для массовой генерации адаптивных производных изображений
+
+from django.core.management.base import BaseCommand
+
+from common.image_derivatives import (
+    DERIVATIVE_WIDTHS, IMAGE_SOURCES, generate_derivatives, get_formats, iter_source_names, prune_derivatives
+)
+
+
+class Command(BaseCommand):
+    """
+    🖼️ Строит WebP/AVIF-производные нескольких ширин для изображений товаров,
+    лодок, категорий и блога
+
+    Актуальные производные (по размеру и времени изменения оригинала)
+    пропускаются, поэтому команду можно безопасно запускать повторно.
+
+    Использование:
+    python manage.py generate_image_derivatives
+    python manage.py generate_image_derivatives --source product --source boat  # 🎯 Только товары
+    python manage.py generate_image_derivatives --workers 4                     # ⚙️ Размер пула
+    python manage.py generate_image_derivatives --force                         # 🔄 Перестроить все
+    python manage.py generate_image_derivatives --prune                         # 🧹 Удалить осиротевшие
+    """
+
+    help = '🖼️ Генерирует адаптивные производные изображений (WebP/AVIF, несколько ширин)'
+
+    def add_arguments(self, parser):
+        """➕ Добавляем опции командной строки"""
+        parser.add_argument(
+            '--source',
+            action='append',
+            choices=sorted(IMAGE_SOURCES),
+            help='🎯 Источник изображений (можно указать несколько раз, по умолчанию - все)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='⚙️ Количество процессов (по умолчанию - число ядер)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='🔄 Перестроить даже актуальные производные',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='🧹 Удалить производные, оригиналы которых больше не существуют',
+        )
+
+    def handle(self, *args, **options):
+        """🚀 Основная логика команды"""
+        names = iter_source_names(options['source'])
+        self.stdout.write(
+            f"🖼️ Изображений: {len(names)}, ширины: {', '.join(map(str, DERIVATIVE_WIDTHS))}, "
+            f"форматы: {', '.join(get_formats())}"
+        )
+
+        stats = generate_derivatives(
+            names,
+            workers=options['workers'],
+            force=options['force'],
+            stdout=self.stdout if options['verbosity'] > 1 else None,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Создано: {stats['created']}, актуальны: {stats['skipped']}, "
+            f"нет файла: {stats['missing']}, ошибок: {stats['errors']}"
+        ))
+
+        if options['prune']:
+            removed = prune_derivatives()
+            self.stdout.write(self.style.SUCCESS(f"🧹 Удалено осиротевших наборов: {removed}"))
@@ -0,0 +1,62 @@
+# 📁 common/management/commands/rebuild_ratings.py
+# ⭐ Django команда для полного пересчета денормализованных агрегатов рейтинга
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from common.models import ProductReview, ProductRating
+
+
+class Command(BaseCommand):
+    """
+    ⭐ Пересчитывает таблицу ProductRating с нуля
+
+    Товары с отзывами обрабатываются пачками: один GROUP BY и один
+    bulk upsert на пачку. Строки агрегатов товаров, у которых отзывов
+    больше нет, удаляются в конце.
+
+    Использование:
+    python manage.py rebuild_ratings
+    python manage.py rebuild_ratings --chunk-size 1000  # 📦 Размер пачки
+    """
+
+    help = '⭐ Пересчитывает агрегаты рейтинга товаров по одобренным отзывам'
+
+    def add_arguments(self, parser):
+        """➕ Добавляем опции командной строки"""
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='📦 Количество товаров в одной пачке (по умолчанию 500)',
+        )
+
+    def handle(self, *args, **options):
+        """🚀 Основная логика команды"""
+        chunk_size = max(1, options['chunk_size'])
+        started_at = timezone.now()
+
+        pairs = (
+            ProductReview.objects.order_by('content_type_id', 'object_id')
+            .values_list('content_type_id', 'object_id')
+            .distinct()
+        )
+
+        chunk = []
+        processed = 0
+        for pair in pairs.iterator(chunk_size=chunk_size):
+            chunk.append(pair)
+            if len(chunk) >= chunk_size:
+                processed += ProductRating.recalculate_many(chunk)
+                self.stdout.write(f"📦 Обработано товаров: {processed}")
+                chunk = []
+
+        if chunk:
+            processed += ProductRating.recalculate_many(chunk)
+
+        # 🧹 Удаляем агрегаты товаров, которых не коснулся пересчет
+        stale_count, _ = ProductRating.objects.filter(updated_at__lt=started_at).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Пересчет завершен: товаров {processed}, удалено устаревших записей {stale_count}"
+        ))
@@ -0,0 +1,48 @@
+# 📁 common/management/commands/rebuild_recommendations.py
+# 🤝 Django команда для пересчета рекомендаций «с этим товаром покупают»
+
+from django.core.management.base import BaseCommand
+
+from common.recommendations import RECOMMENDATIONS_TOP_N, build_recommendations
+
+
+class Command(BaseCommand):
+    """
+    🤝 Пересобирает таблицу ProductRecommendation
+
+    Совместные покупки берутся из позиций заказов (OrderItem) авто и лодок;
+    с --include-carts учитываются и неоплаченные корзины с пониженным весом.
+    Товары без истории покупок получают популярные товары своей категории.
+
+    Использование:
+    python manage.py rebuild_recommendations
+    python manage.py rebuild_recommendations --top-n 12      # 🔢 Соседей на товар
+    python manage.py rebuild_recommendations --include-carts # 🛒 Учесть корзины
+
+    Рекомендуется запускать по расписанию (например, раз в сутки через cron).
+    """
+
+    help = '🤝 Пересчитывает рекомендации товаров по совместным покупкам'
+
+    def add_arguments(self, parser):
+        """➕ Добавляем опции командной строки"""
+        parser.add_argument(
+            '--top-n',
+            type=int,
+            default=RECOMMENDATIONS_TOP_N,
+            help=f'🔢 Количество рекомендаций на товар (по умолчанию {RECOMMENDATIONS_TOP_N})',
+        )
+        parser.add_argument(
+            '--include-carts',
+            action='store_true',
+            help='🛒 Учитывать неоплаченные корзины',
+        )
+
+    def handle(self, *args, **options):
+        """🚀 Основная логика команды"""
+        total = build_recommendations(
+            top_n=max(1, options['top_n']),
+            include_carts=options['include_carts'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ Рекомендации пересчитаны: {total} записей"))
@@ -0,0 +1,46 @@
+# 📁 common/management/commands/rebuild_review_index.py
+# 🧬 Django команда массовой индексации отзывов для поиска почти-дубликатов (common/review_index.py)
+
+from django.core.management.base import BaseCommand
+
+from common.review_index import rebuild_index
+
+
+class Command(BaseCommand):
+    """
+    🧬 Строит MinHash-подписи и корзины LSH для отзывов
+
+    Новые отзывы индексируются сигналом при сохранении; команда нужна для
+    первичного заполнения и после массовых правок в обход сигналов.
+
+    Использование:
+    python manage.py rebuild_review_index                 # 🔄 Только новые и измененные отзывы
+    python manage.py rebuild_review_index --force         # 🔁 Пересчитать все подписи
+    python manage.py rebuild_review_index --chunk-size 5000
+    """
+
+    help = '🧬 Индексирует отзывы для поиска почти-дубликатов (MinHash/LSH)'
+
+    def add_arguments(self, parser):
+        """➕ Добавляем опции командной строки"""
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='📦 Количество отзывов в одной пачке (по умолчанию 1000)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='🔁 Удалить индекс и пересчитать все подписи',
+        )
+
+    def handle(self, *args, **options):
+        """🚀 Основная логика команды"""
+        stats = rebuild_index(
+            chunk_size=max(1, options['chunk_size']), force=options['force'], stdout=self.stdout
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Отзывов {stats['reviews']}: проиндексировано {stats['indexed']}, "
+            f"без изменений {stats['unchanged']}, без текста {stats['empty']}"
+        ))
@@ -0,0 +1,32 @@
+# 📁 common/management/commands/rebuild_search_index.py
+# 🔍 Django команда для полной перестройки поискового индекса
+
+from django.core.management.base import BaseCommand
+
+from common.search import rebuild_index
+
+
+class Command(BaseCommand):
+    """
+    🔍 Перестраивает поисковый индекс по товарам, лодкам и категориям
+
+    Использование:
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --chunk-size 1000  # 📦 Размер пачки
+    """
+
+    help = '🔍 Перестраивает поисковый индекс товаров и категорий'
+
+    def add_arguments(self, parser):
+        """➕ Добавляем опции командной строки"""
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='📦 Количество объектов в одной пачке (по умолчанию 500)',
+        )
+
+    def handle(self, *args, **options):
+        """🚀 Основная логика команды"""
+        total = rebuild_index(chunk_size=max(1, options['chunk_size']), stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"✅ Индекс перестроен: документов {total}"))
@@ -0,0 +1,45 @@
+# ⭐ Денормализованные агрегаты рейтинга товаров
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRating',
+            fields=[
+                ('uid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='Уникальный ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('object_id', models.UUIDField()),
+                ('rating_avg', models.FloatField(default=0.0, verbose_name='Средняя оценка')),
+                ('rating_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('rating_sum', models.PositiveIntegerField(default=0, verbose_name='Сумма оценок')),
+                ('stars_1', models.PositiveIntegerField(default=0, verbose_name='1 звезда')),
+                ('stars_2', models.PositiveIntegerField(default=0, verbose_name='2 звезды')),
+                ('stars_3', models.PositiveIntegerField(default=0, verbose_name='3 звезды')),
+                ('stars_4', models.PositiveIntegerField(default=0, verbose_name='4 звезды')),
+                ('stars_5', models.PositiveIntegerField(default=0, verbose_name='5 звезд')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг товара',
+                'verbose_name_plural': 'Рейтинги товаров',
+                'indexes': [
+                    models.Index(fields=['content_type', 'rating_avg'], name='common_rating_ct_avg_idx'),
+                    models.Index(fields=['content_type', 'rating_count'], name='common_rating_ct_count_idx'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(fields=('content_type', 'object_id'), name='common_productrating_unique_object'),
+                ],
+            },
+        ),
+    ]
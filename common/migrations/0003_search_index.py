@@ -0,0 +1,81 @@
+# 🔍 Поисковый индекс: документы и инвертированный индекс терминов
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models, transaction
+
+
+def create_postgres_indexes(apps, schema_editor):
+    """🐘 На PostgreSQL: pg_trgm (если разрешено) и GIN-индексы для tsvector/триграмм"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS common_searchdoc_tsv_gin "
+        "ON common_searchdocument USING GIN (to_tsvector('russian', search_text))"
+    )
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            schema_editor.execute(
+                "CREATE INDEX IF NOT EXISTS common_searchdoc_trgm_gin "
+                "ON common_searchdocument USING GIN (search_text gin_trgm_ops)"
+            )
+    except Exception:
+        # Нет прав на создание расширения - поиск работает без триграмм pg_trgm
+        pass
+
+
+def drop_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS common_searchdoc_trgm_gin")
+    schema_editor.execute("DROP INDEX IF EXISTS common_searchdoc_tsv_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('common', '0002_productrating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('uid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='Уникальный ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('object_id', models.UUIDField()),
+                ('title', models.CharField(blank=True, max_length=255, verbose_name='Заголовок')),
+                ('search_text', models.TextField(blank=True, verbose_name='Текст для поиска')),
+                ('boost', models.FloatField(default=1.0, verbose_name='Множитель релевантности')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Поисковый документ',
+                'verbose_name_plural': 'Поисковые документы',
+                'constraints': [
+                    models.UniqueConstraint(fields=('content_type', 'object_id'), name='common_searchdocument_unique_object'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Термин')),
+                ('weight', models.FloatField(default=1.0, verbose_name='Вес')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='common.searchdocument', verbose_name='Документ')),
+            ],
+            options={
+                'verbose_name': 'Термин индекса',
+                'verbose_name_plural': 'Термины индекса',
+                'indexes': [
+                    models.Index(fields=['term', 'document'], name='common_posting_term_doc_idx'),
+                ],
+            },
+        ),
+        migrations.RunPython(create_postgres_indexes, drop_postgres_indexes),
+    ]
@@ -0,0 +1,36 @@
+# 🤝 Предрассчитанные рекомендации «с этим товаром покупают»
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('common', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_id', models.UUIDField(verbose_name='ID товара')),
+                ('target_id', models.UUIDField(verbose_name='ID рекомендуемого товара')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Позиция')),
+                ('score', models.FloatField(default=0.0, verbose_name='Сила связи')),
+                ('reason', models.CharField(choices=[('copurchase', 'Совместные покупки'), ('category', 'Та же категория')], default='copurchase', max_length=20, verbose_name='Источник')),
+                ('source_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+                ('target_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Рекомендация товара',
+                'verbose_name_plural': 'Рекомендации товаров',
+                'ordering': ['rank'],
+                'constraints': [
+                    models.UniqueConstraint(fields=('source_type', 'source_id', 'rank'), name='common_recommendation_unique_rank'),
+                ],
+            },
+        ),
+    ]
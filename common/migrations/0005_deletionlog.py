@@ -0,0 +1,32 @@
+# 🪦 Журнал удалений для ленты изменений
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('common', '0004_productrecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionLog',
+            fields=[
+                ('uid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='Уникальный ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('object_id', models.UUIDField(verbose_name='ID удаленного объекта')),
+                ('object_key', models.CharField(blank=True, max_length=255, verbose_name='Внешний ключ (SKU, код, слаг)')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Удаленный объект',
+                'verbose_name_plural': 'Журнал удалений',
+                'indexes': [models.Index(fields=['created_at', 'uid'], name='common_deletionlog_feed_idx')],
+            },
+        ),
+    ]
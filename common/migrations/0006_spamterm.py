@@ -0,0 +1,30 @@
+# 🚫 Спам-слова, управляемые из админки
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0005_deletionlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpamTerm',
+            fields=[
+                ('uid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='Уникальный ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('term', models.CharField(max_length=200, unique=True, verbose_name='Слово или фраза')),
+                ('weight', models.FloatField(default=10.0, verbose_name='Вес (баллы спама)')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активно')),
+            ],
+            options={
+                'verbose_name': 'Спам-слово',
+                'verbose_name_plural': 'Спам-слова',
+                'ordering': ['term'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# 🧬 MinHash-подписи и корзины LSH для поиска почти-дубликатов отзывов
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0006_spamterm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewFingerprint',
+            fields=[
+                ('review', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='common.productreview', verbose_name='Отзыв')),
+                ('signature', models.BinaryField(verbose_name='MinHash-сигнатура')),
+                ('content_hash', models.CharField(max_length=40, verbose_name='Хэш нормализованного текста')),
+                ('shingle_count', models.PositiveIntegerField(default=0, verbose_name='Число шинглов')),
+            ],
+            options={
+                'verbose_name': 'Подпись отзыва',
+                'verbose_name_plural': 'Подписи отзывов',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReviewLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField(verbose_name='Хэш полосы')),
+                ('fingerprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='common.reviewfingerprint', verbose_name='Подпись')),
+            ],
+            options={
+                'verbose_name': 'Корзина LSH',
+                'verbose_name_plural': 'Корзины LSH',
+                'indexes': [models.Index(fields=['bucket', 'fingerprint'], name='common_lsh_bucket_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# 🌐 Диапазоны IP для блокировки и репутации, управляемые из админки
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0007_review_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IPRange',
+            fields=[
+                ('uid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='Уникальный ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('network', models.CharField(max_length=64, unique=True, verbose_name='Сеть (CIDR) или адрес')),
+                ('category', models.CharField(choices=[('blocked', '🚫 Блокировка'), ('tor', '🧅 Tor'), ('proxy', '🔀 Прокси'), ('vpn', '🔒 VPN'), ('hosting', '🖥️ Хостинг / дата-центр'), ('private', '🏠 Частная сеть'), ('other', '❓ Другое')], default='blocked', max_length=20, verbose_name='Категория')),
+                ('weight', models.FloatField(blank=True, help_text='Пусто - вес категории по умолчанию', null=True, verbose_name='Вес (баллы репутации)')),
+                ('note', models.CharField(blank=True, max_length=255, verbose_name='Примечание')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активен')),
+            ],
+            options={
+                'verbose_name': 'Диапазон IP',
+                'verbose_name_plural': 'Диапазоны IP',
+                'ordering': ['category', 'network'],
+            },
+        ),
+    ]
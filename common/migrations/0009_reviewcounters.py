@@ -0,0 +1,30 @@
+# 📊 Материализованные счетчики модерации отзывов (строка создается пересчетом при первом чтении)
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0008_iprange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewCounters',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('total', models.IntegerField(default=0, verbose_name='Всего отзывов')),
+                ('approved', models.IntegerField(default=0, verbose_name='Одобрено')),
+                ('suspicious', models.IntegerField(default=0, verbose_name='Подозрительных')),
+                ('high_spam', models.IntegerField(default=0, verbose_name='Спам-оценка от 80')),
+                ('anonymous', models.IntegerField(default=0, verbose_name='Анонимных')),
+                ('recalculated_at', models.DateTimeField(blank=True, null=True, verbose_name='Полный пересчет')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Счетчики модерации',
+                'verbose_name_plural': 'Счетчики модерации',
+            },
+        ),
+    ]
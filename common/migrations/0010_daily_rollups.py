@@ -0,0 +1,69 @@
+# 📈 Дневные сводки отзывов, заказов и спама (common/rollups.py, команда build_rollups)
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0009_reviewcounters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('stars', models.PositiveSmallIntegerField(verbose_name='Оценка')),
+                ('is_approved', models.BooleanField(verbose_name='Одобрен')),
+                ('reviews', models.PositiveIntegerField(default=0, verbose_name='Отзывов')),
+                ('anonymous', models.PositiveIntegerField(default=0, verbose_name='Анонимных')),
+                ('built_at', models.DateTimeField(verbose_name='Собрано')),
+            ],
+            options={
+                'verbose_name': 'Сводка отзывов за день',
+                'verbose_name_plural': 'Сводки отзывов по дням',
+                'ordering': ['day', 'stars', 'is_approved'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'stars', 'is_approved'), name='common_reviewdailystat_unique_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('delivery_method', models.CharField(max_length=20, verbose_name='Способ доставки')),
+                ('payment_status', models.CharField(max_length=20, verbose_name='Статус оплаты')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Итого к оплате')),
+                ('items_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Стоимость товаров')),
+                ('with_coupon', models.PositiveIntegerField(default=0, verbose_name='С купоном')),
+                ('built_at', models.DateTimeField(verbose_name='Собрано')),
+            ],
+            options={
+                'verbose_name': 'Сводка заказов за день',
+                'verbose_name_plural': 'Сводки заказов по дням',
+                'ordering': ['day', 'delivery_method', 'payment_status'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'delivery_method', 'payment_status'), name='common_orderdailystat_unique_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SpamDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('level', models.CharField(choices=[('minimal', 'Минимальный'), ('low', 'Низкий'), ('medium', 'Средний'), ('high', 'Высокий')], max_length=10, verbose_name='Уровень спама')),
+                ('reviews', models.PositiveIntegerField(default=0, verbose_name='Отзывов')),
+                ('suspicious', models.PositiveIntegerField(default=0, verbose_name='Подозрительных')),
+                ('score_sum', models.FloatField(default=0.0, verbose_name='Сумма спам-оценок')),
+                ('built_at', models.DateTimeField(verbose_name='Собрано')),
+            ],
+            options={
+                'verbose_name': 'Сводка спама за день',
+                'verbose_name_plural': 'Сводки спама по дням',
+                'ordering': ['day', 'level'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'level'), name='common_spamdailystat_unique_key')],
+            },
+        ),
+    ]
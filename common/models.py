@@ -3,7 +3,9 @@
 # ✅ ОБНОВЛЕНО: Добавлены поля для анонимных отзывов и анти-спам защиты
 # 🛡️ ДОБАВЛЕНО: Поля аудита, анти-спам метрики и методы защиты
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
@@ -11,6 +13,18 @@ from django.utils import timezone
 from django.conf import settings
 from base.models import BaseModel
 
+# ⭐ Маркер «вклад отзыва в рейтинг неизвестен» (объект загружен с .only()/.defer())
+RATING_STATE_UNKNOWN = object()
+
+# ⭐ Поля отзыва, от которых зависит вклад в агрегаты рейтинга
+RATING_STATE_FIELDS = {'content_type_id', 'object_id', 'stars', 'is_approved'}
+
+# 📊 Поля отзыва, от которых зависит вклад в счетчики модерации (ReviewCounters)
+COUNTER_STATE_FIELDS = {'is_approved', 'is_suspicious', 'spam_score', 'user_id'}
+
+# 🚨 Спам-оценка, начиная с которой отзыв считается явным спамом в статистике
+HIGH_SPAM_SCORE = 80
+
 # Импорт моделей для правильных ссылок
 from products.models import Color, KitVariant
 
@@ -127,14 +141,23 @@ class ProductReview(BaseModel):
         """🎯 Пересчет спам-оценки отзыва"""
         # Импортируем здесь чтобы избежать циклического импорта
         try:
-            from common.utils import calculate_spam_score
+            from common.utils import calculate_spam_score, get_spam_config
+            from common.review_index import find_near_duplicates, product_key
 
+            config = get_spam_config()
             review_data = {
                 'content': self.content,
                 'ip_address': self.ip_address,
                 'form_submit_time': self.form_submit_time or 0,
                 'user_agent': self.user_agent,
             }
+            if self.content and config.get('ENABLE_SIMILARITY_CHECK', True):
+                review_data['near_duplicates'] = find_near_duplicates(
+                    self.content,
+                    threshold=config.get('SIMILARITY_THRESHOLD', 0.85),
+                    exclude_review=self.pk,
+                    product=product_key(self.content_type_id, self.object_id),
+                )
 
             new_score = calculate_spam_score(review_data)
             self.spam_score = new_score
@@ -143,6 +166,10 @@ class ProductReview(BaseModel):
             spam_threshold = getattr(settings, 'SPAM_DETECTION', {}).get('SPAM_SCORE_THRESHOLD', 70.0)
             self.is_suspicious = new_score >= spam_threshold
 
+            # 🧬 Тот же текст уже оставлен к другим товарам - признак копипаст-кампании
+            if review_data.get('near_duplicates', {}).get('other_products'):
+                self.is_suspicious = True
+
             return new_score
         except ImportError:
             # Если utils недоступны, возвращаем базовую оценку
@@ -285,82 +312,132 @@ class ProductReview(BaseModel):
     @classmethod
     def get_pending_count(cls):
         """📊 Количество отзывов на модерации"""
-        return cls.objects.filter(is_approved=False).count()
+        return ReviewCounters.get_stats()['pending']
 
     @classmethod
     def get_approved_count(cls):
         """📊 Количество одобренных отзывов"""
-        return cls.objects.filter(is_approved=True).count()
+        return ReviewCounters.get_stats()['approved']
 
     @classmethod
     def get_suspicious_count(cls):
         """🚨 Количество подозрительных отзывов"""
-        return cls.objects.filter(is_suspicious=True).count()
+        return ReviewCounters.get_stats()['suspicious']
 
     @classmethod
     def get_anonymous_count(cls):
         """👤 Количество анонимных отзывов"""
-        return cls.objects.filter(user__isnull=True).count()
+        return ReviewCounters.get_stats()['anonymous']
+
+    @staticmethod
+    def get_today_start():
+        """🕛 Начало текущих суток в часовом поясе сайта (диапазон по индексу вместо date_added__date)"""
+        return timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
 
     @classmethod
     def get_today_pending_count(cls):
         """📊 Количество отзывов на модерации за сегодня"""
-        today = timezone.now().date()
-        return cls.objects.filter(
-            is_approved=False,
-            date_added__date=today
-        ).count()
+        return cls.objects.filter(is_approved=False, date_added__gte=cls.get_today_start()).count()
 
     @classmethod
     def get_approval_rate(cls):
         """📊 Процент одобрения отзывов"""
-        total = cls.objects.count()
-        if total == 0:
-            return 0
-        approved = cls.get_approved_count()
-        return round((approved / total) * 100, 1)
+        return ReviewCounters.get_stats()['approval_rate']
 
     @classmethod
     def get_spam_stats(cls):
         """📊 Статистика спама"""
-        total = cls.objects.count()
-        if total == 0:
-            return {'total': 0, 'suspicious': 0, 'high_spam': 0, 'spam_rate': 0}
+        stats = ReviewCounters.get_stats()
+        return {key: stats[key] for key in ('total', 'suspicious', 'high_spam', 'spam_rate')}
 
-        suspicious = cls.get_suspicious_count()
-        high_spam = cls.objects.filter(spam_score__gte=80).count()
+    @classmethod
+    def get_moderation_stats(cls, exact=False):
+        """
+        📊 Полная статистика модерации
+
+        Args:
+            exact: Посчитать по таблице отзывов (один запрос с условными агрегатами)
+                   вместо чтения строки счетчиков
+
+        Returns:
+            dict: total, pending, approved, suspicious, high_spam, anonymous,
+                  today_pending, approval_rate, spam_rate
+        """
+        if exact:
+            return cls.aggregate_moderation_stats()
+        return {**ReviewCounters.get_stats(), 'today_pending': cls.get_today_pending_count()}
 
+    @classmethod
+    def aggregate_moderation_stats(cls, queryset=None):
+        """
+        🧮 Все счетчики модерации и спама одним запросом (COUNT ... FILTER)
+
+        Args:
+            queryset: Отзывы для подсчета (по умолчанию все)
+        """
+        queryset = cls.objects.all() if queryset is None else queryset
+        counts = queryset.order_by().aggregate(
+            **ReviewCounters.aggregate_expressions(),
+            today_pending=Count('uid', filter=Q(is_approved=False, date_added__gte=cls.get_today_start())),
+        )
+        return {**ReviewCounters.derive_stats(counts), 'today_pending': counts['today_pending']}
+
+    # ==================== ВКЛАД В СЧЕТЧИКИ МОДЕРАЦИИ ====================
+
+    def get_counter_state(self):
+        """
+        📊 Вклад отзыва в счетчики модерации
+
+        Returns:
+            dict: {счетчик: 0 или 1} для полей ReviewCounters.COUNTER_FIELDS
+        """
         return {
-            'total': total,
-            'suspicious': suspicious,
-            'high_spam': high_spam,
-            'spam_rate': round((suspicious / total) * 100, 1)
+            'total': 1,
+            'approved': int(bool(self.is_approved)),
+            'suspicious': int(bool(self.is_suspicious)),
+            'high_spam': int((self.spam_score or 0) >= HIGH_SPAM_SCORE),
+            'anonymous': int(self.user_id is None),
         }
 
+    # ==================== ВКЛАД В РЕЙТИНГ ====================
+
     @classmethod
-    def get_moderation_stats(cls):
-        """📊 Полная статистика модерации"""
-        spam_stats = cls.get_spam_stats()
-        return {
-            'total': cls.objects.count(),
-            'pending': cls.get_pending_count(),
-            'approved': cls.get_approved_count(),
-            'suspicious': cls.get_suspicious_count(),
-            'anonymous': cls.get_anonymous_count(),
-            'today_pending': cls.get_today_pending_count(),
-            'approval_rate': cls.get_approval_rate(),
-            'spam_rate': spam_stats['spam_rate'],
-        }
+    def from_db(cls, db, field_names, values):
+        """⭐ Запоминаем состояние из БД, чтобы сигналы считали дельту рейтинга и счетчиков модерации"""
+        instance = super().from_db(db, field_names, values)
+        if RATING_STATE_FIELDS.issubset(field_names):
+            instance._rating_snapshot = instance.get_rating_state()
+        else:
+            instance._rating_snapshot = RATING_STATE_UNKNOWN
+        if COUNTER_STATE_FIELDS.issubset(field_names):
+            instance._counter_snapshot = instance.get_counter_state()
+        else:
+            instance._counter_snapshot = RATING_STATE_UNKNOWN
+        return instance
+
+    def get_rating_state(self):
+        """
+        ⭐ Вклад отзыва в агрегаты рейтинга
+
+        Returns:
+            tuple: (content_type_id, object_id, stars) для одобренного отзыва, иначе None
+        """
+        if not self.is_approved or not self.content_type_id or not self.object_id:
+            return None
+        return (self.content_type_id, self.object_id, int(self.stars))
 
     # ==================== СОХРАНЕНИЕ ====================
 
     def save(self, *args, **kwargs):
         """💾 Переопределение сохранения с автоматическим расчетом спам-оценки"""
         # Автоматически рассчитываем спам-оценку при первом сохранении
-        if not self.pk and self.ip_address:
+        # (pk - UUID со значением по умолчанию, поэтому новизна определяется по _state.adding)
+        if self._state.adding and self.ip_address:
             self.calculate_spam_score()
 
-        super().save(*args, **kwargs)
+        # 📊 Строка и дельты ReviewCounters из сигнала post_save фиксируются вместе
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
 
     # ==================== СТРОКОВОЕ ПРЕДСТАВЛЕНИЕ ====================
 
@@ -387,6 +464,420 @@ class ProductReview(BaseModel):
         ]
 
 
+class ProductRating(BaseModel):
+    """
+    ⭐ Денормализованные агрегаты рейтинга товара (авто и лодки)
+
+    Одна строка на товар (content_type + object_id). Учитываются только
+    одобренные отзывы - те же, что видны покупателям на странице товара.
+    Обновляется инкрементально сигналами ProductReview и пересчитывается
+    после массовых операций (queryset.update) и командой rebuild_ratings.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.UUIDField()
+
+    rating_avg = models.FloatField(default=0.0, verbose_name="Средняя оценка")
+    rating_count = models.PositiveIntegerField(default=0, verbose_name="Количество отзывов")
+    rating_sum = models.PositiveIntegerField(default=0, verbose_name="Сумма оценок")
+
+    # 📊 Гистограмма по звездам
+    stars_1 = models.PositiveIntegerField(default=0, verbose_name="1 звезда")
+    stars_2 = models.PositiveIntegerField(default=0, verbose_name="2 звезды")
+    stars_3 = models.PositiveIntegerField(default=0, verbose_name="3 звезды")
+    stars_4 = models.PositiveIntegerField(default=0, verbose_name="4 звезды")
+    stars_5 = models.PositiveIntegerField(default=0, verbose_name="5 звезд")
+
+    AGGREGATE_FIELDS = [
+        'rating_avg', 'rating_count', 'rating_sum',
+        'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5',
+    ]
+
+    def get_histogram(self):
+        """📊 Гистограмма оценок {звезды: количество}"""
+        return {stars: getattr(self, f'stars_{stars}') for stars in range(5, 0, -1)}
+
+    # ==================== ИНКРЕМЕНТАЛЬНОЕ ОБНОВЛЕНИЕ ====================
+
+    @classmethod
+    def apply_delta(cls, content_type_id, object_id, stars, delta):
+        """
+        ➕ Атомарно добавляет (delta=1) или убирает (delta=-1) одну оценку
+
+        Args:
+            content_type_id: ID типа контента товара
+            object_id: UUID товара
+            stars: Оценка 1-5
+            delta: +1 или -1
+        """
+        if stars not in range(1, 6):
+            return
+
+        with transaction.atomic():
+            cls.objects.get_or_create(content_type_id=content_type_id, object_id=object_id)
+            rows = cls.objects.filter(content_type_id=content_type_id, object_id=object_id)
+            rows.update(
+                rating_count=F('rating_count') + delta,
+                rating_sum=F('rating_sum') + delta * stars,
+                **{f'stars_{stars}': F(f'stars_{stars}') + delta},
+                updated_at=timezone.now(),
+            )
+            # 🧮 Среднее считаем вторым UPDATE - по уже обновленным счетчикам
+            rows.update(rating_avg=Case(
+                When(rating_count__gt=0, then=Cast(F('rating_sum'), FloatField()) / F('rating_count')),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ))
+
+    @classmethod
+    def apply_review_change(cls, old_state, new_state):
+        """
+        🔄 Переносит вклад отзыва из старого состояния в новое
+
+        Args:
+            old_state: Результат ProductReview.get_rating_state() до изменения
+            new_state: Результат ProductReview.get_rating_state() после изменения
+        """
+        if old_state == new_state:
+            return
+        if old_state:
+            cls.apply_delta(old_state[0], old_state[1], old_state[2], -1)
+        if new_state:
+            cls.apply_delta(new_state[0], new_state[1], new_state[2], 1)
+
+    # ==================== ПОЛНЫЙ ПЕРЕСЧЕТ ====================
+
+    @classmethod
+    def recalculate_many(cls, pairs):
+        """
+        🧮 Пересчитывает агрегаты с нуля для набора товаров одним GROUP BY
+
+        Args:
+            pairs: Итерируемое (content_type_id, object_id)
+
+        Returns:
+            int: Количество записанных строк агрегатов
+        """
+        ids_by_type = {}
+        for content_type_id, object_id in pairs:
+            ids_by_type.setdefault(content_type_id, set()).add(object_id)
+        if not ids_by_type:
+            return 0
+
+        condition = Q()
+        for content_type_id, object_ids in ids_by_type.items():
+            condition |= Q(content_type_id=content_type_id, object_id__in=object_ids)
+
+        star_counts = {
+            f'stars_{stars}': Count('uid', filter=Q(stars=stars)) for stars in range(1, 6)
+        }
+        aggregates = (
+            ProductReview.objects.filter(condition, is_approved=True)
+            .order_by()
+            .values('content_type_id', 'object_id')
+            .annotate(rating_count=Count('uid'), rating_sum=Sum('stars'), **star_counts)
+        )
+        by_pair = {(row['content_type_id'], row['object_id']): row for row in aggregates}
+
+        now = timezone.now()
+        ratings = []
+        for content_type_id, object_ids in ids_by_type.items():
+            for object_id in object_ids:
+                row = by_pair.get((content_type_id, object_id), {})
+                count = row.get('rating_count') or 0
+                total = row.get('rating_sum') or 0
+                ratings.append(cls(
+                    content_type_id=content_type_id,
+                    object_id=object_id,
+                    rating_count=count,
+                    rating_sum=total,
+                    rating_avg=(total / count) if count else 0.0,
+                    updated_at=now,
+                    **{f'stars_{stars}': row.get(f'stars_{stars}') or 0 for stars in range(1, 6)},
+                ))
+
+        cls.objects.bulk_create(
+            ratings,
+            update_conflicts=True,
+            unique_fields=['content_type', 'object_id'],
+            update_fields=cls.AGGREGATE_FIELDS + ['updated_at'],
+        )
+
+        from .page_cache import invalidate_objects
+        invalidate_objects(
+            (content_type_id, object_id)
+            for content_type_id, object_ids in ids_by_type.items()
+            for object_id in object_ids
+        )
+        return len(ratings)
+
+    @staticmethod
+    def get_review_objects(reviews):
+        """
+        🔍 Товары, затронутые набором отзывов
+
+        Вызывать ДО queryset.update(): после обновления фильтры
+        исходного queryset (например, is_approved=False) могут не совпасть.
+
+        Returns:
+            list: [(content_type_id, object_id), ...]
+        """
+        return list(reviews.order_by().values_list('content_type_id', 'object_id').distinct())
+
+    # ==================== ЧТЕНИЕ ====================
+
+    @classmethod
+    def for_instance(cls, instance):
+        """
+        🔍 Агрегаты для конкретного товара (кэшируются на экземпляре)
+
+        Returns:
+            ProductRating или None, если отзывов еще не было
+        """
+        if not hasattr(instance, '_product_rating'):
+            content_type = ContentType.objects.get_for_model(instance)
+            instance._product_rating = cls.objects.filter(
+                content_type=content_type,
+                object_id=instance.pk
+            ).first()
+        return instance._product_rating
+
+    @classmethod
+    def annotate_queryset(cls, queryset):
+        """
+        📈 Добавляет к queryset товаров аннотации rating_avg и rating_count
+
+        Позволяет сортировать и фильтровать каталог по рейтингу
+        без запросов на каждую карточку.
+        """
+        content_type = ContentType.objects.get_for_model(queryset.model)
+        ratings = cls.objects.filter(content_type=content_type, object_id=OuterRef('pk'))
+        return queryset.annotate(
+            rating_avg=Coalesce(
+                Subquery(ratings.values('rating_avg')[:1]), Value(0.0), output_field=FloatField()
+            ),
+            rating_count=Coalesce(
+                Subquery(ratings.values('rating_count')[:1]), Value(0), output_field=models.IntegerField()
+            ),
+        )
+
+    def __str__(self):
+        return f"Рейтинг {self.content_type.model}:{self.object_id} - {self.rating_avg:.2f} ({self.rating_count})"
+
+    class Meta:
+        verbose_name = "Рейтинг товара"
+        verbose_name_plural = "Рейтинги товаров"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id"],
+                name="common_productrating_unique_object",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["content_type", "rating_avg"], name="common_rating_ct_avg_idx"),
+            models.Index(fields=["content_type", "rating_count"], name="common_rating_ct_count_idx"),
+        ]
+
+
+class ReviewCounters(models.Model):
+    """
+    📊 Материализованные счетчики модерации отзывов (одна строка)
+
+    Обновляются в той же транзакции, что и отзыв: сигналы ProductReview
+    добавляют дельты через F(), массовые queryset.update() вызывают
+    recalculate(). Админка и бейджи читают строку одним запросом по
+    первичному ключу вместо COUNT по всей таблице отзывов.
+    """
+
+    SINGLETON_ID = 1
+    COUNTER_FIELDS = ['total', 'approved', 'suspicious', 'high_spam', 'anonymous']
+
+    id = models.PositiveSmallIntegerField(primary_key=True, default=SINGLETON_ID)
+    total = models.IntegerField(default=0, verbose_name="Всего отзывов")
+    approved = models.IntegerField(default=0, verbose_name="Одобрено")
+    suspicious = models.IntegerField(default=0, verbose_name="Подозрительных")
+    high_spam = models.IntegerField(default=0, verbose_name=f"Спам-оценка от {HIGH_SPAM_SCORE}")
+    anonymous = models.IntegerField(default=0, verbose_name="Анонимных")
+    recalculated_at = models.DateTimeField(null=True, blank=True, verbose_name="Полный пересчет")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
+
+    @staticmethod
+    def aggregate_expressions():
+        """🧮 Условные COUNT для всех счетчиков (один проход по таблице отзывов)"""
+        return {
+            'total': Count('uid'),
+            'approved': Count('uid', filter=Q(is_approved=True)),
+            'suspicious': Count('uid', filter=Q(is_suspicious=True)),
+            'high_spam': Count('uid', filter=Q(spam_score__gte=HIGH_SPAM_SCORE)),
+            'anonymous': Count('uid', filter=Q(user__isnull=True)),
+        }
+
+    @staticmethod
+    def derive_stats(counts):
+        """📊 Статистика модерации из счетчиков: ожидающие и проценты"""
+        total = counts.get('total') or 0
+        approved = counts.get('approved') or 0
+        suspicious = counts.get('suspicious') or 0
+        return {
+            'total': total,
+            'pending': total - approved,
+            'approved': approved,
+            'suspicious': suspicious,
+            'high_spam': counts.get('high_spam') or 0,
+            'anonymous': counts.get('anonymous') or 0,
+            'approval_rate': round((approved / total) * 100, 1) if total else 0,
+            'spam_rate': round((suspicious / total) * 100, 1) if total else 0,
+        }
+
+    # ==================== ЧТЕНИЕ ====================
+
+    @classmethod
+    def get_stats(cls):
+        """📊 Статистика модерации из строки счетчиков (создается пересчетом при первом чтении)"""
+        counts = cls.objects.filter(pk=cls.SINGLETON_ID).values(*cls.COUNTER_FIELDS).first()
+        if counts is None:
+            counts = cls.recalculate()
+        return cls.derive_stats(counts)
+
+    # ==================== ОБНОВЛЕНИЕ ====================
+
+    @classmethod
+    def apply_review_change(cls, old_state, new_state):
+        """
+        🔄 Переносит вклад отзыва из старого состояния в новое
+
+        Args:
+            old_state: Результат ProductReview.get_counter_state() до изменения (None - отзыва не было)
+            new_state: Результат ProductReview.get_counter_state() после изменения (None - отзыв удален)
+        """
+        deltas = {}
+        for field in cls.COUNTER_FIELDS:
+            delta = (new_state or {}).get(field, 0) - (old_state or {}).get(field, 0)
+            if delta:
+                deltas[field] = F(field) + delta
+        if not deltas:
+            return
+
+        updated = cls.objects.filter(pk=cls.SINGLETON_ID).update(**deltas, updated_at=timezone.now())
+        if not updated:
+            # 🧮 Строки еще нет - пересчет уже учитывает изменение текущей транзакции
+            cls.recalculate()
+
+    @classmethod
+    def recalculate(cls):
+        """
+        🧮 Пересчет счетчиков с нуля одним запросом (после queryset.update() и для сверки)
+
+        Returns:
+            dict: Записанные значения счетчиков
+        """
+        counts = ProductReview.objects.order_by().aggregate(**cls.aggregate_expressions())
+        now = timezone.now()
+        cls.objects.bulk_create(
+            [cls(id=cls.SINGLETON_ID, recalculated_at=now, updated_at=now, **counts)],
+            update_conflicts=True,
+            unique_fields=['id'],
+            update_fields=cls.COUNTER_FIELDS + ['recalculated_at', 'updated_at'],
+        )
+        return counts
+
+    def __str__(self):
+        return f"📊 Отзывов {self.total}, одобрено {self.approved}, подозрительных {self.suspicious}"
+
+    class Meta:
+        verbose_name = "Счетчики модерации"
+        verbose_name_plural = "Счетчики модерации"
+
+
+class SearchDocument(BaseModel):
+    """
+    🔍 Документ поискового индекса (товар, лодочный товар или категория)
+
+    search_text - нормализованный текст для tsvector на PostgreSQL,
+    термины для собственного инвертированного индекса лежат в SearchPosting.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.UUIDField()
+    title = models.CharField(max_length=255, blank=True, verbose_name="Заголовок")
+    search_text = models.TextField(blank=True, verbose_name="Текст для поиска")
+    boost = models.FloatField(default=1.0, verbose_name="Множитель релевантности")
+
+    def __str__(self):
+        return f"{self.content_type.model}: {self.title}"
+
+    class Meta:
+        verbose_name = "Поисковый документ"
+        verbose_name_plural = "Поисковые документы"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id"],
+                name="common_searchdocument_unique_object",
+            ),
+        ]
+
+
+class SearchPosting(models.Model):
+    """🗂️ Запись инвертированного индекса: термин → документ с весом"""
+
+    document = models.ForeignKey(
+        SearchDocument,
+        on_delete=models.CASCADE,
+        related_name='postings',
+        verbose_name="Документ"
+    )
+    term = models.CharField(max_length=64, verbose_name="Термин")
+    weight = models.FloatField(default=1.0, verbose_name="Вес")
+
+    def __str__(self):
+        return f"{self.term} → {self.document_id} ({self.weight:.2f})"
+
+    class Meta:
+        verbose_name = "Термин индекса"
+        verbose_name_plural = "Термины индекса"
+        indexes = [
+            models.Index(fields=["term", "document"], name="common_posting_term_doc_idx"),
+        ]
+
+
+class ProductRecommendation(models.Model):
+    """
+    🤝 Предрассчитанная рекомендация «с этим товаром покупают»
+
+    Для каждого товара (авто или лодки) хранится top-N соседей по совместным
+    покупкам; недостающие места добиваются товарами той же категории.
+    Таблица целиком пересобирается командой rebuild_recommendations.
+    """
+
+    REASON_CHOICES = [
+        ('copurchase', 'Совместные покупки'),
+        ('category', 'Та же категория'),
+    ]
+
+    source_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+    source_id = models.UUIDField(verbose_name="ID товара")
+    target_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+    target_id = models.UUIDField(verbose_name="ID рекомендуемого товара")
+    rank = models.PositiveSmallIntegerField(verbose_name="Позиция")
+    score = models.FloatField(default=0.0, verbose_name="Сила связи")
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, default='copurchase', verbose_name="Источник")
+
+    def __str__(self):
+        return f"{self.source_type_id}:{self.source_id} → {self.target_type_id}:{self.target_id} (#{self.rank})"
+
+    class Meta:
+        verbose_name = "Рекомендация товара"
+        verbose_name_plural = "Рекомендации товаров"
+        ordering = ["rank"]
+        constraints = [
+            # 🔍 Уникальность заодно дает индекс для чтения одним запросом
+            models.UniqueConstraint(
+                fields=["source_type", "source_id", "rank"],
+                name="common_recommendation_unique_rank",
+            ),
+        ]
+
+
 class AdminReply(BaseModel):
     """💬 Ответы администраторов на отзывы"""
 
@@ -443,3 +934,231 @@ class AdminReply(BaseModel):
         ordering = ['-reply_date']
 
 
+
+
+class DeletionLog(BaseModel):
+    """
+    🪦 Журнал удалений для ленты изменений (common/change_feed.py)
+
+    Заполняется сигналами post_delete товаров, категорий и комплектаций:
+    подписчики ленты получают «надгробия» удаленных объектов.
+    created_at - момент удаления (курсор ленты).
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.UUIDField(verbose_name="ID удаленного объекта")
+    object_key = models.CharField(max_length=255, blank=True, verbose_name="Внешний ключ (SKU, код, слаг)")
+
+    def __str__(self):
+        return f"{self.content_type.model}: {self.object_key or self.object_id}"
+
+    class Meta:
+        verbose_name = "Удаленный объект"
+        verbose_name_plural = "Журнал удалений"
+        indexes = [
+            models.Index(fields=["created_at", "uid"], name="common_deletionlog_feed_idx"),
+        ]
+
+
+class SpamTerm(BaseModel):
+    """
+    🚫 Спам-слово, управляемое из админки (дополняет SPAM_DETECTION['SPAM_WORDS'])
+
+    Все активные слова компилируются в автомат common/spam_lexicon.py;
+    изменение списка сбрасывает версию словаря, автомат пересобирается при следующей проверке.
+    Звездочка в конце (кредит*) - совпадение по основе: кредиты, кредитов.
+    """
+
+    term = models.CharField(max_length=200, unique=True, verbose_name="Слово или фраза")
+    weight = models.FloatField(default=10.0, verbose_name="Вес (баллы спама)")
+    is_active = models.BooleanField(default=True, verbose_name="Активно")
+
+    def __str__(self):
+        return f"{self.term} ({self.weight:g})"
+
+    class Meta:
+        verbose_name = "Спам-слово"
+        verbose_name_plural = "Спам-слова"
+        ordering = ["term"]
+
+
+class ReviewFingerprint(models.Model):
+    """
+    🧬 MinHash-подпись текста отзыва для поиска почти-дубликатов (common/review_index.py)
+
+    Сигнатура - 64 минимума по символьным 5-граммам нормализованного текста,
+    полосы сигнатуры разложены по корзинам LSH в ReviewLSHBucket.
+    content_hash позволяет не пересчитывать подпись при сохранении без правки текста.
+    """
+
+    review = models.OneToOneField(
+        ProductReview,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='fingerprint',
+        verbose_name="Отзыв"
+    )
+    signature = models.BinaryField(verbose_name="MinHash-сигнатура")
+    content_hash = models.CharField(max_length=40, verbose_name="Хэш нормализованного текста")
+    shingle_count = models.PositiveIntegerField(default=0, verbose_name="Число шинглов")
+
+    def __str__(self):
+        return f"🧬 {self.review_id} ({self.shingle_count} шинглов)"
+
+    class Meta:
+        verbose_name = "Подпись отзыва"
+        verbose_name_plural = "Подписи отзывов"
+
+
+class ReviewLSHBucket(models.Model):
+    """🪣 Корзина LSH: хэш полосы MinHash-сигнатуры → подпись отзыва"""
+
+    fingerprint = models.ForeignKey(
+        ReviewFingerprint,
+        on_delete=models.CASCADE,
+        related_name='buckets',
+        verbose_name="Подпись"
+    )
+    bucket = models.BigIntegerField(verbose_name="Хэш полосы")
+
+    def __str__(self):
+        return f"{self.bucket} → {self.fingerprint_id}"
+
+    class Meta:
+        verbose_name = "Корзина LSH"
+        verbose_name_plural = "Корзины LSH"
+        indexes = [
+            models.Index(fields=["bucket", "fingerprint"], name="common_lsh_bucket_idx"),
+        ]
+
+
+class IPRange(BaseModel):
+    """
+    🌐 Диапазон IP для блокировки и репутации (VPN, хостинг, Tor, прокси)
+
+    Дополняет SPAM_DETECTION['BLOCKED_IPS'] и settings.IP_REPUTATION;
+    все источники компилируются в префиксное дерево common/ip_ranges.py.
+    """
+
+    CATEGORY_CHOICES = [
+        ('blocked', '🚫 Блокировка'),
+        ('tor', '🧅 Tor'),
+        ('proxy', '🔀 Прокси'),
+        ('vpn', '🔒 VPN'),
+        ('hosting', '🖥️ Хостинг / дата-центр'),
+        ('private', '🏠 Частная сеть'),
+        ('other', '❓ Другое'),
+    ]
+
+    network = models.CharField(max_length=64, unique=True, verbose_name="Сеть (CIDR) или адрес")
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='blocked', verbose_name="Категория")
+    weight = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name="Вес (баллы репутации)",
+        help_text="Пусто - вес категории по умолчанию"
+    )
+    note = models.CharField(max_length=255, blank=True, verbose_name="Примечание")
+    is_active = models.BooleanField(default=True, verbose_name="Активен")
+
+    def __str__(self):
+        return f"{self.network} ({self.get_category_display()})"
+
+    def clean(self):
+        """✅ Сеть должна разбираться как IPv4/IPv6 адрес или CIDR"""
+        import ipaddress
+        from django.core.exceptions import ValidationError
+
+        try:
+            self.network = str(ipaddress.ip_network(self.network.strip(), strict=False))
+        except ValueError:
+            raise ValidationError({'network': "Некорректная сеть: ожидается адрес или CIDR (203.0.113.0/24, 2001:db8::/32)"})
+
+    class Meta:
+        verbose_name = "Диапазон IP"
+        verbose_name_plural = "Диапазоны IP"
+        ordering = ["category", "network"]
+
+
+class ReviewDailyStat(models.Model):
+    """📈 Дневная сводка отзывов: число по оценке и статусу модерации (common/rollups.py)"""
+
+    day = models.DateField(verbose_name="День")
+    stars = models.PositiveSmallIntegerField(verbose_name="Оценка")
+    is_approved = models.BooleanField(verbose_name="Одобрен")
+    reviews = models.PositiveIntegerField(default=0, verbose_name="Отзывов")
+    anonymous = models.PositiveIntegerField(default=0, verbose_name="Анонимных")
+    built_at = models.DateTimeField(verbose_name="Собрано")
+
+    def __str__(self):
+        return f"📈 {self.day}: {self.stars}⭐ {'✅' if self.is_approved else '⏳'} - {self.reviews}"
+
+    class Meta:
+        verbose_name = "Сводка отзывов за день"
+        verbose_name_plural = "Сводки отзывов по дням"
+        ordering = ["day", "stars", "is_approved"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "stars", "is_approved"],
+                name="common_reviewdailystat_unique_key",
+            ),
+        ]
+
+
+class OrderDailyStat(models.Model):
+    """📈 Дневная сводка заказов: число и выручка по способу доставки и статусу оплаты"""
+
+    day = models.DateField(verbose_name="День")
+    delivery_method = models.CharField(max_length=20, verbose_name="Способ доставки")
+    payment_status = models.CharField(max_length=20, verbose_name="Статус оплаты")
+    orders = models.PositiveIntegerField(default=0, verbose_name="Заказов")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Итого к оплате")
+    items_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Стоимость товаров")
+    with_coupon = models.PositiveIntegerField(default=0, verbose_name="С купоном")
+    built_at = models.DateTimeField(verbose_name="Собрано")
+
+    def __str__(self):
+        return f"📈 {self.day}: {self.delivery_method}/{self.payment_status} - {self.orders} ({self.revenue})"
+
+    class Meta:
+        verbose_name = "Сводка заказов за день"
+        verbose_name_plural = "Сводки заказов по дням"
+        ordering = ["day", "delivery_method", "payment_status"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "delivery_method", "payment_status"],
+                name="common_orderdailystat_unique_key",
+            ),
+        ]
+
+
+class SpamDailyStat(models.Model):
+    """📈 Дневная сводка спам-проверок: отзывы по уровню спам-оценки (как ProductReview.get_spam_level)"""
+
+    LEVEL_CHOICES = [
+        ('minimal', 'Минимальный'),
+        ('low', 'Низкий'),
+        ('medium', 'Средний'),
+        ('high', 'Высокий'),
+    ]
+
+    day = models.DateField(verbose_name="День")
+    level = models.CharField(max_length=10, choices=LEVEL_CHOICES, verbose_name="Уровень спама")
+    reviews = models.PositiveIntegerField(default=0, verbose_name="Отзывов")
+    suspicious = models.PositiveIntegerField(default=0, verbose_name="Подозрительных")
+    score_sum = models.FloatField(default=0.0, verbose_name="Сумма спам-оценок")
+    built_at = models.DateTimeField(verbose_name="Собрано")
+
+    def __str__(self):
+        return f"📈 {self.day}: {self.level} - {self.reviews} (🚨 {self.suspicious})"
+
+    class Meta:
+        verbose_name = "Сводка спама за день"
+        verbose_name_plural = "Сводки спама по дням"
+        ordering = ["day", "level"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "level"],
+                name="common_spamdailystat_unique_key",
+            ),
+        ]
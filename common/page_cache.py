@@ -0,0 +1,274 @@
+# 📁 common/page_cache.py
+# 🗄️ Кэш страниц и фрагментов с тегами зависимостей
+# 🏷️ Каждая запись помнит версии своих тегов (category:<uid>, product:<uid>, kits, colors ...)
+# 🔄 Инвалидация = увеличение версии тега: все зависящие записи становятся устаревшими за O(1)
+#
+# ⚠️ Версии тегов лежат в кэше по умолчанию. Между воркерами они согласованы
+# только при общем бэкенде (Redis, Memcached, база, файлы - см. CACHES в
+# settings). Кэш процесса (LocMem, он же вариант без CACHES) у каждого воркера
+# свой: инвалидация в одном до других не доходит, поэтому для него время
+# жизни записей ограничено PAGE_CACHE_LOCAL_TIMEOUT.
+
+import hashlib
+import logging
+import time
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# ⏱️ Время жизни страниц по умолчанию (корректность обеспечивают теги, а не таймаут)
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60 * 6)
+
+# ⏱️ Потолок времени жизни, если кэш не общий для воркеров (LocMem): дольше чужие воркеры отдавать старое не будут
+PAGE_CACHE_LOCAL_TIMEOUT = getattr(settings, 'PAGE_CACHE_LOCAL_TIMEOUT', 60 * 15)
+
+TAG_KEY_PREFIX = 'cache_tag:'
+PAGE_KEY_PREFIX = 'tagged_page:'
+FRAGMENT_KEY_PREFIX = 'tagged_fragment:'
+
+# 🏷️ Общие теги
+KITS_TAG = 'kits'
+COLORS_TAG = 'colors'
+PRODUCTS_CATALOG_TAG = 'catalog:products'       # состав общего каталога автоковриков
+BOATS_CATALOG_TAG = 'catalog:boats'             # состав общего каталога лодок
+PRODUCT_CATEGORIES_TAG = 'categories:products'  # список категорий авто (меню, фильтры)
+BOAT_CATEGORIES_TAG = 'categories:boats'        # список категорий лодок
+RECOMMENDATIONS_TAG = 'recommendations'         # таблица рекомендаций пересобрана
+
+# ⭐ Модель товара → тег каталога, в котором он сортируется и фильтруется по рейтингу
+RATING_CATALOG_TAGS = {
+    'products.product': PRODUCTS_CATALOG_TAG,
+    'boats.boatproduct': BOATS_CATALOG_TAG,
+}
+
+# 📋 Заголовки ответа, которые сохраняются вместе с содержимым
+STORED_HEADERS = ('Content-Type', 'Content-Language', 'Vary')
+
+
+def product_tag(uid) -> str:
+    """🏷️ Тег товара (авто или лодки)"""
+    return f'product:{uid}'
+
+
+def category_tag(uid) -> str:
+    """🏷️ Тег категории (авто или лодки)"""
+    return f'category:{uid}'
+
+
+# ==================== ВРЕМЯ ЖИЗНИ ====================
+
+def is_shared_cache() -> bool:
+    """🌐 Кэш по умолчанию общий для всех воркеров (не LocMem и не Dummy)"""
+    from django.core.cache.backends.dummy import DummyCache
+    from django.core.cache.backends.locmem import LocMemCache
+
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_timeout(timeout: Optional[int] = None) -> int:
+    """⏱️ Время жизни записи: запрошенное (или PAGE_CACHE_TIMEOUT), для кэша процесса - не больше PAGE_CACHE_LOCAL_TIMEOUT"""
+    timeout = PAGE_CACHE_TIMEOUT if timeout is None else timeout
+    if is_shared_cache():
+        return timeout
+    return min(timeout, PAGE_CACHE_LOCAL_TIMEOUT)
+
+
+# ==================== ВЕРСИИ ТЕГОВ ====================
+
+def get_tag_versions(tags: Iterable[str]) -> Dict[str, int]:
+    """
+    🔑 Текущие версии тегов одним обращением к кэшу
+
+    Отсутствующие теги получают уникальное стартовое значение: вытеснение
+    ключа из кэша не может вернуть версию, под которой уже лежат записи.
+    """
+    keys = {tag: TAG_KEY_PREFIX + tag for tag in set(tags)}
+    found = cache.get_many(list(keys.values()))
+
+    missing = [tag for tag, key in keys.items() if key not in found]
+    if missing:
+        initial = int(time.time() * 1000)
+        for tag in missing:
+            cache.add(keys[tag], initial, None)
+        found.update(cache.get_many([keys[tag] for tag in missing]))
+
+    return {tag: found.get(key) for tag, key in keys.items()}
+
+
+def _bump_tags(tags: Iterable[str]):
+    for tag in set(tags):
+        key = TAG_KEY_PREFIX + tag
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), None)
+
+
+def invalidate_tags(*tags: str):
+    """
+    🔄 Инвалидирует все страницы и фрагменты с указанными тегами
+
+    Внутри транзакции версия увеличивается после COMMIT - иначе параллельный
+    запрос мог бы успеть закэшировать еще не зафиксированное состояние.
+    """
+    tags = [tag for tag in tags if tag]
+    if not tags:
+        return
+    logger.debug(f"🔄 Инвалидация тегов кэша: {', '.join(sorted(set(tags)))}")
+    transaction.on_commit(lambda: _bump_tags(tags))
+
+
+def invalidate_objects(pairs: Iterable):
+    """
+    🔄 Инвалидация по товарам, заданным парами (content_type_id, object_id)
+
+    Используется при изменении рейтингов: страдают страница товара,
+    листинг его категории и общий каталог (сортировка и фильтр по рейтингу).
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    ids_by_type = {}
+    for content_type_id, object_id in pairs:
+        ids_by_type.setdefault(content_type_id, set()).add(object_id)
+
+    tags = []
+    for content_type_id, object_ids in ids_by_type.items():
+        tags.extend(product_tag(object_id) for object_id in object_ids)
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        if model._meta.label_lower in RATING_CATALOG_TAGS:
+            tags.append(RATING_CATALOG_TAGS[model._meta.label_lower])
+        if not hasattr(model, 'category_id'):
+            continue
+        category_ids = (
+            model.objects.filter(pk__in=object_ids)
+            .order_by()
+            .values_list('category_id', flat=True)
+            .distinct()
+        )
+        tags.extend(category_tag(category_id) for category_id in category_ids if category_id)
+
+    invalidate_tags(*tags)
+
+
+# ==================== ФРАГМЕНТЫ ====================
+
+def get_or_set_fragment(key: str, tags: Iterable[str], builder: Callable, timeout: Optional[int] = None):
+    """
+    🧩 Значение из кэша фрагментов или результат builder() с сохранением
+
+    Args:
+        key: Уникальный ключ фрагмента
+        tags: Теги зависимостей
+        builder: Функция без аргументов, вычисляющая значение (должно сериализоваться)
+        timeout: Время жизни в секундах (по умолчанию PAGE_CACHE_TIMEOUT)
+    """
+    tags = list(tags)
+    versions = get_tag_versions(tags)
+    cache_key = FRAGMENT_KEY_PREFIX + key
+
+    entry = cache.get(cache_key)
+    if entry is not None and entry.get('tags') == versions:
+        return entry['value']
+
+    value = builder()
+    cache.set(cache_key, {'tags': versions, 'value': value}, get_timeout(timeout))
+    return value
+
+
+# ==================== СТРАНИЦЫ ====================
+
+def _has_messages(request) -> bool:
+    storage = getattr(request, '_messages', None)
+    return storage is not None and len(storage) > 0
+
+
+def _is_cacheable_request(request) -> bool:
+    """👤 Кэшируем только анонимные GET/HEAD без флеш-сообщений"""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return False
+    return not _has_messages(request)
+
+
+def _is_cacheable_response(request, response) -> bool:
+    """📄 Ответ не должен содержать ничего, привязанного к посетителю"""
+    if response.status_code != 200 or response.streaming:
+        return False
+    if response.cookies:
+        return False
+    if response.has_header('Cache-Control') and 'private' in response['Cache-Control']:
+        return False
+    # 🔐 Страница с CSRF-токеном привязана к cookie конкретного посетителя
+    if request.META.get('CSRF_COOKIE_NEEDS_UPDATE') or request.META.get('CSRF_COOKIE_USED'):
+        return False
+    return not _has_messages(request)
+
+
+def _page_key(request) -> str:
+    raw = f"{request.get_host()}|{request.get_full_path()}"
+    return PAGE_KEY_PREFIX + hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def tagged_cache_page(tags, timeout: Optional[int] = None):
+    """
+    🗄️ Декоратор кэширования страницы с тегами зависимостей
+
+    Args:
+        tags: Список тегов или функция (request, *args, **kwargs) -> список тегов.
+              Если функция вернула None, страница отдается без кэша.
+        timeout: Время жизни в секундах (по умолчанию PAGE_CACHE_TIMEOUT, см. get_timeout)
+
+    Пример:
+        @tagged_cache_page(tags=[PRODUCTS_CATALOG_TAG, KITS_TAG])
+        def products_catalog(request): ...
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            page_tags: Optional[List[str]] = tags(request, *args, **kwargs) if callable(tags) else list(tags)
+            if page_tags is None:
+                return view_func(request, *args, **kwargs)
+
+            versions = get_tag_versions(page_tags)
+            cache_key = _page_key(request)
+
+            entry = cache.get(cache_key)
+            if entry is not None and entry.get('tags') == versions:
+                response = HttpResponse(entry['content'], status=entry['status'])
+                for header, value in entry['headers'].items():
+                    response[header] = value
+                response['X-Page-Cache'] = 'HIT'
+                return response
+
+            response = view_func(request, *args, **kwargs)
+
+            if hasattr(response, 'render') and callable(response.render):
+                response = response.render()
+
+            if _is_cacheable_response(request, response):
+                cache.set(cache_key, {
+                    'tags': versions,
+                    'status': response.status_code,
+                    'content': response.content,
+                    'headers': {h: response[h] for h in STORED_HEADERS if response.has_header(h)},
+                }, get_timeout(timeout))
+                response['X-Page-Cache'] = 'MISS'
+
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,341 @@
+# 📁 common/pagination.py
+# 📄 Курсорная (keyset) пагинация для каталогов
+# ⚡ Вместо COUNT + растущего OFFSET - WHERE (ключ, uid) > (последний ключ, последний uid)
+# 🗂️ Сортировка по самой колонке (NULL в конце) - под составные индексы (ключ, uid) у товаров
+# 🔐 Токены next/prev непрозрачные и подписанные (django.core.signing)
+
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from django.contrib import messages
+from django.core import signing
+from django.core.paginator import Paginator
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Q
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+CURSOR_SALT = 'common.pagination.cursor'
+
+# 📋 Параметр sort из URL → (поле, по убыванию?, тип значения)
+KEYSET_SORTS = {
+    '-created_at': ('created_at', True, 'datetime'),
+    'newest': ('created_at', True, 'datetime'),
+    'created_at': ('created_at', False, 'datetime'),
+    'oldest': ('created_at', False, 'datetime'),
+    'price': ('price', False, 'int'),
+    '-price': ('price', True, 'int'),
+    'name': ('product_name', False, 'str'),
+    '-name': ('product_name', True, 'str'),
+}
+
+# 📏 Допустимые размеры страницы в курсорном режиме ("all" не поддерживается)
+CURSOR_PER_PAGE_OPTIONS = [12, 24, 48, 96]
+
+# ⏱️ Время жизни закэшированного подсчета для SQLite/MySQL
+ESTIMATED_COUNT_TIMEOUT = 300
+
+
+def supports_keyset(sort_by: str) -> bool:
+    """✅ Можно ли листать курсором при такой сортировке"""
+    return sort_by in KEYSET_SORTS
+
+
+def is_cursor_mode(request) -> bool:
+    """📄 Запрошен ли курсорный режим (?pagination=cursor или наличие ?cursor=)"""
+    return request.GET.get('pagination') == 'cursor' or bool(request.GET.get('cursor'))
+
+
+def get_cursor_per_page(value) -> int:
+    """📏 Размер страницы для курсорного режима"""
+    try:
+        per_page = int(value)
+    except (TypeError, ValueError):
+        return CURSOR_PER_PAGE_OPTIONS[0]
+    return per_page if per_page in CURSOR_PER_PAGE_OPTIONS else CURSOR_PER_PAGE_OPTIONS[0]
+
+
+class KeysetPage:
+    """
+    📄 Страница курсорной пагинации
+
+    Повторяет часть интерфейса django.core.paginator.Page (object_list,
+    has_next, has_previous), номеров страниц и общего количества нет.
+    """
+
+    paginator = None
+
+    def __init__(self, object_list: List, next_cursor: Optional[str], prev_cursor: Optional[str],
+                 estimated_count: Optional[int] = None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.estimated_count = estimated_count
+
+    def has_next(self) -> bool:
+        return bool(self.next_cursor)
+
+    def has_previous(self) -> bool:
+        return bool(self.prev_cursor)
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _ordering(field: str, descending: bool, nulls_last: bool = True) -> List:
+    """🔑 Порядок просмотра: ключ (NULL в конце или в начале) и uid для однозначности"""
+    nulls = {'nulls_last': True} if nulls_last else {'nulls_first': True}
+    if descending:
+        return [F(field).desc(**nulls), F('uid').desc()]
+    return [F(field).asc(**nulls), F('uid').asc()]
+
+
+def keyset_ordering(sort_by: str) -> List:
+    """🔀 order_by для обычной пагинации с тем же порядком, что и у курсора"""
+    field, descending, _ = KEYSET_SORTS[sort_by]
+    return _ordering(field, descending)
+
+
+def _after_position(field: str, lookup: str, value, uid, nulls_after: bool) -> Q:
+    """
+    ➡️ Условие «строка идет после позиции (value, uid)» в порядке просмотра
+
+    lookup - сравнение в направлении просмотра ('gt' или 'lt'),
+    nulls_after - NULL-ключи идут после всех значений (прямой просмотр) или до них (обратный).
+    """
+    if value is None:
+        same_null = Q(**{f'{field}__isnull': True, f'uid__{lookup}': uid})
+        return same_null if nulls_after else same_null | Q(**{f'{field}__isnull': False})
+
+    after = Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'uid__{lookup}': uid})
+    return (after | Q(**{f'{field}__isnull': True})) if nulls_after else after
+
+
+def _serialize_value(value, value_type: str):
+    if value is None:
+        return None
+    if value_type == 'datetime':
+        return value.isoformat()
+    return value
+
+
+def _deserialize_value(value, value_type: str):
+    if value_type == 'datetime':
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+        if parsed is None:
+            raise ValueError('Некорректная дата в курсоре')
+        return parsed
+    if value is None:
+        return None
+    if value_type == 'int':
+        return int(value)
+    return str(value)
+
+
+def encode_cursor(sort_by: str, value, uid, direction: str) -> str:
+    """🔐 Упаковывает позицию в непрозрачный подписанный токен"""
+    _, _, value_type = KEYSET_SORTS[sort_by]
+    return signing.dumps(
+        {'s': sort_by, 'v': _serialize_value(value, value_type), 'u': str(uid), 'd': direction},
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(token: str, sort_by: str) -> Optional[Tuple[object, str, str]]:
+    """
+    🔓 Распаковывает токен
+
+    Returns:
+        Tuple: (значение ключа, uid, направление 'n'/'p') или None для некорректного/чужого токена
+    """
+    if not token:
+        return None
+    try:
+        payload = signing.loads(token, salt=CURSOR_SALT)
+        if payload.get('s') != sort_by or payload.get('d') not in ('n', 'p'):
+            return None
+        _, _, value_type = KEYSET_SORTS[sort_by]
+        return _deserialize_value(payload.get('v'), value_type), payload['u'], payload['d']
+    except (signing.BadSignature, ValueError, KeyError, TypeError):
+        logger.debug(f"⚠️ Некорректный курсор пагинации: {token[:40]}")
+        return None
+
+
+def estimate_count(queryset) -> int:
+    """
+    📊 Приблизительное количество строк без точного COUNT
+
+    PostgreSQL: оценка планировщика из EXPLAIN (бесплатно, без сканирования).
+    Остальные БД: точный COUNT, закэшированный на несколько минут по тексту запроса.
+    """
+    queryset = queryset.order_by()
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except Exception:
+        return queryset.count()
+
+    if connection.vendor == 'postgresql':
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]['Plan']['Plan Rows'])
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось получить оценку количества: {e}")
+
+    cache_key = 'estimated_count_' + hashlib.md5(
+        f"{sql}|{params}".encode('utf-8')
+    ).hexdigest()
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, ESTIMATED_COUNT_TIMEOUT)
+    return count
+
+
+def keyset_paginate(queryset, sort_by: str, cursor: Optional[str] = None, per_page: int = 12,
+                    with_estimated_count: bool = False) -> KeysetPage:
+    """
+    📄 Возвращает страницу курсорной пагинации
+
+    Стоимость любой страницы одинакова: индексный поиск по (ключ, uid) + LIMIT.
+    Товары без значения ключа (цена NULL) идут в конце в обоих направлениях.
+
+    Args:
+        queryset: QuerySet товаров (без сортировки или с любой - будет заменена)
+        sort_by: Параметр сортировки из KEYSET_SORTS
+        cursor: Токен next/prev из предыдущего ответа (None - первая страница)
+        per_page: Размер страницы
+        with_estimated_count: Добавить приблизительное общее количество
+
+    Returns:
+        KeysetPage
+    """
+    field, descending, _ = KEYSET_SORTS[sort_by]
+    position = decode_cursor(cursor, sort_by)
+
+    estimated = estimate_count(queryset) if with_estimated_count else None
+
+    forward = position is None or position[2] == 'n'
+    # Назад листаем «против шерсти»: обратный порядок + обращение результата
+    reverse_scan = descending if forward else not descending
+    lookup = 'lt' if reverse_scan else 'gt'
+
+    if position is not None:
+        value, uid, _ = position
+        queryset = queryset.filter(_after_position(field, lookup, value, uid, nulls_after=forward))
+
+    # При обратном просмотре NULL-ключи (они в конце листинга) оказываются в начале
+    rows = list(queryset.order_by(*_ordering(field, reverse_scan, nulls_last=forward))[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if not forward:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        first, last = rows[0], rows[-1]
+        if (forward and has_more) or (not forward):
+            next_cursor = encode_cursor(sort_by, getattr(last, field), last.uid, 'n')
+        if (forward and position is not None) or (not forward and has_more):
+            prev_cursor = encode_cursor(sort_by, getattr(first, field), first.uid, 'p')
+
+    return KeysetPage(rows, next_cursor, prev_cursor, estimated)
+
+
+def paginate_catalog(request, queryset, sort_by: str, per_page: str) -> Dict:
+    """
+    📄 Пагинация листинга каталога: классическая или курсорная
+
+    Курсорный режим включается параметром ?pagination=cursor (или ?cursor=...)
+    и работает для сортировок из KEYSET_SORTS. ?count=estimated добавляет
+    приблизительное количество товаров вместо точного COUNT.
+
+    Returns:
+        Dict: page_obj, products, total_products, current_page, total_pages, cursor_page
+    """
+    # 🪶 Карточкам не нужно описание - не тянем тяжелый HTML из БД
+    if any(field.name == 'product_desription' for field in queryset.model._meta.fields):
+        queryset = queryset.defer('product_desription')
+
+    # 🔍 Выдача поиска упорядочена по релевантности - курсор по ключу к ней не применим
+    ranked = 'search_rank' in queryset.query.annotations
+
+    if is_cursor_mode(request) and supports_keyset(sort_by) and not ranked:
+        cursor_page = keyset_paginate(
+            queryset,
+            sort_by,
+            cursor=request.GET.get('cursor'),
+            per_page=get_cursor_per_page(per_page),
+            with_estimated_count=request.GET.get('count') == 'estimated',
+        )
+        return {
+            'page_obj': cursor_page,
+            'products': cursor_page.object_list,
+            'total_products': cursor_page.estimated_count,
+            'current_page': None,
+            'total_pages': None,
+            'cursor_page': cursor_page,
+        }
+
+    if per_page == "all":
+        total_products = queryset.count()
+        if total_products > 500:
+            messages.warning(request, f"Показано первые 500 из {total_products} товаров.")
+            per_page_num = 500
+        else:
+            per_page_num = total_products or 1
+    else:
+        try:
+            per_page_num = int(per_page)
+            if per_page_num not in [12, 24, 48, 96]:
+                per_page_num = 12
+        except (ValueError, TypeError):
+            per_page_num = 12
+
+    paginator = Paginator(queryset, per_page_num)
+    page_obj = paginator.get_page(request.GET.get("page"))
+
+    return {
+        'page_obj': page_obj,
+        'products': page_obj.object_list,
+        'total_products': paginator.count,
+        'current_page': page_obj.number,
+        'total_pages': paginator.num_pages,
+        'cursor_page': None,
+    }
+
+
+def render_cursor_fragment(request, template_name: str, cursor_page: KeysetPage,
+                           extra_context: Optional[Dict] = None) -> JsonResponse:
+    """
+    🧩 JSON-фрагмент следующей порции карточек для бесконечной прокрутки
+
+    Returns:
+        JsonResponse: {'success', 'html', 'next_cursor', 'has_next'}
+    """
+    context = {'products': cursor_page.object_list}
+    if extra_context:
+        context.update(extra_context)
+    return JsonResponse({
+        'success': True,
+        'html': render_to_string(template_name, context, request=request),
+        'next_cursor': cursor_page.next_cursor,
+        'has_next': cursor_page.has_next(),
+    })
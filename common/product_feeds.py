@@ -0,0 +1,447 @@
+# 📁 common/product_feeds.py
+# 🛒 Фиды товаров для маркетплейсов: Яндекс YML и Google Merchant (RSS 2.0)
+# 📋 Товары авто и лодок: цена, главное фото, дерево категорий, наличие
+# 💾 Готовый фид - gzip-снимок на диске; URL фида отдает файл без запросов к БД (ETag/304)
+#
+# Пересборка инкрементальная. Отпечаток предложения - updated_at товара, путь
+# главного фото, цепочка его категорий и цена комплектации "Салон". Полные данные
+# (описание, артикул) загружаются и XML перерисовывается только для предложений
+# с изменившимся отпечатком, остальные фрагменты берутся из хранилища прошлой
+# сборки. Если не изменилось ничего, снимок не переписывается и ETag остается прежним.
+
+import gzip
+import hashlib
+import html
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import Dict, Iterable, List, Optional
+
+from xml.sax.saxutils import XMLGenerator
+
+from django.apps import apps
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+logger = logging.getLogger(__name__)
+
+# 📁 Каталог снимков и хранилищ фрагментов
+FEEDS_DIR = getattr(settings, 'PRODUCT_FEEDS_DIR', os.path.join(settings.BASE_DIR, 'feeds'))
+
+# 🌐 Адрес сайта для абсолютных ссылок (по умолчанию - домен из настроек писем)
+SITE_URL = getattr(
+    settings, 'PRODUCT_FEED_SITE_URL',
+    f"{getattr(settings, 'DEFAULT_HTTP_PROTOCOL', 'https')}://{getattr(settings, 'DEFAULT_DOMAIN', 'localhost')}",
+).rstrip('/')
+
+SHOP_NAME = getattr(settings, 'PRODUCT_FEED_SHOP_NAME', 'EVA коврики')
+COMPANY_NAME = getattr(settings, 'PRODUCT_FEED_COMPANY', SHOP_NAME)
+CURRENCY = getattr(settings, 'PRODUCT_FEED_CURRENCY', 'BYN')
+
+# 📏 Ограничение описания (YML - 3000 символов, Google - 5000)
+DESCRIPTION_LIMIT = 3000
+
+# 📦 Товаров в одном запросе полных данных
+LOAD_CHUNK_SIZE = 500
+
+# 🔢 Версия разметки фрагментов: увеличение перерисовывает все предложения
+FRAGMENT_VERSION = 1
+
+# 📋 Форматы фидов: имя → название
+FEED_FORMATS = {
+    'yml': 'Яндекс YML',
+    'google': 'Google Merchant',
+}
+
+GOOGLE_NS = 'http://base.google.com/ns/1.0'
+
+# 📋 Каталоги товаров: ключ → (модель товара, модель категории, модель фото, имя URL страницы товара)
+FEED_CATALOGS = {
+    'product': ('products.Product', 'products.Category', 'products.ProductImage', 'get_product'),
+    'boat': ('boats.BoatProduct', 'boats.BoatCategory', 'boats.BoatProductImage', 'boats:product_detail'),
+}
+
+# 📋 Поля товара, нужные для разметки предложения
+OFFER_FIELDS = [
+    'uid', 'product_name', 'product_sku', 'slug', 'price', 'category_id',
+    'main_image', 'product_desription', 'meta_description',
+]
+
+
+class FeedError(ValueError):
+    """❌ Неизвестный формат фида"""
+
+
+# ==================== ПУТИ ====================
+
+def feed_path(feed: str) -> str:
+    """📁 Путь gzip-снимка фида"""
+    if feed not in FEED_FORMATS:
+        raise FeedError(f"Неизвестный фид: {feed}")
+    return os.path.join(FEEDS_DIR, f'{feed}.xml.gz')
+
+
+def _store_path(feed: str) -> str:
+    return os.path.join(FEEDS_DIR, f'{feed}.offers.json.gz')
+
+
+def _absolute_url(url: str) -> str:
+    if url.startswith(('http://', 'https://')):
+        return url
+    if url.startswith('//'):
+        return f'https:{url}'
+    return f'{SITE_URL}{url}'
+
+
+# ==================== КАТЕГОРИИ ====================
+
+def _category_id(uid) -> str:
+    """🔢 Числовой id категории (YML требует целое число до 18 знаков) - стабилен между сборками"""
+    return str(int(uid.hex[:14], 16))
+
+
+def load_categories() -> Dict[tuple, Dict]:
+    """
+    📂 Категории обоих каталогов с путями в дереве
+
+    Returns:
+        Dict: (каталог, uid категории) → {id, parent_id, name, path, active}
+    """
+    nodes = {}
+    for catalog, (_, category_label, _, _) in FEED_CATALOGS.items():
+        model = apps.get_model(category_label)
+        has_parent = any(field.name == 'parent' for field in model._meta.fields)
+        values = ['uid', 'category_name', 'is_active'] + (['parent_id'] if has_parent else [])
+        for item in model._default_manager.order_by('display_order', 'category_name', 'uid').values(*values):
+            parent = item.get('parent_id')
+            nodes[(catalog, item['uid'])] = {
+                'id': _category_id(item['uid']),
+                'parent_key': (catalog, parent) if parent else None,
+                'name': item['category_name'],
+                'own_active': item['is_active'],
+            }
+
+    for node in nodes.values():
+        # 🌳 Путь от корня; неактивный предок скрывает ветку целиком
+        path, active, seen, current = [], True, set(), node
+        while current is not None and id(current) not in seen:
+            seen.add(id(current))
+            path.insert(0, current['name'])
+            active = active and current['own_active']
+            current = nodes.get(current['parent_key'])
+        node['path'] = path
+        node['active'] = active
+        parent = nodes.get(node['parent_key'])
+        node['parent_id'] = parent['id'] if parent else None
+    return nodes
+
+
+def _category_signature(category: Optional[Dict]) -> str:
+    if category is None:
+        return ''
+    return json.dumps([category['id'], category['path'], category['active']], ensure_ascii=False)
+
+
+# ==================== ОТПЕЧАТКИ ====================
+
+def _base_prices() -> Dict[str, Optional[float]]:
+    """💰 Цена комплектации "Салон" - витринная цена автоковриков (как Product.get_salon_price)"""
+    KitVariant = apps.get_model('products.KitVariant')
+    salon = KitVariant.objects.filter(code='salon').values_list('price_modifier', flat=True).first()
+    return {'product': float(salon) if salon is not None else None, 'boat': None}
+
+
+def _iter_stamps(categories: Dict[tuple, Dict], base_prices: Dict) -> Iterable[tuple]:
+    """🔍 Легкий проход по всем товарам: (ключ предложения, каталог, uid, отпечаток)"""
+    for catalog, (product_label, _, _, _) in FEED_CATALOGS.items():
+        model = apps.get_model(product_label)
+        rows = (
+            model._default_manager.order_by('product_name', 'uid')
+            .values_list('uid', 'updated_at', 'main_image', 'category_id')
+            .iterator(chunk_size=2000)
+        )
+        for uid, updated_at, main_image, category_id in rows:
+            source = '|'.join([
+                str(FRAGMENT_VERSION), SITE_URL, CURRENCY, updated_at.isoformat(), main_image or '',
+                _category_signature(categories.get((catalog, category_id))), str(base_prices[catalog]),
+            ])
+            yield f'{catalog}:{uid}', catalog, uid, hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
+def _load_offers(catalog: str, uids: List) -> Dict:
+    """📦 Полные данные только изменившихся товаров"""
+    model = apps.get_model(FEED_CATALOGS[catalog][0])
+    loaded = {}
+    for start in range(0, len(uids), LOAD_CHUNK_SIZE):
+        chunk = uids[start:start + LOAD_CHUNK_SIZE]
+        for item in model._default_manager.filter(uid__in=chunk).values(*OFFER_FIELDS):
+            loaded[item['uid']] = item
+    return loaded
+
+
+# ==================== РАЗМЕТКА ====================
+
+def _plain_description(item: Dict) -> str:
+    """📝 Описание без HTML (из CKEditor), с запасным meta_description"""
+    text = html.unescape(strip_tags(item.get('product_desription') or ''))
+    text = re.sub(r'\s+', ' ', text).strip() or (item.get('meta_description') or '').strip()
+    if len(text) > DESCRIPTION_LIMIT:
+        text = text[:DESCRIPTION_LIMIT - 1].rstrip() + '…'
+    return text
+
+
+def build_offer(catalog: str, item: Dict, category: Optional[Dict], base_price: Optional[float]) -> Optional[Dict]:
+    """
+    🛍️ Нормализованное предложение для обоих форматов
+
+    Returns:
+        Dict или None: товар без адреса страницы или без цены в фид не попадает
+    """
+    price = base_price if base_price is not None else item['price']
+    if not item['slug'] or not price or price <= 0:
+        return None
+
+    _, _, image_label, url_name = FEED_CATALOGS[catalog]
+    picture = ''
+    if item['main_image']:
+        image_model = apps.get_model(image_label)
+        picture = _absolute_url(image_model._meta.get_field('image').storage.url(item['main_image']))
+
+    return {
+        'id': f"{catalog[0]}{item['uid'].hex[:19]}",
+        'sku': item['product_sku'] or '',
+        'name': item['product_name'],
+        'url': _absolute_url(reverse(url_name, kwargs={'slug': item['slug']})),
+        'price': f'{price:.2f}',
+        'picture': picture,
+        'description': _plain_description(item),
+        'category_id': category['id'] if category else '',
+        'category_path': ' > '.join(category['path']) if category else '',
+        'available': bool(category and category['active']),
+    }
+
+
+def _element(writer: XMLGenerator, name: str, text: str = '', attrs: Optional[Dict] = None):
+    writer.startElement(name, attrs or {})
+    if text:
+        writer.characters(text)
+    writer.endElement(name)
+
+
+def render_offer(feed: str, offer: Dict) -> str:
+    """🧩 XML-фрагмент одного предложения (<offer> для YML, <item> для Google)"""
+    buffer = io.StringIO()
+    writer = XMLGenerator(buffer, encoding='utf-8', short_empty_elements=True)
+
+    if feed == 'yml':
+        writer.startElement('offer', {'id': offer['id'], 'available': 'true' if offer['available'] else 'false'})
+        _element(writer, 'url', offer['url'])
+        _element(writer, 'price', offer['price'])
+        _element(writer, 'currencyId', CURRENCY)
+        if offer['category_id']:
+            _element(writer, 'categoryId', offer['category_id'])
+        if offer['picture']:
+            _element(writer, 'picture', offer['picture'])
+        _element(writer, 'name', offer['name'])
+        if offer['sku']:
+            _element(writer, 'vendorCode', offer['sku'])
+        if offer['description']:
+            _element(writer, 'description', offer['description'])
+        writer.endElement('offer')
+    else:
+        writer.startElement('item', {})
+        _element(writer, 'g:id', offer['id'])
+        _element(writer, 'g:title', offer['name'])
+        _element(writer, 'g:description', offer['description'] or offer['name'])
+        _element(writer, 'g:link', offer['url'])
+        if offer['picture']:
+            _element(writer, 'g:image_link', offer['picture'])
+        _element(writer, 'g:price', f"{offer['price']} {CURRENCY}")
+        _element(writer, 'g:availability', 'in_stock' if offer['available'] else 'out_of_stock')
+        _element(writer, 'g:condition', 'new')
+        if offer['category_path']:
+            _element(writer, 'g:product_type', offer['category_path'])
+        if offer['sku']:
+            _element(writer, 'g:mpn', offer['sku'])
+        _element(writer, 'g:identifier_exists', 'no')
+        writer.endElement('item')
+
+    writer.ignorableWhitespace('\n')
+    return buffer.getvalue()
+
+
+def _write_snapshot(feed: str, categories: Dict[tuple, Dict], fragments: Iterable[str]):
+    """
+    💾 Потоковая запись фида в gzip: заголовок и категории - XMLGenerator,
+    предложения - готовыми фрагментами. Файл заменяется атомарно.
+    """
+    os.makedirs(FEEDS_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=FEEDS_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw, \
+                gzip.GzipFile(filename='', fileobj=raw, mode='wb', mtime=0) as compressed, \
+                io.TextIOWrapper(compressed, encoding='utf-8') as out:
+            # ✍️ Без коротких пустых тегов: между вызовами генератора нет отложенной разметки
+            writer = XMLGenerator(out, encoding='utf-8', short_empty_elements=False)
+            writer.startDocument()
+
+            if feed == 'yml':
+                writer.startElement('yml_catalog', {'date': timezone.localtime().isoformat(timespec='minutes')})
+                writer.startElement('shop', {})
+                _element(writer, 'name', SHOP_NAME)
+                _element(writer, 'company', COMPANY_NAME)
+                _element(writer, 'url', f'{SITE_URL}/')
+                writer.startElement('currencies', {})
+                _element(writer, 'currency', attrs={'id': CURRENCY, 'rate': '1'})
+                writer.endElement('currencies')
+                writer.ignorableWhitespace('\n')
+                writer.startElement('categories', {})
+                for category in categories.values():
+                    attrs = {'id': category['id']}
+                    if category['parent_id']:
+                        attrs['parentId'] = category['parent_id']
+                    _element(writer, 'category', category['name'], attrs)
+                    writer.ignorableWhitespace('\n')
+                writer.endElement('categories')
+                writer.ignorableWhitespace('\n')
+                writer.startElement('offers', {})
+                writer.ignorableWhitespace('\n')
+                for fragment in fragments:
+                    out.write(fragment)
+                writer.endElement('offers')
+                writer.endElement('shop')
+                writer.endElement('yml_catalog')
+            else:
+                writer.startElement('rss', {'version': '2.0', 'xmlns:g': GOOGLE_NS})
+                writer.startElement('channel', {})
+                _element(writer, 'title', SHOP_NAME)
+                _element(writer, 'link', f'{SITE_URL}/')
+                _element(writer, 'description', COMPANY_NAME)
+                writer.ignorableWhitespace('\n')
+                for fragment in fragments:
+                    out.write(fragment)
+                writer.endElement('channel')
+                writer.endElement('rss')
+
+            writer.ignorableWhitespace('\n')
+            writer.endDocument()
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, feed_path(feed))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+# ==================== ХРАНИЛИЩЕ ФРАГМЕНТОВ ====================
+
+def _load_store(feed: str) -> Dict:
+    """📂 Фрагменты прошлой сборки: {digest, offers: {ключ: [отпечаток, фрагмент]}}"""
+    try:
+        with gzip.open(_store_path(feed), 'rt', encoding='utf-8') as store:
+            data = json.load(store)
+    except FileNotFoundError:
+        return {'digest': '', 'offers': {}}
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Хранилище фрагментов фида {feed} повреждено, полная пересборка: {e}")
+        return {'digest': '', 'offers': {}}
+    return data
+
+
+def _save_store(feed: str, data: Dict):
+    os.makedirs(FEEDS_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=FEEDS_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(filename='', fileobj=raw, mode='wb', mtime=0) as store:
+            store.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        os.replace(temp_path, _store_path(feed))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+# ==================== СБОРКА ====================
+
+def build_feeds(feeds: Optional[Iterable[str]] = None, force: bool = False) -> List[Dict]:
+    """
+    🔄 Инкрементальная пересборка фидов
+
+    Args:
+        feeds: Имена фидов (по умолчанию - все FEED_FORMATS)
+        force: Перерисовать все предложения и переписать снимки
+
+    Returns:
+        List[Dict]: Статистика по каждому фиду (offers, rendered, reused, removed, written, size)
+    """
+    feeds = list(feeds or FEED_FORMATS)
+    for feed in feeds:
+        feed_path(feed)
+
+    categories = load_categories()
+    base_prices = _base_prices()
+    stamps = list(_iter_stamps(categories, base_prices))
+    stores = {feed: {'digest': '', 'offers': {}} if force else _load_store(feed) for feed in feeds}
+
+    # 🔍 Изменившиеся предложения - объединение по всем фидам, данные грузим один раз
+    changed = {}
+    for key, catalog, uid, fingerprint in stamps:
+        if any(stores[feed]['offers'].get(key, [None])[0] != fingerprint for feed in feeds):
+            changed.setdefault(catalog, []).append(uid)
+    loaded = {}
+    for catalog, uids in changed.items():
+        loaded.update(_load_offers(catalog, uids))
+
+    results = []
+    for feed in feeds:
+        previous = stores[feed]['offers']
+        offers, rendered = {}, 0
+        for key, catalog, uid, fingerprint in stamps:
+            cached = previous.get(key)
+            if cached and cached[0] == fingerprint:
+                offers[key] = cached
+                continue
+            item = loaded.get(uid)
+            if item is None:
+                # 🗑️ Товар удален между проходами - попадет в следующую сборку
+                continue
+            offer = build_offer(catalog, item, categories.get((catalog, item['category_id'])), base_prices[catalog])
+            offers[key] = [fingerprint, render_offer(feed, offer) if offer else '']
+            rendered += 1
+
+        digest_source = hashlib.sha1()
+        digest_source.update(json.dumps(
+            [feed, SHOP_NAME, COMPANY_NAME, SITE_URL, CURRENCY,
+             [[c['id'], c['parent_id'], c['name']] for c in categories.values()]],
+            ensure_ascii=False,
+        ).encode('utf-8'))
+        for key, (fingerprint, _) in offers.items():
+            digest_source.update(f'{key}:{fingerprint}\n'.encode('utf-8'))
+        digest = digest_source.hexdigest()
+
+        written = force or digest != stores[feed]['digest'] or not os.path.exists(feed_path(feed))
+        if written:
+            _write_snapshot(feed, categories, (fragment for _, fragment in offers.values() if fragment))
+            _save_store(feed, {'digest': digest, 'offers': offers})
+
+        result = {
+            'feed': feed,
+            'offers': sum(1 for _, fragment in offers.values() if fragment),
+            'skipped': sum(1 for _, fragment in offers.values() if not fragment),
+            'rendered': rendered,
+            'reused': len(offers) - rendered,
+            'removed': len(set(previous) - set(offers)),
+            'written': written,
+            'size': os.path.getsize(feed_path(feed)),
+        }
+        logger.info(
+            f"🛒 Фид {feed}: предложений {result['offers']}, перерисовано {rendered}, "
+            f"удалено {result['removed']}, {'снимок обновлен' if written else 'без изменений'}"
+        )
+        results.append(result)
+    return results
@@ -0,0 +1,269 @@
+# 📁 common/product_snapshot.py
+# 📸 Снимок страницы товара (авто и лодки) для get_product и boat_product_detail
+# ⚡ Строится один раз и хранится в кэше в компактной форме (только примитивы)
+# 🔄 Устаревает по тегам product:<uid>, category:<uid> и recommendations (см. common/page_cache.py)
+#
+# В снимок входят: поля товара и категории, изображения, первая страница
+# одобренных отзывов с ответами администраторов, агрегаты рейтинга и
+# рекомендации «с этим товаром покупают» (common/recommendations.py).
+# Комплектации и цвета конфигуратора берутся из процессного реестра
+# products.registry - они и так обходятся без запросов к БД.
+# Для каждого запроса отдельно считаются только in_cart и форма отзыва.
+
+import logging
+from typing import Dict, List, Optional
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import FileField, Prefetch
+from django.urls import reverse
+
+from .page_cache import (
+    RECOMMENDATIONS_TAG, category_tag, get_or_set_fragment, get_timeout, product_tag
+)
+from .recommendations import get_recommendations
+
+logger = logging.getLogger(__name__)
+
+# 🔢 Версия формата: при изменении структуры снимка старые записи игнорируются
+SNAPSHOT_FORMAT = 3
+
+# 📝 Сколько одобренных отзывов хранить в снимке (первая страница)
+SNAPSHOT_REVIEWS_LIMIT = 20
+
+# 🤝 Сколько рекомендаций хранить в снимке
+SNAPSHOT_SIMILAR_LIMIT = 4
+
+# 👤 Поля пользователя, достаточные для вывода автора отзыва
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+
+class ProductSnapshot:
+    """
+    📸 Восстановленный из кэша снимок страницы товара
+
+    Атрибуты совместимы с шаблонами: product - экземпляр модели
+    с подключенной категорией и изображениями, reviews - список отзывов.
+    """
+
+    __slots__ = ('product', 'reviews', 'reviews_count', 'rating_avg', 'similar_products')
+
+    def __init__(self, product, reviews: List, reviews_count: int, rating_avg: float, similar_products: List):
+        self.product = product
+        self.reviews = reviews
+        self.reviews_count = reviews_count
+        self.rating_avg = rating_avg
+        self.similar_products = similar_products
+
+    @property
+    def has_reviews(self) -> bool:
+        return self.reviews_count > 0
+
+    @property
+    def rating_percentage(self) -> float:
+        return (self.rating_avg / 5) * 100 if self.has_reviews else 0
+
+
+# ==================== СЕРИАЛИЗАЦИЯ ====================
+
+def _image_accessor(model) -> str:
+    """🖼️ Имя обратной связи товара с изображениями"""
+    return 'images' if model._meta.label_lower == 'boats.boatproduct' else 'product_images'
+
+
+def _dump(instance, exclude=()) -> Dict:
+    """📦 Значения конкретных полей модели (файлы - только имя)"""
+    values = {}
+    for field in instance._meta.concrete_fields:
+        if field.attname in exclude:
+            continue
+        value = getattr(instance, field.attname)
+        if isinstance(field, FileField):
+            value = value.name if value else ''
+        values[field.attname] = value
+    return values
+
+
+def _detail_url(instance) -> str:
+    """🔗 URL страницы товара (авто или лодки)"""
+    if hasattr(instance, 'get_absolute_url'):
+        return instance.get_absolute_url()
+    return reverse('get_product', kwargs={'slug': instance.slug})
+
+
+def _dump_user(user) -> Optional[Dict]:
+    if user is None:
+        return None
+    return {name: getattr(user, name) for name in USER_FIELDS}
+
+
+def _restore(model, values: Dict):
+    """🔄 Экземпляр модели из сохраненных значений (как после загрузки из БД)"""
+    return model.from_db(DEFAULT_DB_ALIAS, list(values), list(values.values()))
+
+
+def _attach_prefetched(instance, accessor: str, objects: List):
+    """📎 Подключает список как результат prefetch_related (manager.all() без запросов)"""
+    related_model = getattr(type(instance), accessor).rel.related_model
+    queryset = related_model._base_manager.all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    if not hasattr(instance, '_prefetched_objects_cache'):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[accessor] = queryset
+
+
+# ==================== ПОСТРОЕНИЕ ====================
+
+def build_snapshot_data(model, uid) -> Optional[Dict]:
+    """
+    🏗️ Собирает данные снимка из БД
+
+    Returns:
+        Dict из примитивов или None, если товара нет
+    """
+    from .models import AdminReply, ProductRating, ProductReview
+
+    accessor = _image_accessor(model)
+    product = (
+        model.objects.select_related('category')
+        .prefetch_related(accessor)
+        .filter(pk=uid)
+        .first()
+    )
+    if product is None:
+        return None
+
+    content_type = ContentType.objects.get_for_model(model)
+    approved = ProductReview.objects.filter(content_type=content_type, object_id=uid, is_approved=True)
+    reviews = list(
+        approved.select_related('user')
+        .prefetch_related(Prefetch(
+            'admin_replies',
+            queryset=AdminReply.objects.filter(is_published=True).select_related('admin_user'),
+        ))
+        .order_by('-date_added')[:SNAPSHOT_REVIEWS_LIMIT]
+    )
+    rating = ProductRating.objects.filter(content_type=content_type, object_id=uid).first()
+
+    similar = get_recommendations(product, SNAPSHOT_SIMILAR_LIMIT)
+
+    return {
+        'format': SNAPSHOT_FORMAT,
+        'product': _dump(product),
+        'category': _dump(product.category) if product.category_id else None,
+        'images': [_dump(image) for image in getattr(product, accessor).all()],
+        'reviews': [
+            {
+                'review': _dump(review, exclude=('ip_address', 'user_agent')),
+                'user': _dump_user(review.user),
+                'replies': [
+                    {'reply': _dump(reply), 'admin_user': _dump_user(reply.admin_user)}
+                    for reply in review.admin_replies.all()
+                ],
+            }
+            for review in reviews
+        ],
+        'reviews_count': rating.rating_count if rating else 0,
+        'rating_avg': rating.rating_avg if rating else 0.0,
+        'similar': [
+            {
+                'model': item._meta.label_lower,
+                'url': _detail_url(item),
+                'product': _dump(item, exclude=('product_desription',)),
+            }
+            for item in similar
+        ],
+    }
+
+
+def restore_snapshot(model, data: Dict) -> ProductSnapshot:
+    """🔄 Восстанавливает экземпляры моделей из данных снимка без запросов к БД"""
+    from .models import AdminReply, ProductReview
+
+    accessor = _image_accessor(model)
+    image_model = getattr(model, accessor).rel.related_model
+    category_model = model._meta.get_field('category').related_model
+
+    product = _restore(model, data['product'])
+    if data['category'] is not None:
+        product.category = _restore(category_model, data['category'])
+    _attach_prefetched(product, accessor, [_restore(image_model, values) for values in data['images']])
+    # ⭐ Рейтинг - как аннотация ProductRating.annotate_queryset()
+    product.__dict__['rating_avg'] = data['rating_avg']
+    product.__dict__['rating_count'] = data['reviews_count']
+
+    reviews = []
+    for item in data['reviews']:
+        review = _restore(ProductReview, item['review'])
+        review.user = _restore(User, item['user']) if item['user'] else None
+        replies = []
+        for reply_item in item['replies']:
+            reply = _restore(AdminReply, reply_item['reply'])
+            reply.admin_user = _restore(User, reply_item['admin_user'])
+            replies.append(reply)
+        _attach_prefetched(review, 'admin_replies', replies)
+        reviews.append(review)
+
+    similar_products = []
+    for item in data['similar']:
+        similar = _restore(apps.get_model(item['model']), item['product'])
+        # 🔗 Для общего шаблона карточки (фото - из колонки main_image)
+        similar.detail_url = item['url']
+        similar_products.append(similar)
+
+    return ProductSnapshot(product, reviews, data['reviews_count'], data['rating_avg'], similar_products)
+
+
+# ==================== ЧТЕНИЕ ====================
+
+def _slug_key(model, slug) -> str:
+    return f'product_snapshot_slug:{model._meta.label_lower}:{slug}'
+
+
+def _snapshot_key(model, uid) -> str:
+    return f'product_snapshot:{SNAPSHOT_FORMAT}:{model._meta.label_lower}:{uid}'
+
+
+def get_product_snapshot(model, slug) -> Optional[ProductSnapshot]:
+    """
+    📸 Снимок страницы товара по слагу
+
+    При попадании в кэш обходится без запросов к БД. Ссылка slug → (uid, категория)
+    хранится отдельно и перепроверяется по содержимому снимка.
+
+    Args:
+        model: Product или BoatProduct
+        slug: Слаг товара из URL
+
+    Returns:
+        ProductSnapshot или None, если товара нет
+    """
+    slug_key = _slug_key(model, slug)
+
+    for attempt in range(2):
+        ref = cache.get(slug_key) if attempt == 0 else None
+        if ref is None:
+            ref = model.objects.filter(slug=slug).values_list('uid', 'category_id').first()
+            if ref is None:
+                return None
+            cache.set(slug_key, ref, get_timeout())
+
+        uid, category_id = ref
+        tags = [product_tag(uid), RECOMMENDATIONS_TAG]
+        if category_id:
+            tags.append(category_tag(category_id))
+
+        data = get_or_set_fragment(_snapshot_key(model, uid), tags, lambda: build_snapshot_data(model, uid))
+
+        if (data is not None and data['product']['slug'] == slug
+                and data['product']['category_id'] == category_id):
+            return restore_snapshot(model, data)
+
+        # 🔄 Слаг переименован, товар удален или перенесен в другую категорию
+        cache.delete(slug_key)
+
+    return None
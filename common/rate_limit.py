@@ -0,0 +1,630 @@
+# 📁 common/rate_limit.py
+# ⏱️ Единый rate limiting для отзывов и корзины: скользящее окно и token bucket
+# 🔒 Счетчики меняются атомарно (incr/add или блокировка) - параллельные запросы не проскакивают мимо лимита
+# 🔌 Хранилища: кэш Django, память процесса, файлы, Redis-совместимый сервер (settings.RATE_LIMIT['BACKEND'])
+# 🎯 Политики по маршрутам (RateLimitMiddleware), декоратор @rate_limited и прямой вызов hit()
+#
+# Скользящее окно - счетчики двух соседних фиксированных окон: предыдущее
+# учитывается с весом оставшейся доли. Окно не сдвигается при каждой записи,
+# как было с cache.set(..., 3600): после часа тишины лимит гарантированно
+# восстановлен. Отклоненная попытка не расходует лимит.
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'rl'
+
+# 📋 Политики по умолчанию (settings.RATE_LIMIT['POLICIES'] дополняет и переопределяет)
+#   algorithm: sliding_window (limit за window секунд) или token_bucket (capacity, rate токенов/сек)
+#   key: ip | user | session | user_or_ip | user_or_session
+#   auth_limit: лимит скользящего окна для авторизованных (ключ по пользователю)
+#   methods: HTTP-методы, к которым применяется политика в middleware/декораторе (None - все)
+DEFAULT_POLICIES = {
+    'review': {
+        'algorithm': 'sliding_window',
+        'key': 'user_or_ip',
+        'limit': getattr(settings, 'SPAM_DETECTION', {}).get('RATE_LIMIT_PER_IP', 3),
+        'auth_limit': getattr(settings, 'SPAM_DETECTION', {}).get('MAX_REVIEWS_PER_HOUR_AUTH', 5),
+        'window': getattr(settings, 'SPAM_DETECTION', {}).get('RATE_LIMIT_WINDOW', 3600),
+        'methods': ('POST',),
+        'message': '⚠️ Превышен лимит отзывов. Попробуйте позже.',
+    },
+    'cart': {
+        'algorithm': 'token_bucket',
+        'key': 'user_or_session',
+        'capacity': 30,
+        'rate': 1.0,
+        'methods': None,
+        'message': '⚠️ Слишком много действий с корзиной. Подождите немного.',
+    },
+}
+
+# 🗺️ Маршрут (имя URL) → политика для RateLimitMiddleware
+DEFAULT_ROUTES = {
+    'add_to_cart': 'cart',
+    'update_cart_item': 'cart',
+    'remove_cart': 'cart',
+    'remove_coupon': 'cart',
+    'boats:add_to_cart': 'cart',
+    'boats:remove_from_cart': 'cart',
+    'boats:update_cart': 'cart',
+    'common:add_review': 'review',
+}
+
+BACKEND_ALIASES = {
+    'cache': 'common.rate_limit.CacheBackend',
+    'locmem': 'common.rate_limit.LocMemBackend',
+    'file': 'common.rate_limit.FileBackend',
+    'redis': 'common.rate_limit.RedisBackend',
+}
+
+OUTCOMES = ('allowed', 'blocked')
+
+
+def get_config() -> Dict:
+    """⚙️ Настройки rate limiting (settings.RATE_LIMIT поверх значений по умолчанию)"""
+    config = getattr(settings, 'RATE_LIMIT', {})
+    return {
+        'ENABLED': config.get('ENABLED', True),
+        'BACKEND': config.get('BACKEND', 'cache'),
+        'OPTIONS': config.get('OPTIONS', {}),
+        'POLICIES': {**DEFAULT_POLICIES, **config.get('POLICIES', {})},
+        'ROUTES': {**DEFAULT_ROUTES, **config.get('ROUTES', {})},
+    }
+
+
+# ==================== ХРАНИЛИЩА ====================
+
+class BaseBackend:
+    """
+    🔌 Хранилище счетчиков
+
+    incr - атомарное увеличение (ключ создается с ttl, ttl не продлевается);
+    update - атомарное чтение-изменение-запись состояния через функцию.
+    ttl=None - без срока (счетчики мониторинга).
+    """
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        raise NotImplementedError
+
+    def get_many(self, keys: List[str]) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def update(self, key: str, ttl: int, func: Callable):
+        """func(state или None) → (новое состояние, результат); возвращает результат"""
+        raise NotImplementedError
+
+    def delete_many(self, keys: List[str]):
+        raise NotImplementedError
+
+
+class LocMemBackend(BaseBackend):
+    """🧠 Память процесса: для разработки и одного процесса (у каждого воркера свои счетчики)"""
+
+    def __init__(self, max_entries: int = 100000, **options):
+        self._data: Dict[str, Tuple[object, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+
+    def _live(self, key, now):
+        item = self._data.get(key)
+        if item is None or (item[1] is not None and item[1] <= now):
+            return None
+        return item[0]
+
+    def _store(self, key, value, ttl, now, keep_expiry=False):
+        if len(self._data) >= self._max_entries:
+            self._data = {k: v for k, v in self._data.items() if v[1] is None or v[1] > now}
+        expires = now + ttl if ttl else None
+        if keep_expiry and key in self._data:
+            expires = self._data[key][1]
+        self._data[key] = (value, expires)
+
+    def incr(self, key, amount=1, ttl=None):
+        with self._lock:
+            now = time.time()
+            current = self._live(key, now)
+            value = (current or 0) + amount
+            self._store(key, value, ttl, now, keep_expiry=current is not None)
+            return value
+
+    def get_many(self, keys):
+        now = time.time()
+        with self._lock:
+            values = {key: self._live(key, now) for key in keys}
+        return {key: value for key, value in values.items() if value is not None}
+
+    def update(self, key, ttl, func):
+        with self._lock:
+            now = time.time()
+            state, result = func(self._live(key, now))
+            self._store(key, state, ttl, now)
+            return result
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+
+class CacheBackend(BaseBackend):
+    """
+    🗄️ Кэш Django (по умолчанию): add + incr
+
+    Атомарно на memcached, Redis и locmem. У файлового и DB-кэша incr - это
+    get + set; для них выберите FileBackend или RedisBackend.
+    Без CACHES в settings кэш по умолчанию - LocMem, и у каждого воркера
+    свои счетчики (лимит фактически умножается на число воркеров).
+    """
+
+    LOCK_TIMEOUT = 2
+    LOCK_ATTEMPTS = 50
+
+    def __init__(self, alias: str = 'default', **options):
+        from django.core.cache import caches
+
+        self.cache = caches[alias]
+
+    def incr(self, key, amount=1, ttl=None):
+        if self.cache.add(key, amount, ttl):
+            return amount
+        try:
+            return self.cache.incr(key, amount)
+        except ValueError:
+            # Ключ истек между add и incr - начинаем заново
+            self.cache.add(key, 0, ttl)
+            return self.cache.incr(key, amount)
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    def update(self, key, ttl, func):
+        lock_key = f'{key}:lock'
+        token = uuid.uuid4().hex
+        for _ in range(self.LOCK_ATTEMPTS):
+            if self.cache.add(lock_key, token, self.LOCK_TIMEOUT):
+                break
+            time.sleep(0.01)
+        else:
+            # 🔓 Fail-open: без блокировки состояние не трогаем, запрос пропускаем как с полным лимитом
+            logger.warning(f"⚠️ Rate limit: не удалось взять блокировку {lock_key}, запрос пропущен без учета")
+            return func(None)[1]
+        try:
+            state, result = func(self.cache.get(key))
+            self.cache.set(key, state, ttl)
+            return result
+        finally:
+            # 🔒 Снимаем только свою блокировку: по истечении LOCK_TIMEOUT ее мог взять другой запрос
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+
+    def delete_many(self, keys):
+        self.cache.delete_many(keys)
+
+
+class FileBackend(BaseBackend):
+    """📁 Файлы с блокировкой (flock / msvcrt): общие счетчики всех процессов одного сервера"""
+
+    def __init__(self, location: Optional[str] = None, **options):
+        self.location = location or os.path.join(settings.BASE_DIR, 'var', 'rate_limit')
+        os.makedirs(self.location, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.location, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    @contextmanager
+    def _locked(self, key):
+        with open(self._path(key), 'a+b') as handle:
+            try:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            except ImportError:
+                import msvcrt
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield handle
+            finally:
+                try:
+                    import fcntl
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                except ImportError:
+                    import msvcrt
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    @staticmethod
+    def _read(handle, now):
+        handle.seek(0)
+        try:
+            item = json.loads(handle.read() or b'null')
+        except ValueError:
+            return None, None
+        if not item or (item['expires'] is not None and item['expires'] <= now):
+            return None, None
+        return item['value'], item['expires']
+
+    @staticmethod
+    def _write(handle, value, expires):
+        handle.seek(0)
+        handle.truncate()
+        handle.write(json.dumps({'value': value, 'expires': expires}).encode('utf-8'))
+        handle.flush()
+
+    def incr(self, key, amount=1, ttl=None):
+        with self._locked(key) as handle:
+            now = time.time()
+            value, expires = self._read(handle, now)
+            if value is None:
+                value, expires = 0, (now + ttl if ttl else None)
+            value += amount
+            self._write(handle, value, expires)
+            return value
+
+    def get_many(self, keys):
+        now = time.time()
+        values = {}
+        for key in keys:
+            if not os.path.exists(self._path(key)):
+                continue
+            with self._locked(key) as handle:
+                value, _ = self._read(handle, now)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def update(self, key, ttl, func):
+        with self._locked(key) as handle:
+            now = time.time()
+            state, _ = self._read(handle, now)
+            state, result = func(state)
+            self._write(handle, state, now + ttl if ttl else None)
+            return result
+
+    def delete_many(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+
+class RedisBackend(BaseBackend):
+    """🔴 Redis-совместимый сервер (Redis, Valkey, KeyDB): INCRBY + EXPIRE одним Lua-скриптом"""
+
+    INCR_SCRIPT = """
+        local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+        if value == tonumber(ARGV[1]) and tonumber(ARGV[2]) > 0 then
+            redis.call('EXPIRE', KEYS[1], ARGV[2])
+        end
+        return value
+    """
+
+    def __init__(self, location: str = 'redis://127.0.0.1:6379/0', **options):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("RATE_LIMIT['BACKEND'] = 'redis' требует пакет redis (pip install redis)")
+        self.client = redis.Redis.from_url(location, **options)
+        self._incr = self.client.register_script(self.INCR_SCRIPT)
+
+    def incr(self, key, amount=1, ttl=None):
+        return int(self._incr(keys=[key], args=[amount, int(ttl or 0)]))
+
+    def get_many(self, keys):
+        if not keys:
+            return {}
+        return {key: int(value) for key, value in zip(keys, self.client.mget(keys)) if value is not None}
+
+    def update(self, key, ttl, func):
+        outcome = {}
+
+        def transaction(pipe):
+            raw = pipe.get(key)
+            state, outcome['result'] = func(json.loads(raw) if raw else None)
+            pipe.multi()
+            pipe.set(key, json.dumps(state), ex=int(math.ceil(ttl)))
+
+        self.client.transaction(transaction, key)
+        return outcome['result']
+
+    def delete_many(self, keys):
+        if keys:
+            self.client.delete(*keys)
+
+
+_backend = {}
+
+
+def get_backend() -> BaseBackend:
+    """🔌 Хранилище из настроек (одно на процесс)"""
+    config = get_config()
+    marker = (config['BACKEND'], repr(sorted(config['OPTIONS'].items())))
+    if _backend.get('marker') != marker:
+        backend_class = import_string(BACKEND_ALIASES.get(config['BACKEND'], config['BACKEND']))
+        _backend.update(marker=marker, instance=backend_class(**config['OPTIONS']))
+    return _backend['instance']
+
+
+# ==================== КЛЮЧИ ====================
+
+def get_client_ip(request) -> str:
+    """🌐 IP адрес клиента с учетом прокси"""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '127.0.0.1')
+
+
+def request_identity(request, key_type: str) -> Tuple[str, bool]:
+    """
+    🔑 Идентификатор клиента для политики
+
+    Returns:
+        Tuple: (идентификатор, авторизованный ли пользователь)
+    """
+    user = getattr(request, 'user', None)
+    if key_type in ('user', 'user_or_ip', 'user_or_session') and user is not None and user.is_authenticated:
+        return f'user:{user.pk}', True
+    if key_type in ('session', 'user_or_session'):
+        session = getattr(request, 'session', None)
+        if session is not None and session.session_key:
+            return f'session:{session.session_key}', False
+    return f'ip:{get_client_ip(request)}', False
+
+
+def make_identity(ip_address: Optional[str] = None, user=None) -> Tuple[str, bool]:
+    """🔑 Идентификатор без запроса (пользователь важнее IP)"""
+    if user is not None and getattr(user, 'is_authenticated', False):
+        return f'user:{user.pk}', True
+    return f'ip:{ip_address}', False
+
+
+# ==================== АЛГОРИТМЫ ====================
+
+def _result(policy_name, identity, allowed, limit, remaining, retry_after) -> Dict:
+    return {
+        'allowed': allowed,
+        'policy': policy_name,
+        'identity': identity,
+        'limit': limit,
+        'remaining': max(0, int(remaining)),
+        'retry_after': max(0, int(math.ceil(retry_after))) if not allowed else 0,
+    }
+
+
+def _sliding_window(backend, policy_name, policy, identity, authenticated, cost, now) -> Dict:
+    window = int(policy['window'])
+    limit = int(policy.get('auth_limit', policy['limit']) if authenticated else policy['limit'])
+    index = int(now // window)
+    elapsed = now - index * window
+    base = f'{KEY_PREFIX}:{policy_name}:{identity}'
+    current_key, previous_key = f'{base}:{index}', f'{base}:{index - 1}'
+
+    previous = backend.get_many([previous_key]).get(previous_key, 0)
+    weight = (window - elapsed) / window
+
+    if cost:
+        current = backend.incr(current_key, cost, ttl=window * 2)
+    else:
+        current = backend.get_many([current_key]).get(current_key, 0)
+    estimate = previous * weight + current
+    allowed = estimate <= limit if cost else estimate < limit
+
+    if allowed:
+        return _result(policy_name, identity, True, limit, limit - estimate, 0)
+
+    if cost:
+        # ↩️ Отклоненная попытка не расходует лимит
+        backend.incr(current_key, -cost, ttl=window * 2)
+        current -= cost
+    # ⏳ Когда вес предыдущего окна упадет настолько, что попытка поместится
+    need = max(cost, 1)
+    if previous and current + need <= limit:
+        retry_after = window * (1 - (limit - current - need) / previous) - elapsed
+    else:
+        retry_after = (window - elapsed) + window * max(0.0, 1 - (limit - need) / max(current, 1))
+    return _result(policy_name, identity, False, limit, 0, max(retry_after, 1))
+
+
+def _token_bucket(backend, policy_name, policy, identity, authenticated, cost, now) -> Dict:
+    capacity = float(policy['capacity'])
+    rate = float(policy['rate'])
+    key = f'{KEY_PREFIX}:{policy_name}:{identity}'
+
+    def consume(state):
+        tokens, stamp = state if state else (capacity, now)
+        tokens = min(capacity, tokens + max(0.0, now - stamp) * rate)
+        allowed = tokens >= cost if cost else tokens >= 1
+        if allowed:
+            tokens -= cost
+        return [tokens, now], (allowed, tokens)
+
+    allowed, tokens = backend.update(key, int(math.ceil(capacity / rate)) + 1, consume)
+    retry_after = 0 if allowed else (max(cost, 1) - tokens) / rate
+    return _result(policy_name, identity, allowed, int(capacity), tokens, retry_after)
+
+
+ALGORITHMS = {
+    'sliding_window': _sliding_window,
+    'token_bucket': _token_bucket,
+}
+
+
+# ==================== API ====================
+
+def get_policy(policy_name: str) -> Dict:
+    try:
+        return get_config()['POLICIES'][policy_name]
+    except KeyError:
+        raise ImproperlyConfigured(f"Неизвестная политика rate limiting: {policy_name}")
+
+
+def hit(policy_name: str, request=None, identity: Optional[str] = None,
+        authenticated: bool = False, cost: int = 1) -> Dict:
+    """
+    ⏱️ Попытка действия по политике (атомарно расходует лимит)
+
+    Args:
+        policy_name: Имя политики ('review', 'cart', ...)
+        request: Запрос - идентификатор берется по ключу политики
+        identity: Готовый идентификатор (make_identity), если запроса нет
+        authenticated: Идентификатор - пользователь (для auth_limit)
+        cost: Сколько единиц лимита расходует действие (0 - только проверка)
+
+    Returns:
+        dict: {'allowed', 'policy', 'identity', 'limit', 'remaining', 'retry_after'}
+    """
+    policy = get_policy(policy_name)
+    if request is not None and identity is None:
+        identity, authenticated = request_identity(request, policy.get('key', 'ip'))
+
+    config = get_config()
+    if not config['ENABLED']:
+        return _result(policy_name, identity, True, 0, 0, 0)
+
+    backend = get_backend()
+    try:
+        result = ALGORITHMS[policy.get('algorithm', 'sliding_window')](
+            backend, policy_name, policy, identity, authenticated, cost, time.time()
+        )
+    except Exception as e:
+        # 🔓 Недоступное хранилище не должно ронять оформление заказа
+        logger.error(f"❌ Rate limit {policy_name}: ошибка хранилища: {e}")
+        return _result(policy_name, identity, True, 0, 0, 0)
+
+    if cost:
+        outcome = 'allowed' if result['allowed'] else 'blocked'
+        try:
+            backend.incr(f'{KEY_PREFIX}:stats:{policy_name}:{outcome}', 1, ttl=None)
+        except Exception:
+            pass
+        if not result['allowed']:
+            logger.warning(f"🛡️ Rate limit {policy_name}: {identity} заблокирован на {result['retry_after']} с")
+    return result
+
+
+def peek(policy_name: str, request=None, identity: Optional[str] = None, authenticated: bool = False) -> Dict:
+    """👀 Состояние лимита без расхода"""
+    return hit(policy_name, request=request, identity=identity, authenticated=authenticated, cost=0)
+
+
+def reset(policy_name: str, identity: str):
+    """🔄 Сброс лимита идентификатора (текущее и предыдущее окно, ведро токенов)"""
+    policy = get_policy(policy_name)
+    base = f'{KEY_PREFIX}:{policy_name}:{identity}'
+    keys = [base]
+    if policy.get('algorithm', 'sliding_window') == 'sliding_window':
+        index = int(time.time() // int(policy['window']))
+        keys += [f'{base}:{index}', f'{base}:{index - 1}']
+    get_backend().delete_many(keys)
+
+
+def export_counters() -> Dict[str, Dict[str, int]]:
+    """📊 Счетчики мониторинга: политика → {'allowed': N, 'blocked': N}"""
+    policies = list(get_config()['POLICIES'])
+    keys = {
+        f'{KEY_PREFIX}:stats:{policy}:{outcome}': (policy, outcome)
+        for policy in policies for outcome in OUTCOMES
+    }
+    values = get_backend().get_many(list(keys))
+    counters = {policy: {outcome: 0 for outcome in OUTCOMES} for policy in policies}
+    for key, (policy, outcome) in keys.items():
+        counters[policy][outcome] = int(values.get(key) or 0)
+    return counters
+
+
+def render_metrics() -> str:
+    """📈 Счетчики в текстовом формате Prometheus"""
+    lines = [
+        '# HELP avto_rate_limit_requests_total Requests checked by rate limit policies',
+        '# TYPE avto_rate_limit_requests_total counter',
+    ]
+    for policy, outcomes in export_counters().items():
+        for outcome, value in outcomes.items():
+            lines.append(f'avto_rate_limit_requests_total{{policy="{policy}",outcome="{outcome}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+# ==================== DJANGO ====================
+
+def limited_response(request, result: Dict):
+    """🚫 Ответ на превышение: JSON 429 для AJAX, иначе сообщение и возврат на предыдущую страницу"""
+    from django.contrib import messages
+    from django.http import JsonResponse
+    from django.shortcuts import redirect
+
+    message = get_policy(result['policy']).get('message', '⚠️ Слишком много запросов. Попробуйте позже.')
+    wants_json = (
+        request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        or 'application/json' in request.headers.get('accept', '')
+        or request.content_type == 'application/json'
+    )
+    if wants_json:
+        response = JsonResponse({'success': False, 'error': message}, status=429)
+    else:
+        messages.error(request, message)
+        response = redirect(request.META.get('HTTP_REFERER') or '/')
+    response['Retry-After'] = str(result['retry_after'])
+    return response
+
+
+def _applies(policy: Dict, request) -> bool:
+    methods = policy.get('methods')
+    return not methods or request.method in methods
+
+
+def rate_limited(policy_name: str):
+    """🎯 Декоратор view: лимит по политике (методы - из policy['methods'])"""
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if _applies(get_policy(policy_name), request):
+                result = hit(policy_name, request)
+                if not result['allowed']:
+                    return limited_response(request, result)
+            return view_func(request, *args, **kwargs)
+
+        wrapper.rate_limit_policy = policy_name
+        return wrapper
+
+    return decorator
+
+
+class RateLimitMiddleware:
+    """🗺️ Лимиты по маршрутам из RATE_LIMIT['ROUTES'] (имя URL → политика)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # 🎯 View с декоратором @rate_limited уже считает себя сам
+        if getattr(view_func, 'rate_limit_policy', None):
+            return None
+        match = request.resolver_match
+        policy_name = get_config()['ROUTES'].get(match.view_name) if match else None
+        if not policy_name or not _applies(get_policy(policy_name), request):
+            return None
+        result = hit(policy_name, request)
+        if not result['allowed']:
+            return limited_response(request, result)
+        return None
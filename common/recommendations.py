@@ -0,0 +1,228 @@
+# 📁 common/recommendations.py
+# 🤝 Рекомендации «с этим товаром покупают» для авто и лодок
+# 📦 Пакетный расчет: совместные покупки из OrderItem (и, по желанию, корзин)
+# 📂 Холодные товары добиваются популярными товарами той же категории
+# 🔍 Чтение - один индексный запрос к ProductRecommendation
+
+import heapq
+import logging
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from .page_cache import RECOMMENDATIONS_TAG, invalidate_tags
+
+logger = logging.getLogger(__name__)
+
+# 🔢 Сколько соседей хранить на товар
+RECOMMENDATIONS_TOP_N = 8
+
+# 🧺 Большие корзины (оптовые заказы) почти ничего не говорят о связи товаров,
+# а число пар в них растет квадратично - берем только первые позиции
+MAX_BASKET_SIZE = 50
+
+# 🛒 Вес неоплаченной корзины относительно заказа
+CART_WEIGHT = 0.5
+
+ItemKey = Tuple[int, object]  # (content_type_id, object_id)
+
+
+def _product_models():
+    from products.models import Product
+    from boats.models import BoatProduct
+    return [Product, BoatProduct]
+
+
+# ==================== СБОР КОРЗИН ====================
+
+def _group_rows(rows: Iterable[Tuple]) -> Iterator[set]:
+    """🧺 Группирует упорядоченные строки (группа, content_type_id, object_id) в корзины"""
+    current_group = None
+    basket = set()
+    for group_id, content_type_id, object_id in rows:
+        if group_id != current_group:
+            if basket:
+                yield basket
+            current_group = group_id
+            basket = set()
+        basket.add((content_type_id, object_id))
+    if basket:
+        yield basket
+
+
+def iter_baskets(include_carts: bool = False) -> Iterator[Tuple[float, set]]:
+    """
+    🧺 Корзины покупок с весами
+
+    Yields:
+        (вес, множество (content_type_id, object_id))
+    """
+    from accounts.models import OrderItem, CartItem
+
+    order_rows = (
+        OrderItem.objects.order_by('order_id')
+        .values_list('order_id', 'content_type_id', 'object_id')
+        .iterator(chunk_size=2000)
+    )
+    for basket in _group_rows(order_rows):
+        yield 1.0, basket
+
+    if include_carts:
+        # 💳 Оплаченные корзины уже превратились в заказы - их не считаем повторно
+        cart_rows = (
+            CartItem.objects.filter(cart__is_paid=False)
+            .order_by('cart_id')
+            .values_list('cart_id', 'content_type_id', 'object_id')
+            .iterator(chunk_size=2000)
+        )
+        for basket in _group_rows(cart_rows):
+            yield CART_WEIGHT, basket
+
+
+def mine_copurchases(baskets: Iterable[Tuple[float, set]]):
+    """
+    ⛏️ Считает веса товаров и пар товаров по корзинам
+
+    Returns:
+        Tuple: ({товар: вес}, {(товар_a, товар_b): вес}) с товар_a < товар_b
+    """
+    item_weights: Dict[ItemKey, float] = defaultdict(float)
+    pair_weights: Dict[Tuple[ItemKey, ItemKey], float] = defaultdict(float)
+
+    for weight, basket in baskets:
+        items = sorted(basket, key=lambda key: (key[0], str(key[1])))[:MAX_BASKET_SIZE]
+        for index, item in enumerate(items):
+            item_weights[item] += weight
+            for other in items[index + 1:]:
+                pair_weights[(item, other)] += weight
+
+    return item_weights, pair_weights
+
+
+# ==================== ПОСТРОЕНИЕ ТАБЛИЦЫ ====================
+
+def build_recommendations(top_n: int = RECOMMENDATIONS_TOP_N, include_carts: bool = False,
+                          stdout=None) -> int:
+    """
+    🏗️ Пересобирает таблицу ProductRecommendation целиком
+
+    Сила связи - косинусная мера: совместные покупки / sqrt(покупки_a × покупки_b).
+    Рекомендуются только существующие товары; свободные места заполняются
+    товарами той же категории в порядке популярности.
+
+    Returns:
+        int: Количество записанных рекомендаций
+    """
+    from .models import ProductRecommendation
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    item_weights, pair_weights = mine_copurchases(iter_baskets(include_carts))
+    log(f"🧺 Товаров в покупках: {len(item_weights)}, пар: {len(pair_weights)}")
+
+    # 📋 Каталог: существующие товары и их категории
+    catalog: Dict[ItemKey, object] = {}
+    by_category: Dict[Tuple[int, object], List[ItemKey]] = defaultdict(list)
+    for model in _product_models():
+        content_type_id = ContentType.objects.get_for_model(model).id
+        rows = model.objects.order_by('-created_at').values_list('uid', 'category_id')
+        for uid, category_id in rows.iterator(chunk_size=2000):
+            key = (content_type_id, uid)
+            catalog[key] = category_id
+            if category_id:
+                by_category[(content_type_id, category_id)].append(key)
+
+    # 🔥 Популярные товары категории - первыми (стабильная сортировка сохраняет новизну)
+    for keys in by_category.values():
+        keys.sort(key=lambda key: item_weights.get(key, 0.0), reverse=True)
+
+    neighbours: Dict[ItemKey, List[Tuple[float, ItemKey]]] = defaultdict(list)
+    for (item_a, item_b), weight in pair_weights.items():
+        if item_a not in catalog or item_b not in catalog:
+            continue
+        score = weight / math.sqrt(item_weights[item_a] * item_weights[item_b])
+        neighbours[item_a].append((score, item_b))
+        neighbours[item_b].append((score, item_a))
+
+    rows = []
+    for key, category_id in catalog.items():
+        best = heapq.nlargest(top_n, neighbours.get(key, ()), key=lambda pair: pair[0])
+        chosen = [(target, score, 'copurchase') for score, target in best]
+
+        if len(chosen) < top_n and category_id:
+            taken = {target for target, _, _ in chosen}
+            taken.add(key)
+            for candidate in by_category.get((key[0], category_id), ()):
+                if candidate in taken:
+                    continue
+                chosen.append((candidate, 0.0, 'category'))
+                if len(chosen) >= top_n:
+                    break
+
+        for rank, (target, score, reason) in enumerate(chosen, start=1):
+            rows.append(ProductRecommendation(
+                source_type_id=key[0], source_id=key[1],
+                target_type_id=target[0], target_id=target[1],
+                rank=rank, score=score, reason=reason,
+            ))
+
+    with transaction.atomic():
+        ProductRecommendation.objects.all().delete()
+        ProductRecommendation.objects.bulk_create(rows, batch_size=1000)
+        invalidate_tags(RECOMMENDATIONS_TAG)
+
+    logger.info(f"🤝 Рекомендации пересобраны: товаров {len(catalog)}, записей {len(rows)}")
+    return len(rows)
+
+
+# ==================== ЧТЕНИЕ ====================
+
+def get_recommendations(instance, limit: Optional[int] = None) -> List:
+    """
+    🤝 Рекомендуемые товары для страницы товара
+
+    Один индексный запрос к таблице рекомендаций плюс загрузка самих товаров
+    (по запросу на тип товара, фото - из колонки main_image). Пока таблица не построена -
+    прежнее поведение: первые товары той же категории.
+
+    Returns:
+        list: Экземпляры Product / BoatProduct в порядке рекомендаций
+    """
+    from .models import ProductRecommendation
+
+    limit = limit or RECOMMENDATIONS_TOP_N
+    model = type(instance)
+    content_type = ContentType.objects.get_for_model(model)
+
+    refs = list(
+        ProductRecommendation.objects.filter(source_type=content_type, source_id=instance.pk)
+        .order_by('rank')
+        .values_list('target_type_id', 'target_id')[:limit]
+    )
+
+    if not refs:
+        return list(
+            model.objects.filter(category_id=instance.category_id)
+            .exclude(pk=instance.pk)
+            .cards()[:limit]
+        )
+
+    ids_by_type = defaultdict(list)
+    for content_type_id, object_id in refs:
+        ids_by_type[content_type_id].append(object_id)
+
+    loaded = {}
+    for content_type_id, object_ids in ids_by_type.items():
+        target_model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if target_model is None:
+            continue
+        targets = target_model.objects.filter(pk__in=object_ids).cards()
+        for target in targets:
+            loaded[(content_type_id, target.pk)] = target
+
+    return [loaded[ref] for ref in refs if ref in loaded]
@@ -0,0 +1,308 @@
+# 📁 common/review_index.py
+# 🧬 Индекс почти-дубликатов отзывов: шинглы → MinHash → корзины LSH (ReviewFingerprint, ReviewLSHBucket)
+# 🎯 Ловит копипаст-кампании: один и тот же текст с мелкими правками на разных товарах
+# ⚡ Проверка - один запрос по индексу корзин и сравнение подписей нескольких кандидатов,
+#    время не зависит от числа отзывов в базе (в отличие от SequenceMatcher по всем текстам)
+#
+# Подпись - one permutation hashing: каждый шингл хэшируется один раз, младшие
+# биты хэша выбирают ячейку, в ячейке хранится минимум. Пустые ячейки (короткие
+# отзывы) заполняются из соседней справа со сдвигом - у одинаковых текстов
+# подписи совпадают, доля равных ячеек оценивает сходство Жаккара.
+
+import hashlib
+import logging
+import re
+import struct
+import uuid
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+
+from .spam_lexicon import normalize
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 5  # 🔤 Символьные 5-граммы: устойчивы к заменам отдельных слов и опечаткам
+SIGNATURE_SIZE = 64  # 🧬 Ячеек в подписи (степень двойки)
+BANDS = 16  # 🪣 Полос LSH по BANDS_ROWS ячеек: сходство 0.8 попадает в кандидаты с вероятностью > 0.999
+BAND_ROWS = SIGNATURE_SIZE // BANDS
+MAX_CANDIDATES = 50  # 🔍 Сколько кандидатов с наибольшим числом общих корзин сравнивать
+
+_BIN_BITS = SIGNATURE_SIZE.bit_length() - 1
+_VALUE_MASK = (1 << 64) - 1
+_DENSIFY_OFFSET = 0x9E3779B97F4A7C15  # ➡️ Сдвиг за каждую пропущенную ячейку при заполнении пустых
+_SIGNATURE_FORMAT = f'<{SIGNATURE_SIZE}Q'
+_PUNCTUATION_RE = re.compile(r'[^\w ]+')
+_SPACES_RE = re.compile(r' {2,}')
+
+
+# ==================== ПОДПИСЬ ====================
+
+def shingles(text: str) -> Set[str]:
+    """🔤 Символьные шинглы нормализованного текста без пунктуации"""
+    clean = _SPACES_RE.sub(' ', _PUNCTUATION_RE.sub(' ', normalize(text))).strip()
+    if len(clean) <= SHINGLE_SIZE:
+        return {clean} if clean else set()
+    return {clean[i:i + SHINGLE_SIZE] for i in range(len(clean) - SHINGLE_SIZE + 1)}
+
+
+def minhash(items: Iterable[str]) -> Optional[Tuple[int, ...]]:
+    """🧬 MinHash-подпись множества шинглов (None для пустого множества)"""
+    bins = [None] * SIGNATURE_SIZE
+    bin_mask = SIGNATURE_SIZE - 1
+    for item in items:
+        value = int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'little')
+        position = value & bin_mask
+        value >>= _BIN_BITS
+        current = bins[position]
+        if current is None or value < current:
+            bins[position] = value
+
+    if all(value is None for value in bins):
+        return None
+
+    # ➡️ Пустые ячейки - из ближайшей непустой справа (по кругу) со сдвигом на расстояние
+    signature = list(bins)
+    for position in range(SIGNATURE_SIZE):
+        if bins[position] is not None:
+            continue
+        distance = 1
+        while bins[(position + distance) % SIGNATURE_SIZE] is None:
+            distance += 1
+        signature[position] = (bins[(position + distance) % SIGNATURE_SIZE] + distance * _DENSIFY_OFFSET) & _VALUE_MASK
+    return tuple(signature)
+
+
+def band_buckets(signature: Tuple[int, ...]) -> List[int]:
+    """🪣 Хэши полос подписи (номер полосы входит в хэш - корзины полос не смешиваются)"""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * BAND_ROWS:(band + 1) * BAND_ROWS]
+        digest = hashlib.blake2b(struct.pack(f'<B{BAND_ROWS}Q', band, *rows), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'little', signed=True))
+    return buckets
+
+
+def similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    """📐 Оценка сходства Жаккара: доля совпавших ячеек"""
+    return sum(1 for a, b in zip(left, right) if a == b) / SIGNATURE_SIZE
+
+
+def pack_signature(signature: Tuple[int, ...]) -> bytes:
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data) -> Tuple[int, ...]:
+    return struct.unpack(_SIGNATURE_FORMAT, bytes(data))
+
+
+def fingerprint_text(text: str) -> Optional[Dict]:
+    """🧬 Подпись, корзины и хэш текста (None - в тексте нет букв и цифр)"""
+    items = shingles(text)
+    signature = minhash(items)
+    if signature is None:
+        return None
+    return {
+        'signature': signature,
+        'buckets': band_buckets(signature),
+        'content_hash': hashlib.sha1(normalize(text).encode('utf-8')).hexdigest(),
+        'shingle_count': len(items),
+    }
+
+
+# ==================== ИНДЕКСАЦИЯ ====================
+
+def _build_rows(review_id, fingerprint: Dict):
+    from .models import ReviewFingerprint, ReviewLSHBucket
+
+    row = ReviewFingerprint(
+        review_id=review_id,
+        signature=pack_signature(fingerprint['signature']),
+        content_hash=fingerprint['content_hash'],
+        shingle_count=fingerprint['shingle_count'],
+    )
+    buckets = [ReviewLSHBucket(fingerprint_id=review_id, bucket=bucket) for bucket in fingerprint['buckets']]
+    return row, buckets
+
+
+def index_review(review_id, content: str) -> bool:
+    """
+    🧬 Подпись одного отзыва (пересчитывается, только если изменился текст)
+
+    Returns:
+        bool: True если подпись записана или удалена
+    """
+    from .models import ReviewFingerprint, ReviewLSHBucket
+
+    fingerprint = fingerprint_text(content)
+    stored = ReviewFingerprint.objects.filter(review_id=review_id).values_list('content_hash', flat=True).first()
+    if fingerprint and stored == fingerprint['content_hash']:
+        return False
+    if not fingerprint and stored is None:
+        return False
+
+    with transaction.atomic():
+        ReviewFingerprint.objects.filter(review_id=review_id).delete()
+        if fingerprint:
+            row, buckets = _build_rows(review_id, fingerprint)
+            row.save(force_insert=True)
+            ReviewLSHBucket.objects.bulk_create(buckets)
+    return True
+
+
+def schedule_index(review):
+    """⏳ Индексация после фиксации транзакции (вызывается сигналом post_save)"""
+    review_id, content = review.pk, review.content
+
+    def index():
+        try:
+            index_review(review_id, content)
+        except Exception as e:
+            logger.error(f"❌ Ошибка индексации отзыва {review_id} в индексе дубликатов: {e}")
+
+    transaction.on_commit(index)
+
+
+def rebuild_index(chunk_size: int = 1000, force: bool = False, stdout=None) -> Dict:
+    """
+    🔄 Массовая индексация отзывов
+
+    Args:
+        chunk_size: Отзывов в одной пачке
+        force: Пересчитать все подписи (иначе - только новые и с измененным текстом)
+        stdout: Поток для вывода прогресса
+
+    Returns:
+        Dict: Статистика (reviews, indexed, unchanged, empty)
+    """
+    from .models import ProductReview, ReviewFingerprint, ReviewLSHBucket
+
+    if force:
+        ReviewLSHBucket.objects.all().delete()
+        ReviewFingerprint.objects.all().delete()
+        stored = {}
+    else:
+        stored = dict(ReviewFingerprint.objects.values_list('review_id', 'content_hash'))
+
+    stats = {'reviews': 0, 'indexed': 0, 'unchanged': 0, 'empty': 0}
+
+    def flush(batch):
+        stale = [review_id for review_id, _ in batch if review_id in stored]
+        rows, buckets = [], []
+        for review_id, fingerprint in batch:
+            row, row_buckets = _build_rows(review_id, fingerprint)
+            rows.append(row)
+            buckets.extend(row_buckets)
+        with transaction.atomic():
+            if stale:
+                ReviewFingerprint.objects.filter(review_id__in=stale).delete()
+            ReviewFingerprint.objects.bulk_create(rows)
+            ReviewLSHBucket.objects.bulk_create(buckets, batch_size=chunk_size * BANDS)
+        stats['indexed'] += len(batch)
+        if stdout:
+            stdout.write(f"🧬 Проиндексировано отзывов: {stats['indexed']}")
+
+    batch = []
+    for review_id, content in ProductReview.objects.order_by().values_list('uid', 'content').iterator(chunk_size):
+        stats['reviews'] += 1
+        fingerprint = fingerprint_text(content)
+        if fingerprint is None:
+            stats['empty'] += 1
+            continue
+        if stored.get(review_id) == fingerprint['content_hash']:
+            stats['unchanged'] += 1
+            continue
+        batch.append((review_id, fingerprint))
+        if len(batch) >= chunk_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    return stats
+
+
+# ==================== ПОИСК ====================
+
+def product_key(content_type_id, object_id) -> Optional[Tuple[int, uuid.UUID]]:
+    """
+    🔑 Ключ товара (content_type_id, object_id) в одном виде
+
+    Отзыв из формы приходит со строковыми id, из базы - с int и UUID:
+    без приведения один и тот же товар выглядел бы «другим».
+    """
+    try:
+        return int(content_type_id), uuid.UUID(str(object_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def find_near_duplicates(content: str, threshold: float = 0.8, exclude_review=None,
+                         product=None, limit: int = 5) -> Dict:
+    """
+    🔍 Почти-дубликаты текста среди проиндексированных отзывов
+
+    Args:
+        content: Текст нового отзыва
+        threshold: Порог сходства Жаккара (0-1)
+        exclude_review: uid отзыва, который не сравнивается сам с собой
+        product: (content_type_id, object_id) товара отзыва - для подсчета совпадений на других товарах
+        limit: Сколько похожих отзывов вернуть
+
+    Returns:
+        dict: Оценка в формате check_text_similarity + other_products (число других товаров с дубликатами)
+    """
+    from django.db.models import Count
+    from .models import ReviewFingerprint, ReviewLSHBucket
+
+    result = {'score': 0.0, 'max_similarity': 0.0, 'similar_texts': [], 'similarities_count': 0, 'other_products': 0}
+    if product is not None:
+        product = product_key(*product)
+    fingerprint = fingerprint_text(content)
+    if fingerprint is None:
+        return result
+
+    candidates = ReviewLSHBucket.objects.filter(bucket__in=fingerprint['buckets'])
+    if exclude_review is not None:
+        candidates = candidates.exclude(fingerprint_id=exclude_review)
+    candidate_ids = list(
+        candidates.values('fingerprint_id').annotate(hits=Count('id')).order_by('-hits')
+        .values_list('fingerprint_id', flat=True)[:MAX_CANDIDATES]
+    )
+    if not candidate_ids:
+        return result
+
+    matches = []
+    rows = ReviewFingerprint.objects.filter(review_id__in=candidate_ids).values_list(
+        'review_id', 'signature', 'review__content_type_id', 'review__object_id'
+    )
+    for review_id, signature, content_type_id, object_id in rows:
+        score = similarity(fingerprint['signature'], unpack_signature(signature))
+        matches.append((score, review_id, product_key(content_type_id, object_id)))
+    matches.sort(key=lambda match: match[0], reverse=True)
+
+    similar = [match for match in matches if match[0] >= threshold]
+    max_similarity = matches[0][0] if matches else 0.0
+
+    # Оценка: те же ступени, что и у check_text_similarity
+    score = 0.0
+    if max_similarity >= 0.95:
+        score = 80.0  # Почти идентичный текст
+    elif max_similarity >= 0.85:
+        score = 60.0  # Очень похожий
+    elif max_similarity >= 0.70:
+        score = 30.0  # Похожий
+    elif max_similarity >= 0.50:
+        score = 15.0  # Частично похожий
+
+    result.update({
+        'score': score,
+        'max_similarity': round(max_similarity, 3),
+        'similar_texts': [
+            {'review_id': str(review_id), 'similarity': round(value, 3), 'same_product': key == product}
+            for value, review_id, key in similar[:limit]
+        ],
+        'similarities_count': len(similar),
+        'other_products': len({key for _, _, key in similar if key != product}),
+    })
+    return result
@@ -0,0 +1,358 @@
+# 📁 common/rollups.py
+# 📈 Дневные сводки для дашбордов: отзывы (оценка × статус), заказы (доставка × оплата), спам (уровень оценки)
+# 🔄 Сводки пересобирает команда build_rollups: каждый день группируется одним GROUP BY и записывается upsert-ом
+# ⚡ Дашборд за любой период читает сотни строк сводок вместо сканирования отзывов и заказов
+#
+# День - календарная дата в часовом поясе сайта (TIME_ZONE), границы дня
+# передаются в запрос диапазоном по date_added/order_date, поэтому работают
+# индексы (is_approved, date_added). Сводка дня - снимок на момент сборки:
+# поздняя модерация или оплата попадает в нее при следующем запуске
+# (запуск без параметров пересобирает последние REFRESH_DAYS дней).
+# Текущий день дашборды всегда считают по исходным таблицам.
+
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Min, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_NAMES = ('reviews', 'orders', 'spam')
+
+
+def get_config() -> Dict:
+    """⚙️ settings.ROLLUPS: REFRESH_DAYS, CHUNK_DAYS, MAX_RANGE_DAYS"""
+    config = getattr(settings, 'ROLLUPS', {})
+    return {
+        'REFRESH_DAYS': config.get('REFRESH_DAYS', 7),
+        'CHUNK_DAYS': config.get('CHUNK_DAYS', 31),
+        'MAX_RANGE_DAYS': config.get('MAX_RANGE_DAYS', 3660),
+    }
+
+
+def get_rollups() -> Dict[str, Dict]:
+    """
+    📋 Описания сводок
+
+    model - таблица сводки, queryset и date_field - исходные факты,
+    dimensions - поля группировки (annotations - вычисляемые поля группировки),
+    measures - агрегаты, которые записываются в одноименные поля сводки.
+    """
+    from accounts.models import Order
+    from .models import (
+        HIGH_SPAM_SCORE, ProductReview, ReviewDailyStat, OrderDailyStat, SpamDailyStat,
+    )
+
+    # 🚨 Те же пороги, что и у ProductReview.get_spam_level
+    spam_level = Case(
+        When(spam_score__gte=HIGH_SPAM_SCORE, then=Value('high')),
+        When(spam_score__gte=50, then=Value('medium')),
+        When(spam_score__gte=20, then=Value('low')),
+        default=Value('minimal'),
+        output_field=CharField(),
+    )
+
+    return {
+        'reviews': {
+            'model': ReviewDailyStat,
+            'queryset': ProductReview.objects.all(),
+            'date_field': 'date_added',
+            'dimensions': ['stars', 'is_approved'],
+            'annotations': {},
+            'measures': {
+                'reviews': Count('uid'),
+                'anonymous': Count('uid', filter=Q(user__isnull=True)),
+            },
+        },
+        'orders': {
+            'model': OrderDailyStat,
+            'queryset': Order.objects.all(),
+            'date_field': 'order_date',
+            'dimensions': ['delivery_method', 'payment_status'],
+            'annotations': {},
+            'measures': {
+                'orders': Count('uid'),
+                'revenue': Sum('grand_total'),
+                'items_total': Sum('order_total_price'),
+                'with_coupon': Count('uid', filter=Q(coupon__isnull=False)),
+            },
+        },
+        'spam': {
+            'model': SpamDailyStat,
+            'queryset': ProductReview.objects.all(),
+            'date_field': 'date_added',
+            'dimensions': [],
+            'annotations': {'level': spam_level},
+            'measures': {
+                'reviews': Count('uid'),
+                'suspicious': Count('uid', filter=Q(is_suspicious=True)),
+                'score_sum': Sum('spam_score'),
+            },
+        },
+    }
+
+
+def _key_fields(spec: Dict) -> List[str]:
+    return [*spec['dimensions'], *spec['annotations']]
+
+
+def day_start(day: date) -> datetime:
+    """🕛 Начало дня в часовом поясе сайта"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _days(start: date, end: date, step: int) -> Iterable[tuple]:
+    current = start
+    while current <= end:
+        chunk_end = min(current + timedelta(days=step - 1), end)
+        yield current, chunk_end
+        current = chunk_end + timedelta(days=1)
+
+
+# ==================== СБОРКА ====================
+
+def collect(name: str, start: date, end: date) -> List[Dict]:
+    """
+    🧮 Строки сводки за дни start..end по исходной таблице (один GROUP BY)
+
+    Returns:
+        list: [{'day': date, <поля группировки>, <агрегаты>}, ...]
+    """
+    spec = get_rollups()[name]
+    date_field = spec['date_field']
+    rows = (
+        spec['queryset']
+        .filter(**{f'{date_field}__gte': day_start(start), f'{date_field}__lt': day_start(end + timedelta(days=1))})
+        .order_by()
+        .annotate(day=TruncDate(date_field, tzinfo=timezone.get_current_timezone()), **spec['annotations'])
+        .values('day', *_key_fields(spec))
+        .annotate(**spec['measures'])
+    )
+    return [
+        {**row, **{measure: row[measure] or 0 for measure in spec['measures']}}
+        for row in rows
+    ]
+
+
+def build_rollup(name: str, start: date, end: date, chunk_days: Optional[int] = None, stdout=None) -> Dict:
+    """
+    🔄 Пересборка сводки за дни start..end (повторный запуск дает тот же результат)
+
+    Каждая пачка дней записывается в своей транзакции: upsert по ключу
+    (день + поля группировки), затем удаляются строки этих дней, которых
+    нет в новом снимке (например, все отзывы дня удалены).
+
+    Returns:
+        Dict: Статистика (days, rows, deleted)
+    """
+    spec = get_rollups()[name]
+    model = spec['model']
+    key_fields = ['day', *_key_fields(spec)]
+    stats = {'days': 0, 'rows': 0, 'deleted': 0}
+
+    for chunk_start, chunk_end in _days(start, end, chunk_days or get_config()['CHUNK_DAYS']):
+        rows = collect(name, chunk_start, chunk_end)
+        built_at = timezone.now()
+        with transaction.atomic():
+            if rows:
+                model.objects.bulk_create(
+                    [model(built_at=built_at, **row) for row in rows],
+                    update_conflicts=True,
+                    unique_fields=key_fields,
+                    update_fields=[*spec['measures'], 'built_at'],
+                )
+            deleted, _ = model.objects.filter(
+                day__gte=chunk_start, day__lte=chunk_end, built_at__lt=built_at
+            ).delete()
+
+        stats['days'] += (chunk_end - chunk_start).days + 1
+        stats['rows'] += len(rows)
+        stats['deleted'] += deleted
+        if stdout:
+            stdout.write(f"📈 {name}: {chunk_start} - {chunk_end}, строк {len(rows)}")
+
+    return stats
+
+
+def earliest_day(name: str) -> Optional[date]:
+    """📅 Первый день с данными в исходной таблице (для полного дозаполнения)"""
+    spec = get_rollups()[name]
+    first = spec['queryset'].aggregate(first=Min(spec['date_field']))['first']
+    return timezone.localtime(first).date() if first else None
+
+
+def build_rollups(start: Optional[date] = None, end: Optional[date] = None, names: Iterable[str] = ROLLUP_NAMES,
+                  backfill: bool = False, stdout=None) -> Dict[str, Dict]:
+    """
+    🔄 Пересборка сводок
+
+    Args:
+        start: Первый день (по умолчанию - REFRESH_DAYS дней назад)
+        end: Последний день (по умолчанию - сегодня)
+        names: Какие сводки собирать
+        backfill: Начать с первого дня с данными (start игнорируется)
+        stdout: Поток для вывода прогресса
+
+    Returns:
+        Dict: {сводка: статистика build_rollup}
+    """
+    end = end or timezone.localdate()
+    start = start or end - timedelta(days=get_config()['REFRESH_DAYS'] - 1)
+    result = {}
+    for name in names:
+        first = earliest_day(name) if backfill else start
+        if first is None or first > end:
+            result[name] = {'days': 0, 'rows': 0, 'deleted': 0}
+            continue
+        result[name] = build_rollup(name, first, end, stdout=stdout)
+        logger.info(f"📈 Сводка {name} пересобрана за {first} - {end}: {result[name]}")
+    return result
+
+
+# ==================== ЧТЕНИЕ ====================
+
+def parse_range(start: Optional[str], end: Optional[str], default_days: int = 30) -> tuple:
+    """
+    📅 Период дашборда из GET-параметров (YYYY-MM-DD)
+
+    Raises:
+        ValueError: Некорректная дата, начало позже конца или период длиннее MAX_RANGE_DAYS
+    """
+    end_day = date.fromisoformat(end) if end else timezone.localdate()
+    start_day = date.fromisoformat(start) if start else end_day - timedelta(days=default_days - 1)
+    if start_day > end_day:
+        raise ValueError('Начало периода позже конца')
+    if (end_day - start_day).days + 1 > get_config()['MAX_RANGE_DAYS']:
+        raise ValueError(f"Период длиннее {get_config()['MAX_RANGE_DAYS']} дней")
+    return start_day, end_day
+
+
+def read_rows(name: str, start: date, end: date) -> List[Dict]:
+    """
+    📖 Строки сводки за период: прошедшие дни - из таблицы сводки, остальное - по исходной таблице
+
+    Дни без строк сводки (сегодня, свежая установка, build_rollups еще не
+    запускался, или за день просто не было данных) считаются одним
+    GROUP BY по исходной таблице, так что до первой сборки дашборды не
+    показывают нули.
+
+    Returns:
+        list: Строки в формате collect()
+    """
+    spec = get_rollups()[name]
+    today = timezone.localdate()
+    end = min(end, today)
+    if start > end:
+        return []
+
+    rows = []
+    last_rolled = min(end, today - timedelta(days=1))
+    if start <= last_rolled:
+        rows.extend(
+            spec['model'].objects.filter(day__gte=start, day__lte=last_rolled)
+            .order_by('day')
+            .values('day', *_key_fields(spec), *spec['measures'])
+        )
+
+    rolled_days = {row['day'] for row in rows}
+    missing = [
+        day for day in (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+        if day not in rolled_days
+    ]
+    if missing:
+        missing_days = set(missing)
+        rows.extend(row for row in collect(name, missing[0], missing[-1]) if row['day'] in missing_days)
+    return rows
+
+
+def _total(rows: List[Dict], measures: Iterable[str], key: Optional[str] = None, **filters) -> Dict:
+    """➕ Сумма агрегатов строк (с key - по значениям поля группировки)"""
+    measures = list(measures)
+    totals = {}
+    for row in rows:
+        if any(row[field] != value for field, value in filters.items()):
+            continue
+        bucket = totals.setdefault(row[key] if key else None, dict.fromkeys(measures, 0))
+        for measure in measures:
+            bucket[measure] += row[measure]
+    if key:
+        return totals
+    return totals.get(None, dict.fromkeys(measures, 0))
+
+
+def _daily(rows: List[Dict], start: date, end: date, measure: str, **filters) -> List[Dict]:
+    """📅 Ряд по дням периода (дни без данных - нули)"""
+    by_day = _total(rows, [measure], key='day', **filters)
+    return [
+        {'day': day.isoformat(), measure: by_day.get(day, {}).get(measure, 0)}
+        for day in (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+    ]
+
+
+def review_summary(start: date, end: date) -> Dict:
+    """📝 Отзывы за период: всего, по статусу, по оценкам, по дням"""
+    rows = read_rows('reviews', start, end)
+    totals = _total(rows, ['reviews', 'anonymous'])
+    approved = _total(rows, ['reviews'], is_approved=True)['reviews']
+    by_stars = _total(rows, ['reviews'], key='stars')
+    return {
+        'total': totals['reviews'],
+        'approved': approved,
+        'pending': totals['reviews'] - approved,
+        'anonymous': totals['anonymous'],
+        'by_stars': {stars: by_stars.get(stars, {}).get('reviews', 0) for stars in range(5, 0, -1)},
+        'daily': _daily(rows, start, end, 'reviews'),
+    }
+
+
+def order_summary(start: date, end: date) -> Dict:
+    """🛒 Заказы за период: число и выручка по доставке, статусу оплаты и дням"""
+    from accounts.models import Order
+
+    rows = read_rows('orders', start, end)
+    measures = ['orders', 'revenue', 'items_total', 'with_coupon']
+    delivery_labels = dict(Order._meta.get_field('delivery_method').choices)
+    by_delivery = _total(rows, measures, key='delivery_method')
+    return {
+        **_total(rows, measures),
+        'paid': _total(rows, ['orders', 'revenue'], payment_status='paid'),
+        'by_delivery': {
+            method: {'label': delivery_labels.get(method, method), **values}
+            for method, values in by_delivery.items()
+        },
+        'by_payment_status': _total(rows, ['orders', 'revenue'], key='payment_status'),
+        'daily': _daily(rows, start, end, 'orders'),
+    }
+
+
+def spam_summary(start: date, end: date) -> Dict:
+    """🚨 Спам-проверки за период: отзывы по уровню оценки, подозрительные по дням"""
+    rows = read_rows('spam', start, end)
+    totals = _total(rows, ['reviews', 'suspicious', 'score_sum'])
+    by_level = _total(rows, ['reviews', 'suspicious'], key='level')
+    return {
+        'reviews': totals['reviews'],
+        'suspicious': totals['suspicious'],
+        'avg_score': round(totals['score_sum'] / totals['reviews'], 1) if totals['reviews'] else 0,
+        'by_level': {
+            level: by_level.get(level, {'reviews': 0, 'suspicious': 0})
+            for level in ('high', 'medium', 'low', 'minimal')
+        },
+        'daily': _daily(rows, start, end, 'suspicious'),
+    }
+
+
+def dashboard(start: date, end: date) -> Dict:
+    """📊 Все сводки за период (для reviews_statistics и /common/stats/daily/)"""
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'reviews': review_summary(start, end),
+        'orders': order_summary(start, end),
+        'spam': spam_summary(start, end),
+    }
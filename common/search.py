@@ -0,0 +1,749 @@
+# 📁 common/search.py
+# 🔍 Полнотекстовый поиск по товарам (авто, лодки) и категориям
+# 🇷🇺 Русский/английский стемминг, склейка кириллических/латинских двойников (Х→X, С→C)
+# 🔤 Нечеткий поиск по триграммам и ранжирование по релевантности
+# 🐘 На PostgreSQL используется tsvector, а при наличии расширения - pg_trgm
+
+import bisect
+import math
+import re
+import threading
+import time
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, FloatField, Value, When
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+logger = logging.getLogger(__name__)
+
+# ⚙️ Настройки поиска (можно переопределить в settings.SEARCH)
+SEARCH_CONFIG = {
+    'FUZZY_THRESHOLD': 0.4,       # Минимальное триграммное сходство для опечаток
+    'FUZZY_CANDIDATES': 5,        # Максимум вариантов исправления на слово
+    'PREFIX_CANDIDATES': 20,      # Максимум продолжений для недописанного слова
+    'MAX_RESULTS': 500,           # Максимум документов в выдаче
+    'CHECK_INTERVAL': 2.0,        # Как часто сверять версию словаря (секунды)
+    'USE_POSTGRES': True,         # Использовать tsvector/pg_trgm на PostgreSQL
+}
+SEARCH_CONFIG.update(getattr(settings, 'SEARCH', {}))
+
+# 🔑 Ключ кэша с версией индекса (короткая памятка на CHECK_INTERVAL, источник версии - БД)
+SEARCH_INDEX_VERSION_KEY = 'search_index_version'
+
+# ⚖️ Веса полей документа
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'sku': 4.0,
+    'category': 1.5,
+    'text': 1.0,
+}
+
+# 📊 Множители релевантности для разных видов совпадения
+EXACT_FACTOR = 1.0
+PREFIX_FACTOR = 0.7
+FUZZY_FACTOR = 0.8
+
+# 🔤 Кириллические буквы, совпадающие по начертанию с латинскими
+HOMOGLYPHS = str.maketrans({
+    'а': 'a', 'в': 'b', 'е': 'e', 'к': 'k', 'м': 'm', 'н': 'h', 'о': 'o',
+    'р': 'p', 'с': 'c', 'т': 't', 'у': 'y', 'х': 'x',
+})
+HOMOGLYPH_LETTERS = set('авекмнорстух')
+
+STOP_WORDS = {
+    'и', 'в', 'во', 'на', 'для', 'с', 'со', 'по', 'к', 'ко', 'из', 'от', 'до', 'за', 'о', 'об',
+    'а', 'но', 'или', 'не', 'то', 'же', 'ли', 'как', 'что',
+    'the', 'a', 'an', 'and', 'or', 'for', 'of', 'to', 'in', 'on', 'with',
+}
+
+TOKEN_RE = re.compile(r'[0-9a-zа-яё]+')
+CYRILLIC_RE = re.compile(r'[а-я]')
+LATIN_RE = re.compile(r'[a-z]')
+
+
+# ==================== 🇷🇺 СТЕММИНГ ====================
+
+_RU_RV = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+_RU_PERFECTIVE_GERUND = re.compile(r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$')
+_RU_REFLEXIVE = re.compile(r'(с[яь])$')
+_RU_ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|ую|юю|ая|яя|ою|ею)$'
+)
+_RU_PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+_RU_VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)'
+    r'|((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+_RU_NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+_RU_DERIVATIONAL = re.compile(r'.*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$')
+_RU_DERIVATIONAL_SUFFIX = re.compile(r'ость?$')
+_RU_SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+
+
+def stem_russian(word: str) -> str:
+    """
+    🇷🇺 Стеммер Портера для русского языка (алгоритм Snowball)
+
+    Args:
+        word: Слово в нижнем регистре
+
+    Returns:
+        str: Основа слова ("коврики" → "коврик")
+    """
+    match = _RU_RV.match(word)
+    if not match:
+        return word
+
+    prefix, rv = match.group(1), match.group(2)
+
+    # Шаг 1: деепричастия, затем возвратные + прилагательные/глаголы/существительные
+    stripped = _RU_PERFECTIVE_GERUND.sub('', rv, 1)
+    if stripped == rv:
+        rv = _RU_REFLEXIVE.sub('', rv, 1)
+        stripped = _RU_ADJECTIVE.sub('', rv, 1)
+        if stripped != rv:
+            rv = _RU_PARTICIPLE.sub('', stripped, 1)
+        else:
+            stripped = _RU_VERB.sub('', rv, 1)
+            rv = _RU_NOUN.sub('', rv, 1) if stripped == rv else stripped
+    else:
+        rv = stripped
+
+    # Шаг 2: конечное «и»
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательные суффиксы
+    if _RU_DERIVATIONAL.match(rv):
+        rv = _RU_DERIVATIONAL_SUFFIX.sub('', rv, 1)
+
+    # Шаг 4: мягкий знак, превосходная степень, двойное «н»
+    if rv.endswith('ь'):
+        rv = rv[:-1]
+    else:
+        rv = _RU_SUPERLATIVE.sub('', rv, 1)
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+
+    return prefix + rv
+
+
+def stem_english(word: str) -> str:
+    """🇬🇧 Облегченный английский стеммер (множественное число, -ing, -ed)"""
+    if len(word) <= 3:
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith('sses'):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith('ss') and not word.endswith('us'):
+        word = word[:-1]
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+# ==================== 🔤 НОРМАЛИЗАЦИЯ ====================
+
+def normalize_token(token: str) -> str:
+    """
+    🔤 Приводит токен к термину индекса
+
+    - ё → е
+    - смешанные токены (кириллица + латиница/цифры) переводятся в латиницу: "Х5" → "x5"
+    - чисто русские слова стеммятся по-русски, чисто латинские - по-английски
+    - токены с цифрами не стеммятся (артикулы, модели)
+    """
+    token = token.lower().replace('ё', 'е')
+    has_cyrillic = bool(CYRILLIC_RE.search(token))
+    has_latin = bool(LATIN_RE.search(token))
+    has_digit = any(char.isdigit() for char in token)
+
+    if has_cyrillic and (has_latin or has_digit):
+        token = token.translate(HOMOGLYPHS)
+        has_cyrillic = bool(CYRILLIC_RE.search(token))
+
+    if has_digit or (has_cyrillic and has_latin):
+        return token
+    if has_cyrillic:
+        return stem_russian(token)
+    return stem_english(token)
+
+
+def tokenize(text: str) -> List[str]:
+    """✂️ Разбивает текст на слова (без стоп-слов)"""
+    if not text:
+        return []
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def analyze(text: str) -> List[str]:
+    """🔍 Текст → список терминов индекса"""
+    return [normalize_token(token) for token in tokenize(text)]
+
+
+def fold_text(text: str) -> str:
+    """🔤 Текст для tsvector: HTML убран, двойники в смешанных словах переведены в латиницу"""
+    words = []
+    for token in TOKEN_RE.findall(strip_tags(text or '').lower().replace('ё', 'е')):
+        if CYRILLIC_RE.search(token) and (LATIN_RE.search(token) or any(c.isdigit() for c in token)):
+            token = token.translate(HOMOGLYPHS)
+        words.append(token)
+    return ' '.join(words)
+
+
+def query_variants(token: str) -> List[str]:
+    """
+    🔀 Варианты термина для слова из запроса
+
+    Чисто кириллическое слово из одних «двойников» ("ВМВ", "ХС")
+    дополнительно ищется в латинском написании.
+    """
+    variants = [normalize_token(token)]
+    lowered = token.lower()
+    if lowered and set(lowered) <= HOMOGLYPH_LETTERS:
+        latin = lowered.translate(HOMOGLYPHS)
+        if latin not in variants:
+            variants.append(latin)
+    return variants
+
+
+def trigrams(term: str) -> Set[str]:
+    """🔤 Триграммы термина (с граничными пробелами, как в pg_trgm)"""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigram_similarity(left: str, right: str) -> float:
+    """📐 Сходство двух терминов по Жаккару на триграммах"""
+    left_set, right_set = trigrams(left), trigrams(right)
+    if not left_set or not right_set:
+        return 0.0
+    return len(left_set & right_set) / len(left_set | right_set)
+
+
+# ==================== 📄 ДОКУМЕНТЫ ====================
+
+def get_indexed_models():
+    """📋 Модели, попадающие в поисковый индекс"""
+    from products.models import Product, Category
+    from boats.models import BoatProduct
+    return [Product, BoatProduct, Category]
+
+
+def build_document(instance) -> Optional[Dict]:
+    """
+    📄 Собирает поля документа для товара или категории
+
+    Returns:
+        Dict: {'title', 'boost', 'fields': {имя_поля: текст}} или None, если объект не индексируется
+    """
+    from products.models import Category
+
+    if isinstance(instance, Category):
+        if not instance.is_active:
+            return None
+        return {
+            'title': instance.category_name or '',
+            'boost': 1.2,
+            'fields': {
+                'title': instance.category_name,
+                'sku': instance.category_sku,
+                'text': strip_tags(instance.description or ''),
+            },
+        }
+
+    category = getattr(instance, 'category', None)
+    return {
+        'title': instance.product_name or '',
+        'boost': 1.0,
+        'fields': {
+            'title': instance.product_name,
+            'sku': instance.product_sku,
+            'category': category.category_name if category else '',
+            'text': strip_tags(instance.product_desription or ''),
+        },
+    }
+
+
+def _field_weights(fields: Dict[str, str]) -> Dict[str, float]:
+    """⚖️ Вес каждого термина документа: сумма весов полей × частота (логарифмически)"""
+    weights: Dict[str, float] = defaultdict(float)
+    for field_name, text in fields.items():
+        field_weight = FIELD_WEIGHTS.get(field_name, 1.0)
+        counts: Dict[str, int] = defaultdict(int)
+        for term in analyze(str(text or '')):
+            if len(term) <= 64:
+                counts[term] += 1
+        for term, count in counts.items():
+            weights[term] += field_weight * (1 + math.log(count))
+    return weights
+
+
+# ==================== 🗂️ ИНДЕКСАЦИЯ ====================
+
+def index_instance(instance, bump_version: bool = True):
+    """
+    ➕ Добавляет или обновляет документ объекта в индексе
+
+    Args:
+        instance: Product, BoatProduct или Category
+        bump_version: Увеличить версию словаря (False при массовой перестройке)
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from common.models import SearchDocument, SearchPosting
+
+    document_data = build_document(instance)
+    if document_data is None:
+        remove_instance(instance, bump_version=bump_version)
+        return
+
+    content_type = ContentType.objects.get_for_model(instance)
+    fields = document_data['fields']
+    search_text = fold_text(' '.join(str(value or '') for value in fields.values()))
+
+    with transaction.atomic():
+        document, _ = SearchDocument.objects.update_or_create(
+            content_type=content_type,
+            object_id=instance.pk,
+            defaults={
+                'title': document_data['title'][:255],
+                'search_text': search_text,
+                'boost': document_data['boost'],
+            }
+        )
+        SearchPosting.objects.filter(document=document).delete()
+        SearchPosting.objects.bulk_create([
+            SearchPosting(document=document, term=term, weight=weight)
+            for term, weight in _field_weights(fields).items()
+        ])
+
+    if bump_version:
+        bump_index_version()
+
+
+def remove_instance(instance, bump_version: bool = True):
+    """➖ Удаляет документ объекта из индекса"""
+    from django.contrib.contenttypes.models import ContentType
+    from common.models import SearchDocument
+
+    content_type = ContentType.objects.get_for_model(instance)
+    deleted, _ = SearchDocument.objects.filter(content_type=content_type, object_id=instance.pk).delete()
+    if deleted and bump_version:
+        bump_index_version()
+
+
+def reindex_objects(model, pks, chunk_size: int = 500) -> int:
+    """
+    🔄 Пакетная переиндексация объектов одной модели (после bulk-операций без сигналов)
+
+    На пакет - несколько запросов вместо нескольких на каждый объект:
+    старые документы удаляются одним DELETE (термины - каскадом),
+    новые документы и термины вставляются bulk_create.
+
+    Returns:
+        int: Количество проиндексированных объектов
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from common.models import SearchDocument, SearchPosting
+
+    content_type = ContentType.objects.get_for_model(model)
+    pks = list(pks)
+    total = 0
+    for start in range(0, len(pks), chunk_size):
+        chunk = pks[start:start + chunk_size]
+        queryset = model.objects.filter(pk__in=chunk)
+        if hasattr(model, 'category'):
+            queryset = queryset.select_related('category')
+
+        documents, postings = [], []
+        for instance in queryset:
+            document_data = build_document(instance)
+            if document_data is None:
+                continue
+            fields = document_data['fields']
+            document = SearchDocument(
+                content_type=content_type,
+                object_id=instance.pk,
+                title=document_data['title'][:255],
+                search_text=fold_text(' '.join(str(value or '') for value in fields.values())),
+                boost=document_data['boost'],
+            )
+            documents.append(document)
+            postings.extend(
+                SearchPosting(document=document, term=term, weight=weight)
+                for term, weight in _field_weights(fields).items()
+            )
+
+        with transaction.atomic():
+            SearchDocument.objects.filter(content_type=content_type, object_id__in=chunk).delete()
+            SearchDocument.objects.bulk_create(documents)
+            SearchPosting.objects.bulk_create(postings, batch_size=2000)
+        total += len(documents)
+
+    if total:
+        bump_index_version()
+    return total
+
+
+def schedule_reindex(model, pks):
+    """⏳ Пакетная переиндексация после COMMIT (для массового импорта)"""
+    pks = list(pks)
+    if not pks:
+        return
+
+    def reindex():
+        try:
+            reindex_objects(model, pks)
+        except Exception as e:
+            logger.error(f"❌ Ошибка переиндексации {model.__name__}: {e}")
+
+    transaction.on_commit(reindex)
+
+
+def bump_index_version():
+    """
+    🔄 Сброс памятки версии и словаря текущего процесса
+
+    Версия индекса выводится из таблицы SearchDocument, поэтому остальные
+    воркеры увидят изменения при следующей сверке (не позже CHECK_INTERVAL).
+    """
+    cache.delete(SEARCH_INDEX_VERSION_KEY)
+    _vocabulary.invalidate()
+
+
+# ==================== 📚 СЛОВАРЬ ====================
+
+class _Vocabulary:
+    """📚 Процессный словарь терминов с триграммным индексом для опечаток и префиксов"""
+
+    def __init__(self):
+        self._data: Optional[Tuple[object, List[str], Dict[str, Set[str]]]] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._data = None
+        self._checked_at = 0.0
+
+    @staticmethod
+    def _current_version():
+        """🔑 Версия индекса: число документов и последний updated_at (памятка в кэше на CHECK_INTERVAL)"""
+        version = cache.get(SEARCH_INDEX_VERSION_KEY)
+        if version is not None:
+            return version
+
+        from django.db.models import Count, Max
+        from common.models import SearchDocument
+
+        stats = SearchDocument.objects.aggregate(count=Count('pk'), last=Max('updated_at'))
+        version = f"{stats['count']}|{stats['last'].isoformat() if stats['last'] else ''}"
+        cache.set(SEARCH_INDEX_VERSION_KEY, version, SEARCH_CONFIG['CHECK_INTERVAL'])
+        return version
+
+    def _get(self):
+        data = self._data
+        now = time.monotonic()
+        if data is not None and now - self._checked_at < SEARCH_CONFIG['CHECK_INTERVAL']:
+            return data
+
+        version = self._current_version()
+        self._checked_at = now
+        if data is not None and data[0] == version:
+            return data
+
+        with self._lock:
+            data = self._data
+            if data is None or data[0] != version:
+                from common.models import SearchPosting
+                terms = sorted(set(SearchPosting.objects.values_list('term', flat=True).distinct()))
+                grams: Dict[str, Set[str]] = defaultdict(set)
+                for term in terms:
+                    for gram in trigrams(term):
+                        grams[gram].add(term)
+                data = (version, terms, dict(grams))
+                self._data = data
+        return data
+
+    def expand(self, term: str) -> Dict[str, float]:
+        """
+        🔀 Термины словаря, подходящие под слово запроса
+
+        Returns:
+            Dict[str, float]: {термин: множитель релевантности}
+        """
+        _, terms, grams = self._get()
+        candidates = {term: EXACT_FACTOR}
+
+        # ✍️ Недописанное слово - продолжения по префиксу (словарь отсортирован)
+        if len(term) >= 3:
+            position = bisect.bisect_left(terms, term)
+            found = 0
+            while position < len(terms) and terms[position].startswith(term):
+                if terms[position] != term:
+                    candidates.setdefault(terms[position], PREFIX_FACTOR)
+                    found += 1
+                    if found >= SEARCH_CONFIG['PREFIX_CANDIDATES']:
+                        break
+                position += 1
+
+        # 🔤 Опечатки - похожие термины по триграммам
+        if len(term) >= 4:
+            shared: Dict[str, int] = defaultdict(int)
+            for gram in trigrams(term):
+                for candidate in grams.get(gram, ()):
+                    shared[candidate] += 1
+            scored = []
+            for candidate in shared:
+                if candidate == term:
+                    continue
+                similarity = trigram_similarity(term, candidate)
+                if similarity >= SEARCH_CONFIG['FUZZY_THRESHOLD']:
+                    scored.append((similarity, candidate))
+            scored.sort(reverse=True)
+            for similarity, candidate in scored[:SEARCH_CONFIG['FUZZY_CANDIDATES']]:
+                candidates.setdefault(candidate, FUZZY_FACTOR * similarity)
+
+        return candidates
+
+
+_vocabulary = _Vocabulary()
+
+
+# ==================== 🔍 ПОИСК ====================
+
+class SearchHit:
+    """🎯 Результат поиска"""
+
+    __slots__ = ('content_type_id', 'object_id', 'title', 'score')
+
+    def __init__(self, content_type_id, object_id, title, score):
+        self.content_type_id = content_type_id
+        self.object_id = object_id
+        self.title = title
+        self.score = score
+
+    def __repr__(self):
+        return f"<SearchHit {self.title!r} {self.score:.3f}>"
+
+
+def _content_type_ids(models) -> Optional[List[int]]:
+    if not models:
+        return None
+    from django.contrib.contenttypes.models import ContentType
+    return [ContentType.objects.get_for_model(model).pk for model in models]
+
+
+def _search_inverted_index(query_tokens: List[str], content_type_ids, limit: int) -> List[SearchHit]:
+    """🗂️ Поиск по собственному инвертированному индексу (SQLite и любые БД)"""
+    from common.models import SearchDocument, SearchPosting
+
+    # 🔀 Для каждого слова запроса - набор терминов с множителями
+    expansions = []
+    for token in query_tokens:
+        expanded: Dict[str, float] = {}
+        for variant in query_variants(token):
+            for term, factor in _vocabulary.expand(variant).items():
+                expanded[term] = max(expanded.get(term, 0.0), factor)
+        expansions.append(expanded)
+
+    all_terms = set()
+    for expanded in expansions:
+        all_terms.update(expanded)
+    if not all_terms:
+        return []
+
+    postings = SearchPosting.objects.filter(term__in=all_terms)
+    if content_type_ids is not None:
+        postings = postings.filter(document__content_type_id__in=content_type_ids)
+
+    by_term: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+    for document_id, term, weight in postings.values_list('document_id', 'term', 'weight'):
+        by_term[term].append((document_id, weight))
+
+    total_documents = max(1, SearchDocument.objects.count())
+
+    # 🧮 Для каждого слова запроса берем лучшее совпадение в документе (tf·idf·множитель)
+    scores: Dict[int, float] = defaultdict(float)
+    matched: Dict[int, int] = defaultdict(int)
+    for expanded in expansions:
+        best: Dict[int, float] = {}
+        for term, factor in expanded.items():
+            term_postings = by_term.get(term)
+            if not term_postings:
+                continue
+            idf = math.log(1 + total_documents / len(term_postings))
+            for document_id, weight in term_postings:
+                value = weight * idf * factor
+                if value > best.get(document_id, 0.0):
+                    best[document_id] = value
+        for document_id, value in best.items():
+            scores[document_id] += value
+            matched[document_id] += 1
+
+    if not scores:
+        return []
+
+    # 🎯 Если есть документы со всеми словами запроса - показываем только их
+    required = max(matched.values())
+    candidate_ids = [document_id for document_id, count in matched.items() if count == required]
+
+    documents = SearchDocument.objects.filter(pk__in=candidate_ids).values_list(
+        'pk', 'content_type_id', 'object_id', 'title', 'boost'
+    )
+    hits = [
+        SearchHit(content_type_id, object_id, title, scores[pk] * boost)
+        for pk, content_type_id, object_id, title, boost in documents
+    ]
+    hits.sort(key=lambda hit: hit.score, reverse=True)
+    return hits[:limit]
+
+
+_pg_trgm_available = None
+
+
+def _postgres_enabled() -> bool:
+    return connection.vendor == 'postgresql' and SEARCH_CONFIG['USE_POSTGRES']
+
+
+def _has_pg_trgm() -> bool:
+    """🐘 Установлено ли расширение pg_trgm (проверяется один раз на процесс)"""
+    global _pg_trgm_available
+    if _pg_trgm_available is None:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                _pg_trgm_available = cursor.fetchone() is not None
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось проверить pg_trgm: {e}")
+            _pg_trgm_available = False
+    return _pg_trgm_available
+
+
+def _search_postgres(query: str, content_type_ids, limit: int) -> List[SearchHit]:
+    """🐘 Поиск средствами PostgreSQL: tsvector('russian') + триграммы pg_trgm"""
+    from common.models import SearchDocument
+
+    table = SearchDocument._meta.db_table
+    folded_query = fold_text(query)
+    use_trgm = _has_pg_trgm()
+
+    if use_trgm:
+        # 🔤 word_similarity / <% дают устойчивость к опечаткам
+        rank_sql = "ts_rank_cd(to_tsvector('russian', search_text), q) + word_similarity(%s, search_text)"
+        match_sql = "(to_tsvector('russian', search_text) @@ q OR %s <%% search_text)"
+        params = [folded_query, folded_query, folded_query]
+    else:
+        rank_sql = "ts_rank_cd(to_tsvector('russian', search_text), q)"
+        match_sql = "to_tsvector('russian', search_text) @@ q"
+        params = [folded_query]
+
+    type_filter = ''
+    if content_type_ids is not None:
+        type_filter = 'AND content_type_id = ANY(%s)'
+        params.append(list(content_type_ids))
+    params.append(limit)
+
+    # Порядок параметров совпадает с порядком %s в запросе: rank, tsquery, match, типы, limit
+    sql = (
+        f"SELECT content_type_id, object_id, title, ({rank_sql}) * boost AS rank "
+        f"FROM {table}, websearch_to_tsquery('russian', %s) q "
+        f"WHERE {match_sql} {type_filter} "
+        f"ORDER BY rank DESC LIMIT %s"
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [SearchHit(*row) for row in cursor.fetchall()]
+
+
+def search(query: str, models=None, limit: Optional[int] = None) -> List[SearchHit]:
+    """
+    🔍 Поиск по индексу
+
+    Args:
+        query: Строка запроса ("коврики BMW Х5")
+        models: Список моделей для ограничения выдачи (по умолчанию все)
+        limit: Максимум результатов
+
+    Returns:
+        List[SearchHit]: Результаты по убыванию релевантности
+    """
+    limit = limit or SEARCH_CONFIG['MAX_RESULTS']
+    query_tokens = tokenize(query)
+    if not query_tokens:
+        return []
+
+    content_type_ids = _content_type_ids(models)
+
+    if _postgres_enabled():
+        try:
+            return _search_postgres(query, content_type_ids, limit)
+        except Exception as e:
+            logger.warning(f"⚠️ PostgreSQL-поиск недоступен, используем индекс: {e}")
+
+    return _search_inverted_index(query_tokens, content_type_ids, limit)
+
+
+def search_queryset(queryset, query: str, limit: Optional[int] = None):
+    """
+    🔍 Фильтрует queryset по поисковому запросу и аннотирует search_rank
+
+    Args:
+        queryset: QuerySet товаров или категорий
+        query: Строка запроса
+
+    Returns:
+        QuerySet: Только найденные объекты, отсортированные по релевантности
+    """
+    hits = search(query, models=[queryset.model], limit=limit)
+    if not hits:
+        return queryset.none()
+
+    ranks = {hit.object_id: hit.score for hit in hits}
+    return queryset.filter(pk__in=list(ranks)).annotate(
+        search_rank=Case(
+            *[When(pk=object_id, then=Value(score)) for object_id, score in ranks.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    ).order_by('-search_rank')
+
+
+def rebuild_index(chunk_size: int = 500, stdout=None) -> int:
+    """
+    🔄 Полная перестройка индекса пачками
+
+    Returns:
+        int: Количество проиндексированных объектов
+    """
+    from common.models import SearchDocument
+
+    started_at = timezone.now()
+    total = 0
+    for model in get_indexed_models():
+        queryset = model.objects.all()
+        if hasattr(model, 'category'):
+            queryset = queryset.select_related('category')
+        for instance in queryset.order_by('pk').iterator(chunk_size=chunk_size):
+            index_instance(instance, bump_version=False)
+            total += 1
+            if stdout and total % chunk_size == 0:
+                stdout.write(f"📦 Проиндексировано: {total}")
+
+    # 🧹 Документы удаленных (или неактивных) объектов
+    stale, _ = SearchDocument.objects.filter(updated_at__lt=started_at).delete()
+    if stdout and stale:
+        stdout.write(f"🧹 Удалено устаревших документов: {stale}")
+
+    bump_index_version()
+    return total
@@ -0,0 +1,345 @@
+# 📁 common/signals.py
+# 🔔 Сигналы приложения common
+# ⭐ Инкрементальное обновление агрегатов рейтинга при изменении отзывов
+# 📊 Дельты материализованных счетчиков модерации (ReviewCounters)
+# 🔍 Инкрементальное обновление поискового индекса при изменении товаров и категорий
+# 🗄️ Точечная инвалидация тегового кэша страниц
+# 🖼️ Генерация адаптивных производных изображений после загрузки
+# 🪦 Журнал удалений для ленты изменений (common/change_feed.py)
+
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from products.models import (
+    Product, Category, ProductImage, KitVariant, Color, AutoCatalogDescription
+)
+from boats.models import BoatProduct, BoatCategory, BoatProductImage, BoatCatalogDescription
+from blog.models import Article, Category as BlogCategory
+from .models import (
+    ProductReview, ProductRating, ReviewCounters, AdminReply, SpamTerm, IPRange, RATING_STATE_UNKNOWN
+)
+from . import search
+from . import page_cache
+from . import image_derivatives
+from . import change_feed
+from . import spam_lexicon
+from . import review_index
+from . import ip_ranges
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=ProductReview)
+def update_rating_on_review_save(sender, instance, created, raw=False, **kwargs):
+    """
+    ⭐ Переносит вклад отзыва в агрегаты рейтинга после сохранения
+
+    Args:
+        sender: Класс модели (ProductReview)
+        instance: Экземпляр отзыва
+        created: True если отзыв только что создан
+        raw: True при загрузке фикстур
+    """
+    if raw:
+        return
+
+    new_state = instance.get_rating_state()
+    old_state = None if created else getattr(instance, '_rating_snapshot', RATING_STATE_UNKNOWN)
+
+    if old_state is RATING_STATE_UNKNOWN:
+        # 🧮 Прежнее состояние неизвестно - пересчитываем товар целиком
+        ProductRating.recalculate_many([(instance.content_type_id, instance.object_id)])
+    else:
+        ProductRating.apply_review_change(old_state, new_state)
+
+    instance._rating_snapshot = new_state
+
+
+@receiver(post_delete, sender=ProductReview)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    """⭐ Убирает вклад удаленного отзыва из агрегатов рейтинга"""
+    old_state = getattr(instance, '_rating_snapshot', RATING_STATE_UNKNOWN)
+
+    if old_state is RATING_STATE_UNKNOWN:
+        ProductRating.recalculate_many([(instance.content_type_id, instance.object_id)])
+    else:
+        ProductRating.apply_review_change(old_state, None)
+
+    instance._rating_snapshot = None
+
+
+
+# ==================== 📊 СЧЕТЧИКИ МОДЕРАЦИИ ====================
+
+@receiver(post_save, sender=ProductReview)
+def update_counters_on_review_save(sender, instance, created, raw=False, **kwargs):
+    """📊 Переносит вклад отзыва в счетчики модерации (в транзакции ProductReview.save)"""
+    if raw:
+        return
+
+    new_state = instance.get_counter_state()
+    old_state = None if created else getattr(instance, '_counter_snapshot', RATING_STATE_UNKNOWN)
+
+    if old_state is RATING_STATE_UNKNOWN:
+        ReviewCounters.recalculate()
+    else:
+        ReviewCounters.apply_review_change(old_state, new_state)
+
+    instance._counter_snapshot = new_state
+
+
+@receiver(post_delete, sender=ProductReview)
+def update_counters_on_review_delete(sender, instance, **kwargs):
+    """📊 Убирает вклад удаленного отзыва из счетчиков модерации"""
+    old_state = getattr(instance, '_counter_snapshot', RATING_STATE_UNKNOWN)
+
+    if old_state is RATING_STATE_UNKNOWN:
+        ReviewCounters.recalculate()
+    else:
+        ReviewCounters.apply_review_change(old_state, None)
+
+    instance._counter_snapshot = None
+
+# ==================== 🔍 ПОИСКОВЫЙ ИНДЕКС ====================
+
+def _safe_index(instance):
+    """🔍 Индексация без влияния на сохранение объекта при ошибке"""
+    try:
+        search.index_instance(instance)
+    except Exception as e:
+        logger.error(f"❌ Ошибка индексации {instance.__class__.__name__} {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=BoatProduct)
+def update_search_index_on_product_save(sender, instance, raw=False, **kwargs):
+    """🔍 Переиндексация товара после фиксации транзакции"""
+    if raw:
+        return
+    transaction.on_commit(lambda: _safe_index(instance))
+
+
+@receiver(post_save, sender=Category)
+def update_search_index_on_category_save(sender, instance, raw=False, **kwargs):
+    """🔍 Переиндексация категории и ее товаров (название категории входит в их документы)"""
+    if raw:
+        return
+
+    def reindex():
+        _safe_index(instance)
+        try:
+            search.reindex_objects(Product, instance.products.values_list('pk', flat=True))
+        except Exception as e:
+            logger.error(f"❌ Ошибка переиндексации товаров категории {instance.pk}: {e}")
+
+    transaction.on_commit(reindex)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=BoatProduct)
+@receiver(post_delete, sender=Category)
+def remove_from_search_index(sender, instance, **kwargs):
+    """🔍 Удаление документа из индекса"""
+    try:
+        search.remove_instance(instance)
+    except Exception as e:
+        logger.error(f"❌ Ошибка удаления из индекса {sender.__name__} {instance.pk}: {e}")
+
+
+# ==================== 🗄️ ТЕГОВЫЙ КЭШ СТРАНИЦ ====================
+
+# 📋 Модель → (тег общего каталога, тег списка категорий)
+CATALOG_TAGS = {
+    Product: (page_cache.PRODUCTS_CATALOG_TAG, page_cache.PRODUCT_CATEGORIES_TAG),
+    Category: (page_cache.PRODUCTS_CATALOG_TAG, page_cache.PRODUCT_CATEGORIES_TAG),
+    ProductImage: (page_cache.PRODUCTS_CATALOG_TAG, page_cache.PRODUCT_CATEGORIES_TAG),
+    BoatProduct: (page_cache.BOATS_CATALOG_TAG, page_cache.BOAT_CATEGORIES_TAG),
+    BoatCategory: (page_cache.BOATS_CATALOG_TAG, page_cache.BOAT_CATEGORIES_TAG),
+    BoatProductImage: (page_cache.BOATS_CATALOG_TAG, page_cache.BOAT_CATEGORIES_TAG),
+}
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=BoatProduct)
+def remember_product_category(sender, instance, raw=False, **kwargs):
+    """🗄️ Запоминает прежнюю категорию: при переносе товара устаревают обе"""
+    if raw or instance._state.adding:
+        return
+    instance._page_cache_old_category_id = (
+        sender.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=BoatProduct)
+@receiver(post_delete, sender=BoatProduct)
+def invalidate_product_pages(sender, instance, raw=False, **kwargs):
+    """🗄️ Товар изменен: его страница, листинг категории и общий каталог"""
+    if raw:
+        return
+    catalog_tag, _ = CATALOG_TAGS[sender]
+    category_ids = {instance.category_id, getattr(instance, '_page_cache_old_category_id', None)}
+    page_cache.invalidate_tags(
+        page_cache.product_tag(instance.pk),
+        catalog_tag,
+        *(page_cache.category_tag(category_id) for category_id in category_ids if category_id),
+    )
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=BoatProductImage)
+@receiver(post_delete, sender=BoatProductImage)
+def invalidate_product_image_pages(sender, instance, raw=False, **kwargs):
+    """🖼️ Изображение изменено: карточки товара в листингах и страница товара"""
+    if raw:
+        return
+    catalog_tag, _ = CATALOG_TAGS[sender]
+    product_model = Product if sender is ProductImage else BoatProduct
+    category_id = (
+        product_model.objects.filter(pk=instance.product_id)
+        .values_list('category_id', flat=True).first()
+    )
+    page_cache.invalidate_tags(
+        page_cache.product_tag(instance.product_id),
+        page_cache.category_tag(category_id) if category_id else None,
+        catalog_tag,
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=BoatCategory)
+@receiver(post_delete, sender=BoatCategory)
+def invalidate_category_pages(sender, instance, raw=False, **kwargs):
+    """📂 Категория изменена: ее листинг и все страницы со списком категорий"""
+    if raw:
+        return
+    catalog_tag, categories_tag = CATALOG_TAGS[sender]
+    page_cache.invalidate_tags(page_cache.category_tag(instance.pk), categories_tag, catalog_tag)
+
+
+@receiver(post_save, sender=AutoCatalogDescription)
+@receiver(post_delete, sender=AutoCatalogDescription)
+@receiver(post_save, sender=BoatCatalogDescription)
+@receiver(post_delete, sender=BoatCatalogDescription)
+def invalidate_catalog_description_pages(sender, raw=False, **kwargs):
+    """📝 Описание каталога выводится на страницах со списком категорий"""
+    if raw:
+        return
+    if sender is AutoCatalogDescription:
+        page_cache.invalidate_tags(page_cache.PRODUCT_CATEGORIES_TAG)
+    else:
+        page_cache.invalidate_tags(page_cache.BOAT_CATEGORIES_TAG)
+
+
+@receiver(post_save, sender=KitVariant)
+@receiver(post_delete, sender=KitVariant)
+def invalidate_kit_pages(sender, raw=False, **kwargs):
+    """📦 Комплектации влияют на цены во всех листингах и на страницах товаров"""
+    if raw:
+        return
+    page_cache.invalidate_tags(page_cache.KITS_TAG)
+
+
+@receiver(post_save, sender=Color)
+@receiver(post_delete, sender=Color)
+def invalidate_color_pages(sender, raw=False, **kwargs):
+    """🎨 Цвета выводятся в конфигураторе на страницах товаров"""
+    if raw:
+        return
+    page_cache.invalidate_tags(page_cache.COLORS_TAG)
+
+
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def invalidate_review_pages(sender, instance, raw=False, **kwargs):
+    """📝 Отзыв изменен: снимок страницы товара и листинг (рейтинг) его категории"""
+    if raw:
+        return
+    page_cache.invalidate_objects([(instance.content_type_id, instance.object_id)])
+
+
+@receiver(post_save, sender=AdminReply)
+@receiver(post_delete, sender=AdminReply)
+def invalidate_admin_reply_pages(sender, instance, raw=False, **kwargs):
+    """💬 Ответы администратора выводятся под отзывом на странице товара"""
+    if raw:
+        return
+    review = ProductReview.objects.filter(pk=instance.review_id).values_list(
+        'content_type_id', 'object_id'
+    ).first()
+    if review:
+        page_cache.invalidate_tags(page_cache.product_tag(review[1]))
+
+
+# ==================== ПРОИЗВОДНЫЕ ИЗОБРАЖЕНИЙ ====================
+
+# 🖼️ Модель → поле с изображением (см. image_derivatives.IMAGE_SOURCES)
+DERIVATIVE_IMAGE_FIELDS = {
+    ProductImage: 'image',
+    BoatProductImage: 'image',
+    Category: 'category_image',
+    BoatCategory: 'category_image',
+    Article: 'featured_image',
+    BlogCategory: 'image',
+}
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=BoatProductImage)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=BoatCategory)
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=BlogCategory)
+def schedule_image_derivatives(sender, instance, raw=False, **kwargs):
+    """🖼️ Производные нового или замененного файла (актуальные пропускаются по размеру и mtime)"""
+    if raw:
+        return
+    image = getattr(instance, DERIVATIVE_IMAGE_FIELDS[sender], None)
+    if image:
+        image_derivatives.schedule_derivatives([image.name])
+
+
+# ==================== 🪦 ЖУРНАЛ УДАЛЕНИЙ ====================
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=BoatProduct)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=BoatCategory)
+@receiver(post_delete, sender=KitVariant)
+def record_deletion_tombstone(sender, instance, **kwargs):
+    """🪦 Надгробие для подписчиков ленты изменений (в той же транзакции, что и удаление)"""
+    change_feed.record_deletion(instance)
+
+
+# ==================== 🚫 СЛОВАРЬ СПАМ-СЛОВ ====================
+
+@receiver(post_save, sender=SpamTerm)
+@receiver(post_delete, sender=SpamTerm)
+def invalidate_spam_lexicon(sender, instance, raw=False, **kwargs):
+    """🚫 Новая версия словаря после фиксации транзакции - автомат пересоберется при следующей проверке"""
+    transaction.on_commit(spam_lexicon.invalidate)
+
+
+# ==================== 🧬 ИНДЕКС ПОЧТИ-ДУБЛИКАТОВ ОТЗЫВОВ ====================
+
+@receiver(post_save, sender=ProductReview)
+def update_review_fingerprint(sender, instance, raw=False, **kwargs):
+    """🧬 Подпись отзыва для поиска копипаста (пересчитывается только при смене текста)"""
+    if raw:
+        return
+    review_index.schedule_index(instance)
+
+
+# ==================== 🌐 ДИАПАЗОНЫ IP ====================
+
+@receiver(post_save, sender=IPRange)
+@receiver(post_delete, sender=IPRange)
+def invalidate_ip_ranges(sender, instance, raw=False, **kwargs):
+    """🌐 Пересборка дерева диапазонов после фиксации транзакции"""
+    transaction.on_commit(ip_ranges.invalidate)
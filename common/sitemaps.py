@@ -0,0 +1,245 @@
+# 📁 common/sitemaps.py
+# 🗺️ Карта сайта в готовых файлах: индекс sitemap.xml + gzip-страницы разделов
+# 📋 Разделы: автоковрики (products/sitemap.py), лодки (boats/sitemap.py), блог (blog/sitemap.py)
+# 💾 Запросы краулеров отдаются с диска (common.views.sitemap_file или веб-сервер) - без обращений к БД
+#
+# Обновление инкрементальное. Подпись раздела - число объектов и последний
+# updated_at: раздел с прежней подписью не перечитывается. В измененном разделе
+# переписываются только страницы с другим содержимым - у остальных файлов
+# сохраняются mtime и ETag, краулер получает 304.
+
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+from datetime import date, datetime
+from types import SimpleNamespace
+from typing import Dict, List
+
+from xml.sax.saxutils import XMLGenerator
+
+from django.conf import settings
+from django.db.models import Count, Max, QuerySet
+
+logger = logging.getLogger(__name__)
+
+# 📁 Каталог готовых файлов (отдается по корню сайта: /sitemap.xml, /sitemap-<раздел>-<N>.xml.gz)
+SITEMAPS_DIR = getattr(settings, 'SITEMAPS_DIR', os.path.join(settings.BASE_DIR, 'sitemaps'))
+
+# 🌐 Домен и протокол адресов в карте (по умолчанию - из настроек писем)
+SITEMAP_DOMAIN = getattr(settings, 'SITEMAP_DOMAIN', getattr(settings, 'DEFAULT_DOMAIN', 'localhost'))
+SITEMAP_PROTOCOL = getattr(settings, 'SITEMAP_PROTOCOL', getattr(settings, 'DEFAULT_HTTP_PROTOCOL', 'https'))
+
+INDEX_FILE = 'sitemap.xml'
+STATE_FILE = 'sitemaps.state.json'
+PAGE_FILE_RE = re.compile(r'^sitemap-[a-z0-9_-]+-\d+\.xml\.gz$')
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def get_sitemaps() -> Dict[str, type]:
+    """🗺️ Все разделы карты сайта: имя раздела → класс Sitemap"""
+    from blog.sitemap import blog_sitemaps
+    from boats.sitemap import boats_sitemaps
+    from products.sitemap import products_sitemaps
+
+    return {**products_sitemaps, **boats_sitemaps, **blog_sitemaps}
+
+
+def page_filename(section: str, page: int) -> str:
+    """📄 Имя файла страницы раздела"""
+    return f'sitemap-{section}-{page}.xml.gz'
+
+
+# ==================== РАЗМЕТКА ====================
+
+def _format_lastmod(value) -> str:
+    """📅 Дата в формате W3C"""
+    if isinstance(value, datetime):
+        return value.replace(microsecond=0).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return ''
+
+
+def _element(writer: XMLGenerator, name: str, text: str):
+    writer.startElement(name, {})
+    writer.characters(text)
+    writer.endElement(name)
+
+
+def render_urlset(urls: List[Dict]) -> bytes:
+    """✍️ Страница карты (<urlset>) из результата Sitemap.get_urls()"""
+    buffer = io.BytesIO()
+    writer = XMLGenerator(buffer, encoding='utf-8', short_empty_elements=True)
+    writer.startDocument()
+    writer.startElement('urlset', {'xmlns': SITEMAP_NS})
+    writer.ignorableWhitespace('\n')
+    for url in urls:
+        writer.startElement('url', {})
+        _element(writer, 'loc', url['location'])
+        if url.get('lastmod'):
+            _element(writer, 'lastmod', _format_lastmod(url['lastmod']))
+        if url.get('changefreq'):
+            _element(writer, 'changefreq', url['changefreq'])
+        if url.get('priority'):
+            _element(writer, 'priority', url['priority'])
+        writer.endElement('url')
+        writer.ignorableWhitespace('\n')
+    writer.endElement('urlset')
+    writer.ignorableWhitespace('\n')
+    writer.endDocument()
+    return buffer.getvalue()
+
+
+def render_index(pages: List[Dict]) -> bytes:
+    """✍️ Индекс карт (<sitemapindex>) со ссылками на страницы разделов"""
+    buffer = io.BytesIO()
+    writer = XMLGenerator(buffer, encoding='utf-8', short_empty_elements=True)
+    writer.startDocument()
+    writer.startElement('sitemapindex', {'xmlns': SITEMAP_NS})
+    writer.ignorableWhitespace('\n')
+    for page in pages:
+        writer.startElement('sitemap', {})
+        _element(writer, 'loc', f"{SITEMAP_PROTOCOL}://{SITEMAP_DOMAIN}/{page['file']}")
+        if page['lastmod']:
+            _element(writer, 'lastmod', page['lastmod'])
+        writer.endElement('sitemap')
+        writer.ignorableWhitespace('\n')
+    writer.endElement('sitemapindex')
+    writer.ignorableWhitespace('\n')
+    writer.endDocument()
+    return buffer.getvalue()
+
+
+# ==================== ФАЙЛЫ ====================
+
+def _write_file(filename: str, data: bytes, compress: bool):
+    """💾 Атомарная запись файла карты (временный файл + os.replace)"""
+    os.makedirs(SITEMAPS_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=SITEMAPS_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            if compress:
+                with gzip.GzipFile(filename='', fileobj=raw, mode='wb', mtime=0) as compressed:
+                    compressed.write(data)
+            else:
+                raw.write(data)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, os.path.join(SITEMAPS_DIR, filename))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def _remove_file(filename: str):
+    try:
+        os.remove(os.path.join(SITEMAPS_DIR, filename))
+    except FileNotFoundError:
+        pass
+
+
+def _load_state() -> Dict:
+    try:
+        with open(os.path.join(SITEMAPS_DIR, STATE_FILE), 'r', encoding='utf-8') as state:
+            return json.load(state)
+    except FileNotFoundError:
+        return {'sections': {}, 'index_sha': ''}
+    except ValueError as e:
+        logger.warning(f"⚠️ Состояние карты сайта повреждено, полная пересборка: {e}")
+        return {'sections': {}, 'index_sha': ''}
+
+
+# ==================== СБОРКА ====================
+
+def _signature(sitemap) -> str:
+    """
+    🔑 Подпись раздела: число объектов и последний updated_at одним агрегатом
+
+    Пустая подпись (раздел не из QuerySet или модель без updated_at) -
+    раздел перечитывается при каждой сборке.
+    """
+    items = sitemap.items()
+    if not isinstance(items, QuerySet) or not any(f.name == 'updated_at' for f in items.model._meta.fields):
+        return ''
+    stats = items.order_by().aggregate(count=Count('pk'), last=Max('updated_at'))
+    last = stats['last'].isoformat() if stats['last'] else ''
+    return f"{SITEMAP_PROTOCOL}://{SITEMAP_DOMAIN}|{sitemap.limit}|{stats['count']}|{last}"
+
+
+def build_sitemaps(force: bool = False) -> Dict:
+    """
+    🔄 Инкрементальная сборка файлов карты сайта
+
+    Args:
+        force: Перечитать все разделы и переписать все файлы
+
+    Returns:
+        Dict: Статистика (sections, skipped, pages, written, unchanged, removed, urls)
+    """
+    state = {'sections': {}, 'index_sha': ''} if force else _load_state()
+    site = SimpleNamespace(domain=SITEMAP_DOMAIN, name=SITEMAP_DOMAIN)
+    stats = {'sections': 0, 'skipped': 0, 'pages': 0, 'written': 0, 'unchanged': 0, 'removed': 0, 'urls': 0}
+    sections = {}
+
+    for section, sitemap_class in get_sitemaps().items():
+        sitemap = sitemap_class()
+        signature = _signature(sitemap)
+        previous = state['sections'].get(section) or {'signature': '', 'pages': []}
+        stats['sections'] += 1
+
+        if (signature and previous['signature'] == signature
+                and all(os.path.exists(os.path.join(SITEMAPS_DIR, page['file'])) for page in previous['pages'])):
+            sections[section] = previous
+            stats['skipped'] += 1
+            stats['pages'] += len(previous['pages'])
+            continue
+
+        previous_sha = {page['file']: page['sha'] for page in previous['pages']}
+        pages = []
+        # 📄 Paginator раздела делит URL по Sitemap.limit (50 000 - предел протокола)
+        for page_number in sitemap.paginator.page_range:
+            urls = sitemap.get_urls(page=page_number, site=site, protocol=SITEMAP_PROTOCOL)
+            if not urls:
+                break
+            data = render_urlset(urls)
+            sha = hashlib.sha1(data).hexdigest()
+            filename = page_filename(section, page_number)
+            if previous_sha.get(filename) != sha or not os.path.exists(os.path.join(SITEMAPS_DIR, filename)):
+                _write_file(filename, data, compress=True)
+                stats['written'] += 1
+            else:
+                stats['unchanged'] += 1
+            lastmods = [url['lastmod'] for url in urls if url.get('lastmod')]
+            pages.append({'file': filename, 'sha': sha, 'lastmod': _format_lastmod(max(lastmods)) if lastmods else ''})
+            stats['urls'] += len(urls)
+
+        sections[section] = {'signature': signature, 'pages': pages}
+        stats['pages'] += len(pages)
+
+    index = render_index([page for section in sections.values() for page in section['pages']])
+    index_sha = hashlib.sha1(index).hexdigest()
+    if index_sha != state.get('index_sha') or not os.path.exists(os.path.join(SITEMAPS_DIR, INDEX_FILE)):
+        _write_file(INDEX_FILE, index, compress=False)
+
+    # 🧹 Страницы, которых больше нет (раздел сократился или удален) - после записи индекса
+    current = {page['file'] for section in sections.values() for page in section['pages']}
+    for section in state['sections'].values():
+        for page in section['pages']:
+            if page['file'] not in current:
+                _remove_file(page['file'])
+                stats['removed'] += 1
+
+    new_state = json.dumps({'sections': sections, 'index_sha': index_sha}, ensure_ascii=False, indent=1)
+    _write_file(STATE_FILE, new_state.encode('utf-8'), compress=False)
+
+    logger.info(
+        f"🗺️ Карта сайта: разделов {stats['sections']} (без изменений {stats['skipped']}), "
+        f"страниц {stats['pages']}, записано {stats['written']}, удалено {stats['removed']}"
+    )
+    return stats
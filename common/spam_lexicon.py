@@ -0,0 +1,270 @@
+# 📁 common/spam_lexicon.py
+# 🚫 Словарь спам-слов: автомат Ахо–Корасик по SPAM_DETECTION['SPAM_WORDS'] + слова из админки (SpamTerm)
+# ⚡ Текст проверяется за один проход - время не зависит от числа слов в словаре
+# 🔑 Скомпилированный автомат хранится в процессе и пересобирается только при смене версии словаря
+#
+# Границы слов проверяются через str.isalnum, поэтому работают и для кириллицы:
+# «займ» не находится внутри «взаймы». Звездочка в конце слова (кредит*) снимает
+# правую границу - совпадение по основе (кредиты, кредитов). Текст и слова
+# нормализуются одинаково: нижний регистр, ё → е, пробелы схлопываются.
+
+import hashlib
+import logging
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+# ⏱️ Как часто процесс сверяет версию слов из админки с БД (секунды)
+REFRESH_INTERVAL = getattr(settings, 'SPAM_LEXICON_REFRESH_INTERVAL', 60)
+
+VERSION_CACHE_KEY = 'spam_lexicon:db_version'
+STEM_MARK = '*'
+
+# ⚖️ Веса по умолчанию для слов из настроек (SPAM_DETECTION['SPAM_TERM_WEIGHTS'] переопределяет)
+DEFAULT_WEIGHT = 10.0
+DEFAULT_TERM_WEIGHTS = {
+    'casino': 25.0, 'gambling': 25.0, 'porn': 25.0, 'xxx': 25.0,
+    'free': 15.0, 'discount': 15.0, 'cheap': 15.0,
+}
+
+# 📦 Сколько автоматов для custom_words держать в процессе
+CUSTOM_CACHE_SIZE = 32
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize(text: str) -> str:
+    """🔤 Нормализация текста и слов словаря (регистр, ё, пробелы)"""
+    return _WHITESPACE_RE.sub(' ', (text or '').lower().replace('ё', 'е')).strip()
+
+
+class SpamLexicon:
+    """
+    🤖 Скомпилированный словарь: автомат Ахо–Корасик с весами и границами слов
+
+    Args:
+        terms: Пары (слово, вес); повтор слова после нормализации - побеждает последний
+        version: Версия словаря, из которой собран автомат
+    """
+
+    def __init__(self, terms: Iterable[Tuple[str, float]], version: str = ''):
+        self.version = version
+        self.labels: List[str] = []
+        self.weights: List[float] = []
+        self._lengths: List[int] = []
+        self._left_bound: List[bool] = []
+        self._right_bound: List[bool] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        index_by_key = {}
+        for term, weight in terms:
+            stem = term.rstrip().endswith(STEM_MARK)
+            key = normalize(term.rstrip().rstrip(STEM_MARK))
+            if not key:
+                continue
+            label = term.strip()
+            if key in index_by_key:
+                i = index_by_key[key]
+                self.labels[i], self.weights[i] = label, float(weight)
+                self._right_bound[i] = not stem and key[-1].isalnum()
+                continue
+            index_by_key[key] = len(self.labels)
+            self.labels.append(label)
+            self.weights.append(float(weight))
+            self._lengths.append(len(key))
+            self._left_bound.append(key[0].isalnum())
+            self._right_bound.append(not stem and key[-1].isalnum())
+            self._insert(key, index_by_key[key])
+
+        self._link()
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _insert(self, key: str, index: int):
+        state = 0
+        for char in key:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = next_state
+        self._out[state] += (index,)
+
+    def _link(self):
+        """🔗 Суффиксные ссылки обходом в ширину; выходы наследуются по ссылкам"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def find(self, text: str, normalized: bool = False) -> List[int]:
+        """🔍 Индексы найденных слов в порядке первого вхождения (каждое слово - один раз)"""
+        if not self.labels:
+            return []
+        if not normalized:
+            text = normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        lengths, left_bound, right_bound = self._lengths, self._left_bound, self._right_bound
+        last = len(text) - 1
+        found, seen = [], set()
+        state = 0
+
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in out[state]:
+                if index in seen:
+                    continue
+                start = position - lengths[index] + 1
+                if left_bound[index] and start > 0 and text[start - 1].isalnum():
+                    continue
+                if right_bound[index] and position < last and text[position + 1].isalnum():
+                    continue
+                seen.add(index)
+                found.append(index)
+        return found
+
+
+# ==================== ВЕРСИЯ И КЭШ ====================
+
+_compiled: Dict[str, SpamLexicon] = {}
+_custom: Dict[Tuple[str, ...], SpamLexicon] = {}
+_settings_memo: Dict = {}
+
+
+def _term_weights() -> Dict[str, float]:
+    from .utils import get_spam_config
+
+    return {**DEFAULT_TERM_WEIGHTS, **get_spam_config().get('SPAM_TERM_WEIGHTS', {})}
+
+
+def _settings_terms() -> Tuple[List[Tuple[str, float]], str]:
+    """⚙️ Слова из настроек и их отпечаток (пересчитываются, только если список сменился)"""
+    from .utils import get_spam_config
+
+    words = get_spam_config().get('SPAM_WORDS', [])
+    marker = (id(words), len(words))
+    if _settings_memo.get('marker') != marker:
+        weights = _term_weights()
+        terms = [(word, weights.get(word, DEFAULT_WEIGHT)) for word in words]
+        _settings_memo.update(
+            marker=marker, terms=terms,
+            sha=hashlib.sha1(repr(terms).encode('utf-8')).hexdigest()[:12],
+        )
+    return _settings_memo['terms'], _settings_memo['sha']
+
+
+def _db_version() -> str:
+    """🔑 Версия слов из админки: число и последний updated_at (кэшируется на REFRESH_INTERVAL)"""
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is not None:
+        return version
+
+    from django.db.models import Count, Max
+    from .models import SpamTerm
+
+    try:
+        stats = SpamTerm.objects.aggregate(count=Count('pk'), last=Max('updated_at'))
+    except DatabaseError as e:
+        logger.warning(f"⚠️ Спам-слова из админки недоступны: {e}")
+        return 'unavailable'
+    version = f"{stats['count']}|{stats['last'].isoformat() if stats['last'] else ''}"
+    cache.set(VERSION_CACHE_KEY, version, REFRESH_INTERVAL)
+    return version
+
+
+def _db_terms() -> List[Tuple[str, float]]:
+    from .models import SpamTerm
+
+    try:
+        return list(SpamTerm.objects.filter(is_active=True).values_list('term', 'weight'))
+    except DatabaseError:
+        return []
+
+
+def get_lexicon() -> SpamLexicon:
+    """🤖 Автомат текущей версии словаря (компилируется один раз на версию в каждом процессе)"""
+    settings_terms, settings_sha = _settings_terms()
+    version = f"{settings_sha}|{_db_version()}"
+
+    lexicon = _compiled.get(version)
+    if lexicon is None:
+        lexicon = SpamLexicon(settings_terms + _db_terms(), version=version)
+        _compiled.clear()
+        _compiled[version] = lexicon
+        logger.info(f"🚫 Словарь спам-слов скомпилирован: {len(lexicon)} слов (версия {version})")
+    return lexicon
+
+
+def get_custom_lexicon(words: Iterable[str]) -> SpamLexicon:
+    """🧩 Автомат для дополнительных слов вызова (не смешивается с общим словарем)"""
+    key = tuple(words)
+    lexicon = _custom.get(key)
+    if lexicon is None:
+        weights = _term_weights()
+        lexicon = SpamLexicon([(word, weights.get(word, DEFAULT_WEIGHT)) for word in key])
+        if len(_custom) >= CUSTOM_CACHE_SIZE:
+            _custom.pop(next(iter(_custom)))
+        _custom[key] = lexicon
+    return lexicon
+
+
+def invalidate():
+    """🔄 Сброс версии слов из админки (сигналы SpamTerm); процесс пересоберет автомат при следующей проверке"""
+    cache.delete(VERSION_CACHE_KEY)
+
+
+# ==================== ОЦЕНКА ====================
+
+def score_text(text: str, custom_words: Optional[List[str]] = None) -> Dict:
+    """
+    🔍 Оценка текста по словарю спам-слов
+
+    Args:
+        text: Анализируемый текст
+        custom_words: Дополнительные слова только для этого вызова
+
+    Returns:
+        dict: {'score': float, 'found_words': list, 'word_scores': dict, 'details': dict}
+    """
+    normalized = normalize(text)
+    lexicons = [get_lexicon()]
+    if custom_words:
+        lexicons.append(get_custom_lexicon(custom_words))
+
+    word_scores = {}
+    for lexicon in lexicons:
+        for index in lexicon.find(normalized, normalized=True):
+            word_scores.setdefault(lexicon.labels[index], lexicon.weights[index])
+
+    total_score = sum(word_scores.values())
+    return {
+        'score': min(total_score, 100.0),  # Максимум 100
+        'found_words': list(word_scores),
+        'word_scores': word_scores,
+        'details': {
+            'total_words_checked': sum(len(lexicon) for lexicon in lexicons),
+            'found_count': len(word_scores),
+            'lexicon_version': lexicons[0].version,
+        }
+    }
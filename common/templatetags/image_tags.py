@@ -0,0 +1,48 @@
+# 📁 common/templatetags/image_tags.py
+# 🖼️ Адаптивные изображения: <picture> с srcset/sizes из производных (common/image_derivatives.py)
+
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from common.image_derivatives import get_manifest
+
+register = template.Library()
+
+# 📐 Ширина карточки каталога: 2 в ряд на телефоне, 3 на планшете, 4 на десктопе
+CARD_SIZES = '(max-width: 576px) 50vw, (max-width: 992px) 33vw, 25vw'
+
+
+def _srcset(variants) -> str:
+    return ', '.join(f"{default_storage.url(name)} {width}w" for width, name in variants)
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes=CARD_SIZES, css_class='', loading='lazy'):
+    """
+    🖼️ Изображение с производными WebP/AVIF
+
+    Пока производные не построены - обычный <img> с оригиналом.
+
+    Пример:
+        {% responsive_image product.main_image product.product_name %}
+        {% responsive_image category.category_image alt="..." sizes="100vw" loading="eager" %}
+    """
+    name = getattr(image, 'name', image) or ''
+    if not name:
+        return ''
+
+    manifest = get_manifest(name)
+    attrs = format_html(' class="{}"', css_class) if css_class else ''
+    if not manifest:
+        return format_html('<img src="{}" alt="{}" loading="{}"{} />',
+                           default_storage.url(name), alt, loading, attrs)
+
+    sources = format_html_join(
+        '', '<source type="image/{}" srcset="{}" sizes="{}" />',
+        ((fmt, _srcset(variants), sizes) for fmt, variants in manifest['variants'].items() if variants),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" alt="{}" loading="{}" decoding="async"{} /></picture>',
+        sources, default_storage.url(name), alt, loading, attrs,
+    )
@@ -0,0 +1,1092 @@
+# 📁 common/tests.py
+# 🧪 Тесты общего приложения: рейтинги, кэш, отзывы, анти-спам, лимиты, статистика
+
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from products.models import Category, Product
+
+from . import (
+    change_feed, ip_ranges, page_cache, product_feeds, rate_limit, review_index, rollups, search, sitemaps,
+    spam_lexicon,
+)
+from .image_derivatives import render_derivatives
+from .models import (
+    IPRange, ProductRating, ProductRecommendation, ProductReview, ReviewCounters, ReviewDailyStat,
+    ReviewFingerprint, ReviewLSHBucket, SpamTerm,
+)
+from .pagination import KEYSET_SORTS, keyset_ordering, keyset_paginate
+from .product_snapshot import get_product_snapshot
+from .recommendations import build_recommendations, get_recommendations, mine_copurchases
+from .utils import (
+    analyze_ip_reputation, check_rate_limit, check_spam_words, increment_rate_limit, is_ip_blocked,
+    reset_user_rate_limit,
+)
+
+
+def create_product(sku='10001', category=None, **fields):
+    """🛍️ Товар для тестов (категория создается при необходимости)"""
+    if category is None:
+        category, _ = Category.objects.get_or_create(category_name='BMW', defaults={'slug': 'bmw'})
+    fields.setdefault('product_name', f'Коврик {sku}')
+    fields.setdefault('slug', f'kovrik-{sku}')
+    fields.setdefault('price', 100)
+    return Product.objects.create(product_sku=sku, category=category, **fields)
+
+
+def create_review(product, stars=5, is_approved=True, **fields):
+    """📝 Отзыв к товару"""
+    fields.setdefault('content', 'Хорошие коврики')
+    fields.setdefault('ip_address', '10.0.0.1')
+    return ProductReview.objects.create(
+        content_type=ContentType.objects.get_for_model(product),
+        object_id=product.pk,
+        stars=stars,
+        is_approved=is_approved,
+        **fields,
+    )
+
+
+class ProductRatingTests(TestCase):
+    """⭐ Денормализованные агрегаты рейтинга (user-001)"""
+
+    def setUp(self):
+        self.product = create_product()
+
+    def rating(self):
+        return ProductRating.objects.get(object_id=self.product.pk)
+
+    def test_only_approved_reviews_are_counted(self):
+        create_review(self.product, stars=5)
+        create_review(self.product, stars=3, is_approved=False)
+        create_review(self.product, stars=4)
+
+        rating = self.rating()
+        self.assertEqual(rating.rating_count, 2)
+        self.assertAlmostEqual(rating.rating_avg, 4.5)
+        self.assertEqual(rating.get_histogram(), {5: 1, 4: 1, 3: 0, 2: 0, 1: 0})
+
+    def test_approve_edit_and_delete_move_the_aggregate(self):
+        first = create_review(self.product, stars=5)
+        pending = create_review(self.product, stars=1, is_approved=False)
+
+        pending.approve()
+        self.assertAlmostEqual(self.rating().rating_avg, 3.0)
+
+        first.stars = 3
+        first.save()
+        self.assertEqual(self.rating().get_histogram()[3], 1)
+        self.assertEqual(self.rating().get_histogram()[5], 0)
+
+        pending.delete()
+        self.assertEqual(self.rating().rating_count, 1)
+        self.assertAlmostEqual(self.rating().rating_avg, 3.0)
+
+    def test_annotate_queryset_and_product_accessors(self):
+        other = create_product('10002')
+        create_review(self.product, stars=2)
+        create_review(other, stars=5)
+
+        ranked = list(ProductRating.annotate_queryset(Product.objects.all()).order_by('-rating_avg'))
+        self.assertEqual([product.pk for product in ranked], [other.pk, self.product.pk])
+        self.assertEqual(ranked[0].get_reviews_count(), 1)
+        self.assertAlmostEqual(Product.objects.get(pk=self.product.pk).get_rating(), 2.0)
+
+    def test_rebuild_ratings_restores_drifted_aggregates(self):
+        create_review(self.product, stars=4)
+        create_review(self.product, stars=2)
+        ProductRating.objects.update(rating_avg=0, rating_count=0, rating_sum=0)
+
+        call_command('rebuild_ratings', chunk_size=1, stdout=StringIO())
+
+        rating = self.rating()
+        self.assertEqual(rating.rating_count, 2)
+        self.assertAlmostEqual(rating.rating_avg, 3.0)
+
+
+class SearchTests(TestCase):
+    """🔍 Поисковый индекс: стемминг, «двойники» букв, опечатки (user-003)"""
+
+    def setUp(self):
+        cache.clear()
+        bmw = Category.objects.create(category_name='BMW', slug='bmw')
+        audi = Category.objects.create(category_name='AUDI', slug='audi')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.x5 = create_product('101', bmw, product_name='Коврик BMW X5',
+                                     product_desription='<p>EVA коврики в салон</p>')
+            self.x3 = create_product('102', bmw, product_name='Коврик BMW X3')
+            self.a6 = create_product('103', audi, product_name='Коврик Audi A6')
+
+    def found(self, query):
+        return {hit.object_id for hit in search.search(query)}
+
+    def test_russian_stemming(self):
+        self.assertEqual(search.stem_russian('коврики'), search.stem_russian('ковриков'))
+        self.assertIn(self.x5.pk, self.found('коврики BMW'))
+
+    def test_homoglyphs_and_typos(self):
+        # 🔤 Кириллические «двойники» в латинских словах: ВМW, Х5
+        self.assertEqual(self.found('ВМW'), {self.x5.pk, self.x3.pk})
+        self.assertEqual(self.found('коврики BMW Х5'), {self.x5.pk})
+        self.assertEqual(self.found('коврк'), {self.x5.pk, self.x3.pk, self.a6.pk})
+
+    def test_search_queryset_ranks_best_match_first(self):
+        ranked = list(search.search_queryset(Product.objects.all(), 'коврик bmw x5'))
+        self.assertEqual(ranked[0].pk, self.x5.pk)
+        self.assertNotIn(self.a6.pk, [product.pk for product in ranked])
+
+    def test_deleted_product_leaves_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.x3.delete()
+        self.assertNotIn(self.x3.pk, self.found('bmw'))
+        self.assertIn(self.x5.pk, self.found('bmw'))
+
+    @mock.patch.dict(search.SEARCH_CONFIG, {'CHECK_INTERVAL': 0})
+    def test_other_process_vocabulary_sees_new_terms(self):
+        worker = search._Vocabulary()
+        self.assertFalse(any(term.startswith('cayen') for term in worker.expand('caye')))
+
+        # 🔑 Переиндексация в другом процессе: памятку и словарь этого воркера никто не сбрасывает
+        with mock.patch('common.search.bump_index_version'), self.captureOnCommitCallbacks(execute=True):
+            create_product('104', product_name='Коврик Porsche Cayenne')
+
+        self.assertTrue(any(term.startswith('cayen') for term in worker.expand('caye')))
+
+
+class KeysetPaginationTests(TestCase):
+    """📄 Курсорная пагинация каталога (user-004)"""
+
+    def setUp(self):
+        prices = [None, 10, 20, 20, 30, None, 10, 50, 20, 40, 30]
+        for index, price in enumerate(prices):
+            create_product(str(20000 + index), product_name=f'Коврик {index % 4}', price=price)
+        self.queryset = Product.objects.all()
+
+    def walk(self, sort_by, per_page=3):
+        pages = [keyset_paginate(self.queryset, sort_by, per_page=per_page)]
+        while pages[-1].has_next():
+            pages.append(keyset_paginate(self.queryset, sort_by, cursor=pages[-1].next_cursor, per_page=per_page))
+        return pages
+
+    def test_forward_and_backward_walks_match_the_ordering(self):
+        for sort_by in KEYSET_SORTS:
+            with self.subTest(sort_by=sort_by):
+                expected = [product.pk for product in self.queryset.order_by(*keyset_ordering(sort_by))]
+                pages = self.walk(sort_by)
+                self.assertEqual([product.pk for page in pages for product in page], expected)
+
+                page, backward = pages[-1], [product.pk for product in pages[-1]]
+                while page.has_previous():
+                    page = keyset_paginate(self.queryset, sort_by, cursor=page.prev_cursor, per_page=3)
+                    backward = [product.pk for product in page] + backward
+                self.assertEqual(backward, expected)
+
+    def test_products_without_price_go_last_in_both_directions(self):
+        for sort_by in ('price', '-price'):
+            products = [product for page in self.walk(sort_by) for product in page]
+            self.assertEqual([product.price for product in products[-2:]], [None, None])
+
+    def test_foreign_or_tampered_cursor_restarts_from_the_first_page(self):
+        first = keyset_paginate(self.queryset, 'price', per_page=3)
+        for cursor in (first.next_cursor + 'x', keyset_paginate(self.queryset, 'name', per_page=3).next_cursor):
+            page = keyset_paginate(self.queryset, 'price', cursor=cursor, per_page=3)
+            self.assertEqual([product.pk for product in page], [product.pk for product in first])
+            self.assertFalse(page.has_previous())
+
+
+class PageCacheTests(TestCase):
+    """🗄️ Кэш страниц и фрагментов с тегами (user-005)"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.renders = 0
+
+    def view(self, request):
+        self.renders += 1
+        return HttpResponse(f'render {self.renders}')
+
+    def get(self, view):
+        request = self.factory.get('/catalog/')
+        request.user = AnonymousUser()
+        return view(request)
+
+    def test_fragment_is_rebuilt_after_its_tag_is_invalidated(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            return len(builds)
+
+        self.assertEqual(page_cache.get_or_set_fragment('block', ['tag:a', 'tag:b'], build), 1)
+        self.assertEqual(page_cache.get_or_set_fragment('block', ['tag:a', 'tag:b'], build), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            page_cache.invalidate_tags('tag:b')
+        self.assertEqual(page_cache.get_or_set_fragment('block', ['tag:a', 'tag:b'], build), 2)
+
+    def test_page_hit_until_product_save(self):
+        view = page_cache.tagged_cache_page(tags=[page_cache.PRODUCTS_CATALOG_TAG])(self.view)
+
+        self.assertEqual(self.get(view)['X-Page-Cache'], 'MISS')
+        response = self.get(view)
+        self.assertEqual((response['X-Page-Cache'], response.content), ('HIT', b'render 1'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_product()
+        self.assertEqual(self.get(view).content, b'render 2')
+
+    def test_rating_change_invalidates_the_catalog(self):
+        product = create_product()
+        view = page_cache.tagged_cache_page(tags=[page_cache.PRODUCTS_CATALOG_TAG])(self.view)
+        self.get(view)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_review(product, stars=5)
+        self.assertEqual(self.get(view)['X-Page-Cache'], 'MISS')
+
+    def test_process_local_cache_caps_the_timeout(self):
+        self.assertFalse(page_cache.is_shared_cache())
+        self.assertEqual(
+            page_cache.get_timeout(),
+            min(page_cache.PAGE_CACHE_TIMEOUT, page_cache.PAGE_CACHE_LOCAL_TIMEOUT),
+        )
+        self.assertEqual(page_cache.get_timeout(60), 60)
+
+
+class ProductSnapshotTests(TestCase):
+    """📸 Снимок страницы товара (user-006)"""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = create_product(product_desription='<b>EVA</b>')
+            create_review(self.product, stars=4, content='Хороший коврик, советую')
+
+    def test_cached_snapshot_needs_no_queries(self):
+        snapshot = get_product_snapshot(Product, self.product.slug)
+        self.assertEqual(snapshot.product.pk, self.product.pk)
+        self.assertEqual(snapshot.reviews_count, 1)
+        self.assertEqual(snapshot.rating_percentage, 80)
+
+        with self.assertNumQueries(0):
+            snapshot = get_product_snapshot(Product, self.product.slug)
+            self.assertEqual(snapshot.product.category.category_name, 'BMW')
+            self.assertEqual([review.content for review in snapshot.reviews], ['Хороший коврик, советую'])
+
+    def test_review_and_product_changes_refresh_the_snapshot(self):
+        get_product_snapshot(Product, self.product.slug)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review = ProductReview.objects.get()
+            review.content = 'Обновленный текст отзыва'
+            review.save()
+        self.assertEqual(get_product_snapshot(Product, self.product.slug).reviews[0].content, 'Обновленный текст отзыва')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = 250
+            self.product.save()
+        self.assertEqual(get_product_snapshot(Product, self.product.slug).product.price, 250)
+
+    def test_renamed_slug_no_longer_resolves(self):
+        old_slug = self.product.slug
+        get_product_snapshot(Product, old_slug)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.slug = 'kovrik-new'
+            self.product.save()
+        self.assertIsNone(get_product_snapshot(Product, old_slug))
+        self.assertEqual(get_product_snapshot(Product, 'kovrik-new').product.pk, self.product.pk)
+
+
+def create_order(products, number=None, **fields):
+    """🛒 Заказ с позициями (по одной штуке каждого товара)"""
+    from accounts.models import Order, OrderItem
+
+    fields.setdefault('order_total_price', 100)
+    fields.setdefault('grand_total', 100)
+    order = Order.objects.create(
+        customer_name='Покупатель', customer_phone='+375291112233', customer_email='buyer@example.com',
+        customer_city='Минск', order_id=number or f'T{Order.objects.count() + 1:05d}', **fields,
+    )
+    for product in products:
+        OrderItem.objects.create(
+            order=order, content_type=ContentType.objects.get_for_model(product), object_id=product.pk, quantity=1,
+        )
+    return order
+
+
+class RecommendationTests(TestCase):
+    """🤝 Рекомендации «с этим товаром покупают» (user-007)"""
+
+    def setUp(self):
+        self.products = [create_product(str(30000 + index)) for index in range(5)]
+
+    def names(self, product):
+        return [item.product_name for item in get_recommendations(product)]
+
+    def test_category_fallback_before_the_table_is_built(self):
+        self.assertEqual(len(get_recommendations(self.products[0])), 4)
+        self.assertNotIn(self.products[0].pk, [item.pk for item in get_recommendations(self.products[0])])
+
+    def test_copurchases_rank_first_and_category_fills_the_rest(self):
+        first, second, third = self.products[:3]
+        create_order([first, second])
+        create_order([first, second])
+        create_order([first, third])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            build_recommendations(top_n=4)
+
+        rows = list(ProductRecommendation.objects.filter(source_id=first.pk).order_by('rank'))
+        self.assertEqual([row.target_id for row in rows[:2]], [second.pk, third.pk])
+        self.assertEqual([row.reason for row in rows], ['copurchase', 'copurchase', 'category', 'category'])
+        self.assertGreater(rows[0].score, rows[1].score)
+        self.assertEqual(self.names(first)[:2], [second.product_name, third.product_name])
+
+    def test_copurchase_weights_count_orders_and_pairs(self):
+        a, b, c = (1, 'a'), (1, 'b'), (1, 'c')
+        item_weights, pair_weights = mine_copurchases([(1.0, {a, b}), (1.0, {a, b}), (0.5, {a, c})])
+        self.assertEqual(item_weights[a], 2.5)
+        self.assertEqual(pair_weights[(a, b)], 2.0)
+        self.assertEqual(pair_weights[(a, c)], 0.5)
+
+
+class ImageDerivativeTests(TestCase):
+    """🖼️ Производные изображений и srcset (user-009)"""
+
+    def setUp(self):
+        from PIL import Image
+
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        os.makedirs(os.path.join(self.media_root, 'product'))
+        Image.new('RGB', (1000, 600), 'red').save(os.path.join(self.media_root, 'product', 'a.jpg'))
+
+    def render(self, widths, formats=('webp',)):
+        return render_derivatives(self.media_root, 'product/a.jpg', widths, formats, 80)
+
+    def test_widths_never_upscale(self):
+        _, status, manifest = self.render((320, 640, 1280))
+        self.assertEqual(status, 'created')
+        self.assertEqual([width for width, _ in manifest['variants']['webp']], [320, 640, 1000])
+        for _, name in manifest['variants']['webp']:
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+
+    def test_partial_run_is_extended_not_replaced(self):
+        self.render((320,))
+        _, status, manifest = self.render((320, 640))
+        self.assertEqual(status, 'created')
+        self.assertEqual(manifest['widths'], [320, 640])
+
+        self.assertEqual(self.render((320,))[1], 'skipped')
+        self.assertEqual(self.render((320, 640))[1], 'skipped')
+
+    def test_changed_source_is_rebuilt(self):
+        from PIL import Image
+
+        self.render((320,))
+        Image.new('RGB', (400, 300), 'blue').save(os.path.join(self.media_root, 'product', 'a.jpg'))
+        _, status, manifest = self.render((320,))
+        self.assertEqual(status, 'created')
+        self.assertEqual(manifest['width'], 400)
+
+    def test_responsive_image_tag(self):
+        template = Template('{% load image_tags %}{% responsive_image name "Коврик" %}')
+        with self.settings(MEDIA_ROOT=self.media_root):
+            self.assertTrue(template.render(Context({'name': 'product/a.jpg'})).startswith('<img '))
+
+            self.render((320, 640))
+            cache.clear()
+            html = template.render(Context({'name': 'product/a.jpg'}))
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('320w', html)
+        self.assertIn('640w', html)
+
+
+@mock.patch('common.change_feed.SAFETY_LAG', 0)
+class ChangeFeedTests(TestCase):
+    """🔄 Лента изменений каталога с токенами продолжения (user-016)"""
+
+    def setUp(self):
+        self.since = timezone.now() - timedelta(seconds=1)
+        self.categories = [
+            Category.objects.create(category_name=f'C{index}', slug=f'c{index}', category_sku=index + 1)
+            for index in range(2)
+        ]
+        self.products = [create_product(str(1000 + index), category=self.categories[index % 2])
+                         for index in range(5)]
+
+    def read_all(self, token=None, limit=3):
+        rows, pages = [], 0
+        while True:
+            page, token, has_more = change_feed.read_changes(token=token, since=self.since, limit=limit)
+            rows += page
+            pages += 1
+            if not has_more:
+                return rows, token, pages
+
+    def test_pages_cover_every_change_once(self):
+        rows, token, pages = self.read_all()
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(len({(row['type'], row['uid']) for row in rows}), 7)
+        self.assertEqual(change_feed.read_changes(token=token)[0], [])
+
+    def test_updates_and_cascaded_deletes_after_token(self):
+        _, token, _ = self.read_all()
+
+        product = self.products[0]
+        product.price = 999
+        product.save()
+        self.categories[1].delete()
+
+        rows, _, has_more = change_feed.read_changes(token=token)
+        self.assertFalse(has_more)
+        changes = [(row['type'], row['op'], row['key']) for row in rows]
+        self.assertEqual(changes[0], ('product', 'upsert', '1000'))
+        self.assertEqual(rows[0]['data']['price'], 999)
+        self.assertCountEqual(changes[1:], [('product', 'delete', '1001'), ('product', 'delete', '1003'),
+                                            ('category', 'delete', '2')])
+
+    def test_admin_bulk_actions_reach_the_feed(self):
+        from boats.models import BoatCategory
+
+        boats = BoatCategory.objects.create(category_name='Yamaha', slug='yamaha')
+        _, token, _ = self.read_all()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+        for url, action, pk in [
+            ('/admin/products/product/', 'mark_as_new', self.products[2].pk),
+            ('/admin/boats/boatcategory/', 'deactivate_categories', boats.pk),
+        ]:
+            response = self.client.post(url, {'action': action, '_selected_action': [pk]})
+            self.assertEqual(response.status_code, 302)
+
+        rows, _, _ = change_feed.read_changes(token=token)
+        changes = {(row['type'], row['uid']): row['data'] for row in rows}
+        self.assertTrue(changes[('product', str(self.products[2].pk))]['newest_product'])
+        self.assertFalse(changes[('boat_category', str(boats.pk))]['is_active'])
+
+    def test_tampered_token_is_rejected(self):
+        _, token, _ = self.read_all()
+
+        with self.assertRaises(change_feed.ChangeFeedError):
+            change_feed.read_changes(token=token[:-2] + 'xx')
+
+    @override_settings(CHANGE_FEED_TOKENS=['secret'])
+    def test_endpoint_requires_token(self):
+        params = {'since': self.since.isoformat(), 'limit': 4}
+        self.assertEqual(self.client.get('/common/changes/', params).status_code, 403)
+
+        response = self.client.get('/common/changes/', params, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Has-More'], 'true')
+        self.assertEqual(len(response.content.decode().splitlines()), 4)
+
+        response = self.client.get('/common/changes/', {'token': response['X-Next-Token'], 'format': 'csv'},
+                                   HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response['X-Has-More'], 'false')
+        self.assertEqual(len(response.content.decode().splitlines()), 4)
+
+        response = self.client.get('/common/changes/', {'since': 'yesterday'}, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 400)
+
+
+class ProductFeedTests(TestCase):
+    """🛒 Инкрементальные фиды YML и Google Merchant (user-017)"""
+
+    def setUp(self):
+        feeds_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, feeds_dir, ignore_errors=True)
+        patcher = mock.patch('common.product_feeds.FEEDS_DIR', feeds_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.root = Category.objects.create(category_name='Audi', slug='audi', category_sku=1)
+        child = Category.objects.create(category_name='A4 & S4', slug='a4', category_sku=2, parent=self.root)
+        self.products = [
+            create_product(str(1000 + index), category=child if index % 2 else self.root, price=100 + index,
+                           product_desription='<p>Коврик&nbsp;<b>EVA</b></p>')
+            for index in range(4)
+        ]
+        create_product('9', category=self.root, price=0)
+
+    def read_feed(self, feed):
+        with gzip.open(product_feeds.feed_path(feed)) as file:
+            return file.read().decode()
+
+    def counts(self, results):
+        return [(result['rendered'], result['reused'], result['written']) for result in results]
+
+    def test_feeds_are_valid_xml_without_unpriced_offers(self):
+        from xml.dom import minidom
+
+        results = product_feeds.build_feeds()
+
+        self.assertEqual([(result['feed'], result['offers'], result['skipped']) for result in results],
+                         [('yml', 4, 1), ('google', 4, 1)])
+        yml = self.read_feed('yml')
+        minidom.parseString(yml)
+        minidom.parseString(self.read_feed('google'))
+        self.assertIn('A4 &amp; S4', yml)
+        self.assertIn('Коврик EVA', yml)
+
+    def test_only_changed_offers_are_rendered(self):
+        product_feeds.build_feeds()
+        modified = os.stat(product_feeds.feed_path('yml')).st_mtime_ns
+
+        self.assertEqual(self.counts(product_feeds.build_feeds()), [(0, 5, False), (0, 5, False)])
+        self.assertEqual(os.stat(product_feeds.feed_path('yml')).st_mtime_ns, modified)
+
+        product = self.products[1]
+        product.price = 555
+        product.save()
+        self.assertEqual(self.counts(product_feeds.build_feeds()), [(1, 4, True), (1, 4, True)])
+        self.assertIn('555.00', self.read_feed('yml'))
+
+        self.products[2].delete()
+        self.assertEqual([(result['offers'], result['removed']) for result in product_feeds.build_feeds()],
+                         [(3, 1), (3, 1)])
+
+    def test_category_change_rerenders_its_offers(self):
+        product_feeds.build_feeds()
+
+        self.root.is_active = False
+        self.root.save()
+
+        # 🌳 Неактивный родитель скрывает и подкатегорию
+        self.assertEqual([(result['rendered'], result['reused']) for result in product_feeds.build_feeds()],
+                         [(5, 0), (5, 0)])
+        self.assertEqual(self.read_feed('yml').count('available="false"'), 4)
+
+    def test_feed_view_serves_snapshot(self):
+        response = self.client.get('/common/feeds/yml.xml')
+        self.assertEqual(response.status_code, 503)
+
+        product_feeds.build_feeds()
+        response = self.client.get('/common/feeds/yml.xml')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(body.startswith(b'<?xml'))
+
+        cached = self.client.get('/common/feeds/yml.xml', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        compressed = self.client.get('/common/feeds/yml.xml', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(compressed.streaming_content)), body)
+
+        self.assertEqual(self.client.get('/common/feeds/nope.xml').status_code, 404)
+
+
+@mock.patch('products.sitemap.ProductSitemap.limit', 3)
+class SitemapTests(TestCase):
+    """🗺️ Статические карты сайта с постраничной пересборкой (user-018)"""
+
+    def setUp(self):
+        sitemaps_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, sitemaps_dir, ignore_errors=True)
+        patcher = mock.patch('common.sitemaps.SITEMAPS_DIR', sitemaps_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sitemaps_dir = sitemaps_dir
+
+        category = Category.objects.create(category_name='Audi', slug='audi', category_sku=1)
+        hidden = Category.objects.create(category_name='Off', slug='off', category_sku=2, is_active=False)
+        self.products = [create_product(str(index), category=category) for index in range(7)]
+        create_product('99', category=hidden)
+
+    def files(self):
+        return sorted(name for name in os.listdir(self.sitemaps_dir) if name.startswith('sitemap-products-'))
+
+    def test_sections_are_split_into_pages(self):
+        report = sitemaps.build_sitemaps()
+
+        self.assertEqual(report['written'], report['pages'])
+        self.assertEqual(self.files(), ['sitemap-products-1.xml.gz', 'sitemap-products-2.xml.gz',
+                                        'sitemap-products-3.xml.gz'])
+        with open(os.path.join(self.sitemaps_dir, 'sitemap.xml')) as file:
+            index = file.read()
+        self.assertIn('/sitemap-products-3.xml.gz</loc>', index)
+        with gzip.open(os.path.join(self.sitemaps_dir, 'sitemap-products-1.xml.gz')) as file:
+            self.assertEqual(file.read().decode().count('<url>'), 3)
+
+    def test_only_changed_pages_are_rewritten(self):
+        sitemaps.build_sitemaps()
+        self.assertEqual(sitemaps.build_sitemaps()['written'], 0)
+
+        product = self.products[4]
+        product.slug = 'novyi-slug'
+        product.save()
+        report = sitemaps.build_sitemaps()
+        # 📄 Перечитан только раздел товаров (и раздел без lastmod), записана одна страница
+        self.assertEqual(report['written'], 1)
+        self.assertEqual(report['skipped'], report['sections'] - 2)
+
+        self.products[6].delete()
+        report = sitemaps.build_sitemaps()
+        self.assertEqual(report['removed'], 1)
+        self.assertEqual(len(self.files()), 2)
+
+    def test_views_serve_files_without_queries(self):
+        sitemaps.build_sitemaps()
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/sitemap.xml')
+            self.assertEqual(response.status_code, 200)
+            cached = self.client.get('/sitemap.xml', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(cached.status_code, 304)
+
+            page = self.client.get('/sitemap-products-1.xml.gz')
+            self.assertEqual(page['Content-Type'], 'application/gzip')
+            self.assertEqual(self.client.get('/sitemap-products-9.xml.gz').status_code, 404)
+
+
+class SpamLexiconTests(TestCase):
+    """🚫 Словарь спам-слов на автомате Ахо-Корасик (user-020)"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_phrases_are_matched_on_word_boundaries(self):
+        result = check_spam_words('Супер цена! РЕКЛАМА, купить   дешево')
+        self.assertEqual(result['found_words'], ['супер цена', 'реклама', 'купить дешево'])
+        self.assertEqual(result['score'], 30.0)
+
+        self.assertEqual(check_spam_words('нерекламный текст')['found_words'], [])
+
+    def test_admin_terms_with_stems(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            SpamTerm.objects.create(term='кредит*', weight=30)
+            SpamTerm.objects.create(term='займ', weight=20)
+
+        result = check_spam_words('кредиты и займы, займ; взаймы')
+        self.assertEqual(result['word_scores'], {'кредит*': 30.0, 'займ': 20.0})
+
+        # 🔑 Версия словаря в кэше: повторные проверки без запросов к БД
+        with self.assertNumQueries(0):
+            check_spam_words('кредиты')
+
+    def test_custom_words_do_not_leak_into_settings(self):
+        result = check_spam_words('Free foo casino-бонус', custom_words=['foo', 'casino'])
+
+        self.assertEqual(result['found_words'], ['foo', 'casino'])
+        self.assertEqual(check_spam_words('foo')['found_words'], [])
+
+    def test_automaton_matches_brute_force(self):
+        import random
+        import re
+
+        rnd = random.Random(1)
+        alphabet = 'абвгде fo'
+        terms = sorted({''.join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 4))).strip() or 'а'
+                        for _ in range(200)})
+        lexicon = spam_lexicon.SpamLexicon([(term + '*', 1) for term in terms])
+
+        for _ in range(200):
+            text = ''.join(rnd.choice(alphabet) for _ in range(40))
+            normalized = spam_lexicon.normalize(text)
+            expected = set()
+            for term in terms:
+                key = spam_lexicon.normalize(term)
+                for match in re.finditer('(?=' + re.escape(key) + ')', normalized):
+                    start = match.start()
+                    if key[0].isalnum() and start > 0 and normalized[start - 1].isalnum():
+                        continue
+                    expected.add(term)
+                    break
+            self.assertEqual({lexicon.labels[index][:-1] for index in lexicon.find(text)}, expected, text)
+
+
+class ReviewDuplicateTests(TestCase):
+    """🧬 Почти-дубликаты отзывов через MinHash/LSH (user-021)"""
+
+    SPAM = ('Отличные коврики, лучшая цена только у нас! Заходите на наш сайт '
+            'и получите скидку на все товары.')
+
+    def setUp(self):
+        cache.clear()
+        self.first = create_product('1')
+        self.second = create_product('2')
+
+    def create_review(self, product, content, ip_address='8.8.8.8'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_review(product, content=content, ip_address=ip_address, reviewer_name='Гость')
+
+    def test_signatures_estimate_similarity(self):
+        original = review_index.fingerprint_text(self.SPAM)
+        edited = review_index.fingerprint_text(self.SPAM.replace('лучшая', 'самая лучшая').upper())
+        other = review_index.fingerprint_text('Коврик хорошо лег в салон, края ровные, запаха нет.')
+
+        self.assertGreater(review_index.similarity(original['signature'], edited['signature']), 0.7)
+        self.assertLess(review_index.similarity(original['signature'], other['signature']), 0.3)
+        self.assertIsNone(review_index.fingerprint_text('?! ...'))
+
+    def test_reviews_are_indexed_and_cross_product_copies_flagged(self):
+        first = self.create_review(self.first, self.SPAM)
+        self.assertTrue(ReviewFingerprint.objects.filter(review=first).exists())
+        self.assertTrue(ReviewLSHBucket.objects.exists())
+
+        copy = self.create_review(self.second, self.SPAM.replace('лучшая', 'самая лучшая').upper(), '8.8.4.4')
+        normal = self.create_review(self.second, 'Коврик хорошо лег в салон, края ровные, запаха нет.', '8.8.4.4')
+        self.assertTrue(copy.is_suspicious)
+        self.assertFalse(normal.is_suspicious)
+
+        result = review_index.find_near_duplicates(self.SPAM, exclude_review=first.pk,
+                                                   product=(first.content_type_id, self.first.pk))
+        self.assertEqual(result['similarities_count'], 1)
+        self.assertEqual(result['other_products'], 1)
+
+    def test_product_key_is_normalised(self):
+        review = self.create_review(self.first, self.SPAM)
+        content_type_id = review.content_type_id
+
+        # 🔑 Строковые id из формы - тот же товар, а не «другой»
+        result = review_index.find_near_duplicates(self.SPAM, product=(str(content_type_id), str(self.first.pk)))
+        self.assertEqual(result['similarities_count'], 1)
+        self.assertEqual(result['other_products'], 0)
+        self.assertEqual(review_index.product_key(str(content_type_id), str(self.first.pk)),
+                         review_index.product_key(content_type_id, self.first.pk))
+        self.assertIsNone(review_index.product_key('x', 'y'))
+
+    def test_rebuild_index(self):
+        review = self.create_review(self.first, self.SPAM)
+        ReviewFingerprint.objects.all().delete()
+
+        review_index.rebuild_index()
+
+        self.assertTrue(ReviewFingerprint.objects.filter(review=review).exists())
+
+
+@override_settings(RATE_LIMIT={'BACKEND': 'locmem'})
+class RateLimitTests(TestCase):
+    """🚦 Атомарные лимиты: скользящее окно и token bucket (user-022)"""
+
+    def setUp(self):
+        cache.clear()
+
+    def hit_concurrently(self, policy, identity, count):
+        results = []
+
+        def worker():
+            results.append(rate_limit.hit(policy, identity=identity)['allowed'])
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(results)
+
+    def test_concurrent_hits_never_exceed_limit(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        for backend, options in (('cache', {}), ('locmem', {}), ('file', {'location': directory})):
+            # ⏱️ Время заморожено: token bucket не пополняется между потоками
+            with self.subTest(backend=backend), \
+                    self.settings(RATE_LIMIT={'BACKEND': backend, 'OPTIONS': options}), \
+                    mock.patch.object(rate_limit.time, 'time', return_value=1_000_000 * 3600.0):
+                self.assertEqual(self.hit_concurrently('review', f'ip:{backend}', 20), 3)
+                self.assertFalse(rate_limit.peek('review', identity=f'ip:{backend}')['allowed'])
+                self.assertEqual(self.hit_concurrently('cart', f'session:{backend}', 40), 30)
+
+    def test_sliding_window_weights_previous_window(self):
+        start = 1_000_000 * 3600.0
+        with mock.patch.object(rate_limit.time, 'time', return_value=start + 10):
+            allowed = [rate_limit.hit('review', identity='ip:w')['allowed'] for _ in range(4)]
+        self.assertEqual(allowed, [True, True, True, False])
+
+        # ⚖️ Середина следующего часа: прошлые 3 попытки весят 1.5
+        with mock.patch.object(rate_limit.time, 'time', return_value=start + 5400):
+            self.assertTrue(rate_limit.hit('review', identity='ip:w')['allowed'])
+            blocked = rate_limit.hit('review', identity='ip:w')
+        self.assertFalse(blocked['allowed'])
+        self.assertGreater(blocked['retry_after'], 0)
+
+        with mock.patch.object(rate_limit.time, 'time', return_value=start + 5400 + blocked['retry_after']):
+            self.assertTrue(rate_limit.hit('review', identity='ip:w')['allowed'])
+
+    def test_cache_backend_fails_open_when_lock_is_busy(self):
+        backend = rate_limit.CacheBackend()
+        backend.LOCK_ATTEMPTS = 2
+        backend.cache.set('rl:test', [5.0, 0], 60)
+        backend.cache.set('rl:test:lock', 'other', 60)
+
+        with self.assertLogs('common.rate_limit', 'WARNING'):
+            result = backend.update('rl:test', 60, lambda state: ([0.0, 1], state))
+
+        # 🔓 Запрос пропущен без учета, чужие блокировка и состояние не тронуты
+        self.assertIsNone(result)
+        self.assertEqual(backend.cache.get('rl:test'), [5.0, 0])
+        self.assertEqual(backend.cache.get('rl:test:lock'), 'other')
+
+        backend.cache.delete('rl:test:lock')
+        self.assertEqual(backend.update('rl:test', 60, lambda state: ([1.0, 1], state)), [5.0, 0])
+        self.assertEqual(backend.cache.get('rl:test'), [1.0, 1])
+        self.assertIsNone(backend.cache.get('rl:test:lock'))
+
+    def test_legacy_helpers(self):
+        self.assertEqual(check_rate_limit('9.9.9.9')['remaining'], 3)
+        for _ in range(3):
+            self.assertTrue(increment_rate_limit('9.9.9.9'))
+        self.assertTrue(check_rate_limit('9.9.9.9')['is_exceeded'])
+
+        reset_user_rate_limit(ip_address='9.9.9.9')
+        self.assertEqual(check_rate_limit('9.9.9.9')['remaining'], 3)
+
+    def test_middleware_limits_cart_requests(self):
+        policies = {'cart': {**rate_limit.DEFAULT_POLICIES['cart'], 'capacity': 2, 'rate': 0.01}}
+        url = f'/products/add-to-cart/{create_product().pk}/'
+        with self.settings(RATE_LIMIT={'BACKEND': 'locmem', 'POLICIES': policies}):
+            codes = [
+                self.client.post(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest', HTTP_REFERER='/').status_code
+                for _ in range(3)
+            ]
+            self.assertEqual(codes[2], 429)
+            self.assertNotEqual(codes[0], 429)
+
+            response = self.client.post(url, HTTP_REFERER='/')
+            self.assertEqual(response.status_code, 302)
+            self.assertIn('Retry-After', response)
+
+            counters = rate_limit.export_counters()['cart']
+            self.assertEqual((counters['allowed'], counters['blocked']), (2, 2))
+
+
+class IPRangeTests(TestCase):
+    """🌐 Префиксное дерево диапазонов IP (user-023)"""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.list_file = os.path.join(directory, 'tor.txt')
+        with open(self.list_file, 'w') as file:
+            file.write('# tor\n198.51.100.0/24\n203.0.113.5 proxy 40\nbad-line\n')
+
+    def reputation_settings(self):
+        return self.settings(IP_REPUTATION={
+            'FILES': [{'path': self.list_file, 'category': 'tor'}],
+            'RANGES': [{'network': '2001:db8::/32', 'category': 'vpn'}],
+            'REFRESH_INTERVAL': 0,
+        })
+
+    def test_trie_matches_brute_force(self):
+        import ipaddress
+        import random
+
+        rnd = random.Random(5)
+        networks = [ipaddress.ip_network((rnd.getrandbits(32), rnd.randint(0, 32)), strict=False)
+                    for _ in range(300)]
+        networks += [ipaddress.ip_network((rnd.getrandbits(128), rnd.randint(0, 128)), strict=False)
+                     for _ in range(100)]
+        networks += [ipaddress.ip_network(network) for network in ('10.0.0.0/8', '10.1.0.0/16', '10.1.2.3/32')]
+        matcher = ip_ranges.IPMatcher([{'network': str(network), 'category': 'vpn', 'weight': 1}
+                                       for network in networks])
+
+        for _ in range(1000):
+            if rnd.random() < 0.5:
+                base = rnd.choice(networks)
+                ip = base.network_address + rnd.randrange(min(base.num_addresses, 2 ** 20))
+            else:
+                ip = ipaddress.ip_address(rnd.getrandbits(32))
+            expected = sorted(str(network) for network in networks if network.version == ip.version and ip in network)
+            self.assertEqual(sorted(entry['network'] for entry in matcher.lookup(ip)), expected, ip)
+
+        # 🎯 Самый узкий диапазон - первым
+        self.assertEqual(matcher.match('10.1.2.3')['network'], '10.1.2.3/32')
+
+    def test_settings_files_and_mapped_addresses(self):
+        with self.reputation_settings():
+            self.assertEqual(analyze_ip_reputation('198.51.100.9')['categories'], ['tor'])
+            self.assertEqual(analyze_ip_reputation('::ffff:203.0.113.5')['categories'], ['proxy'])
+            self.assertEqual(analyze_ip_reputation('2001:db8::1')['categories'], ['vpn'])
+            self.assertFalse(is_ip_blocked('192.0.2.8'))
+            self.assertTrue(is_ip_blocked('garbage'))
+
+            # 🔄 Измененный файл перечитывается без перезапуска
+            with open(self.list_file, 'w') as file:
+                file.write('198.51.101.0/24 hosting\n')
+            stat = os.stat(self.list_file)
+            os.utime(self.list_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+            self.assertEqual(ip_ranges.lookup('198.51.100.9'), [])
+            self.assertEqual(ip_ranges.lookup('198.51.101.1')[0]['category'], 'hosting')
+
+    def test_admin_ranges_block_after_commit(self):
+        with self.reputation_settings():
+            self.assertFalse(is_ip_blocked('100.64.1.1'))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                IPRange.objects.create(network='100.64.0.0/10', category='blocked')
+            self.assertTrue(is_ip_blocked('100.64.1.1'))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                IPRange.objects.filter(network='100.64.0.0/10').delete()
+            self.assertFalse(is_ip_blocked('100.64.1.1'))
+
+
+class ReviewCountersTests(TestCase):
+    """📊 Материализованные счетчики модерации (user-024)"""
+
+    def setUp(self):
+        cache.clear()
+        self.product = create_product()
+        self.reviews = [create_review(self.product, is_approved=False, content='Хороший коврик, рекомендую всем')
+                        for _ in range(5)]
+        self.reviews.append(create_review(self.product, is_approved=False, user=User.objects.create(username='u')))
+
+    def assertCountersExact(self):
+        self.assertEqual(ProductReview.get_moderation_stats(), ProductReview.aggregate_moderation_stats())
+
+    def test_counters_follow_every_change(self):
+        self.assertCountersExact()
+        self.assertEqual(ProductReview.get_moderation_stats()['total'], 6)
+
+        self.reviews[0].approve()
+        self.reviews[1].approve()
+        self.assertCountersExact()
+
+        review = ProductReview.objects.get(pk=self.reviews[2].pk)
+        review.is_suspicious = True
+        review.spam_score = 90
+        review.save()
+        self.assertCountersExact()
+
+        self.reviews[3].reject()
+        self.assertCountersExact()
+
+        ProductReview.objects.filter(pk__in=[self.reviews[4].pk, self.reviews[5].pk]).delete()
+        self.assertCountersExact()
+
+        # 🧩 Отложенные поля: состояние дочитывается, вклад не теряется
+        review = ProductReview.objects.only('uid', 'is_approved').get(pk=self.reviews[2].pk)
+        review.is_approved = True
+        review.save()
+        self.assertCountersExact()
+
+    def test_rollback_and_bulk_update(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                create_review(self.product)
+                raise RuntimeError
+        self.assertCountersExact()
+
+        ProductReview.objects.update(is_approved=True)
+        ReviewCounters.recalculate()
+        self.assertCountersExact()
+
+    def test_stats_read_is_one_query(self):
+        ProductReview.get_moderation_stats()
+        with self.assertNumQueries(1):
+            ReviewCounters.get_stats()
+
+        ReviewCounters.objects.all().delete()
+        create_review(self.product)
+        self.assertCountersExact()
+
+
+class RollupTests(TestCase):
+    """📈 Дневные агрегаты для дашбордов (user-025)"""
+
+    def setUp(self):
+        import random
+        from accounts.models import Order
+
+        rnd = random.Random(1)
+        now = timezone.now()
+        product = create_product()
+        for _ in range(80):
+            review = create_review(product, stars=rnd.randint(1, 5), is_approved=rnd.random() < 0.6,
+                                   is_suspicious=rnd.random() < 0.2)
+            ProductReview.objects.filter(pk=review.pk).update(
+                date_added=now - timedelta(hours=rnd.randint(0, 24 * 30)),
+                spam_score=rnd.choice([0, 25, 55, 85]),
+            )
+        for _ in range(40):
+            order = create_order([], delivery_method=rnd.choice(['pickup', 'europochta', 'yandex']),
+                                 grand_total=rnd.randint(10, 500))
+            Order.objects.filter(pk=order.pk).update(order_date=now - timedelta(hours=rnd.randint(0, 24 * 30)))
+
+        self.end = timezone.localdate()
+        self.start = self.end - timedelta(days=20)
+
+    def exact(self):
+        """🧮 Те же показатели прямыми запросами к исходным таблицам"""
+        from accounts.models import Order
+
+        low, high = rollups.day_start(self.start), rollups.day_start(self.end + timedelta(days=1))
+        reviews = ProductReview.objects.filter(date_added__gte=low, date_added__lt=high)
+        orders = Order.objects.filter(order_date__gte=low, order_date__lt=high)
+        return (
+            reviews.count(), reviews.filter(is_approved=True).count(), reviews.filter(is_suspicious=True).count(),
+            reviews.filter(stars=5).count(), orders.count(), sum(order.grand_total for order in orders),
+            orders.filter(delivery_method='yandex').count(), reviews.filter(spam_score__gte=80).count(),
+        )
+
+    def summary(self):
+        data = rollups.dashboard(self.start, self.end)
+        return (
+            data['reviews']['total'], data['reviews']['approved'], data['spam']['suspicious'],
+            data['reviews']['by_stars'][5], data['orders']['orders'], data['orders']['revenue'],
+            data['orders']['by_delivery'].get('yandex', {}).get('orders', 0),
+            data['spam']['by_level']['high']['reviews'],
+        )
+
+    def test_dashboard_without_rollups_reads_source_tables(self):
+        self.assertFalse(ReviewDailyStat.objects.exists())
+        self.assertEqual(self.summary(), self.exact())
+
+    def test_rollups_match_source_and_are_idempotent(self):
+        before = rollups.dashboard(self.start, self.end)
+        rollups.build_rollups(backfill=True)
+        rows = ReviewDailyStat.objects.count()
+
+        self.assertEqual(rollups.dashboard(self.start, self.end), before)
+        self.assertEqual(self.summary(), self.exact())
+
+        rollups.build_rollups(backfill=True)
+        self.assertEqual(ReviewDailyStat.objects.count(), rows)
+
+    def test_rebuilt_day_drops_stale_rows(self):
+        rollups.build_rollups(backfill=True)
+
+        review = ProductReview.objects.filter(date_added__lt=rollups.day_start(self.end - timedelta(days=3))).first()
+        day = timezone.localtime(review.date_added).date()
+        ProductReview.objects.filter(date_added__gte=rollups.day_start(day),
+                                     date_added__lt=rollups.day_start(day + timedelta(days=1))).delete()
+
+        result = rollups.build_rollups(start=day, end=day)
+        self.assertGreater(result['reviews']['deleted'], 0)
+        self.assertFalse(ReviewDailyStat.objects.filter(day=day).exists())
+        self.assertEqual(self.summary(), self.exact())
+
+    def test_stats_endpoint(self):
+        self.assertEqual(self.client.get('/common/stats/daily/').status_code, 403)
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+        response = self.client.get('/common/stats/daily/', {'start': self.start.isoformat(),
+                                                             'end': self.end.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['reviews']['total'], self.exact()[0])
+
+        response = self.client.get('/common/stats/daily/', {'start': '2026-02-01', 'end': '2026-01-31'})
+        self.assertFalse(response.json()['success'])
@@ -13,9 +13,26 @@ urlpatterns = [
 
     # 📋 СПИСКИ - HTML страницы (если потребуются)
     path('reviews/', views.ReviewListView.as_view(), name='reviews_list'),
+
+    # 🔄 ЛЕНТА ИЗМЕНЕНИЙ каталога (партнеры, 1С)
+    path('changes/', views.catalog_changes, name='catalog_changes'),
+
+    # 🛒 ФИДЫ ТОВАРОВ для маркетплейсов (gzip-снимки)
+    path('feeds/<slug:feed_name>.xml', views.product_feed, name='product_feed'),
+    path('feeds/<slug:feed_name>.xml.gz', views.product_feed, {'compressed': True}, name='product_feed_gz'),
+
+    # ⏱️ МЕТРИКИ rate limiting (Prometheus)
+    path('metrics/rate-limits/', views.rate_limit_metrics, name='rate_limit_metrics'),
+
+    # 📈 ДНЕВНЫЕ СВОДКИ отзывов, заказов и спама (дашборды)
+    path('stats/daily/', views.daily_statistics, name='daily_statistics'),
 ]
 
 # 🎯 ТЕПЕРЬ ДОСТУПНЫ URL:
 #
 # 📝 POST /common/reviews/add/ - добавление отзыва
-# 📋 GET /common/reviews/ - список всех отзывов
\ No newline at end of file
+# 📋 GET /common/reviews/ - список всех отзывов
+# 🔄 GET /common/changes/?since=<ISO>|token=<...>&format=jsonl|csv - лента изменений каталога
+# 🛒 GET /common/feeds/yml.xml, /common/feeds/google.xml (+ .xml.gz) - фиды маркетплейсов
+# ⏱️ GET /common/metrics/rate-limits/ (?format=json) - счетчики rate limiting для мониторинга
+# 📈 GET /common/stats/daily/?start=YYYY-MM-DD&end=YYYY-MM-DD - сводки отзывов, заказов и спама
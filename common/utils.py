@@ -20,6 +20,8 @@ from django.contrib.auth.models import User
 import logging
 from django.contrib.contenttypes.models import ContentType
 
+from . import ip_ranges, rate_limit, review_index, spam_lexicon
+
 logger = logging.getLogger(__name__)
 
 
@@ -164,7 +166,8 @@ DEFAULT_SPAM_WORDS = [
     'click here', 'visit now', 'act now', 'limited time', 'guaranteed',
 
     # Русские спам-слова
-    'казино', 'ставки', 'кредит', 'займ', 'заработок', 'доход', 'инвестиции',
+    # * в конце - совпадение по основе (кредиты, займов), см. common/spam_lexicon.py
+    'казино', 'ставки', 'кредит*', 'займ*', 'заработок', 'доход', 'инвестиции',
     'похудение', 'диета', 'секс', 'знакомства', 'эскорт',
 ]
 
@@ -203,47 +206,17 @@ def check_spam_words(text: str, custom_words: List[str] = None) -> Dict:
     """
     🔍 Проверка текста на наличие спам-слов
 
+    Слова из SPAM_DETECTION['SPAM_WORDS'] и админки (SpamTerm) проверяются
+    одним проходом автомата common/spam_lexicon.py с учетом границ слов.
+
     Args:
         text: Анализируемый текст
-        custom_words: Дополнительные спам-слова
+        custom_words: Дополнительные спам-слова (только для этого вызова, общий список не меняется)
 
     Returns:
-        dict: {'score': float, 'found_words': list, 'details': dict}
+        dict: {'score': float, 'found_words': list, 'word_scores': dict, 'details': dict}
     """
-    config = get_spam_config()
-    spam_words = config['SPAM_WORDS']
-
-    if custom_words:
-        spam_words.extend(custom_words)
-
-    text_lower = text.lower()
-    found_words = []
-    word_scores = {}
-
-    for word in spam_words:
-        if word.lower() in text_lower:
-            found_words.append(word)
-            # Разные веса для разных типов спам-слов
-            if word in ['casino', 'gambling', 'porn', 'xxx']:
-                weight = 25.0  # Высокий вес
-            elif word in ['free', 'discount', 'cheap']:
-                weight = 15.0  # Средний вес
-            else:
-                weight = 10.0  # Низкий вес
-
-            word_scores[word] = weight
-
-    total_score = sum(word_scores.values())
-
-    return {
-        'score': min(total_score, 100.0),  # Максимум 100
-        'found_words': found_words,
-        'word_scores': word_scores,
-        'details': {
-            'total_words_checked': len(spam_words),
-            'found_count': len(found_words)
-        }
-    }
+    return spam_lexicon.score_text(text, custom_words)
 
 
 def analyze_text_quality(text: str) -> Dict:
@@ -388,26 +361,9 @@ def is_ip_blocked(ip_address: str) -> bool:
     if not ip_address:
         return False
 
-    config = get_spam_config()
-    blocked_ips = config.get('BLOCKED_IPS', [])
-
     try:
-        ip = ipaddress.ip_address(ip_address)
-
-        # Проверяем прямое совпадение
-        if ip_address in blocked_ips:
-            return True
-
-        # Проверяем подсети
-        for blocked_ip in blocked_ips:
-            try:
-                if '/' in blocked_ip:  # Это подсеть
-                    if ip in ipaddress.ip_network(blocked_ip, strict=False):
-                        return True
-            except ValueError:
-                continue
-
-        return False
+        # 🌐 Префиксное дерево BLOCKED_IPS, BLOCKED_IP_RANGES, IP_REPUTATION и админки (common/ip_ranges.py)
+        return ip_ranges.is_blocked(ip_address)
 
     except ValueError:
         # Некорректный IP
@@ -429,6 +385,7 @@ def analyze_ip_reputation(ip_address: str) -> Dict:
         return {'score': 0.0, 'issues': ['no_ip'], 'reputation': 'unknown'}
 
     issues = []
+    categories = []
     score = 0.0
     reputation = 'good'
 
@@ -448,21 +405,11 @@ def analyze_ip_reputation(ip_address: str) -> Dict:
             score += 15.0
             issues.append('reserved_ip')
 
-        # Проверяем на известные прокси/VPN диапазоны
-        # Это упрощенная проверка, в реальности нужна база данных IP репутации
-        suspicious_ranges = [
-            '10.0.0.0/8',  # Приватная сеть
-            '172.16.0.0/12',  # Приватная сеть
-            '192.168.0.0/16',  # Приватная сеть
-        ]
-
-        for range_ip in suspicious_ranges:
-            try:
-                if ip in ipaddress.ip_network(range_ip):
-                    score += 10.0
-                    issues.append(f'in_range_{range_ip}')
-            except ValueError:
-                continue
+        # Проверяем на известные прокси/VPN/хостинг/Tor диапазоны (common/ip_ranges.py)
+        for entry in ip_ranges.lookup(ip):
+            score += entry['weight']
+            issues.append(f"in_range_{entry['network']}")
+            categories.append(entry['category'])
 
         # Определяем итоговую репутацию
         if score >= 30:
@@ -482,6 +429,7 @@ def analyze_ip_reputation(ip_address: str) -> Dict:
         'score': min(score, 100.0),
         'issues': issues,
         'reputation': reputation,
+        'categories': categories,
         'ip': ip_address
     }
 
@@ -490,7 +438,7 @@ def analyze_ip_reputation(ip_address: str) -> Dict:
 
 def check_rate_limit(ip_address: str, user: Optional[User] = None) -> Dict:
     """
-    ⏱️ Проверка ограничений по частоте отправки отзывов
+    ⏱️ Проверка ограничений по частоте отправки отзывов (без расхода лимита)
 
     Args:
         ip_address: IP адрес отправителя
@@ -499,42 +447,22 @@ def check_rate_limit(ip_address: str, user: Optional[User] = None) -> Dict:
     Returns:
         dict: Результат проверки лимитов
     """
-    config = get_spam_config()
-
-    if user and user.is_authenticated:
-        limit = config.get('MAX_REVIEWS_PER_HOUR_AUTH', 5)
-        cache_key = f'review_limit_user_{user.id}'
-        identifier = f'user_{user.id}'
-    else:
-        limit = config.get('MAX_REVIEWS_PER_HOUR', 3)
-        cache_key = f'review_limit_ip_{ip_address}'
-        identifier = f'ip_{ip_address}'
-
-    # Получаем текущий счетчик
-    current_count = cache.get(cache_key, 0)
-
-    is_exceeded = current_count >= limit
-    remaining = max(0, limit - current_count)
-
-    # Время до сброса лимита
-    ttl = cache.ttl(cache_key)
-    if ttl is None or ttl < 0:
-        ttl = 3600  # 1 час по умолчанию
+    identity, authenticated = rate_limit.make_identity(ip_address, user)
+    result = rate_limit.peek('review', identity=identity, authenticated=authenticated)
 
     return {
-        'is_exceeded': is_exceeded,
-        'current_count': current_count,
-        'limit': limit,
-        'remaining': remaining,
-        'reset_in_seconds': ttl,
-        'identifier': identifier,
-        'cache_key': cache_key
+        'is_exceeded': not result['allowed'],
+        'current_count': result['limit'] - result['remaining'],
+        'limit': result['limit'],
+        'remaining': result['remaining'],
+        'reset_in_seconds': result['retry_after'],
+        'identifier': identity,
     }
 
 
 def increment_rate_limit(ip_address: str, user: Optional[User] = None) -> bool:
     """
-    📈 Увеличение счетчика отзывов для rate limiting
+    📈 Учет отзыва в rate limiting (атомарно: проверка и увеличение одним действием)
 
     Args:
         ip_address: IP адрес отправителя
@@ -543,20 +471,8 @@ def increment_rate_limit(ip_address: str, user: Optional[User] = None) -> bool:
     Returns:
         bool: True если лимит не превышен после увеличения
     """
-    rate_limit_result = check_rate_limit(ip_address, user)
-
-    if rate_limit_result['is_exceeded']:
-        return False
-
-    cache_key = rate_limit_result['cache_key']
-    current_count = rate_limit_result['current_count']
-
-    # Устанавливаем счетчик на час
-    cache.set(cache_key, current_count + 1, 3600)
-
-    logger.info(f"Rate limit incremented for {rate_limit_result['identifier']}: {current_count + 1}")
-
-    return True
+    identity, authenticated = rate_limit.make_identity(ip_address, user)
+    return rate_limit.hit('review', identity=identity, authenticated=authenticated)['allowed']
 
 
 def check_form_timing(form_load_time: float) -> Dict:
@@ -624,9 +540,12 @@ def calculate_spam_score(review_data: Dict) -> float:
             'form_submit_time': float,
             'user_agent': str,
             'reviewer_name': str (optional),
-            'existing_reviews': List[str] (optional)
+            'existing_reviews': List[str] (optional),
+            'near_duplicates': dict (optional) - готовый результат review_index.find_near_duplicates
         }
 
+        Без existing_reviews схожесть ищется по индексу почти-дубликатов (common/review_index.py).
+
     Returns:
         float: Спам-оценка от 0 до 100
     """
@@ -668,8 +587,13 @@ def calculate_spam_score(review_data: Dict) -> float:
 
     # 4. Проверка схожести с существующими отзывами
     existing_reviews = review_data.get('existing_reviews', [])
-    if existing_reviews and config.get('ENABLE_SIMILARITY_CHECK', True):
-        similarity_result = check_text_similarity(content, existing_reviews)
+    if content and config.get('ENABLE_SIMILARITY_CHECK', True):
+        if existing_reviews:
+            similarity_result = check_text_similarity(content, existing_reviews)
+        else:
+            similarity_result = review_data.get('near_duplicates') or review_index.find_near_duplicates(
+                content, threshold=config.get('SIMILARITY_THRESHOLD', 0.85)
+            )
         total_score += similarity_result['score'] * weights['similarity']
 
     return min(round(total_score, 2), 100.0)
@@ -793,13 +717,11 @@ def reset_user_rate_limit(user_id: int = None, ip_address: str = None):
         ip_address: IP адрес
     """
     if user_id:
-        cache_key = f'review_limit_user_{user_id}'
-        cache.delete(cache_key)
+        rate_limit.reset('review', f'user:{user_id}')
         logger.info(f"Rate limit reset for user {user_id}")
 
     if ip_address:
-        cache_key = f'review_limit_ip_{ip_address}'
-        cache.delete(cache_key)
+        rate_limit.reset('review', f'ip:{ip_address}')
         logger.info(f"Rate limit reset for IP {ip_address}")
 
 
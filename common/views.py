@@ -7,13 +7,14 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.generic import ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET, require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.contenttypes.models import ContentType  # ✅ ДОБАВЛЕНО: недостающий импорт
 import json
 
 from .models import ProductReview
+from .rate_limit import rate_limited
 
 
 class ReviewListView(ListView):
@@ -32,6 +33,7 @@ class ReviewListView(ListView):
 
 @require_POST
 @login_required
+@rate_limited('review')
 def add_review(request):
     """📝 Добавление отзыва (AJAX)"""
     try:
@@ -115,4 +117,229 @@ def get_user_review_status(user, content_type_id, object_id):
 # - Функция add_to_wishlist теперь полностью рабочая
 # - Все AJAX запросы будут корректно обрабатываться
 # - Существующий frontend код заработает без изменений
-# - Готовность к немедленному использованию
\ No newline at end of file
+# - Готовность к немедленному использованию
+
+
+# ==================== 🔄 ЛЕНТА ИЗМЕНЕНИЙ КАТАЛОГА ====================
+
+def _staff_or_token_allowed(request, tokens) -> bool:
+    """🔐 Сотрудник в админке или клиент с Bearer-токеном из списка"""
+    import hmac
+
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not header.startswith('Bearer '):
+        return False
+    supplied = header[len('Bearer '):].strip().encode('utf-8')
+    return any(hmac.compare_digest(supplied, str(token).encode('utf-8')) for token in tokens)
+
+
+def _change_feed_allowed(request) -> bool:
+    """🔐 Сотрудник в админке или партнер с токеном из settings.CHANGE_FEED_TOKENS"""
+    from django.conf import settings
+
+    return _staff_or_token_allowed(request, getattr(settings, 'CHANGE_FEED_TOKENS', []))
+
+
+@require_GET
+def catalog_changes(request):
+    """
+    🔄 Изменения каталога после водяной отметки (JSONL или CSV)
+
+    GET-параметры:
+        since: Водяная отметка ISO 8601 (первый запрос)
+        token: Токен продолжения (последующие запросы)
+        format: jsonl (по умолчанию) или csv
+        limit: Записей на странице (до change_feed.MAX_LIMIT)
+
+    Токен следующего запроса - в заголовке X-Next-Token, признак
+    непрочитанных записей - X-Has-More. Пустая страница тоже возвращает
+    токен: его и нужно сохранить до следующего опроса.
+    """
+    from . import change_feed
+
+    if not _change_feed_allowed(request):
+        return JsonResponse({'success': False, 'error': 'Доступ запрещен'}, status=403)
+
+    export_format = request.GET.get('format', 'jsonl')
+    if export_format not in ('jsonl', 'csv'):
+        return JsonResponse({'success': False, 'error': f'Неподдерживаемый формат: {export_format}'}, status=400)
+
+    try:
+        since = request.GET.get('since')
+        rows, next_token, has_more = change_feed.read_changes(
+            token=request.GET.get('token'),
+            since=change_feed.parse_since(since) if since else None,
+            limit=int(request.GET.get('limit', change_feed.DEFAULT_LIMIT)),
+        )
+    except (change_feed.ChangeFeedError, ValueError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    if export_format == 'csv':
+        response = HttpResponse(change_feed.to_csv(rows), content_type='text/csv; charset=utf-8')
+    else:
+        response = HttpResponse(change_feed.to_jsonl(rows), content_type='application/x-ndjson; charset=utf-8')
+    response['X-Next-Token'] = next_token
+    response['X-Has-More'] = 'true' if has_more else 'false'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def _snapshot_validators(request, snapshot, variant):
+    """
+    🔑 ETag и Last-Modified открытого файла-снимка + готовый 304, если копия клиента свежая
+
+    Берутся из открытого дескриптора: атомарная замена файла между open и
+    чтением не рассинхронизирует заголовки с отдаваемым телом.
+    """
+    import os
+
+    from django.utils.cache import get_conditional_response
+    from django.utils.http import http_date
+
+    stat = os.fstat(snapshot.fileno())
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}-{variant}"'
+    last_modified = int(stat.st_mtime)
+    headers = {'ETag': etag, 'Last-Modified': http_date(last_modified)}
+    return headers, get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def product_feed(request, feed_name, compressed=False):
+    """
+    🛒 Фид товаров для маркетплейсов из gzip-снимка (common/product_feeds.py)
+
+    /common/feeds/<фид>.xml отдает XML: клиенту с Accept-Encoding: gzip -
+    снимок как есть (Content-Encoding: gzip), остальным - распакованный поток.
+    /common/feeds/<фид>.xml.gz - сам файл снимка. ETag и Last-Modified
+    берутся из файла: If-None-Match / If-Modified-Since дают 304 без чтения.
+    """
+    import gzip
+
+    from django.http import FileResponse, Http404, StreamingHttpResponse
+
+    from . import product_feeds
+
+    try:
+        path = product_feeds.feed_path(feed_name)
+    except product_feeds.FeedError:
+        raise Http404("Фид не найден")
+
+    try:
+        snapshot = open(path, 'rb')
+    except FileNotFoundError:
+        response = HttpResponse('Фид еще не собран: python manage.py build_product_feeds',
+                                status=503, content_type='text/plain; charset=utf-8')
+        response['Retry-After'] = '600'
+        return response
+
+    send_gzip = compressed or 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    validators, not_modified = _snapshot_validators(request, snapshot, 'gz' if send_gzip else 'xml')
+    if not_modified is not None:
+        snapshot.close()
+        return not_modified
+
+    if compressed:
+        response = FileResponse(snapshot, content_type='application/gzip', filename=f'{feed_name}.xml.gz')
+    elif send_gzip:
+        response = FileResponse(snapshot, content_type='application/xml; charset=utf-8')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        def decompressed():
+            with snapshot, gzip.GzipFile(fileobj=snapshot) as xml:
+                for block in iter(lambda: xml.read(64 * 1024), b''):
+                    yield block
+
+        response = StreamingHttpResponse(decompressed(), content_type='application/xml; charset=utf-8')
+
+    if not compressed:
+        response.headers.pop('Content-Disposition', None)
+        response['Vary'] = 'Accept-Encoding'
+    for header, value in validators.items():
+        response[header] = value
+    response['Cache-Control'] = 'public, max-age=300'
+    return response
+
+
+def sitemap_file(request, filename='sitemap.xml'):
+    """
+    🗺️ Файлы карты сайта, собранные common/sitemaps.py (build_sitemaps)
+
+    Индекс /sitemap.xml и страницы /sitemap-<раздел>-<N>.xml.gz читаются
+    с диска - запрос краулера не обращается к БД. В продакшене каталог
+    SITEMAPS_DIR можно отдавать веб-сервером напрямую.
+    """
+    import os
+
+    from django.http import FileResponse, Http404
+
+    from . import sitemaps
+
+    if filename != sitemaps.INDEX_FILE and not sitemaps.PAGE_FILE_RE.match(filename):
+        raise Http404("Карта сайта не найдена")
+
+    try:
+        snapshot = open(os.path.join(sitemaps.SITEMAPS_DIR, filename), 'rb')
+    except FileNotFoundError:
+        raise Http404("Карта сайта не собрана: python manage.py build_sitemaps")
+
+    validators, not_modified = _snapshot_validators(request, snapshot, 'sitemap')
+    if not_modified is not None:
+        snapshot.close()
+        return not_modified
+
+    is_index = filename == sitemaps.INDEX_FILE
+    response = FileResponse(snapshot, content_type='application/xml; charset=utf-8' if is_index else 'application/gzip')
+    response.headers.pop('Content-Disposition', None)
+    for header, value in validators.items():
+        response[header] = value
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
+# ==================== ⏱️ МЕТРИКИ RATE LIMITING ====================
+
+@require_GET
+def rate_limit_metrics(request):
+    """
+    📈 Счетчики rate limiting в формате Prometheus (?format=json - JSON)
+
+    Доступ: сотрудник или сборщик метрик с токеном из settings.RATE_LIMIT['METRICS_TOKENS'].
+    """
+    from django.conf import settings
+    from . import rate_limit
+
+    if not _staff_or_token_allowed(request, getattr(settings, 'RATE_LIMIT', {}).get('METRICS_TOKENS', [])):
+        return JsonResponse({'success': False, 'error': 'Доступ запрещен'}, status=403)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'success': True, 'counters': rate_limit.export_counters()})
+    return HttpResponse(rate_limit.render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ==================== 📈 ДНЕВНЫЕ СВОДКИ ====================
+
+@require_GET
+def daily_statistics(request):
+    """
+    📈 Отзывы, заказы и спам за период из дневных сводок (JSON для дашбордов)
+
+    GET-параметры:
+        start, end: Период YYYY-MM-DD (по умолчанию - последние 30 дней)
+
+    Доступ: сотрудник или клиент с токеном из settings.ROLLUPS['API_TOKENS'].
+    """
+    from django.conf import settings
+    from . import rollups
+
+    if not _staff_or_token_allowed(request, getattr(settings, 'ROLLUPS', {}).get('API_TOKENS', [])):
+        return JsonResponse({'success': False, 'error': 'Доступ запрещен'}, status=403)
+
+    try:
+        start, end = rollups.parse_range(request.GET.get('start'), request.GET.get('end'))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': f'Некорректный период: {e}'}, status=400)
+
+    response = JsonResponse({'success': True, **rollups.dashboard(start, end)})
+    response['Cache-Control'] = 'no-store'
+    return response
@@ -69,6 +69,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'common.rate_limit.RateLimitMiddleware',  # ⏱️ Лимиты по маршрутам (корзина, AJAX-отзывы)
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -297,6 +298,22 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, "public/media")]
 MEDIA_ROOT = os.path.join(BASE_DIR, 'public/media')
 MEDIA_URL = '/media/'
 
+# ================================
+# 🗄️ КЭШ
+# ================================
+
+# ⚠️ Кэш страниц (common/page_cache.py) хранит версии тегов в кэше по умолчанию.
+# Без CACHES это LocMem - свой у каждого воркера, и инвалидация из одного воркера
+# до других не доходит. Для нескольких воркеров задайте общий бэкенд, например:
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#         'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
+#     }
+# }
+PAGE_CACHE_TIMEOUT = 60 * 60 * 6  # ⏱️ Время жизни страниц при общем кэше (корректность обеспечивают теги)
+PAGE_CACHE_LOCAL_TIMEOUT = 60 * 15  # ⏱️ Потолок времени жизни, пока кэш LocMem
+
 # 📁 Создаем директории, если их нет
 os.makedirs(MEDIA_ROOT, exist_ok=True)
 os.makedirs(os.path.dirname(STATIC_ROOT), exist_ok=True)
@@ -632,6 +649,37 @@ SPAM_DETECTION = {
     'ENABLE_SPAM_LOGGING': config('ENABLE_SPAM_LOGGING', default=True, cast=bool),
     'LOG_ALL_SUBMISSIONS': config('LOG_ALL_SUBMISSIONS', default=DEBUG, cast=bool),
 }
+
+# 🌐 Диапазоны IP для репутации отзывов (common/ip_ranges.py), дополняют BLOCKED_IPS и таблицу IPRange
+# RANGES: [{'network': '203.0.113.0/24', 'category': 'vpn', 'weight': 20}]
+# FILES: [{'path': BASE_DIR / 'var' / 'tor-exits.txt', 'category': 'tor'}] - строки «CIDR [категория] [вес]»
+IP_REPUTATION = {
+    'RANGES': [],
+    'FILES': [],
+    'REFRESH_INTERVAL': 60,  # секунд между проверками изменений источников
+}
+
+# ⏱️ Rate limiting отзывов и корзины (common/rate_limit.py)
+# BACKEND: cache (кэш Django) | locmem | file | redis | путь к своему классу
+# ⚠️ cache работает через кэш по умолчанию: пока CACHES не задан (LocMem), счетчики у каждого
+# воркера свои. Для нескольких воркеров - общий CACHES, file (один сервер) или redis
+# POLICIES и ROUTES дополняют значения по умолчанию из common/rate_limit.py
+RATE_LIMIT = {
+    'ENABLED': config('RATE_LIMIT_ENABLED', default=True, cast=bool),
+    'BACKEND': config('RATE_LIMIT_BACKEND', default='cache'),
+    'OPTIONS': {},
+    'POLICIES': {},
+    'ROUTES': {},
+    'METRICS_TOKENS': [],  # 🔑 Bearer-токены сборщика метрик (/common/metrics/rate-limits/)
+}
+
+# 📈 Дневные сводки отзывов, заказов и спама (common/rollups.py, команда build_rollups)
+ROLLUPS = {
+    'REFRESH_DAYS': 7,  # 🔄 Сколько последних дней пересобирает запуск без параметров (поздняя модерация, оплата)
+    'CHUNK_DAYS': 31,  # 📦 Дней в одной транзакции при дозаполнении истории
+    'MAX_RANGE_DAYS': 3660,  # 📅 Самый длинный период для дашбордов
+    'API_TOKENS': [],  # 🔑 Bearer-токены внешних дашбордов (/common/stats/daily/)
+}
 # 📁 ecomm/settings.py - ДОБАВИТЬ В КОНЕЦ ФАЙЛА
 # 🔍 ДЕТАЛЬНОЕ ЛОГИРОВАНИЕ ДЛЯ ДИАГНОСТИКИ ОТЗЫВОВ
 
@@ -3,10 +3,12 @@
 # ✅ ДОБАВЛЕНО: подключение common/urls.py для AJAX функций
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from common.views import sitemap_file
+
 # 🌐 Основные URL-паттерны
 urlpatterns = [
     # 🔧 Админка Django
@@ -30,6 +32,10 @@ urlpatterns = [
     # ✅ ДОБАВЛЕНО: Общие функции (отзывы, избранное) - AJAX API
     path('common/', include('common.urls')),
 
+    # 🗺️ Карта сайта - готовые файлы (python manage.py build_sitemaps), без запросов к БД
+    path('sitemap.xml', sitemap_file, name='sitemap'),
+    re_path(r'^(?P<filename>sitemap-[a-z0-9_-]+-\d+\.xml\.gz)$', sitemap_file, name='sitemap_page'),
+
     # 🏠 Главная страница и статические страницы
     path('', include('home.urls')),
 ]
@@ -44,4 +50,5 @@ if settings.DEBUG:
 #
 # 🎯 ТЕПЕРЬ ДОСТУПНЫ:
 # POST /common/reviews/add/ - добавление отзыва
-# GET /common/reviews/ - список всех отзывов
\ No newline at end of file
+# GET /common/reviews/ - список всех отзывов
+# GET /sitemap.xml, /sitemap-<раздел>-<N>.xml.gz - карта сайта из common/sitemaps.py
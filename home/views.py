@@ -4,7 +4,13 @@
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
-from products.models import Product, Category, KitVariant, ProductImage
+from products.models import Product, Category, ProductImage
+from products.registry import registry
+from common.search import search_queryset
+from common.pagination import is_cursor_mode, keyset_ordering, keyset_paginate
+from common.page_cache import (
+    tagged_cache_page, category_tag, KITS_TAG, PRODUCT_CATEGORIES_TAG, BOAT_CATEGORIES_TAG,
+)
 from boats.models import BoatCategory  # 🛥️ ДОБАВЛЕНО: импорт категорий лодок
 from .models import FAQ, HeroSection, CompanyDescription, ContactInfo
 import random
@@ -44,7 +50,7 @@ def index(request):
     faqs = FAQ.objects.filter(is_active=True).order_by('order', 'created_at')
 
     # 📦 Комплектация "Салон" (для совместимости с существующим кодом)
-    salon_kit = KitVariant.objects.filter(code='salon').first()
+    salon_kit = registry.get_kit('salon')
 
     # 🎲 Получаем случайные неглавные изображения для галереи
     gallery_images = get_random_product_gallery_images()
@@ -136,6 +142,25 @@ def get_random_product_gallery_images(count=12):
 
 # ✅ ВСЕ ОСТАЛЬНЫЕ ФУНКЦИИ ОСТАЮТСЯ БЕЗ ИЗМЕНЕНИЙ
 
+# 🔀 Параметр sort страницы категории → сортировка из common.pagination.KEYSET_SORTS
+CATEGORY_SORTS = {
+    'newest': '-created_at',
+    'priceAsc': 'price',
+    'priceDesc': '-price',
+    'nameAsc': 'name',
+    'nameDesc': '-name',
+}
+
+
+def _category_view_tags(request, slug):
+    """🏷️ Теги страницы категории (None - категории нет, кэш не нужен)"""
+    category_uid = Category.objects.filter(slug=slug).values_list('uid', flat=True).first()
+    if category_uid is None:
+        return None
+    return [category_tag(category_uid), PRODUCT_CATEGORIES_TAG, KITS_TAG]
+
+
+@tagged_cache_page(tags=_category_view_tags)
 def category_view(request, slug):
     """
     🛍️ Отображение страницы категории с товарами
@@ -152,21 +177,30 @@ def category_view(request, slug):
 
     # 🔧 ИСПРАВЛЕНО: Убран filter(parent=None)
     # Получаем все продукты этой категории
-    products_query = Product.objects.filter(category=category)
+    products_query = Product.objects.filter(category=category).cards()
 
     # Сортировка товаров (аналогично index view)
     sort_option = request.GET.get('sort')
     if sort_option == 'newest':
         products_query = products_query.filter(newest_product=True)
-    elif sort_option == 'priceAsc':
-        products_query = products_query.order_by('price')
-    elif sort_option == 'priceDesc':
-        products_query = products_query.order_by('-price')
+    keyset_sort = CATEGORY_SORTS.get(sort_option, '-created_at')
+    if sort_option in CATEGORY_SORTS:
+        products_query = products_query.order_by(*keyset_ordering(keyset_sort))
 
     # Пагинация
-    page = request.GET.get('page', 1)
-    paginator = Paginator(products_query, 12)  # 12 товаров на странице
-    products = paginator.get_page(page)
+    if is_cursor_mode(request):
+        # 📄 Курсорный режим: без COUNT и OFFSET, стоимость страницы не растет с глубиной
+        products = keyset_paginate(
+            products_query,
+            keyset_sort,
+            cursor=request.GET.get('cursor'),
+            per_page=12,
+            with_estimated_count=request.GET.get('count') == 'estimated',
+        )
+    else:
+        page = request.GET.get('page', 1)
+        paginator = Paginator(products_query, 12)  # 12 товаров на странице
+        products = paginator.get_page(page)
 
     # Получаем все категории для фильтра
     categories = Category.objects.all()
@@ -177,7 +211,7 @@ def category_view(request, slug):
     category_description = None  # Пока используем значение по умолчанию в шаблоне
 
     # Получаем комплектацию "Салон"
-    salon_kit = KitVariant.objects.filter(code='salon').first()
+    salon_kit = registry.get_kit('salon')
 
     context = {
         'category': category,
@@ -198,7 +232,11 @@ def product_search(request):
     products = None
 
     if query:
-        products = Product.objects.filter(product_name__icontains=query)
+        # 🔍 Полнотекстовый поиск: "коврики BMW Х5" находит "Коврик BMW X5"
+        products = search_queryset(
+            Product.objects.cards(),
+            query
+        )
 
     context = {
         'query': query,
@@ -445,6 +483,7 @@ def delivery(request):
     return render(request, 'home/delivery.html', context)
 
 
+@tagged_cache_page(tags=[PRODUCT_CATEGORIES_TAG])
 def auto_catalog(request):
     """🚗 Каталог автоковриков"""
     from products.models import AutoCatalogDescription
@@ -458,6 +497,7 @@ def auto_catalog(request):
     })
 
 
+@tagged_cache_page(tags=[BOAT_CATEGORIES_TAG])
 def boat_catalog(request):
     """🛥️ Каталог лодочных ковриков"""
     from boats.models import BoatCatalogDescription
@@ -10,9 +10,11 @@ from django.http import HttpResponseRedirect
 from django import forms
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 from .models import *
 from .forms import ProductImportForm
+from .storage import MANAGED_STORAGE_CLASSES
 
 # 🆕 НОВЫЙ ИМПОРТ: Функции экспорта
 from .export_views import get_export_button_html, get_export_context
@@ -60,8 +62,8 @@ class ProductImageInline(admin.TabularInline):
         if obj.image:
             # 🎯 Показываем информацию о OverwriteStorage
             storage_type = obj.image.storage.__class__.__name__
-            if storage_type == 'OverwriteStorage':
-                return format_html('<span style="color: green;">✅ OverwriteStorage</span>')
+            if storage_type in MANAGED_STORAGE_CLASSES:
+                return format_html('<span style="color: green;">✅ {}</span>', storage_type)
             else:
                 return format_html('<span style="color: orange;">⚠️ {}</span>', storage_type)
         return "❌ Файл не загружен"
@@ -256,7 +258,7 @@ class CategoryAdmin(admin.ModelAdmin):
         """💾 Статус хранилища изображения"""
         if obj.category_image:
             storage_type = obj.category_image.storage.__class__.__name__
-            if storage_type == 'OverwriteStorage':
+            if storage_type in MANAGED_STORAGE_CLASSES:
                 return format_html('<span style="color: green; font-weight: bold;">✅</span>')
             else:
                 return format_html('<span style="color: orange;">⚠️</span>')
@@ -304,13 +306,13 @@ class CategoryAdmin(admin.ModelAdmin):
         if obj.category_image:
             storage_type = obj.category_image.storage.__class__.__name__
             file_name = obj.category_image.name.split('/')[-1]
-            if storage_type == 'OverwriteStorage':
+            if storage_type in MANAGED_STORAGE_CLASSES:
                 return format_html(
                     '<div style="padding: 8px; background: #d4edda; border: 1px solid #c3e6cb; border-radius: 4px;">'
-                    '<strong>✅ OverwriteStorage</strong><br>'
+                    '<strong>✅ {}</strong><br>'
                     '<small>Файл: {}</small>'
                     '</div>',
-                    file_name
+                    storage_type, file_name
                 )
             else:
                 return format_html(
@@ -394,7 +396,7 @@ class CategoryAdmin(admin.ModelAdmin):
         for category in queryset:
             if category.category_image:
                 storage_type = category.category_image.storage.__class__.__name__
-                if storage_type == 'OverwriteStorage':
+                if storage_type in MANAGED_STORAGE_CLASSES:
                     overwrite_count += 1
                 else:
                     standard_count += 1
@@ -495,9 +497,13 @@ class ProductAdmin(admin.ModelAdmin):
     get_boat_dimensions.admin_order_field = "boat_mat_length"
 
     # ВСЕ СУЩЕСТВУЮЩИЕ МЕТОДЫ СОХРАНЕНЫ БЕЗ ИЗМЕНЕНИЙ
+    def get_queryset(self, request):
+        """⚡ Изображения одним запросом на страницу списка (колонки фото и хранилища)"""
+        return super().get_queryset(request).select_related('category').prefetch_related('product_images')
+
     def get_main_image_preview(self, obj):
         """🖼️ Предпросмотр главного изображения товара"""
-        main_image = obj.product_images.filter(is_main=True).first()
+        main_image = obj.get_main_image()
         if main_image and main_image.image:
             return format_html(
                 '<img src="{}" style="width: 60px; height: 60px; object-fit: cover; border-radius: 5px; border: 2px solid #f39c12;" title="{}">',
@@ -505,12 +511,11 @@ class ProductAdmin(admin.ModelAdmin):
                 obj.product_name
             )
 
-        # Если нет главного, берем первое доступное
-        first_image = obj.product_images.first()
-        if first_image and first_image.image:
+        # Если нет главного, колонка main_image хранит первое доступное
+        if obj.main_image:
             return format_html(
                 '<img src="{}" style="width: 60px; height: 60px; object-fit: cover; border-radius: 5px; border: 1px solid #ddd;" title="{}">',
-                first_image.image.url,
+                obj.get_main_image_url(),
                 obj.product_name
             )
 
@@ -529,10 +534,9 @@ class ProductAdmin(admin.ModelAdmin):
 
     def has_main_image_status(self, obj):
         """🖼️ Статус наличия главного изображения"""
-        main_image = obj.product_images.filter(is_main=True).first()
-        if main_image:
+        if obj.has_main_image():
             return format_html('<span style="color: green;">✅</span>')
-        elif obj.product_images.exists():
+        elif obj.product_images.all():
             return format_html(
                 '<span style="color: orange;" title="Есть изображения, но не назначено главное">⚠️</span>')
         return format_html('<span style="color: red;" title="Нет изображений">❌</span>')
@@ -551,7 +555,7 @@ class ProductAdmin(admin.ModelAdmin):
         for image in images:
             if image.image:
                 storage_type = image.image.storage.__class__.__name__
-                if storage_type == 'OverwriteStorage':
+                if storage_type in MANAGED_STORAGE_CLASSES:
                     overwrite_count += 1
 
         if overwrite_count == total_count:
@@ -570,12 +574,13 @@ class ProductAdmin(admin.ModelAdmin):
 
     def mark_as_new(self, request, queryset):
         """🆕 Отметить выбранные товары как новые"""
-        updated = queryset.update(newest_product=True)
+        # 🕒 updated_at - водяная отметка ленты изменений (common/change_feed.py)
+        updated = queryset.update(newest_product=True, updated_at=timezone.now())
         self.message_user(request, f"✅ Отмечено как новые: {updated} товаров")
 
     def mark_as_regular(self, request, queryset):
         """📦 Убрать отметку 'новый товар' с выбранных товаров"""
-        updated = queryset.update(newest_product=False)
+        updated = queryset.update(newest_product=False, updated_at=timezone.now())
         self.message_user(request, f"✅ Убрана отметка 'новый': {updated} товаров")
 
     def set_first_image_as_main(self, request, queryset):
@@ -611,7 +616,7 @@ class ProductAdmin(admin.ModelAdmin):
             for image in product.product_images.all():
                 total_images += 1
                 storage_type = image.image.storage.__class__.__name__
-                if storage_type == 'OverwriteStorage':
+                if storage_type in MANAGED_STORAGE_CLASSES:
                     overwrite_images += 1
                 else:
                     standard_images += 1
@@ -674,14 +679,27 @@ class KitVariantAdmin(admin.ModelAdmin):
 
     def make_option(self, request, queryset):
         """🔧 Превратить выбранные элементы в опции"""
-        queryset.update(is_option=True, order=100)
+        # 🕒 updated_at входит в версию реестра - по нему перезагружаются остальные воркеры
+        queryset.update(is_option=True, order=100, updated_at=timezone.now())
+        self._invalidate_kits()
         self.message_user(request, f"✅ Превращено в опции: {queryset.count()} записей")
 
     def make_kit(self, request, queryset):
         """📦 Превратить выбранные элементы в комплектации"""
-        queryset.update(is_option=False)
+        queryset.update(is_option=False, updated_at=timezone.now())
+        self._invalidate_kits()
         self.message_user(request, f"✅ Превращено в комплектации: {queryset.count()} записей")
 
+    @staticmethod
+    def _invalidate_kits():
+        """🔄 queryset.update() не вызывает сигналы - сбрасываем реестр и кэш страниц вручную"""
+        from django.db import transaction
+        from .registry import bump_registry_version
+        from common.page_cache import invalidate_tags, KITS_TAG
+
+        transaction.on_commit(bump_registry_version)
+        invalidate_tags(KITS_TAG)
+
     make_option.short_description = "🔧 Сделать опциями"
     make_kit.short_description = "📦 Сделать комплектациями"
 
@@ -818,4 +836,31 @@ class AutoCatalogDescriptionAdmin(admin.ModelAdmin):
             'classes': ('collapse',),
             'description': 'Мета-описание для поисковых систем'
         }),
-    )
\ No newline at end of file
+    )
+
+# 📥 Задания импорта (только просмотр: создаются формой импорта, выполняются process_import_jobs)
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    """📥 Журнал фоновых заданий импорта с прогрессом"""
+
+    list_display = ['file_name', 'status', 'progress_display', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status']
+    search_fields = ['file_name']
+    readonly_fields = [
+        'status', 'file_name', 'created_by', 'staged_path', 'total_categories', 'total_products',
+        'processed_rows', 'statistics', 'errors', 'error', 'worker', 'started_at', 'heartbeat_at', 'finished_at',
+    ]
+    exclude = ['preview', 'results']
+
+    def has_add_permission(self, request):
+        return False
+
+    def progress_display(self, obj):
+        """📊 Строки и ссылка на страницу прогресса"""
+        return format_html(
+            '<a href="{}">{} / {} ({}%)</a>',
+            reverse('import_job_progress', kwargs={'job_uid': obj.uid}),
+            obj.processed_rows, obj.total_rows, obj.progress_percent(),
+        )
+
+    progress_display.short_description = "Прогресс"
@@ -4,7 +4,7 @@
 # ✅ Убрана временная Excel-книга в execute_import_view()
 
 import logging
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.http import JsonResponse
@@ -12,10 +12,13 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django import forms
 from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.urls import reverse
 
-from .import_processor import ProductImportProcessor, preview_excel_data
+from .import_processor import build_preview
 from .import_utils import read_excel_file, separate_categories_and_products
-from .image_utils import process_images_zip
+from .image_utils import ingest_images_zip
+from .import_jobs import RUN_INLINE, discard_job, job_progress, queue_job, run_inline, stage_import
+from .models import ImportJob
 
 logger = logging.getLogger(__name__)
 
@@ -28,10 +31,10 @@ class UnifiedImportForm(forms.Form):
     """
 
     excel_file = forms.FileField(
-        label="📊 Excel файл с товарами",
-        help_text="Поддерживаемые форматы: .xlsx, .xls (макс. 10 МБ)",
+        label="📊 Excel или CSV файл с товарами",
+        help_text="Поддерживаемые форматы: .xlsx, .xls, .csv (макс. 10 МБ)",
         widget=forms.FileInput(attrs={
-            'accept': '.xlsx,.xls',
+            'accept': '.xlsx,.xls,.csv',
             'class': 'form-control'
         })
     )
@@ -60,7 +63,7 @@ class UnifiedImportForm(forms.Form):
             )
 
         # 📁 Расширение
-        allowed_extensions = ['.xlsx', '.xls']
+        allowed_extensions = ['.xlsx', '.xls', '.csv']
         file_extension = file.name.lower().split('.')[-1]
 
         if f'.{file_extension}' not in allowed_extensions:
@@ -113,10 +116,20 @@ def import_form_view(request):
                         request.session['uploaded_zip_size'] = images_zip.size
 
                         logger.info("🖼️ Начинаем обработку ZIP архива с изображениями...")
-                        images_processed = process_images_zip(images_zip)
+                        images_report = ingest_images_zip(images_zip)
+                        images_processed = images_report['processed']
                         request.session['images_processed'] = images_processed
 
-                        messages.success(request, f"🖼️ Обработано изображений: {images_processed}")
+                        messages.success(
+                            request,
+                            f"🖼️ Обработано изображений: {images_processed} "
+                            f"(записано {images_report['saved']}, без изменений {images_report['unchanged']})"
+                        )
+                        failed = [item for item in images_report['files'] if item['status'] == 'error']
+                        for item in failed[:10]:
+                            messages.warning(request, f"⚠️ {item['name']}: {item['error']}")
+                        if len(failed) > 10:
+                            messages.warning(request, f"⚠️ ... и еще {len(failed) - 10} файлов с ошибками")
                         logger.info(f"✅ Успешно обработано {images_processed} изображений")
 
                     except Exception as e:
@@ -130,15 +143,7 @@ def import_form_view(request):
                     request.session.pop('uploaded_zip_size', None)
                     request.session['images_processed'] = 0
 
-                # 📊 Анализируем Excel файл
-                excel_file.seek(0)
-                preview_result = preview_excel_data(excel_file)
-
-                if not preview_result['success']:
-                    messages.error(request, f"❌ {preview_result['error']}")
-                    return render(request, 'admin/products/import_form.html', {'form': form})
-
-                # 📊 Читаем ПОЛНЫЕ данные для импорта
+                # 📊 Читаем файл один раз: и предпросмотр, и данные для импорта
                 excel_file.seek(0)
                 success, raw_data = read_excel_file(excel_file)
 
@@ -148,15 +153,17 @@ def import_form_view(request):
 
                 # 🔄 Разделяем на категории и товары
                 categories, products, invalid_data = separate_categories_and_products(raw_data)
-
-                # 💾 Сохраняем данные в сессии
-                request.session['preview_data'] = preview_result  # Для отображения
-                request.session['full_import_data'] = {  # 🎯 СТРУКТУРИРОВАННЫЕ данные (не Excel!)
-                    'categories': categories,
-                    'products': products,
-                    'invalid_data': invalid_data,
-                    'success': True
-                }
+                preview_result = build_preview(categories, products, invalid_data)
+
+                # 💾 Строки - в файл задания, в сессии только его ID
+                previous_job = ImportJob.objects.filter(pk=request.session.get('import_job_id')).first()
+                if previous_job is not None:
+                    discard_job(previous_job)
+                job = stage_import(
+                    categories, products, invalid_data, preview_result,
+                    file_name=excel_file.name, user=request.user,
+                )
+                request.session['import_job_id'] = str(job.uid)
 
                 # 🎉 Формируем сообщение об успехе
                 if images_zip:
@@ -188,8 +195,11 @@ def import_form_view(request):
 def import_preview_view(request):
     """👁️ Страница предпросмотра данных с информацией об изображениях"""
     try:
-        # 📊 Получаем данные предпросмотра
-        preview_data = request.session.get('preview_data')
+        # 📊 Получаем данные предпросмотра из задания
+        job = ImportJob.objects.filter(
+            pk=request.session.get('import_job_id'), status=ImportJob.STATUS_STAGED
+        ).first()
+        preview_data = job.preview if job is not None else None
 
         if not preview_data:
             messages.error(request, "❌ Данные для предпросмотра не найдены. Загрузите файл заново.")
@@ -208,6 +218,7 @@ def import_preview_view(request):
         context = {
             'title': 'Предпросмотр импорта товаров',
             'statistics': preview_data['statistics'],
+            'changes': preview_data.get('changes'),
             'categories': preview_data.get('categories', []),
             'products': preview_data.get('products', []),
             'invalid_data': preview_data['invalid_data'],
@@ -236,9 +247,11 @@ def import_preview_view(request):
 @require_http_methods(["POST"])
 def execute_import_view(request):
     """
-    🚀 ИСПРАВЛЁННОЕ выполнение импорта БЕЗ костыля с Excel
+    🚀 Подтверждение импорта: задание ставится в очередь
 
-    Теперь использует process_structured_data() напрямую с готовыми данными
+    Импорт выполняет обработчик (manage.py process_import_jobs) пакетами
+    с контрольными точками; страница прогресса опрашивает import_job_status.
+    При IMPORT_JOBS_INLINE задание выполняется прямо в этом запросе.
     """
     try:
         # 📁 Проверяем подтверждение
@@ -246,60 +259,29 @@ def execute_import_view(request):
             messages.error(request, "❌ Импорт не подтверждён")
             return redirect('import_preview')
 
-        # 📊 Получаем структурированные данные из сессии
-        full_data = request.session.get('full_import_data')
+        # 📊 Задание, подготовленное на шаге загрузки
+        job = ImportJob.objects.filter(pk=request.session.get('import_job_id')).first()
 
-        if not full_data or not full_data.get('success'):
+        if job is None:
             messages.error(request, "❌ Данные для импорта не найдены. Загрузите файл заново.")
             return redirect('import_form')
 
-        # 🎯 Извлекаем готовые списки
-        categories_data = full_data.get('categories', [])
-        products_data = full_data.get('products', [])
-        invalid_data = full_data.get('invalid_data', [])
-
-        logger.info(f"🚀 Начинаем прямой импорт: {len(categories_data)} категорий, {len(products_data)} товаров")
-        messages.info(request, "🔄 Запуск импорта товаров...")
-
-        # 🎯 КЛЮЧЕВОЕ ИЗМЕНЕНИЕ: Используем новый метод без Excel!
-        processor = ProductImportProcessor()
-        result = processor.process_structured_data(categories_data, products_data, invalid_data)
-
-        # 📊 Логируем результат
-        logger.info(f"📈 Результат импорта: {result['success']}, статистика: {result.get('statistics', {})}")
-
         # 🧹 Очищаем сессию
         session_keys = [
-            'preview_data', 'full_import_data', 'uploaded_file_name', 'uploaded_file_size',
+            'import_job_id', 'uploaded_file_name', 'uploaded_file_size',
             'uploaded_zip_name', 'uploaded_zip_size', 'images_processed'
         ]
         for key in session_keys:
             request.session.pop(key, None)
 
-        # 📈 Сохраняем результаты для отображения
-        request.session['import_results'] = result
-
-        if result['success']:
-            stats = result['statistics']
-            # 🖼️ Дополняем сообщение информацией об изображениях
-            images_info = ""
-            if stats.get('images_processed', 0) > 0:
-                images_info = f", изображений: {stats.get('images_processed', 0)}"
-
-            messages.success(
-                request,
-                f"✅ Импорт завершён! "
-                f"Создано категорий: {stats.get('categories_created', 0)}, "
-                f"товаров: {stats.get('products_created', 0)}, "
-                f"обновлено категорий: {stats.get('categories_updated', 0)}, "
-                f"товаров: {stats.get('products_updated', 0)}"
-                f"{images_info}, "
-                f"ошибок: {stats.get('errors', 0)}"
-            )
-        else:
-            messages.error(request, f"❌ Импорт завершён с ошибками: {result.get('error', 'Неизвестная ошибка')}")
+        if queue_job(job):
+            logger.info(f"📬 Импорт поставлен в очередь: задание {job.uid}, {job.total_rows} строк")
+            messages.info(request, f"🔄 Импорт поставлен в очередь: {job.total_categories} категорий, "
+                                   f"{job.total_products} товаров")
+            if RUN_INLINE:
+                job = run_inline(job)
 
-        return redirect('import_results')
+        return redirect('import_job_progress', job_uid=job.uid)
 
     except Exception as e:
         error_msg = f"❌ Критическая ошибка при импорте: {str(e)}"
@@ -308,29 +290,59 @@ def execute_import_view(request):
         return redirect('import_form')
 
 
+@staff_member_required
+def import_job_progress_view(request, job_uid):
+    """📊 Страница прогресса задания импорта (опрашивает import_job_status)"""
+    job = get_object_or_404(ImportJob, pk=job_uid)
+
+    context = {
+        'title': 'Импорт товаров: выполнение',
+        'job': job,
+        'progress': job_progress(job),
+        'status_url': reverse('import_job_status', kwargs={'job_uid': job.uid}),
+        'results_url': f"{reverse('import_results')}?job={job.uid}",
+    }
+    return render(request, 'admin/products/import_progress.html', context)
+
+
+@staff_member_required
+def import_job_status(request, job_uid):
+    """⚡ AJAX прогресс задания: строки, скорость, ETA"""
+    job = ImportJob.objects.filter(pk=job_uid).first()
+    if job is None:
+        return JsonResponse({'success': False, 'error': 'Задание импорта не найдено'}, status=404)
+
+    return JsonResponse({'success': True, **job_progress(job)})
+
+
 @staff_member_required
 def import_results_view(request):
     """📈 Страница результатов импорта"""
     try:
-        # 📊 Получаем результаты из сессии
-        results = request.session.get('import_results')
+        # 📊 Результаты - из задания импорта
+        job = ImportJob.objects.filter(pk=request.GET.get('job')).first()
 
-        if not results:
+        if job is None or not job.is_finished:
             messages.warning(request, "⚠️ Результаты импорта не найдены")
             return redirect('import_form')
 
+        statistics = {**(job.preview.get('statistics') or {}), **job.statistics}
+        results = {
+            'success': job.status == ImportJob.STATUS_DONE,
+            'error': job.error,
+            'category_results': job.results.get('category_results', []),
+            'product_results': job.results.get('product_results', []),
+        }
+
         # 📈 Подготавливаем контекст
         context = {
             'title': 'Результаты импорта товаров',
             'results': results,
-            'statistics': results.get('statistics', {}),
-            'errors': results.get('errors', []),
-            'invalid_data': results.get('invalid_data', []),
+            'statistics': statistics,
+            'errors': job.errors,
+            'invalid_data': job.results.get('invalid_data', []),
         }
 
-        # 🧹 Очищаем результаты из сессии после отображения
-        request.session.pop('import_results', None)
-
         return render(request, 'admin/products/import_results.html', context)
 
     except Exception as e:
@@ -354,7 +366,7 @@ def ajax_validate_file(request):
         file = request.FILES['file']
         file_extension = file.name.lower().split('.')[-1]
 
-        if file_extension in ['xlsx', 'xls']:
+        if file_extension in ['xlsx', 'xls', 'csv']:
             # ✅ Валидация Excel файла
             form = UnifiedImportForm()
             form.cleaned_data = {'excel_file': file}
@@ -428,4 +440,9 @@ def ajax_validate_file(request):
 # - НЕТ костыля с временным Excel файлом
 # - Одна форма вместо дублирования
 # - Прямая передача данных в процессор
-# - Более чистая архитектура
\ No newline at end of file
+# - Более чистая архитектура
+#
+# ✅ ИЗМЕНЕНО: Разобранные строки - в файле задания ImportJob (products/import_jobs.py),
+#    в сессии только import_job_id; файл читается один раз для предпросмотра и импорта
+# ✅ ИЗМЕНЕНО: execute_import_view() ставит задание в очередь вместо импорта в запросе
+# ✅ ДОБАВЛЕНО: import_job_progress_view() + import_job_status() - прогресс, скорость и ETA
\ No newline at end of file
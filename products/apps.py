@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        """🚀 Подключаем сигналы приложения"""
+        try:
+            import products.signals  # noqa F401
+        except ImportError:
+            pass
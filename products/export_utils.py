@@ -1,15 +1,21 @@
 # 📁 products/export_utils.py
-# 📊 Генерация Excel файла для экспорта товаров и категорий
+# 📊 Потоковый экспорт товаров и категорий (авто и лодки) в Excel / CSV / JSONL
 # 🔄 Обратная операция к import_utils.py
+# ⚡ Строки идут из двух упорядоченных запросов (категории + товары) без загрузки каталога в память
 
+import csv
+import json
 import logging
+import os
+import tempfile
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
 from openpyxl.styles import Font, PatternFill, Alignment
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from io import BytesIO
-from django.db.models import Q
 
-from .models import Category, Product
+from django.apps import apps
 
 logger = logging.getLogger(__name__)
 
@@ -24,170 +30,147 @@ EXCEL_HEADERS = [
     'Изображение'  # G: Имя файла изображения
 ]
 
-
-def generate_excel_export() -> BytesIO:
-    """
-    🚀 ГЛАВНАЯ ФУНКЦИЯ: Генерация Excel файла с товарами и категориями
-
-    Создает файл в том же формате, что принимает импорт:
-    - Категория → все её товары → следующая категория → её товары
-    - Сохраняет только имена файлов изображений (без путей)
-
-    Returns:
-        BytesIO: Excel файл готовый для скачивания
-    """
-    try:
-        logger.info("🚀 Начинаем генерацию Excel экспорта")
-
-        # 📊 Создаем новую Excel книгу
-        workbook = openpyxl.Workbook()
-        worksheet = workbook.active
-        worksheet.title = "Товары и категории"
-
-        # 🎨 Настраиваем стили
-        _setup_excel_styles(worksheet)
-
-        # 📝 Добавляем заголовки
-        _add_headers(worksheet)
-
-        # 📊 Получаем данные из БД
-        export_data = _collect_export_data()
-
-        # ✍️ Заполняем данные
-        row_number = _fill_excel_data(worksheet, export_data)
-
-        # 📏 Автоширина колонок
-        _auto_resize_columns(worksheet)
-
-        # 💾 Сохраняем в память
-        excel_buffer = BytesIO()
-        workbook.save(excel_buffer)
-        excel_buffer.seek(0)
-
-        logger.info(f"✅ Excel экспорт сгенерирован: {row_number - 1} строк данных")
-        return excel_buffer
-
-    except Exception as e:
-        logger.error(f"❌ Ошибка генерации Excel экспорта: {e}", exc_info=True)
-        raise
+# 🔑 Ключи строки экспорта в порядке колонок
+ROW_KEYS = ['identifier', 'name', 'title', 'price', 'description', 'meta_description', 'image']
+
+# 📏 Ширина колонок Excel
+COLUMN_WIDTHS = [18, 35, 25, 12, 50, 35, 25]
+
+# 🗂️ Каталоги экспорта: модели и дополнительные колонки товара
+EXPORT_CATALOGS = {
+    'products': {
+        'title': 'Автоковрики',
+        'category_model': 'products.Category',
+        'product_model': 'products.Product',
+        'extra_columns': [],
+    },
+    'boats': {
+        'title': 'Лодочные коврики',
+        'category_model': 'boats.BoatCategory',
+        'product_model': 'boats.BoatProduct',
+        'extra_columns': [
+            ('boat_mat_length', 'Длина коврика (см)'),
+            ('boat_mat_width', 'Ширина коврика (см)'),
+        ],
+    },
+}
+
+# 📄 Форматы выгрузки: MIME-тип и расширение файла
+EXPORT_FORMATS = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+}
+
+# 📦 Размер пакета курсора БД и блока отдачи файла
+QUERY_CHUNK_SIZE = 2000
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# 📋 Поля товара, которые нужны строке экспорта (остальное не загружается)
+PRODUCT_EXPORT_FIELDS = [
+    'uid', 'category_id', 'product_name', 'product_sku', 'price',
+    'product_desription', 'page_title', 'meta_description', 'main_image',
+]
 
 
-def _setup_excel_styles(worksheet):
-    """🎨 Настройка стилей Excel"""
-    # 📏 Устанавливаем ширину колонок по умолчанию
-    column_widths = {
-        'A': 15,  # Идентификатор
-        'B': 30,  # Название
-        'C': 25,  # Title
-        'D': 10,  # Цена
-        'E': 40,  # Описание
-        'F': 30,  # Мета-описание
-        'G': 20  # Изображение
-    }
+def get_export_headers(catalog: str = 'products') -> List[str]:
+    """📋 Заголовки колонок выгрузки каталога"""
+    return EXCEL_HEADERS + [title for _, title in EXPORT_CATALOGS[catalog]['extra_columns']]
 
-    for col_letter, width in column_widths.items():
-        worksheet.column_dimensions[col_letter].width = width
 
+# ==================== СБОР СТРОК ====================
 
-def _add_headers(worksheet):
-    """📝 Добавление заголовков в Excel"""
-    # 🎨 Стиль заголовков
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-
-    # ✍️ Записываем заголовки
-    for col_num, header in enumerate(EXCEL_HEADERS, 1):
-        cell = worksheet.cell(row=1, column=col_num, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-
-
-def _collect_export_data() -> List[Dict]:
+def iter_export_rows(catalog: str = 'products') -> Iterator[Dict]:
     """
-    📊 Сбор данных для экспорта из БД
+    📊 Строки выгрузки: категория → все её товары → следующая категория
 
-    Порядок: категория → все её товары → следующая категория
+    Два запроса на весь каталог: активные категории и их товары,
+    отсортированные в том же порядке категорий. Потоки сливаются по
+    category_id, товары читаются курсором пакетами по QUERY_CHUNK_SIZE.
+    Фото берется из колонки main_image - без запросов на товар.
 
-    Returns:
-        List[Dict]: Список строк для Excel
+    Args:
+        catalog: Ключ EXPORT_CATALOGS ('products' или 'boats')
     """
-    try:
-        export_rows = []
-
-        # 📂 Получаем все активные категории с сортировкой
-        categories = Category.objects.filter(is_active=True).order_by('display_order', 'category_name')
-
-        logger.info(f"📂 Найдено категорий для экспорта: {categories.count()}")
-
-        for category in categories:
-            # 🏷️ Добавляем строку категории
-            category_row = _build_category_row(category)
-            export_rows.append(category_row)
-
-            # 🛍️ Получаем товары этой категории
-            products = Product.objects.filter(category=category).order_by('product_name')
-
-            logger.debug(f"📦 Категория {category.category_name}: {products.count()} товаров")
-
-            # 🛍️ Добавляем строки товаров
-            for product in products:
-                product_row = _build_product_row(product)
-                export_rows.append(product_row)
-
-        logger.info(f"📊 Подготовлено строк для экспорта: {len(export_rows)}")
-        return export_rows
-
-    except Exception as e:
-        logger.error(f"❌ Ошибка сбора данных: {e}")
-        raise
-
-
-def _build_category_row(category: Category) -> Dict:
+    spec = EXPORT_CATALOGS[catalog]
+    category_model = apps.get_model(spec['category_model'])
+    product_model = apps.get_model(spec['product_model'])
+    extra_fields = [field for field, _ in spec['extra_columns']]
+
+    categories = list(
+        category_model.objects.filter(is_active=True)
+        .defer('additional_content')
+        .order_by('display_order', 'category_name', 'uid')
+    )
+    logger.info(f"📂 Найдено категорий для экспорта ({catalog}): {len(categories)}")
+
+    products = (
+        product_model.objects.filter(category__is_active=True)
+        .only(*PRODUCT_EXPORT_FIELDS, *extra_fields)
+        .order_by('category__display_order', 'category__category_name', 'category_id', 'product_name', 'uid')
+        .iterator(chunk_size=QUERY_CHUNK_SIZE)
+    )
+
+    pending = next(products, None)
+    rows = 0
+    for position, category in enumerate(categories, 1):
+        yield _build_category_row(category, position, extra_fields)
+        rows += 1
+
+        while pending is not None and pending.category_id == category.uid:
+            pending.category = category
+            yield _build_product_row(pending, extra_fields)
+            rows += 1
+            pending = next(products, None)
+
+    logger.info(f"📊 Выгружено строк ({catalog}): {rows}")
+
+
+def _build_category_row(category, position: int = 1, extra_fields: List[str] = ()) -> Dict:
     """
     📂 Формирование строки категории для Excel
 
     Args:
-        category: Объект категории
+        category: Категория авто (с category_sku) или лодок
+        position: Номер категории в выгрузке - идентификатор, если SKU нет
+        extra_fields: Дополнительные колонки каталога (у категории пустые)
 
     Returns:
         Dict: Данные строки категории
     """
     try:
         # 🔢 Формируем идентификатор категории (SKU.Название)
-        category_identifier = f"{category.category_sku}.{category.category_name}"
-
-        # 🖼️ Получаем имя файла изображения (без пути)
-        image_name = ""
-        if category.category_image:
-            import os
-            image_name = os.path.basename(category.category_image.name)
+        category_sku = getattr(category, 'category_sku', None) or position
+        category_identifier = f"{category_sku}.{category.category_name}"
 
-        # 📝 Очищаем HTML из описания (берем только текст)
-        description = _clean_html_content(category.description)
+        # 🖼️ Имя файла изображения (без пути)
+        image_name = os.path.basename(category.category_image.name) if category.category_image else ""
 
-        return {
+        row = {
+            'type': 'category',
             'identifier': category_identifier,
             'name': category.category_name,
             'title': category.page_title or category.category_name,
             'price': '',  # 💰 У категорий нет цены
-            'description': description,
+            'description': _clean_html_content(category.description),
             'meta_description': category.meta_description or '',
             'image': image_name
         }
+        row.update({field: '' for field in extra_fields})
+        return row
 
     except Exception as e:
         logger.error(f"❌ Ошибка формирования строки категории {category.category_name}: {e}")
         raise
 
 
-def _build_product_row(product: Product) -> Dict:
+def _build_product_row(product, extra_fields: List[str] = ()) -> Dict:
     """
     🛍️ Формирование строки товара для Excel
 
     Args:
-        product: Объект товара
+        product: Товар авто или лодки с подключенной категорией
+        extra_fields: Дополнительные колонки каталога
 
     Returns:
         Dict: Данные строки товара
@@ -197,32 +180,22 @@ def _build_product_row(product: Product) -> Dict:
         product_sku = product.product_sku
         if not product_sku:
             # 🆕 Генерируем SKU по формуле category_sku * 10000 + 1
-            category_sku = product.category.category_sku or 1
+            category_sku = getattr(product.category, 'category_sku', None) or 1
             product_sku = str(category_sku * 10000 + 1)
             logger.warning(f"⚠️ Сгенерирован SKU для товара {product.product_name}: {product_sku}")
 
-        # 🖼️ Получаем главное изображение (только имя файла)
-        image_name = ""
-        main_image = product.get_main_image()
-        if main_image and main_image.image:
-            import os
-            image_name = os.path.basename(main_image.image.name)
-
-        # 📝 Очищаем HTML из описания
-        description = _clean_html_content(product.product_desription)
-
-        # 💰 Цена товара (базовая цена)
-        price = product.price or 0
-
-        return {
+        row = {
+            'type': 'product',
             'identifier': str(product_sku),
             'name': product.product_name,
             'title': product.page_title or '',
-            'price': price,
-            'description': description,
+            'price': product.price or 0,  # 💰 Цена товара (базовая цена)
+            'description': _clean_html_content(product.product_desription),
             'meta_description': product.meta_description or '',
-            'image': image_name
+            'image': os.path.basename(product.main_image) if product.main_image else ''
         }
+        row.update({field: getattr(product, field) or '' for field in extra_fields})
+        return row
 
     except Exception as e:
         logger.error(f"❌ Ошибка формирования строки товара {product.product_name}: {e}")
@@ -265,87 +238,160 @@ def _clean_html_content(html_content: Optional[str]) -> str:
         return str(html_content)[:100] if html_content else ""
 
 
-def _fill_excel_data(worksheet, export_data: List[Dict]) -> int:
+# ==================== ЗАПИСЬ ====================
+
+class _Echo:
+    """📝 «Файл» для csv.writer: write() возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def _row_values(row: Dict, keys: List[str]) -> List:
+    return [row[key] for key in keys]
+
+
+def write_xlsx(rows: Iterator[Dict], catalog: str, target):
+    """
+    📊 Запись строк в Excel в режиме write-only
+
+    Строки сбрасываются во временный XML по мере записи - книга целиком
+    в памяти не собирается.
+    """
+    keys = ROW_KEYS + [field for field, _ in EXPORT_CATALOGS[catalog]['extra_columns']]
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title="Товары и категории")
+
+    # 📏 Ширина колонок задается до первой строки
+    for index, width in enumerate(COLUMN_WIDTHS + [20] * (len(keys) - len(ROW_KEYS)), 1):
+        worksheet.column_dimensions[get_column_letter(index)].width = width
+
+    # 🎨 Стиль заголовков
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+    header = []
+    for title in get_export_headers(catalog):
+        cell = WriteOnlyCell(worksheet, value=title)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        header.append(cell)
+    worksheet.append(header)
+
+    for row in rows:
+        worksheet.append(_row_values(row, keys))
+
+    workbook.save(target)
+
+
+def iter_xlsx(rows: Iterator[Dict], catalog: str) -> Iterator[bytes]:
+    """📊 Excel блоками: книга пишется во временный файл, затем отдается по STREAM_BLOCK_SIZE"""
+    with tempfile.TemporaryFile(suffix='.xlsx') as target:
+        write_xlsx(rows, catalog, target)
+        target.seek(0)
+        while True:
+            block = target.read(STREAM_BLOCK_SIZE)
+            if not block:
+                break
+            yield block
+
+
+def iter_csv(rows: Iterator[Dict], catalog: str) -> Iterator[bytes]:
+    """📄 CSV построчно (UTF-8 с BOM и «;» - Excel открывает без мастера импорта)"""
+    keys = ROW_KEYS + [field for field, _ in EXPORT_CATALOGS[catalog]['extra_columns']]
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield '\ufeff'.encode('utf-8')
+    yield writer.writerow(get_export_headers(catalog)).encode('utf-8')
+    for row in rows:
+        yield writer.writerow(_row_values(row, keys)).encode('utf-8')
+
+
+def iter_jsonl(rows: Iterator[Dict], catalog: str) -> Iterator[bytes]:
+    """🧾 JSON Lines: одна строка - один объект с полем type (category / product)"""
+    for row in rows:
+        yield (json.dumps(row, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+EXPORT_WRITERS = {
+    'xlsx': iter_xlsx,
+    'csv': iter_csv,
+    'jsonl': iter_jsonl,
+}
+
+
+def stream_export(export_format: str = 'xlsx', catalog: str = 'products') -> Tuple[Iterator[bytes], str, str]:
     """
-    ✍️ Заполнение Excel данными
+    🚀 Потоковая выгрузка каталога
 
     Args:
-        worksheet: Лист Excel
-        export_data: Данные для записи
+        export_format: 'xlsx', 'csv' или 'jsonl'
+        catalog: 'products' или 'boats'
 
     Returns:
-        int: Номер последней заполненной строки
+        Tuple: (итератор байтов для StreamingHttpResponse, MIME-тип, расширение файла)
     """
-    try:
-        current_row = 2  # 📝 Начинаем со второй строки (после заголовков)
-
-        for row_data in export_data:
-            # ✍️ Заполняем колонки
-            worksheet.cell(row=current_row, column=1, value=row_data['identifier'])
-            worksheet.cell(row=current_row, column=2, value=row_data['name'])
-            worksheet.cell(row=current_row, column=3, value=row_data['title'])
-            worksheet.cell(row=current_row, column=4, value=row_data['price'])
-            worksheet.cell(row=current_row, column=5, value=row_data['description'])
-            worksheet.cell(row=current_row, column=6, value=row_data['meta_description'])
-            worksheet.cell(row=current_row, column=7, value=row_data['image'])
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат экспорта: {export_format}")
+    if catalog not in EXPORT_CATALOGS:
+        raise ValueError(f"Неизвестный каталог: {catalog}")
 
-            current_row += 1
+    content_type, extension = EXPORT_FORMATS[export_format]
+    return EXPORT_WRITERS[export_format](iter_export_rows(catalog), catalog), content_type, extension
 
-        logger.info(f"✅ Заполнено строк данных: {current_row - 2}")
-        return current_row
 
-    except Exception as e:
-        logger.error(f"❌ Ошибка заполнения Excel: {e}")
-        raise
+def generate_excel_export(catalog: str = 'products') -> BytesIO:
+    """
+    📊 Excel файл с товарами и категориями целиком в памяти
 
+    Создает файл в том же формате, что принимает импорт. Для HTTP
+    используйте stream_export() - он не держит файл в памяти.
 
-def _auto_resize_columns(worksheet):
-    """📏 Автоматическая настройка ширины колонок"""
+    Returns:
+        BytesIO: Excel файл готовый для скачивания
+    """
     try:
-        # 📊 Устанавливаем оптимальную ширину для каждой колонки
-        optimal_widths = {
-            'A': 18,  # Идентификатор (1.BMW, 10001)
-            'B': 35,  # Название
-            'C': 25,  # Title страницы
-            'D': 12,  # Цена
-            'E': 50,  # Описание (самая широкая)
-            'F': 35,  # Мета-описание
-            'G': 25  # Изображение
-        }
-
-        for col_letter, width in optimal_widths.items():
-            worksheet.column_dimensions[col_letter].width = width
-
-        logger.debug("📏 Автоширина колонок настроена")
+        logger.info("🚀 Начинаем генерацию Excel экспорта")
+        excel_buffer = BytesIO()
+        write_xlsx(iter_export_rows(catalog), catalog, excel_buffer)
+        excel_buffer.seek(0)
+        return excel_buffer
 
     except Exception as e:
-        logger.warning(f"⚠️ Ошибка настройки ширины колонок: {e}")
+        logger.error(f"❌ Ошибка генерации Excel экспорта: {e}", exc_info=True)
+        raise
 
 
-def get_export_statistics() -> Dict:
+def get_export_statistics(catalog: str = 'products') -> Dict:
     """
     📊 Получение статистики для экспорта (для отображения в UI)
 
+    Args:
+        catalog: Ключ EXPORT_CATALOGS ('products' или 'boats')
+
     Returns:
         Dict: Статистика экспорта
     """
     try:
+        spec = EXPORT_CATALOGS[catalog]
+        category_model = apps.get_model(spec['category_model'])
+        product_model = apps.get_model(spec['product_model'])
+
         # 📂 Считаем активные категории
-        active_categories = Category.objects.filter(is_active=True).count()
+        active_categories = category_model.objects.filter(is_active=True).count()
 
         # 🛍️ Считаем товары в активных категориях
-        products_in_active_categories = Product.objects.filter(
+        products_in_active_categories = product_model.objects.filter(
             category__is_active=True
         ).count()
 
-        # 🖼️ Считаем товары с главными изображениями
-        products_with_images = Product.objects.filter(
-            category__is_active=True,
-            product_images__is_main=True
-        ).count()
+        # 🖼️ Считаем товары с фото (колонка main_image)
+        products_with_images = product_model.objects.filter(
+            category__is_active=True
+        ).exclude(main_image='').count()
 
         # 📂 Считаем категории с изображениями
-        categories_with_images = Category.objects.filter(
+        categories_with_images = category_model.objects.filter(
             is_active=True,
             category_image__isnull=False
         ).exclude(category_image='').count()
@@ -371,17 +417,20 @@ def get_export_statistics() -> Dict:
 
 # 🎯 ОСНОВНЫЕ ФУНКЦИИ ЭТОГО ФАЙЛА:
 #
-# ✅ generate_excel_export() - главная функция генерации
-# ✅ _collect_export_data() - сбор данных из БД
+# ✅ stream_export() - потоковая выгрузка (xlsx / csv / jsonl) для StreamingHttpResponse
+# ✅ iter_export_rows() - строки каталога из двух упорядоченных запросов (авто или лодки)
+# ✅ write_xlsx() - Excel в режиме write-only
+# ✅ generate_excel_export() - Excel целиком в BytesIO (обратная совместимость)
 # ✅ _build_category_row() - формирование строки категории
 # ✅ _build_product_row() - формирование строки товара
 # ✅ _clean_html_content() - очистка HTML для Excel
 # ✅ get_export_statistics() - статистика для UI
 #
 # 🔄 ЛОГИКА ЭКСПОРТА:
-# 1. Получаем все активные категории
-# 2. Для каждой категории: категория → все её товары
-# 3. Генерируем SKU если отсутствует
-# 4. Извлекаем только имена файлов изображений
-# 5. Очищаем HTML от тегов
-# 6. Создаем Excel и отдаем как BytesIO
\ No newline at end of file
+# 1. Получаем все активные категории (один запрос)
+# 2. Товары активных категорий - один запрос в порядке категорий, курсором
+# 3. Слияние по category_id: категория → все её товары
+# 4. Генерируем SKU если отсутствует
+# 5. Имя файла фото - из колонки main_image (без запросов на товар)
+# 6. Очищаем HTML от тегов
+# 7. Пишем строки сразу в выбранный формат и отдаем блоками
@@ -4,14 +4,14 @@
 
 import logging
 from datetime import datetime
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.shortcuts import render, redirect
 from django.views.decorators.http import require_http_methods
 from django.core.exceptions import PermissionDenied
 
-from .export_utils import generate_excel_export, get_export_statistics
+from .export_utils import EXPORT_CATALOGS, EXPORT_FORMATS, get_export_statistics, stream_export
 
 logger = logging.getLogger(__name__)
 
@@ -20,19 +20,30 @@ logger = logging.getLogger(__name__)
 @require_http_methods(["GET"])
 def export_excel_view(request):
     """
-    📊 ГЛАВНАЯ VIEW: Экспорт товаров в Excel
+    📊 ГЛАВНАЯ VIEW: Экспорт товаров в Excel / CSV / JSONL
 
-    Генерирует Excel файл и сразу отдает на скачивание.
-    Без предпросмотра, без асинхронности - максимально просто.
+    Файл формируется по мере отдачи (StreamingHttpResponse): строки
+    читаются из БД курсором и сразу пишутся в ответ.
+
+    GET-параметры:
+        format: xlsx (по умолчанию), csv или jsonl
+        catalog: products (по умолчанию) или boats
 
     Returns:
-        HttpResponse: Excel файл для скачивания
+        StreamingHttpResponse: Файл для скачивания
     """
     try:
-        logger.info(f"🚀 Пользователь {request.user.username} запустил экспорт товаров")
+        export_format = request.GET.get('format', 'xlsx')
+        catalog = request.GET.get('catalog', 'products')
+
+        if export_format not in EXPORT_FORMATS or catalog not in EXPORT_CATALOGS:
+            messages.error(request, "❌ Неподдерживаемый формат или каталог экспорта")
+            return redirect('export_info')
+
+        logger.info(f"🚀 Пользователь {request.user.username} запустил экспорт: {catalog}, {export_format}")
 
         # 📊 Проверяем есть ли данные для экспорта
-        stats = get_export_statistics()
+        stats = get_export_statistics(catalog)
 
         if stats.get('estimated_rows', 0) == 0:
             logger.warning("⚠️ Нет данных для экспорта")
@@ -41,27 +52,22 @@ def export_excel_view(request):
 
         logger.info(f"📊 Будет экспортировано: {stats['estimated_rows']} строк")
 
-        # 🚀 Генерируем Excel файл
-        excel_buffer = generate_excel_export()
+        # 🚀 Поток байтов выбранного формата
+        chunks, content_type, extension = stream_export(export_format, catalog)
 
         # 📅 Формируем имя файла с датой
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"tovary_export_{timestamp}.xlsx"
+        prefix = 'tovary' if catalog == 'products' else 'lodki'
+        filename = f"{prefix}_export_{timestamp}.{extension}"
 
-        # 📦 Создаем HTTP response для скачивания
-        response = HttpResponse(
-            excel_buffer.getvalue(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        # 📦 Потоковый ответ: размер заранее неизвестен, Content-Length не ставим
+        response = StreamingHttpResponse(chunks, content_type=content_type)
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response['Content-Length'] = len(excel_buffer.getvalue())
-
-        logger.info(f"✅ Экспорт завершен: {filename} ({len(excel_buffer.getvalue())} байт)")
 
         # 🎉 Добавляем сообщение об успехе (покажется на следующей странице)
         messages.success(
             request,
-            f"✅ Экспорт завершен! Скачано: {stats['total_categories']} категорий, "
+            f"✅ Экспорт запущен: {stats['total_categories']} категорий, "
             f"{stats['total_products']} товаров"
         )
 
@@ -88,6 +94,7 @@ def export_info_view(request):
         context = {
             'title': 'Экспорт товаров',
             'statistics': stats,
+            'boat_statistics': get_export_statistics('boats'),
             'has_data': stats.get('estimated_rows', 0) > 0
         }
 
@@ -199,8 +206,8 @@ def get_export_context():
 # 🚀 FLOW ЭКСПОРТА:
 # 1. Админ переходит на /products/export/
 # 2. Проверяются права и наличие данных
-# 3. Генерируется Excel за 2-3 секунды
-# 4. Файл сразу скачивается с именем tovary_export_YYYYMMDD_HHMMSS.xlsx
+# 3. Файл отдается потоком по мере чтения строк из БД (?format=xlsx|csv|jsonl, ?catalog=products|boats)
+# 4. Файл скачивается с именем tovary_export_YYYYMMDD_HHMMSS.xlsx (lodki_export_... для лодок)
 # 5. Показывается сообщение об успехе
 #
 # 🔒 БЕЗОПАСНОСТЬ:
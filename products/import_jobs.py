@@ -0,0 +1,338 @@
+# 📁 products/import_jobs.py
+# 📥 Фоновые задания импорта товаров: подготовка, очередь, пакетная обработка
+# 📂 Разобранные строки лежат в JSONL-файле в IMPORT_STAGING_DIR (не в сессии): категории, затем товары
+# 🔁 Контрольная точка ImportJob.processed_rows фиксируется в одной транзакции с пакетом -
+#    после сбоя обработчик продолжает с первой незафиксированной строки
+# ⚙️ Обработчик: python manage.py process_import_jobs (или сразу в запросе при IMPORT_JOBS_INLINE)
+
+import json
+import logging
+import os
+import socket
+import tempfile
+from datetime import timedelta
+from itertools import chain, islice
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+# 📂 Куда складываются подготовленные строки (вне MEDIA_ROOT - файлы не должны быть доступны по URL)
+STAGING_DIR = getattr(settings, 'IMPORT_STAGING_DIR', os.path.join(settings.BASE_DIR, 'import_jobs'))
+
+# 📦 Строк товаров в одном пакете (одна транзакция + одна контрольная точка)
+JOB_CHUNK_SIZE = getattr(settings, 'IMPORT_JOB_CHUNK_SIZE', 500)
+
+# ⏱️ Через сколько секунд без контрольной точки задание считается брошенным и перехватывается
+STALE_AFTER = getattr(settings, 'IMPORT_JOB_STALE_AFTER', 10 * 60)
+
+# ⚡ Выполнять задание прямо в запросе админки (удобно в разработке, без отдельного обработчика)
+RUN_INLINE = getattr(settings, 'IMPORT_JOBS_INLINE', settings.DEBUG)
+
+# 📋 Сколько строк результатов и сообщений об ошибках хранить в задании
+RESULT_ROWS_LIMIT = 500
+ERRORS_LIMIT = 500
+
+
+class JobLost(Exception):
+    """🚫 Задание перехвачено другим обработчиком (или снято с выполнения)"""
+
+
+def worker_name() -> str:
+    """🏷️ Имя текущего обработчика: хост и PID"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ==================== ПОДГОТОВКА ====================
+
+def stage_import(categories: List[Dict], products: List[Dict], invalid_data: List[Dict],
+                 preview: Dict, file_name: str = '', user=None) -> ImportJob:
+    """
+    📥 Сохраняет разобранные строки в файл и создает задание в статусе staged
+
+    Args:
+        categories, products, invalid_data: Результат separate_categories_and_products()
+        preview: Результат build_preview() - показывается на странице предпросмотра
+        file_name: Имя загруженного файла
+        user: Кто загрузил файл
+
+    Returns:
+        ImportJob: Задание, ожидающее подтверждения
+    """
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    job = ImportJob(
+        file_name=file_name[:255],
+        created_by=user if user is not None and user.is_authenticated else None,
+        total_categories=len(categories),
+        total_products=len(products),
+        preview=preview,
+        results={'invalid_data': invalid_data[:RESULT_ROWS_LIMIT]},
+    )
+
+    fd, temp_path = tempfile.mkstemp(dir=STAGING_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as staged:
+            for row in chain(categories, products):
+                staged.write(json.dumps(row, ensure_ascii=False))
+                staged.write('\n')
+            staged.flush()
+            os.fsync(staged.fileno())
+        job.staged_path = os.path.join(STAGING_DIR, f'{job.uid}.jsonl')
+        os.replace(temp_path, job.staged_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    job.save()
+    logger.info(f"📥 Задание импорта {job.uid}: {job.total_categories} категорий, {job.total_products} товаров")
+    return job
+
+
+def _iter_staged_rows(path: str, offset: int) -> Iterator[Dict]:
+    """📖 Строки подготовленного файла начиная с offset"""
+    with open(path, 'r', encoding='utf-8') as staged:
+        for line in islice(staged, offset, None):
+            yield json.loads(line)
+
+
+def _remove_staged_file(path: str):
+    if path and os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"⚠️ Не удалось удалить подготовленные данные {path}: {e}")
+
+
+def discard_job(job: ImportJob):
+    """🗑️ Удаляет неподтвержденное задание вместе с файлом"""
+    if job.status != ImportJob.STATUS_STAGED:
+        return
+    _remove_staged_file(job.staged_path)
+    job.delete()
+
+
+# ==================== ОЧЕРЕДЬ ====================
+
+def queue_job(job: ImportJob) -> bool:
+    """📬 Ставит подтвержденное задание в очередь (повторное подтверждение ничего не меняет)"""
+    queued = ImportJob.objects.filter(pk=job.pk, status=ImportJob.STATUS_STAGED).update(
+        status=ImportJob.STATUS_QUEUED, updated_at=timezone.now()
+    )
+    if queued:
+        job.status = ImportJob.STATUS_QUEUED
+    return bool(queued)
+
+
+def requeue_job(job: ImportJob) -> bool:
+    """🔁 Возвращает упавшее задание в очередь - оно продолжится с контрольной точки"""
+    if not job.staged_path or not os.path.exists(job.staged_path):
+        return False
+    requeued = ImportJob.objects.filter(pk=job.pk, status=ImportJob.STATUS_FAILED).update(
+        status=ImportJob.STATUS_QUEUED, error='', finished_at=None, updated_at=timezone.now()
+    )
+    return bool(requeued)
+
+
+def _claimable(now) -> Q:
+    """🔍 В очереди или выполняется, но без контрольной точки дольше STALE_AFTER (обработчик упал)"""
+    stale = now - timedelta(seconds=STALE_AFTER)
+    return Q(status=ImportJob.STATUS_QUEUED) | Q(status=ImportJob.STATUS_RUNNING, heartbeat_at__lt=stale)
+
+
+def claim_job(job_uid=None, worker: Optional[str] = None) -> Optional[ImportJob]:
+    """
+    🔒 Захватывает задание (конкретное или самое старое из доступных)
+
+    Захват - условный UPDATE по (uid, статус, heartbeat_at): из нескольких
+    обработчиков задание получит ровно один, без блокировок таблицы.
+
+    Returns:
+        ImportJob или None, если захватывать нечего
+    """
+    worker = worker or worker_name()
+    now = timezone.now()
+    candidates = ImportJob.objects.filter(_claimable(now)).order_by('created_at')
+    if job_uid is not None:
+        candidates = candidates.filter(pk=job_uid)
+
+    for uid, status, heartbeat_at in candidates.values_list('uid', 'status', 'heartbeat_at')[:10]:
+        claimed = ImportJob.objects.filter(pk=uid, status=status, heartbeat_at=heartbeat_at).update(
+            status=ImportJob.STATUS_RUNNING,
+            worker=worker[:100],
+            heartbeat_at=now,
+            started_at=Coalesce('started_at', now),
+            updated_at=now,
+        )
+        if claimed:
+            if status == ImportJob.STATUS_RUNNING:
+                logger.warning(f"🔁 Задание импорта {uid} перехвачено после остановки обработчика")
+            return ImportJob.objects.get(pk=uid)
+    return None
+
+
+# ==================== ВЫПОЛНЕНИЕ ====================
+
+def run_job(job: ImportJob, worker: Optional[str] = None, chunk_size: Optional[int] = None) -> ImportJob:
+    """
+    🚀 Выполняет захваченное задание с его контрольной точки
+
+    Категории импортируются одним шагом, товары - пакетами по chunk_size.
+    Каждый шаг и сдвиг контрольной точки - одна транзакция. Ошибка шага
+    откатывает только его: задание помечается failed и может быть
+    возвращено в очередь (requeue_job) без повторной записи готовых пакетов.
+    """
+    from .import_processor import ProductImportProcessor
+
+    worker = worker or job.worker or worker_name()
+    chunk_size = chunk_size or JOB_CHUNK_SIZE
+    processor = ProductImportProcessor()
+    for key in processor.statistics:
+        processor.statistics[key] = job.statistics.get(key, 0)
+
+    logger.info(f"🚀 Задание импорта {job.uid}: с строки {job.processed_rows} из {job.total_rows}")
+    try:
+        rows = _iter_staged_rows(job.staged_path, job.processed_rows)
+
+        if job.processed_rows < job.total_categories:
+            categories = list(islice(rows, job.total_categories - job.processed_rows))
+            _run_step(job, worker, processor, 'category_results', len(categories),
+                      lambda: processor.import_categories(categories))
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            _run_step(job, worker, processor, 'product_results', len(chunk),
+                      lambda: processor.import_products_chunk(chunk))
+
+    except JobLost:
+        logger.warning(f"⚠️ Задание импорта {job.uid} выполняет другой обработчик - останавливаемся")
+        return job
+
+    except Exception as e:
+        error_msg = f"❌ Критическая ошибка при импорте: {str(e)}"
+        logger.error(f"{error_msg} (задание {job.uid}, строка {job.processed_rows})", exc_info=True)
+        ImportJob.objects.filter(pk=job.pk, worker=worker).update(
+            status=ImportJob.STATUS_FAILED, error=error_msg, finished_at=timezone.now(), updated_at=timezone.now()
+        )
+        job.refresh_from_db()
+        return job
+
+    if processor.statistics.get('errors', 0) > 0:
+        logger.info("🧹 Выполняем очистку после ошибок...")
+        processor._cleanup_failed_images()
+
+    now = timezone.now()
+    finished = ImportJob.objects.filter(pk=job.pk, worker=worker, status=ImportJob.STATUS_RUNNING).update(
+        status=ImportJob.STATUS_DONE, finished_at=now, heartbeat_at=now, updated_at=now
+    )
+    if finished:
+        _remove_staged_file(job.staged_path)
+    job.refresh_from_db()
+    logger.info(f"✅ Задание импорта {job.uid} завершено: {job.statistics}")
+    return job
+
+
+def _run_step(job: ImportJob, worker: str, processor, results_key: str, row_count: int, step):
+    """💾 Шаг импорта и контрольная точка в одной транзакции"""
+    with transaction.atomic():
+        locked = (
+            ImportJob.objects.select_for_update()
+            .filter(pk=job.pk)
+            .values_list('status', 'worker', 'processed_rows')
+            .first()
+        )
+        if locked != (ImportJob.STATUS_RUNNING, worker, job.processed_rows):
+            raise JobLost(job.pk)
+
+        processor.errors = []
+        step_results = step()
+
+        stored = job.results.setdefault(results_key, [])
+        stored.extend(step_results[:max(0, RESULT_ROWS_LIMIT - len(stored))])
+        job.errors.extend(processor.errors[:max(0, ERRORS_LIMIT - len(job.errors))])
+        job.statistics = dict(processor.statistics)
+        job.processed_rows += row_count
+        job.heartbeat_at = timezone.now()
+
+        ImportJob.objects.filter(pk=job.pk).update(
+            processed_rows=job.processed_rows,
+            statistics=job.statistics,
+            results=job.results,
+            errors=job.errors,
+            heartbeat_at=job.heartbeat_at,
+            updated_at=job.heartbeat_at,
+        )
+
+
+def run_inline(job: ImportJob) -> ImportJob:
+    """⚡ Захват и выполнение задания в текущем процессе (IMPORT_JOBS_INLINE)"""
+    claimed = claim_job(job.pk)
+    return run_job(claimed) if claimed is not None else job
+
+
+# ==================== ПРОГРЕСС ====================
+
+def job_progress(job: ImportJob) -> Dict:
+    """
+    📊 Прогресс задания для страницы опроса
+
+    Скорость - строк в секунду с момента первого захвата, ETA - оставшиеся
+    строки при этой скорости (None, пока считать не из чего).
+    """
+    now = timezone.now()
+    elapsed = ((job.finished_at or now) - job.started_at).total_seconds() if job.started_at else 0.0
+    rate = job.processed_rows / elapsed if elapsed > 0 and job.processed_rows else 0.0
+    remaining = max(0, job.total_rows - job.processed_rows)
+
+    if job.is_finished:
+        eta = 0
+    elif rate > 0:
+        eta = round(remaining / rate)
+    else:
+        eta = None
+
+    statistics = job.statistics or {}
+    return {
+        'uid': str(job.uid),
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'finished': job.is_finished,
+        'file_name': job.file_name,
+        'processed_rows': job.processed_rows,
+        'total_rows': job.total_rows,
+        'percent': job.progress_percent(),
+        'elapsed_seconds': round(elapsed),
+        'rows_per_second': round(rate, 1),
+        'eta_seconds': eta,
+        'statistics': {
+            key: statistics.get(key, 0) for key in (
+                'categories_created', 'categories_updated', 'products_created',
+                'products_updated', 'products_unchanged', 'images_processed', 'errors',
+            )
+        },
+        'recent_errors': job.errors[-5:],
+        'error': job.error,
+        'stale': (
+            job.status == ImportJob.STATUS_RUNNING and job.heartbeat_at is not None
+            and (now - job.heartbeat_at).total_seconds() > STALE_AFTER
+        ),
+    }
+
+
+def purge_staged_jobs(older_than_days: int) -> int:
+    """🧹 Удаляет неподтвержденные задания старше N дней вместе с файлами"""
+    threshold = timezone.now() - timedelta(days=older_than_days)
+    removed = 0
+    for job in ImportJob.objects.filter(status=ImportJob.STATUS_STAGED, created_at__lt=threshold):
+        discard_job(job)
+        removed += 1
+    return removed
@@ -2,11 +2,15 @@
 # 🛠️ ОБНОВЛЕННАЯ версия с улучшенной обработкой изображений
 # ✅ Добавлена защита от блокировок файлов и валидация
 
+import hashlib
+import json
 import logging
 import os
 import time
-from typing import Dict, List, Tuple, Optional
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple, Optional
 from django.db import transaction, IntegrityError, models
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.files import File
 from django.conf import settings
@@ -21,6 +25,36 @@ from .import_utils import (
 
 logger = logging.getLogger(__name__)
 
+# 📦 Размер пакета bulk_create / bulk_update (и IN-запросов) в массовом режиме
+IMPORT_CHUNK_SIZE = getattr(settings, 'IMPORT_BULK_CHUNK_SIZE', 500)
+
+# 🔄 Поля товара, которые переписывает импорт (для bulk_update и сравнения)
+PRODUCT_IMPORT_FIELDS = [
+    'product_name', 'category', 'product_sku', 'slug', 'price',
+    'product_desription', 'page_title', 'meta_description',
+]
+
+# 🔍 Поля, входящие в поисковый документ товара (common.search.build_document)
+PRODUCT_SEARCH_FIELDS = {'product_name', 'category', 'product_sku', 'product_desription'}
+
+# 🔑 Версия нормализации отпечатков строк: увеличение заставляет заново сравнить все строки
+FINGERPRINT_VERSION = 1
+
+
+def _chunks(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def fingerprint_is_current(fingerprint: str, stored: str, synced_at, updated_at) -> bool:
+    """
+    🔑 Строка совпадает с последним импортом и объект с тех пор не менялся
+
+    Правка в админке сдвигает updated_at позже import_synced_at - такой
+    отпечаток недействителен, и импорт снова перезапишет поля из файла.
+    """
+    return bool(fingerprint) and fingerprint == stored and synced_at is not None and updated_at <= synced_at
+
 
 class ProductImportProcessor:
     """
@@ -30,16 +64,23 @@ class ProductImportProcessor:
     1. process_excel_file() - классический режим (Excel → разбор → импорт)
     2. process_structured_data() - новый режим (готовые данные → импорт)
 
+    Товары по умолчанию импортируются массово (bulk=True): существующие
+    товары и категории загружаются одним запросом на пакет, строки
+    сравниваются в памяти, запись - bulk_create / bulk_update пакетами по
+    chunk_size. bulk=False - прежний построчный режим с сигналами на каждый товар.
+
     🛠️ ДОБАВЛЕНО: Улучшенная обработка изображений с защитой от WinError 32
     """
 
-    def __init__(self):
+    def __init__(self, bulk: bool = True, chunk_size: int = None):
         self.statistics = {
             'total_processed': 0,
             'categories_created': 0,
             'categories_updated': 0,
             'products_created': 0,
             'products_updated': 0,
+            'categories_unchanged': 0,
+            'products_unchanged': 0,
             'errors': 0,
             'images_processed': 0,
             'images_failed': 0,
@@ -47,6 +88,9 @@ class ProductImportProcessor:
         }
         self.errors = []
         self.category_cache = {}  # 💾 Кэш созданных категорий
+        self.bulk = bulk
+        self.chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+        self._category_lookup = None  # 🔍 Предзагруженные категории: {'sku': {...}, 'name': {...}}
 
     def process_excel_file(self, file) -> Dict:
         """
@@ -62,11 +106,8 @@ class ProductImportProcessor:
             if not success:
                 return self._create_error_result(f"Ошибка чтения файла: {result}")
 
-            raw_data = result
-            logger.info(f"📋 Прочитано {len(raw_data)} строк из файла")
-
-            # 🔄 Разделяем на категории и товары
-            categories, products, invalid_data = separate_categories_and_products(raw_data)
+            # 🔄 Разделяем на категории и товары (строки читаются потоково)
+            categories, products, invalid_data = separate_categories_and_products(result)
 
             if not categories and not products:
                 return self._create_error_result("Нет валидных данных для импорта")
@@ -109,10 +150,15 @@ class ProductImportProcessor:
             # 🚀 Выполняем импорт в транзакции
             with transaction.atomic():
                 # 📂 Сначала импортируем категории
+                if self.bulk:
+                    self._prefetch_categories(categories)
                 category_results = self._import_categories(categories)
 
                 # 🛍️ Затем импортируем товары
-                product_results = self._import_products(products)
+                if self.bulk:
+                    product_results = self._import_products_bulk(products)
+                else:
+                    product_results = self._import_products(products)
 
             # 🧹 Дополнительная очистка после обработки
             if self.statistics.get('errors', 0) > 0:
@@ -137,6 +183,29 @@ class ProductImportProcessor:
             logger.error(error_msg)
             return self._create_error_result(error_msg)
 
+    # ==================== ПОШАГОВЫЙ ИМПОРТ (products.import_jobs) ====================
+
+    def import_categories(self, categories: List[Dict]) -> List[Dict]:
+        """
+        📂 Шаг задания импорта: все категории файла
+
+        Транзакцию и контрольную точку ведет вызывающий код.
+        """
+        if self.bulk:
+            self._prefetch_categories(categories)
+        return self._import_categories(categories)
+
+    def import_products_chunk(self, products: List[Dict]) -> List[Dict]:
+        """
+        🛍️ Шаг задания импорта: очередной пакет товаров
+
+        Категории ищутся по названию (кэш процессора, иначе запросом),
+        поэтому пакет можно обработать и после перезапуска задания.
+        """
+        if self.bulk:
+            return self._import_products_bulk(products)
+        return self._import_products(products)
+
     def _import_categories(self, categories_data: List[Dict]) -> List[Dict]:
         """📂 Импорт категорий с созданием моделей Category"""
         results = []
@@ -168,34 +237,45 @@ class ProductImportProcessor:
 
         try:
             # 🔍 Проверяем, существует ли категория (по SKU или названию)
-            existing_category = Category.objects.filter(
-                models.Q(category_sku=category_sku) | models.Q(category_name=category_name)
-            ).first()
-
-            if existing_category:
-                # 🔄 Обновляем существующую категорию
-                category = self._update_category(existing_category, category_data)
-                action = 'updated'
-                self.statistics['categories_updated'] += 1
+            existing_category = self._find_category(category_sku, category_name)
+            fingerprint = self._category_fingerprint(category_data)
+
+            if existing_category and fingerprint_is_current(
+                    fingerprint, existing_category.import_fingerprint,
+                    existing_category.import_synced_at, existing_category.updated_at):
+                # ⏭️ Строка не изменилась с прошлого импорта
+                category = existing_category
+                action = 'unchanged'
+                self.statistics['categories_unchanged'] += 1
             else:
-                # 🆕 Создаём новую категорию
-                category = self._create_category(category_data)
-                action = 'created'
-                self.statistics['categories_created'] += 1
-
-            # 🖼️ Обрабатываем изображение категории с улучшенной защитой
-            if category_data.get('image'):
-                self._attach_category_image(category, category_data['image'])
+                if existing_category:
+                    # 🔄 Обновляем существующую категорию
+                    category = self._update_category(existing_category, category_data)
+                    action = 'updated'
+                    self.statistics['categories_updated'] += 1
+                else:
+                    # 🆕 Создаём новую категорию
+                    category = self._create_category(category_data)
+                    action = 'created'
+                    self.statistics['categories_created'] += 1
+
+                # 🖼️ Обрабатываем изображение категории с улучшенной защитой
+                image_attached = True
+                if category_data.get('image'):
+                    image_attached = self._attach_category_image(category, category_data['image'])
+                # 🔑 Без изображения строка не считается синхронизированной - следующий импорт повторит попытку
+                self._store_fingerprint(category, fingerprint if image_attached else '')
 
             # 💾 Добавляем в кэш для товаров
             self.category_cache[category_name] = category
+            self._remember_category(category)
 
             logger.info(f"✅ Категория {category_name} (SKU: {category_sku}) {action}")
 
             return {
                 'name': category_name,
                 'status': action,
-                'message': f'Категория успешно {action}'
+                'message': 'Без изменений' if action == 'unchanged' else f'Категория успешно {action}'
             }
 
         except Exception as e:
@@ -203,6 +283,92 @@ class ProductImportProcessor:
             logger.error(error_msg)
             raise
 
+    def _prefetch_categories(self, categories_data: List[Dict]):
+        """🔍 Все затронутые категории одним запросом (по SKU или названию)"""
+        skus = {data.get('category_sku') for data in categories_data if data.get('category_sku')}
+        names = {data['category_name'] for data in categories_data}
+        self._category_lookup = {'sku': {}, 'name': {}}
+        if skus or names:
+            for category in Category.objects.filter(
+                    models.Q(category_sku__in=skus) | models.Q(category_name__in=names)
+            ):
+                self._remember_category(category, replace=False)
+
+    def _remember_category(self, category: Category, replace: bool = True):
+        if self._category_lookup is None:
+            return
+        for key, value in (('sku', category.category_sku), ('name', category.category_name)):
+            if value and (replace or value not in self._category_lookup[key]):
+                self._category_lookup[key][value] = category
+
+    def _find_category(self, category_sku, category_name: str) -> Optional[Category]:
+        """🔍 Категория по SKU или названию (из предзагрузки, иначе запросом)"""
+        if self._category_lookup is None:
+            return Category.objects.filter(
+                models.Q(category_sku=category_sku) | models.Q(category_name=category_name)
+            ).first()
+        return self._category_lookup['sku'].get(category_sku) or self._category_lookup['name'].get(category_name)
+
+    # ==================== ОТПЕЧАТКИ СТРОК ====================
+
+    def _row_fingerprint(self, values: List) -> str:
+        """🔑 SHA-1 нормализованного содержимого строки"""
+        normalized = [FINGERPRINT_VERSION] + ['' if value is None else str(value).strip() for value in values]
+        return hashlib.sha1(json.dumps(normalized, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def _category_fingerprint(self, category_data: Dict) -> str:
+        return self._row_fingerprint([
+            category_data.get('category_name'), category_data.get('category_sku'),
+            category_data.get('description'), category_data.get('title'),
+            category_data.get('meta_description'), category_data.get('image'),
+        ])
+
+    def _product_fingerprint(self, product_data: Dict) -> str:
+        return self._row_fingerprint([
+            product_data.get('sku'), product_data.get('name'), product_data.get('category_name'),
+            self._normalize_price(product_data.get('price', 0)), product_data.get('description'),
+            product_data.get('title'), product_data.get('meta_description'), product_data.get('image'),
+        ])
+
+    def _store_fingerprint(self, instance, fingerprint: str):
+        """💾 Отпечаток записанной строки; момент синхронизации = updated_at (без его сдвига)"""
+        type(instance).objects.filter(pk=instance.pk).update(
+            import_fingerprint=fingerprint, import_synced_at=models.F('updated_at')
+        )
+        instance.import_fingerprint = fingerprint
+        instance.import_synced_at = instance.updated_at
+
+    def _store_product_fingerprints(self, products: List[Product]):
+        """💾 Отпечатки пакета товаров: bulk_update + один UPDATE момента синхронизации"""
+        for chunk in _chunks(products, self.chunk_size):
+            Product.objects.bulk_update(chunk, ['import_fingerprint'])
+            Product.objects.filter(pk__in=[product.pk for product in chunk]).update(
+                import_synced_at=models.F('updated_at')
+            )
+
+    def _unchanged_skus(self, products_data: List[Dict], fingerprints: List[str]) -> set:
+        """
+        ⏭️ SKU, все строки которых совпадают с отпечатком последнего импорта
+
+        Читаются только отпечатки - такие товары не загружаются и не пишутся.
+        """
+        row_fingerprints = {}
+        for product_data, fingerprint in zip(products_data, fingerprints):
+            if product_data.get('sku'):
+                row_fingerprints.setdefault(str(product_data['sku']), set()).add(fingerprint)
+
+        unchanged = set()
+        for chunk in _chunks(sorted(row_fingerprints), self.chunk_size):
+            stored_rows = Product.objects.filter(product_sku__in=chunk).values_list(
+                'product_sku', 'import_fingerprint', 'import_synced_at', 'updated_at'
+            )
+            for sku, stored, synced_at, updated_at in stored_rows:
+                fingerprints_for_sku = row_fingerprints[sku]
+                if len(fingerprints_for_sku) == 1 and fingerprint_is_current(
+                        next(iter(fingerprints_for_sku)), stored, synced_at, updated_at):
+                    unchanged.add(sku)
+        return unchanged
+
     def _create_category(self, category_data: Dict) -> Category:
         """🆕 Создание новой категории с поддержкой category_sku"""
         try:
@@ -237,6 +403,9 @@ class ProductImportProcessor:
     def _update_category(self, category: Category, category_data: Dict) -> Category:
         """🔄 Обновление существующей категории"""
         try:
+            original_state = (category.description, category.page_title, category.meta_title,
+                              category.meta_description, category.category_sku)
+
             # 🔄 Обновляем поля если они заполнены
             if category_data.get('description'):
                 category.description = category_data['description']
@@ -252,6 +421,11 @@ class ProductImportProcessor:
             if category_data.get('category_sku'):
                 category.category_sku = category_data['category_sku']
 
+            # ⏭️ Без изменений - не сохраняем (сохранение переиндексирует все товары категории)
+            if original_state == (category.description, category.page_title, category.meta_title,
+                                  category.meta_description, category.category_sku):
+                return category
+
             category.save()
 
             logger.info(f"🔄 Обновлена категория: {category.category_name} (SKU: {category.category_sku})")
@@ -261,7 +435,7 @@ class ProductImportProcessor:
             logger.error(f"❌ Ошибка обновления категории {category.category_name}: {e}")
             raise
 
-    def _attach_category_image(self, category: Category, image_filename: str):
+    def _attach_category_image(self, category: Category, image_filename: str) -> bool:
         """
         🖼️ УЛУЧШЕННОЕ присоединение изображения к категории
 
@@ -270,15 +444,20 @@ class ProductImportProcessor:
         Args:
             category: Объект категории
             image_filename: Имя файла изображения
+
+        Returns:
+            bool: Изображение присоединено (или уже было присоединено)
         """
         try:
             # ✅ Предварительная валидация файла
             if not self._validate_image_file(image_filename, 'categories'):
                 logger.warning(f"⚠️ Файл изображения категории не прошел валидацию: {image_filename}")
-                return
+                return False
 
             # 📁 Формируем путь к изображению
             image_path = f"categories/{image_filename}"
+            if category.category_image.name == image_path:
+                return True
 
             # 💾 Безопасное присоединение изображения с повторными попытками
             for attempt in range(3):
@@ -286,7 +465,7 @@ class ProductImportProcessor:
                     category.category_image.name = image_path
                     category.save(update_fields=['category_image'])
                     logger.info(f"✅ Присоединено изображение категории (попытка {attempt + 1}): {image_filename}")
-                    return
+                    return True
 
                 except Exception as save_error:
                     if attempt < 2:  # Не последняя попытка
@@ -300,6 +479,7 @@ class ProductImportProcessor:
         except Exception as e:
             logger.error(f"❌ Критическая ошибка присоединения изображения категории {image_filename}: {e}")
             self.statistics['images_failed'] += 1
+        return False
 
     def _import_products(self, products_data: List[Dict]) -> List[Dict]:
         """🛍️ Импорт товаров с привязкой к категориям"""
@@ -325,17 +505,348 @@ class ProductImportProcessor:
 
         return results
 
+    # ==================== МАССОВЫЙ ИМПОРТ ТОВАРОВ ====================
+
+    def _import_products_bulk(self, products_data: List[Dict]) -> List[Dict]:
+        """
+        🚀 Массовый импорт товаров: предзагрузка → сравнение в памяти → bulk-запись
+
+        Результаты по строкам - те же, что у построчного _import_products().
+        Сигналы при bulk-операциях не срабатывают, поэтому main_image,
+        теговый кэш, поисковый индекс и производные изображений
+        обновляются здесь явно.
+        """
+        results: List[Optional[Dict]] = [None] * len(products_data)
+        failed = {}  # 🚫 SKU → текст ошибки (для всех строк этого SKU)
+
+        # 🔑 Строки без изменений с прошлого импорта отсекаются до загрузки товаров
+        fingerprints = [self._product_fingerprint(data) for data in products_data]
+        unchanged = self._unchanged_skus(products_data, fingerprints)
+        pending = [data for data in products_data if str(data.get('sku') or '') not in unchanged]
+
+        categories = self._resolve_categories({data.get('category_name') for data in pending})
+        existing = self._prefetch_products({str(data['sku']) for data in pending if data.get('sku')})
+        old_category_ids = {sku: product.category_id for sku, product in existing.items()}
+        original_state = {sku: self._product_state(product) for sku, product in existing.items()}
+
+        # 🧮 Сравнение в памяти: строка → новый или измененный товар
+        planned = {}  # SKU → Product (в порядке первого появления)
+        repeated = set()  # 🔁 SKU, встречающиеся в файле больше одного раза
+        row_skus = []
+        for index, product_data in enumerate(products_data):
+            self.statistics['total_processed'] += 1
+            sku = str(product_data.get('sku') or '')
+            row_skus.append(sku)
+            if sku in unchanged:
+                results[index] = {
+                    'sku': product_data['sku'],
+                    'name': product_data['name'],
+                    'status': 'unchanged',
+                    'message': 'Без изменений'
+                }
+                continue
+            try:
+                category = categories.get(product_data.get('category_name'))
+                if category is None:
+                    raise ValueError(f"Категория {product_data.get('category_name')} не найдена")
+
+                product = planned.get(sku) or existing.get(sku)
+                if sku in planned:
+                    # 🔁 Повтор SKU в файле: построчно товар уже записан предыдущей строкой,
+                    # и статус зависит только от совпадения с ее отпечатком
+                    repeated.add(sku)
+                    action = 'unchanged' if fingerprints[index] == product.import_fingerprint else 'updated'
+                    if action == 'updated':
+                        self._apply_product_update(product, product_data, category)
+                elif product is None:
+                    product = self._build_product(product_data, category)
+                    action = 'created'
+                else:
+                    self._apply_product_update(product, product_data, category)
+                    action = 'updated'
+                product.import_fingerprint = fingerprints[index]
+                planned[sku] = product
+
+                results[index] = {
+                    'sku': product_data['sku'],
+                    'name': product_data['name'],
+                    'status': action,
+                    'message': 'Без изменений' if action == 'unchanged' else f'Товар успешно {action}'
+                }
+            except Exception as e:
+                results[index] = {'sku': product_data.get('sku', '?'), 'status': 'error', 'message': str(e)}
+
+        for sku, message in self._find_slug_conflicts(planned).items():
+            failed[sku] = message
+            planned.pop(sku)
+
+        # 💾 Запись пакетами (каждый пакет - в своей точке сохранения)
+        to_create = [product for sku, product in planned.items() if sku not in existing]
+        changed_fields = {
+            sku: self._changed_fields(original_state[sku], self._product_state(product))
+            for sku, product in planned.items() if sku in existing
+        }
+        to_update = [product for sku, product in planned.items() if changed_fields.get(sku)]
+        now = timezone.now()
+        for chunk in _chunks(to_create, self.chunk_size):
+            self._write_chunk(chunk, failed, lambda batch: Product.objects.bulk_create(batch))
+        for chunk in _chunks(to_update, self.chunk_size):
+            # ✂️ Только реально измененные поля: CASE WHEN на каждое поле дорог
+            fields = sorted(set().union(*(changed_fields[product.product_sku] for product in chunk)))
+            for product in chunk:
+                product.updated_at = now
+            self._write_chunk(chunk, failed, lambda batch: (
+                Product.objects.bulk_update(batch, fields),
+                # 🕒 Одно значение на весь пакет - обычный UPDATE вместо CASE по строкам
+                Product.objects.filter(pk__in=[product.pk for product in batch]).update(updated_at=now),
+            ))
+        for sku in failed:
+            planned.pop(sku, None)
+
+        # 🖼️ Изображения - точным совпадением пути
+        image_rows = [
+            (planned[row_skus[index]], product_data['image'])
+            for index, product_data in enumerate(products_data)
+            if product_data.get('image') and row_skus[index] in planned and results[index]['status'] != 'error'
+        ]
+        images_touched, images_missing = self._attach_product_images_bulk(image_rows)
+
+        # 🔑 Отпечатки - после изображений: строка без своего изображения не считается синхронизированной
+        for product in planned.values():
+            if product.pk in images_missing:
+                product.import_fingerprint = ''
+        self._store_product_fingerprints(list(planned.values()))
+
+        # 📋 Итоговые статусы строк и статистика
+        for index, product_data in enumerate(products_data):
+            sku = row_skus[index]
+            if sku in failed and results[index]['status'] != 'error':
+                results[index] = {'sku': product_data.get('sku', '?'), 'status': 'error', 'message': failed[sku]}
+            elif (results[index]['status'] == 'updated' and sku not in repeated and not changed_fields.get(sku)
+                  and planned[sku].pk not in images_touched and planned[sku].pk not in images_missing):
+                # ⏸️ Отпечаток устарел, но поля и изображения совпали с БД - запись не понадобилась
+                # (строка с неприсоединенным изображением - повторная попытка, как построчно, updated)
+                # (повторы SKU построчно пишутся каждой строкой - их статус не меняем)
+                results[index] = {**results[index], 'status': 'unchanged', 'message': 'Без изменений'}
+
+            result = results[index]
+            if result['status'] == 'error':
+                error_msg = f"❌ Ошибка обработки товара {result['sku']}: {result['message']}"
+                logger.error(error_msg)
+                self.errors.append(error_msg)
+                self.statistics['errors'] += 1
+                continue
+
+            self.statistics[f"products_{result['status']}"] += 1
+            # 🆕 Счетчик автосгенерированных SKU
+            if not product_data.get('original_sku'):
+                self.statistics['sku_generated'] += 1
+
+        # 🗄️ Сигналы не сработали - кэш страниц и поиск обновляем сами
+        written = [product for product in to_create + to_update if product.product_sku not in failed]
+        self._after_bulk_write(
+            written,
+            [product for product in planned.values() if product.pk in images_touched],
+            {old_category_ids[product.product_sku] for product in written if product.product_sku in old_category_ids},
+            [
+                product for product in written
+                if product.product_sku not in changed_fields
+                or PRODUCT_SEARCH_FIELDS & changed_fields[product.product_sku]
+            ],
+        )
+
+        logger.info(
+            f"🚀 Массовый импорт товаров: создано {len(to_create)}, изменено {len(to_update)}, "
+            f"без изменений {len(unchanged) + len(planned) - len(to_create) - len(to_update)} "
+            f"(по отпечатку {len(unchanged)}), ошибок {self.statistics['errors']}"
+        )
+        return results
+
+    def _resolve_categories(self, names: Iterable[str]) -> Dict[str, Category]:
+        """📂 Категории для товаров: кэш импорта, затем один запрос, затем fallback-создание"""
+        names = {name for name in names if name}
+        missing = names - set(self.category_cache)
+        if missing:
+            for category in Category.objects.filter(category_name__in=missing):
+                self.category_cache.setdefault(category.category_name, category)
+
+        resolved = {}
+        for name in names:
+            try:
+                # 🛡️ Точка сохранения: ошибка fallback-создания не обрывает всю транзакцию
+                with transaction.atomic():
+                    resolved[name] = self._get_category_for_product(name)
+            except Exception as e:
+                logger.error(f"❌ Не удалось получить категорию {name}: {e}")
+        return resolved
+
+    def _prefetch_products(self, skus: Iterable[str]) -> Dict[str, Product]:
+        """🔍 Существующие товары по SKU (один запрос на пакет)"""
+        existing = {}
+        for chunk in _chunks(sorted(skus), self.chunk_size):
+            for product in Product.objects.filter(product_sku__in=chunk):
+                existing[product.product_sku] = product
+        return existing
+
+    def _product_state(self, product: Product) -> Tuple:
+        return tuple(getattr(product, Product._meta.get_field(name).attname) for name in PRODUCT_IMPORT_FIELDS)
+
+    def _changed_fields(self, before: Tuple, after: Tuple) -> set:
+        return {name for name, old, new in zip(PRODUCT_IMPORT_FIELDS, before, after) if old != new}
+
+    def _find_slug_conflicts(self, planned: Dict[str, Product]) -> Dict[str, str]:
+        """
+        🔗 Слаги, которые нарушили бы уникальность (с другими товарами или внутри файла)
+
+        В построчном режиме это была IntegrityError на save() - здесь ошибка
+        строки, а не всего пакета.
+        """
+        conflicts = {}
+        counts = Counter(product.slug for product in planned.values())
+        taken = set()
+        pks = {product.pk for product in planned.values()}
+        for chunk in _chunks(sorted(counts), self.chunk_size):
+            taken.update(
+                slug for slug, pk in Product.objects.filter(slug__in=chunk).values_list('slug', 'pk')
+                if pk not in pks
+            )
+
+        seen = set()
+        for sku, product in planned.items():
+            if product.slug in taken or product.slug in seen:
+                conflicts[sku] = f"URL-адрес '{product.slug}' уже занят другим товаром"
+            seen.add(product.slug)
+        return conflicts
+
+    def _write_chunk(self, chunk: List[Product], failed: Dict[str, str], write):
+        try:
+            with transaction.atomic():
+                write(chunk)
+        except Exception as e:
+            logger.error(f"❌ Ошибка записи пакета из {len(chunk)} товаров: {e}")
+            for product in chunk:
+                failed[product.product_sku] = str(e)
+
+    def _attach_product_images_bulk(self, image_rows: List[Tuple[Product, str]]) -> Tuple[set, set]:
+        """
+        🖼️ Массовое присоединение изображений
+
+        Существующая запись ищется по точному пути product/<файл>
+        (без LIKE-сканирования). Последнее изображение строки товара
+        становится главным, как при построчной обработке.
+
+        Returns:
+            Tuple[set, set]: uid товаров, у которых изменились изображения,
+            и uid товаров, чье изображение не прошло валидацию
+        """
+        valid_files = {}
+        rows = []
+        missing = set()
+        for product, image_filename in image_rows:
+            if image_filename not in valid_files:
+                valid_files[image_filename] = self._validate_image_file(image_filename, 'product')
+                if not valid_files[image_filename]:
+                    logger.warning(f"⚠️ Файл изображения товара не прошел валидацию: {image_filename}")
+            if valid_files[image_filename]:
+                rows.append((product, f"product/{image_filename}"))
+            else:
+                missing.add(product.pk)
+        if not rows:
+            return set(), missing
+
+        product_ids = list({product.pk for product, _ in rows})
+        existing = {}
+        current_main = {}  # 🌟 uid главного изображения → uid товара (как сейчас в БД)
+        for chunk in _chunks(product_ids, self.chunk_size):
+            for image in ProductImage.objects.filter(product_id__in=chunk).only('uid', 'product_id', 'image', 'is_main'):
+                existing.setdefault((image.product_id, image.image.name), image)
+                if image.is_main:
+                    current_main[image.pk] = image.product_id
+
+        new_images = {}
+        main_image = {}  # 🌟 Товар → его главное изображение
+        for product, path in rows:
+            key = (product.pk, path)
+            image = existing.get(key) or new_images.get(key)
+            if image is None:
+                image = new_images[key] = ProductImage(product=product, image=path)
+            main_image[product.pk] = image
+
+        main_pks = {image.pk for image in main_image.values()}
+        for image in new_images.values():
+            image.is_main = main_image[image.product_id] is image
+
+        # 🔄 Сравнение с БД в памяти: кого снять с главных, кого назначить
+        demoted = [pk for pk in current_main if pk not in main_pks]
+        promoted = [
+            image for image in main_image.values()
+            if not image._state.adding and image.pk not in current_main
+        ]
+        touched = {image.product_id for image in new_images.values()}
+        touched.update(current_main[pk] for pk in demoted)
+        touched.update(image.product_id for image in promoted)
+
+        for chunk in _chunks(demoted, self.chunk_size):
+            ProductImage.objects.filter(pk__in=chunk).update(is_main=False)
+        for chunk in _chunks([image.pk for image in promoted], self.chunk_size):
+            ProductImage.objects.filter(pk__in=chunk).update(is_main=True)
+        for chunk in _chunks(list(new_images.values()), self.chunk_size):
+            ProductImage.objects.bulk_create(chunk)
+
+        for chunk in _chunks(list(touched), self.chunk_size):
+            Product.refresh_main_images(chunk)
+
+        self.statistics['images_processed'] += len(new_images)
+        logger.info(f"🖼️ Изображений присоединено: {len(new_images)}, уже были: {len(rows) - len(new_images)}")
+
+        # 🖼️ Адаптивные производные для новых записей (в фоне)
+        from common.image_derivatives import schedule_derivatives
+        schedule_derivatives(sorted({image.image.name for image in new_images.values()}))
+        return touched, missing
+
+    def _after_bulk_write(self, written: List[Product], images_changed: List[Product], old_category_ids: set,
+                          reindex: List[Product]):
+        """🗄️ Инвалидация тегового кэша и переиндексация измененных товаров (после COMMIT)"""
+        products = {product.pk: product for product in written + images_changed}
+        if not products:
+            return
+        from common.page_cache import PRODUCTS_CATALOG_TAG, category_tag, invalidate_tags, product_tag
+        from common.search import schedule_reindex
+
+        category_ids = {product.category_id for product in products.values()} | old_category_ids
+        invalidate_tags(
+            PRODUCTS_CATALOG_TAG,
+            *(product_tag(uid) for uid in products),
+            *(category_tag(category_id) for category_id in category_ids if category_id),
+        )
+        schedule_reindex(Product, [product.pk for product in reindex])
+
     def _process_single_product(self, product_data: Dict) -> Dict:
         """🛍️ Обработка одного товара с поиском по SKU"""
         product_sku = product_data['sku']
         product_name = product_data['name']
 
         try:
-            # 📂 Получаем категорию
-            category = self._get_category_for_product(product_data['category_name'])
-
             # 🎯 Ищем товар по SKU
             existing_product = Product.objects.filter(product_sku=product_sku).first()
+            fingerprint = self._product_fingerprint(product_data)
+
+            if existing_product and fingerprint_is_current(
+                    fingerprint, existing_product.import_fingerprint,
+                    existing_product.import_synced_at, existing_product.updated_at):
+                # ⏭️ Строка не изменилась с прошлого импорта - без save() и сигналов
+                self.statistics['products_unchanged'] += 1
+                if not product_data.get('original_sku'):
+                    self.statistics['sku_generated'] += 1
+                return {
+                    'sku': product_sku,
+                    'name': product_name,
+                    'status': 'unchanged',
+                    'message': 'Без изменений'
+                }
+
+            # 📂 Получаем категорию
+            category = self._get_category_for_product(product_data['category_name'])
 
             if existing_product:
                 # 🔄 Обновляем существующий товар
@@ -355,8 +866,11 @@ class ProductImportProcessor:
                 self.statistics['sku_generated'] += 1
 
             # 🖼️ Обрабатываем изображение товара с улучшенной защитой
+            image_attached = True
             if product_data.get('image'):
-                self._attach_product_image(product, product_data['image'])
+                image_attached = self._attach_product_image(product, product_data['image']) is not None
+            # 🔑 Без изображения строка не считается синхронизированной - следующий импорт повторит попытку
+            self._store_fingerprint(product, fingerprint if image_attached else '')
 
             logger.info(f"✅ Товар {product_sku} ({product_name}) {action}")
 
@@ -405,29 +919,12 @@ class ProductImportProcessor:
             product_name = product_data['name']
             product_sku = product_data['sku']
 
-            # 💰 ИСПРАВЛЕНО: Безопасная обработка цены
-            price = self._normalize_price(product_data.get('price', 0))
-
-            # 📝 Описание товара
-            description = product_data.get('description', '')
-            if not description:
-                description = f"<p>Качественные автоковрики {product_name}.</p>"
-
             # 🆕 Создаём товар с сохранением SKU
-            product = Product.objects.create(
-                product_name=product_name,
-                product_sku=product_sku,
-                slug=slugify(f"{product_name}-{product_sku}"),
-                category=category,
-                price=price,
-                product_desription=description,
-                page_title=product_data.get('title', ''),
-                meta_description=product_data.get('meta_description', ''),
-                newest_product=True
-            )
+            product = self._build_product(product_data, category)
+            product.save(force_insert=True)
 
             logger.info(
-                f"✅ Создан товар: {product_name} (SKU: {product_sku}, цена: {price}, категория: {category.category_name})")
+                f"✅ Создан товар: {product_name} (SKU: {product_sku}, цена: {product.price}, категория: {category.category_name})")
             return product
 
         except Exception as e:
@@ -437,27 +934,7 @@ class ProductImportProcessor:
     def _update_product(self, product: Product, product_data: Dict, category: Category) -> Product:
         """🔄 Обновление существующего товара"""
         try:
-            # 🔄 Обновляем ВСЕ поля
-            product.product_name = product_data['name']
-            product.category = category
-            product.product_sku = product_data['sku']
-
-            # 💰 ИСПРАВЛЕНО: Безопасная обработка цены
-            product.price = self._normalize_price(product_data.get('price', 0))
-
-            # 📝 Обновляем описание и SEO поля
-            if product_data.get('description'):
-                product.product_desription = product_data['description']
-
-            if product_data.get('title'):
-                product.page_title = product_data['title']
-
-            if product_data.get('meta_description'):
-                product.meta_description = product_data['meta_description']
-
-            # 🔗 Обновляем slug для уникальности
-            product.slug = slugify(f"{product.product_name}-{product.product_sku}")
-
+            self._apply_product_update(product, product_data, category)
             product.save()
 
             logger.info(f"🔄 Обновлён товар: {product.product_name} (SKU: {product.product_sku})")
@@ -467,6 +944,52 @@ class ProductImportProcessor:
             logger.error(f"❌ Ошибка обновления товара {product.product_name}: {e}")
             raise
 
+    def _build_product(self, product_data: Dict, category: Category) -> Product:
+        """🆕 Новый товар из строки импорта (без сохранения)"""
+        product_name = product_data['name']
+        product_sku = product_data['sku']
+
+        # 📝 Описание товара
+        description = product_data.get('description', '')
+        if not description:
+            description = f"<p>Качественные автоковрики {product_name}.</p>"
+
+        return Product(
+            product_name=product_name,
+            product_sku=product_sku,
+            slug=slugify(f"{product_name}-{product_sku}"),
+            category=category,
+            # 💰 ИСПРАВЛЕНО: Безопасная обработка цены
+            price=self._normalize_price(product_data.get('price', 0)),
+            product_desription=description,
+            page_title=product_data.get('title', ''),
+            meta_description=product_data.get('meta_description', ''),
+            newest_product=True
+        )
+
+    def _apply_product_update(self, product: Product, product_data: Dict, category: Category):
+        """🔄 Переносит поля строки импорта в существующий товар (без сохранения)"""
+        # 🔄 Обновляем ВСЕ поля
+        product.product_name = product_data['name']
+        product.category = category
+        product.product_sku = product_data['sku']
+
+        # 💰 ИСПРАВЛЕНО: Безопасная обработка цены
+        product.price = self._normalize_price(product_data.get('price', 0))
+
+        # 📝 Обновляем описание и SEO поля
+        if product_data.get('description'):
+            product.product_desription = product_data['description']
+
+        if product_data.get('title'):
+            product.page_title = product_data['title']
+
+        if product_data.get('meta_description'):
+            product.meta_description = product_data['meta_description']
+
+        # 🔗 Обновляем slug для уникальности
+        product.slug = slugify(f"{product.product_name}-{product.product_sku}")
+
     def _normalize_price(self, price_value) -> int:
         """
         💰 НОВЫЙ МЕТОД: Безопасная нормализация цены
@@ -510,6 +1033,9 @@ class ProductImportProcessor:
         Args:
             product: Объект товара
             image_filename: Имя файла изображения
+
+        Returns:
+            ProductImage или None, если изображение не присоединено
         """
         try:
             # ✅ Предварительная валидация файла
@@ -665,6 +1191,72 @@ class ProductImportProcessor:
         }
 
 
+def classify_import_rows(categories: List[Dict], products: List[Dict]) -> Dict:
+    """
+    🔑 Сколько строк импорт создаст, изменит и пропустит
+
+    Сравниваются только сохраненные отпечатки (те же правила, что при
+    импорте), сами категории и товары не загружаются. "Изменится" - отпечаток
+    другой или устарел; если поля совпадут с БД, запись все равно не понадобится.
+    """
+    processor = ProductImportProcessor()
+    changes = {
+        f'{kind}_{state}': 0
+        for kind in ('categories', 'products') for state in ('new', 'changed', 'unchanged')
+    }
+
+    def classify(kind: str, fingerprint: str, stored: Optional[Dict]):
+        if stored is None:
+            changes[f'{kind}_new'] += 1
+        elif fingerprint_is_current(fingerprint, stored['import_fingerprint'],
+                                    stored['import_synced_at'], stored['updated_at']):
+            changes[f'{kind}_unchanged'] += 1
+        else:
+            changes[f'{kind}_changed'] += 1
+
+    # 📂 Категории: по SKU, иначе по названию (как _find_category)
+    by_sku, by_name = {}, {}
+    category_skus = {data.get('category_sku') for data in categories if data.get('category_sku')}
+    category_names = {data['category_name'] for data in categories}
+    if categories:
+        stored_categories = Category.objects.filter(
+            models.Q(category_sku__in=category_skus) | models.Q(category_name__in=category_names)
+        ).values('category_sku', 'category_name', 'import_fingerprint', 'import_synced_at', 'updated_at')
+        for row in stored_categories:
+            by_sku.setdefault(row['category_sku'], row)
+            by_name.setdefault(row['category_name'], row)
+    for data in categories:
+        stored = by_sku.get(data.get('category_sku')) or by_name.get(data['category_name'])
+        classify('categories', processor._category_fingerprint(data), stored)
+
+    # 🛍️ Товары: по SKU, пакетами IN-запросов
+    stored_products = {}
+    skus = sorted({str(data['sku']) for data in products if data.get('sku')})
+    for chunk in _chunks(skus, processor.chunk_size):
+        for row in Product.objects.filter(product_sku__in=chunk).values(
+                'product_sku', 'import_fingerprint', 'import_synced_at', 'updated_at'):
+            stored_products[row['product_sku']] = row
+    for data in products:
+        classify('products', processor._product_fingerprint(data), stored_products.get(str(data.get('sku') or '')))
+
+    return changes
+
+
+def build_preview(categories: List[Dict], products: List[Dict], invalid_data: List[Dict]) -> Dict:
+    """👁️ Предпросмотр уже разобранных данных: статистика, сравнение с прошлым импортом и первые строки"""
+    return {
+        'success': True,
+        'statistics': get_import_statistics(categories, products, invalid_data),
+        'changes': classify_import_rows(categories, products),
+        'categories': categories[:5],
+        'products': products[:10],
+        'invalid_data': invalid_data[:5],
+        'total_categories': len(categories),
+        'total_products': len(products),
+        'total_invalid': len(invalid_data)
+    }
+
+
 def preview_excel_data(file) -> Dict:
     """👁️ Предпросмотр данных с разделением на категории и товары"""
     try:
@@ -673,29 +1265,11 @@ def preview_excel_data(file) -> Dict:
         if not success:
             return {'success': False, 'error': result}
 
-        raw_data = result
-
-        # 🔄 Разделяем данные
-        categories, products, invalid_data = separate_categories_and_products(raw_data)
-
-        # 📊 Статистика
-        stats = get_import_statistics(categories, products, invalid_data)
+        # 🔄 Разделяем данные (строки читаются потоково)
+        categories, products, invalid_data = separate_categories_and_products(result)
 
-        # 👁️ Ограничиваем для предпросмотра
-        preview_categories = categories[:5]
-        preview_products = products[:10]
-        preview_invalid = invalid_data[:5]
-
-        return {
-            'success': True,
-            'statistics': stats,
-            'categories': preview_categories,
-            'products': preview_products,
-            'invalid_data': preview_invalid,
-            'total_categories': len(categories),
-            'total_products': len(products),
-            'total_invalid': len(invalid_data)
-        }
+        # 👁️ Статистика и первые строки для предпросмотра
+        return build_preview(categories, products, invalid_data)
 
     except Exception as e:
         return {
@@ -712,6 +1286,15 @@ def preview_excel_data(file) -> Dict:
 # ✅ ИЗМЕНЕНО: _attach_category_image() - добавлены повторные попытки и валидация
 # ✅ ИЗМЕНЕНО: process_structured_data() - добавлен вызов очистки при ошибках
 # ✅ СОХРАНЕНО: Вся существующая логика процессора
+# ✅ ДОБАВЛЕНО: _import_products_bulk() - массовый режим (по умолчанию): предзагрузка SKU и
+#    категорий, сравнение в памяти, bulk_create / bulk_update пакетами IMPORT_BULK_CHUNK_SIZE
+# ✅ ДОБАВЛЕНО: _attach_product_images_bulk() - поиск изображения по точному пути вместо icontains
+# ✅ ДОБАВЛЕНО: _after_bulk_write() - теговый кэш, main_image и поиск вместо пропущенных сигналов
+# ✅ ИЗМЕНЕНО: _update_category() не сохраняет категорию без изменений
+# ✅ ДОБАВЛЕНО: import_categories() / import_products_chunk() - шаги фонового задания
+#    импорта (products/import_jobs.py), build_preview() - предпросмотр без повторного чтения файла
+# ✅ ДОБАВЛЕНО: отпечатки строк (import_fingerprint) - неизмененные с прошлого импорта строки
+#    пропускаются без загрузки и записи (статус unchanged); classify_import_rows() для предпросмотра
 #
 # 🎯 РЕЗУЛЬТАТ:
 # - Защита от блокировок файлов при сохранении изображений
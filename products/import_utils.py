@@ -4,9 +4,12 @@
 # ✅ Логика привязки товаров к категориям исправлена
 # ✅ Статистика изображений показывает реальные файлы
 
+import codecs
+import csv
 import logging
 import openpyxl
-from typing import Dict, List, Tuple, Optional, Union
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional, Union
 from decimal import Decimal, InvalidOperation
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.conf import settings
@@ -25,96 +28,158 @@ EXCEL_COLUMN_MAPPING = {
     'meta_description': 5,  # F: Мета-описание
     'image': 6  # G: Изображение
 }
+EXCEL_COLUMN_COUNT = max(EXCEL_COLUMN_MAPPING.values()) + 1
+
+# 📄 Сколько байт CSV анализировать для определения кодировки и разделителя
+CSV_SAMPLE_SIZE = 64 * 1024
 
 # 📋 УПРОЩЕННЫЕ требования
 REQUIRED_FIELDS = ['identifier']  # ✅ Только идентификатор обязателен
 
 
-def read_excel_file(file: InMemoryUploadedFile) -> Tuple[bool, Union[List[Dict], str]]:
+def read_excel_file(file: InMemoryUploadedFile) -> Tuple[bool, Union[Iterator[Dict], str]]:
     """
-    📊 Чтение Excel файла с разделением на категории и товары
+    📊 Потоковое чтение Excel (или CSV) файла с разделением на категории и товары
+
+    Книга открывается в режиме read_only и читается построчно (iter_rows),
+    CSV - csv.reader поверх файла. Вместо списка возвращается генератор
+    нормализованных строк: весь лист в памяти не держится, строки сразу
+    уходят в separate_categories_and_products().
 
     Args:
-        file: Загруженный Excel файл
+        file: Загруженный файл (.xlsx или .csv)
 
     Returns:
-        Tuple[bool, Union[List[Dict], str]]: (success, data_or_error)
+        Tuple[bool, Union[Iterator[Dict], str]]: (success, rows_or_error)
     """
     try:
         logger.info(f"🔄 Начинаем чтение файла: {file.name}")
 
-        # 📖 Загружаем Excel файл
-        workbook = openpyxl.load_workbook(file, data_only=True)
-        worksheet = workbook.active
+        if os.path.splitext(file.name or '')[1].lower() == '.csv':
+            source = _iter_csv_values(file)
+        else:
+            source = _iter_excel_values(file)
 
-        # 📏 Получаем размеры таблицы
-        max_row = worksheet.max_row
-        max_col = worksheet.max_column
+        # 📋 Заголовок пропускаем, первую строку данных проверяем сразу
+        next(source, None)
+        first_row = next(source, None)
+        if first_row is None:
+            source.close()
+            return False, "❌ Файл должен содержать минимум 2 строки (заголовок + данные)"
 
-        logger.info(f"📊 Размер таблицы: {max_row} строк, {max_col} колонок")
+        return True, _normalize_rows(chain([first_row], source))
 
-        if max_row < 2:
-            return False, "❌ Файл должен содержать минимум 2 строки (заголовок + данные)"
+    except Exception as e:
+        error_msg = f"❌ Ошибка чтения файла: {str(e)}"
+        logger.error(error_msg)
+        return False, error_msg
 
-        # 📋 Читаем данные начиная со второй строки (пропускаем заголовок)
-        data = []
 
-        for row_num in range(2, max_row + 1):
-            try:
-                # 🔍 Получаем значения ячеек
-                row_data = {}
+def _iter_excel_values(file) -> Iterator[Tuple]:
+    """📖 Значения строк активного листа (read_only: ячейки не хранятся в памяти)"""
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.active
+        logger.info(f"📊 Лист: {worksheet.title}, размер по метаданным: {worksheet.max_row} строк")
+        yield from worksheet.iter_rows(values_only=True, max_col=EXCEL_COLUMN_COUNT)
+    finally:
+        workbook.close()
+
 
-                # 📝 Безопасное извлечение данных из каждой ячейки
-                for field_name, col_index in EXCEL_COLUMN_MAPPING.items():
-                    cell_value = None
+def _detect_csv_encoding(file) -> str:
+    """
+    🔤 Кодировка CSV: UTF-8 или Windows-1251 (Excel)
 
-                    if col_index < max_col:
-                        cell = worksheet.cell(row=row_num, column=col_index + 1)  # +1 так как Excel 1-based
-                        cell_value = cell.value
+    Решают первые не-ASCII байты, а не начало файла: у выгрузки с латинским
+    заголовком и длинным ASCII-началом кириллица может встретиться далеко за
+    CSV_SAMPLE_SIZE. Файл читается блоками до первого блока с не-ASCII.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    file.seek(0)
+    try:
+        while True:
+            chunk = file.read(CSV_SAMPLE_SIZE)
+            if not chunk:
+                decoder.decode(b'', final=True)
+                return 'utf-8-sig'
+            decoder.decode(chunk)
+            # ✂️ Блок мог оборвать многобайтовый символ - тогда решает следующий
+            if not chunk.isascii() and not decoder.getstate()[0]:
+                return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'cp1251'
+    finally:
+        file.seek(0)
+
+
+def _iter_csv_values(file) -> Iterator[List[str]]:
+    """
+    📖 Строки CSV файла
 
-                    # 🧹 Очистка и нормализация данных
-                    if cell_value is not None:
-                        if isinstance(cell_value, str):
-                            cell_value = cell_value.strip()
-                            if not cell_value:
-                                cell_value = None
+    Кодировка (UTF-8 или Windows-1251 из Excel) определяется по первым
+    не-ASCII байтам, разделитель (, ; или табуляция) - по началу файла.
+    """
+    encoding = _detect_csv_encoding(file)
+    sample = file.read(CSV_SAMPLE_SIZE)
+    file.seek(0)
 
-                    row_data[field_name] = cell_value
+    try:
+        dialect = csv.Sniffer().sniff(sample.decode(encoding, errors='ignore'), delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
 
-                # 🚫 Пропускаем строки без идентификатора
-                if not row_data.get('identifier'):
-                    logger.warning(f"⚠️ Строка {row_num}: пропущена (нет идентификатора)")
-                    continue
+    yield from csv.reader(codecs.iterdecode(iter(file), encoding), dialect)
 
-                # 🎯 Определяем тип строки: категория или товар
-                identifier = str(row_data['identifier']).strip()
-                is_category = '.' in identifier
 
-                row_data['row_number'] = row_num
-                row_data['is_category'] = is_category
+def _normalize_rows(values_rows: Iterable) -> Iterator[Dict]:
+    """
+    🧹 Нормализация строк: значения по EXCEL_COLUMN_MAPPING, тип строки
 
-                if is_category:
-                    # 📂 Это категория - извлекаем чистое название
-                    row_data['category_name'] = extract_category_name(identifier)
-                    row_data['type'] = 'category'
-                else:
-                    # 🛍️ Это товар - сохраняем SKU
-                    row_data['sku'] = identifier
-                    row_data['type'] = 'product'
+    Нумерация строк - как в Excel (заголовок - строка 1).
+    """
+    row_num = 1
+    for row_num, values in enumerate(values_rows, start=2):
+        try:
+            values = list(values or ())
+            row_data = {}
+
+            for field_name, col_index in EXCEL_COLUMN_MAPPING.items():
+                cell_value = values[col_index] if col_index < len(values) else None
+
+                # 🧹 Очистка и нормализация данных
+                if isinstance(cell_value, str):
+                    cell_value = cell_value.strip() or None
 
-                data.append(row_data)
+                row_data[field_name] = cell_value
 
-            except Exception as e:
-                logger.error(f"❌ Ошибка обработки строки {row_num}: {str(e)}")
+            # 🚫 Пропускаем строки без идентификатора
+            if not row_data.get('identifier'):
+                logger.debug(f"⚠️ Строка {row_num}: пропущена (нет идентификатора)")
                 continue
 
-        logger.info(f"✅ Успешно прочитано {len(data)} строк данных")
-        return True, data
+            # 🎯 Определяем тип строки: категория или товар
+            identifier = str(row_data['identifier']).strip()
+            is_category = '.' in identifier
 
-    except Exception as e:
-        error_msg = f"❌ Ошибка чтения файла: {str(e)}"
-        logger.error(error_msg)
-        return False, error_msg
+            row_data['row_number'] = row_num
+            row_data['is_category'] = is_category
+
+            if is_category:
+                # 📂 Это категория - извлекаем чистое название
+                row_data['category_name'] = extract_category_name(identifier)
+                row_data['type'] = 'category'
+            else:
+                # 🛍️ Это товар - сохраняем SKU
+                row_data['sku'] = identifier
+                row_data['type'] = 'product'
+
+            yield row_data
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка обработки строки {row_num}: {str(e)}")
+            continue
+
+    logger.info(f"✅ Прочитано строк файла: {row_num - 1}")
 
 
 def extract_category_name(category_identifier: str) -> str:
@@ -225,7 +290,7 @@ def generate_sku_for_product(category_sku: int, existing_products_in_category: L
         # 🎯 Генерируем итоговый SKU
         generated_sku = base_sku + next_sequence
 
-        logger.info(
+        logger.debug(
             f"🆕 Сгенерирован SKU: {generated_sku} (категория {category_sku}, последовательность {next_sequence})")
 
         return str(generated_sku)
@@ -320,7 +385,19 @@ def normalize_price(price_value: Union[str, int, float, None]) -> float:
     return 0.0
 
 
-def separate_categories_and_products(raw_data: List[Dict]) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+def validate_rows(rows: Iterable[Dict]) -> Iterator[Tuple[Dict, List[str]]]:
+    """
+    ✅ Потоковая валидация: (строка, ошибки) для каждой строки генератора
+
+    Args:
+        rows: Строки из read_excel_file()
+    """
+    for row in rows:
+        is_valid, errors = validate_row(row)
+        yield row, ([] if is_valid else errors)
+
+
+def separate_categories_and_products(raw_data: Iterable[Dict]) -> Tuple[List[Dict], List[Dict], List[Dict]]:
     """
     🔄 ИСПРАВЛЕННОЕ разделение данных с правильной привязкой товаров к категориям
 
@@ -332,8 +409,11 @@ def separate_categories_and_products(raw_data: List[Dict]) -> Tuple[List[Dict],
     - Строка с точкой → категория (ОБНОВЛЯЕМ current_category)
     - Строка без точки → товар (привязываем к current_category + генерируем SKU если нужно)
 
+    Строки потребляются по одной (генератор read_excel_file() → validate_rows()),
+    в памяти остаются только итоговые словари категорий и товаров.
+
     Args:
-        raw_data: Сырые данные из Excel
+        raw_data: Строки из read_excel_file() (генератор или список)
 
     Returns:
         Tuple[List[Dict], List[Dict], List[Dict]]: (categories, products, invalid_data)
@@ -345,14 +425,11 @@ def separate_categories_and_products(raw_data: List[Dict]) -> Tuple[List[Dict],
     current_category_sku = 1  # 🔢 SKU текущей категории
     products_in_current_category = []  # 📦 Товары в текущей категории (для генерации SKU)
 
-    logger.info(f"🔄 Начинаем обработку с автогенерацией SKU {len(raw_data)} строк...")
+    logger.info("🔄 Начинаем потоковую обработку строк с автогенерацией SKU...")
 
-    for row in raw_data:
+    for row, errors in validate_rows(raw_data):
         try:
-            # ✅ Валидируем строку
-            is_valid, errors = validate_row(row)
-
-            if not is_valid:
+            if errors:
                 row['errors'] = errors
                 invalid_data.append(row)
                 logger.warning(f"❌ Строка {row.get('row_number', '?')}: ошибки валидации")
@@ -401,10 +478,10 @@ def separate_categories_and_products(raw_data: List[Dict]) -> Tuple[List[Dict],
                 if not original_sku or original_sku == '':
                     generated_sku = generate_sku_for_product(current_category_sku, products_in_current_category)
                     final_sku = generated_sku
-                    logger.info(f"🆕 Сгенерирован SKU: {final_sku} для товара в категории {current_category}")
+                    logger.debug(f"🆕 Сгенерирован SKU: {final_sku} для товара в категории {current_category}")
                 else:
                     final_sku = str(original_sku).strip()
-                    logger.info(f"✅ Используем существующий SKU: {final_sku}")
+                    logger.debug(f"✅ Используем существующий SKU: {final_sku}")
 
                 product_data = {
                     'sku': final_sku,  # 🎯 Финальный SKU (исходный или сгенерированный)
@@ -423,7 +500,7 @@ def separate_categories_and_products(raw_data: List[Dict]) -> Tuple[List[Dict],
                 products.append(product_data)
                 products_in_current_category.append(product_data)  # 📦 Добавляем в список для генерации следующих SKU
 
-                logger.info(
+                logger.debug(
                     f"🛍️ Товар {final_sku} → категория {current_category} (строка {row.get('row_number', '?')})")
 
         except Exception as e:
@@ -566,6 +643,9 @@ def get_import_statistics(categories: List[Dict], products: List[Dict], invalid_
 # ✅ ИСПРАВЛЕНО: get_import_statistics() - реальная проверка существования изображений
 # ✅ ДОБАВЛЕНО: Детальная диагностика обработки категорий и товаров
 # ✅ ДОБАВЛЕНО: Подсчет недостающих изображений
+# ✅ ИЗМЕНЕНО: read_excel_file() - потоковое чтение (read_only + iter_rows), возвращает генератор
+# ✅ ДОБАВЛЕНО: чтение CSV через тот же конвейер (кодировка и разделитель определяются сами)
+# ✅ ДОБАВЛЕНО: validate_rows() - потоковая валидация между чтением и разделением
 #
 # 📊 РЕЗУЛЬТАТ:
 # - НЕТ циклического импорта - сервер запустится
@@ -573,4 +653,5 @@ def get_import_statistics(categories: List[Dict], products: List[Dict], invalid_
 # - Товары ACURA → категория ACURA
 # - Товары ALFA ROMEO → категория ALFA ROMEO
 # - Правильная статистика изображений
-# - Детальные логи для отладки
\ No newline at end of file
+# - Детальные логи для отладки
+# - Прайс на десятки тысяч строк не загружается в память целиком
\ No newline at end of file
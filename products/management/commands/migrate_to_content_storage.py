@@ -0,0 +1,244 @@
+# 📁 products/management/commands/migrate_to_content_storage.py
+# 🔐 Django команда для переноса изображений в контентно-адресуемое хранилище
+# 📛 product/BMW.png → product/ab/ab12...ef.png, пути в БД переписываются пакетно
+
+import hashlib
+import os
+import posixpath
+import shutil
+import tempfile
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from common.page_cache import (
+    BOAT_CATEGORIES_TAG, BOATS_CATALOG_TAG, PRODUCT_CATEGORIES_TAG, PRODUCTS_CATALOG_TAG,
+    category_tag, invalidate_tags, product_tag
+)
+from products.storage import content_addressed_name, content_addressed_storage, is_content_addressed
+
+# 📋 Поля, которые обслуживает products.storage.get_image_storage
+IMAGE_FIELDS = [
+    ('products.ProductImage', 'image'),
+    ('products.Category', 'category_image'),
+    ('boats.BoatProductImage', 'image'),
+    ('boats.BoatCategory', 'category_image'),
+]
+
+# 🖼️ Изображения товаров → модель товара с колонкой main_image
+PRODUCT_IMAGE_MODELS = {
+    'products.ProductImage': 'products.Product',
+    'boats.BoatProductImage': 'boats.BoatProduct',
+}
+
+# 📦 Размер пакета UPDATE ... CASE
+BATCH_SIZE = 500
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_digest(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class Command(BaseCommand):
+    """
+    🔐 Переносит изображения товаров и категорий (авто и лодки) под имена-отпечатки
+
+    Одинаковые файлы сливаются в один, пути в ImageField переписываются
+    пакетными UPDATE ... CASE в одной транзакции, колонки main_image
+    пересчитываются. Оригиналы удаляются только после COMMIT.
+
+    Включите settings.MEDIA_CONTENT_ADDRESSED = True, чтобы новые загрузки
+    сразу сохранялись по отпечатку. Команду можно запускать повторно
+    (например, после импорта ZIP с изображениями).
+
+    Использование:
+    python manage.py migrate_to_content_storage --dry-run          # 👁️ Только показать
+    python manage.py migrate_to_content_storage                    # 🚀 Перенести
+    python manage.py migrate_to_content_storage --keep-originals   # 💾 Не удалять старые файлы
+    python manage.py migrate_to_content_storage --gc               # 🧹 Удалить неиспользуемые блобы
+    """
+
+    help = '🔐 Переносит изображения в контентно-адресуемое хранилище и переписывает пути в БД'
+
+    def add_arguments(self, parser):
+        """➕ Добавляем опции командной строки"""
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='👁️ Только показать, что будет перенесено',
+        )
+        parser.add_argument(
+            '--keep-originals',
+            action='store_true',
+            help='💾 Не удалять исходные файлы после переноса',
+        )
+        parser.add_argument(
+            '--gc',
+            action='store_true',
+            help='🧹 Удалить файлы-отпечатки, на которые не ссылается ни одна запись',
+        )
+
+    def handle(self, *args, **options):
+        """🚀 Основная логика команды"""
+        dry_run = options['dry_run']
+
+        legacy_names = set()
+        for model_label, field_name in IMAGE_FIELDS:
+            legacy_names.update(
+                name for name in self._field_values(model_label, field_name)
+                if not is_content_addressed(name)
+            )
+        self.stdout.write(f"🔍 Файлов со старыми именами: {len(legacy_names)}")
+
+        mapping, missing, deduplicated = self._copy_to_blobs(sorted(legacy_names), dry_run)
+        self.stdout.write(
+            f"🧬 К переносу: {len(mapping)}, уникальных блобов: {len(set(mapping.values()))}, "
+            f"совпадений по содержимому: {deduplicated}, файлов нет на диске: {len(missing)}"
+        )
+        for name in missing[:20]:
+            self.stdout.write(self.style.WARNING(f"⚠️ Нет файла: {name}"))
+
+        if mapping and not dry_run:
+            updated = self._rewrite_paths(mapping, delete_originals=not options['keep_originals'])
+            self.stdout.write(self.style.SUCCESS(f"✅ Переписано путей в БД: {updated}"))
+            self.stdout.write("🖼️ Производные для новых имен: python manage.py generate_image_derivatives --prune")
+
+        if options['gc']:
+            removed = self._collect_garbage(dry_run)
+            verb = 'Будет удалено' if dry_run else 'Удалено'
+            self.stdout.write(self.style.SUCCESS(f"🧹 {verb} неиспользуемых блобов: {removed}"))
+
+    # ==================== ЭТАПЫ ====================
+
+    def _field_values(self, model_label, field_name):
+        model = apps.get_model(model_label)
+        return set(
+            model._default_manager.exclude(**{field_name: ''})
+            .exclude(**{f'{field_name}__isnull': True})
+            .order_by()
+            .values_list(field_name, flat=True)
+            .distinct()
+        )
+
+    def _copy_to_blobs(self, names, dry_run):
+        """📦 Копирует файлы под имена-отпечатки (оригиналы пока не трогаем)"""
+        mapping, missing = {}, []
+        deduplicated = 0
+
+        for name in names:
+            path = content_addressed_storage.path(name)
+            if not os.path.isfile(path):
+                missing.append(name)
+                continue
+
+            new_name = content_addressed_name(
+                posixpath.dirname(name), _file_digest(path), os.path.splitext(name)[1] or '.bin'
+            )
+            new_path = content_addressed_storage.path(new_name)
+
+            if new_name in mapping.values() or os.path.exists(new_path):
+                deduplicated += 1
+            elif not dry_run:
+                os.makedirs(os.path.dirname(new_path), exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(new_path), suffix='.upload')
+                os.close(fd)
+                shutil.copy2(path, temp_path)
+                os.replace(temp_path, new_path)
+
+            mapping[name] = new_name
+
+        return mapping, missing, deduplicated
+
+    def _rewrite_paths(self, mapping, delete_originals):
+        """✏️ Пакетная замена путей во всех полях + пересчет main_image и инвалидация кэша"""
+        old_names = list(mapping)
+        updated = 0
+        tags = [PRODUCTS_CATALOG_TAG, BOATS_CATALOG_TAG, PRODUCT_CATEGORIES_TAG, BOAT_CATEGORIES_TAG]
+
+        with transaction.atomic():
+            for model_label, field_name in IMAGE_FIELDS:
+                model = apps.get_model(model_label)
+                for start in range(0, len(old_names), BATCH_SIZE):
+                    batch = old_names[start:start + BATCH_SIZE]
+                    updated += model._default_manager.filter(**{f'{field_name}__in': batch}).update(**{
+                        field_name: Case(
+                            *[When(**{field_name: old}, then=Value(mapping[old])) for old in batch],
+                            default=F(field_name),
+                            output_field=model._meta.get_field(field_name),
+                        )
+                    })
+
+                if model_label in PRODUCT_IMAGE_MODELS:
+                    product_model = apps.get_model(PRODUCT_IMAGE_MODELS[model_label])
+                    product_ids = list(
+                        model._default_manager.filter(**{f'{field_name}__in': set(mapping.values())})
+                        .order_by()
+                        .values_list('product_id', flat=True)
+                        .distinct()
+                    )
+                    for start in range(0, len(product_ids), BATCH_SIZE):
+                        product_model.refresh_main_images(product_ids[start:start + BATCH_SIZE])
+                    tags.extend(product_tag(uid) for uid in product_ids)
+                    tags.extend(
+                        category_tag(category_id) for category_id in
+                        product_model.objects.filter(pk__in=product_ids).order_by()
+                        .values_list('category_id', flat=True).distinct()
+                    )
+                else:
+                    tags.extend(
+                        category_tag(uid) for uid in
+                        model._default_manager.filter(**{f'{field_name}__in': set(mapping.values())})
+                        .values_list('pk', flat=True)
+                    )
+
+            invalidate_tags(*tags)
+            if delete_originals:
+                transaction.on_commit(lambda: self._delete_originals(old_names))
+
+        return updated
+
+    def _delete_originals(self, names):
+        removed = 0
+        for name in names:
+            path = content_addressed_storage.path(name)
+            try:
+                os.unlink(path)
+                removed += 1
+            except OSError as e:
+                self.stdout.write(self.style.WARNING(f"⚠️ Не удалось удалить {name}: {e}"))
+        self.stdout.write(f"🗑️ Удалено исходных файлов: {removed}")
+
+    def _collect_garbage(self, dry_run):
+        """🧹 Удаляет блобы в папках изображений, на которые не ссылается ни одна запись"""
+        referenced = set()
+        folders = set()
+        for model_label, field_name in IMAGE_FIELDS:
+            referenced.update(self._field_values(model_label, field_name))
+            field = apps.get_model(model_label)._meta.get_field(field_name)
+            folders.add(field.upload_to)
+
+        removed = 0
+        for folder in sorted(folders):
+            root = content_addressed_storage.path(folder)
+            if not os.path.isdir(root):
+                continue
+            for prefix in os.listdir(root):
+                prefix_dir = os.path.join(root, prefix)
+                if len(prefix) != 2 or not os.path.isdir(prefix_dir):
+                    continue
+                for filename in os.listdir(prefix_dir):
+                    name = posixpath.join(folder, prefix, filename)
+                    if not is_content_addressed(name) or name in referenced:
+                        continue
+                    if not dry_run:
+                        os.unlink(os.path.join(prefix_dir, filename))
+                    removed += 1
+        return removed
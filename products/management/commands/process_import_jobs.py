@@ -0,0 +1,116 @@
+# 📁 products/management/commands/process_import_jobs.py
+# 📥 Обработчик фоновых заданий импорта товаров (products/import_jobs.py)
+# 🔁 Задание выполняется пакетами с контрольными точками: после сбоя - продолжение с места остановки
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.import_jobs import (
+    JOB_CHUNK_SIZE, STALE_AFTER, claim_job, purge_staged_jobs, requeue_job, run_job, worker_name
+)
+from products.models import ImportJob
+
+
+class Command(BaseCommand):
+    """
+    📥 Выполняет задания импорта из очереди
+
+    Захватывает задания в статусе queued, а также running, чей обработчик
+    не сохранял контрольную точку дольше IMPORT_JOB_STALE_AFTER секунд
+    (процесс упал или был перезапущен). Несколько обработчиков можно
+    запускать одновременно - каждое задание получит ровно один.
+
+    Использование:
+    python manage.py process_import_jobs                  # 🔄 Работать постоянно, опрашивая очередь
+    python manage.py process_import_jobs --once           # ⚡ Выполнить очередь и выйти (cron)
+    python manage.py process_import_jobs --retry <uid>    # 🔁 Вернуть упавшее задание в очередь
+    python manage.py process_import_jobs --purge-days 7   # 🧹 Удалить неподтвержденные задания старше 7 дней
+    """
+
+    help = '📥 Выполняет фоновые задания импорта товаров с контрольными точками'
+
+    def add_arguments(self, parser):
+        """➕ Добавляем опции командной строки"""
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='⚡ Выполнить все доступные задания и выйти',
+        )
+        parser.add_argument(
+            '--job',
+            help='🎯 Выполнить только задание с этим UID',
+        )
+        parser.add_argument(
+            '--retry',
+            help='🔁 Вернуть упавшее задание в очередь (продолжится с контрольной точки)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=JOB_CHUNK_SIZE,
+            help=f'📦 Строк товаров в пакете (по умолчанию {JOB_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=5.0,
+            help='⏱️ Пауза между опросами пустой очереди, секунд',
+        )
+        parser.add_argument(
+            '--purge-days',
+            type=int,
+            help='🧹 Удалить неподтвержденные задания старше N дней и выйти',
+        )
+
+    def handle(self, *args, **options):
+        """🚀 Основная логика команды"""
+        if options['purge_days'] is not None:
+            removed = purge_staged_jobs(options['purge_days'])
+            self.stdout.write(self.style.SUCCESS(f"🧹 Удалено неподтвержденных заданий: {removed}"))
+            return
+
+        if options['retry']:
+            job = ImportJob.objects.filter(pk=options['retry']).first()
+            if job is None:
+                raise CommandError(f"❌ Задание {options['retry']} не найдено")
+            if not requeue_job(job):
+                raise CommandError("❌ Вернуть в очередь можно только упавшее задание с сохраненными данными")
+            self.stdout.write(self.style.SUCCESS(
+                f"🔁 Задание {job.uid} в очереди, продолжится со строки {job.processed_rows}"
+            ))
+            return
+
+        worker = worker_name()
+        self.stdout.write(f"📥 Обработчик {worker}: пакет {options['chunk_size']}, "
+                          f"перехват заданий без контрольной точки дольше {STALE_AFTER} с")
+
+        while True:
+            job = claim_job(options['job'], worker=worker)
+            if job is None:
+                if options['once'] or options['job']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f"🚀 {job.file_name or job.uid}: со строки {job.processed_rows} из {job.total_rows}")
+            started = time.monotonic()
+            job = run_job(job, worker=worker, chunk_size=options['chunk_size'])
+            elapsed = time.monotonic() - started
+
+            if job.status == ImportJob.STATUS_DONE:
+                stats = job.statistics
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ {job.uid}: создано товаров {stats.get('products_created', 0)}, "
+                    f"обновлено {stats.get('products_updated', 0)}, без изменений {stats.get('products_unchanged', 0)}, "
+                    f"ошибок {stats.get('errors', 0)} "
+                    f"за {elapsed:.1f} с"
+                ))
+            elif job.status == ImportJob.STATUS_FAILED:
+                self.stdout.write(self.style.ERROR(
+                    f"❌ {job.uid}: {job.error} (контрольная точка: строка {job.processed_rows}; "
+                    f"повтор: --retry {job.uid})"
+                ))
+
+            if options['job']:
+                break
@@ -0,0 +1,33 @@
+# 🖼️ Денормализованное фото карточки товара (Product.main_image)
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_main_image(apps, schema_editor):
+    """🔄 Заполняет колонку для уже существующих товаров"""
+    Product = apps.get_model('products', 'Product')
+    ProductImage = apps.get_model('products', 'ProductImage')
+    first_image = (
+        ProductImage.objects.filter(product=OuterRef('pk'))
+        .order_by('-is_main', 'created_at')
+        .values('image')[:1]
+    )
+    Product.objects.update(main_image=Coalesce(Subquery(first_image), Value('')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_alter_wishlist_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='main_image',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Обновляется автоматически при сохранении и удалении изображений товара', max_length=255, verbose_name='Фото карточки'),
+        ),
+        migrations.RunPython(fill_main_image, migrations.RunPython.noop),
+    ]
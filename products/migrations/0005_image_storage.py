@@ -0,0 +1,24 @@
+# 🔐 Выбор хранилища изображений через products.storage.get_image_storage
+
+import products.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_main_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='category_image',
+            field=models.ImageField(help_text='Рекомендуемый размер: 800x400 px. Файл сохранится с точным именем', storage=products.storage.get_image_storage, upload_to='categories', verbose_name='Изображение категории'),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='image',
+            field=models.ImageField(help_text='Файл сохранится с точным именем без хеш-суффиксов', storage=products.storage.get_image_storage, upload_to='product', verbose_name='Изображение'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# 📥 Фоновые задания импорта товаров (products.ImportJob)
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_image_storage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('uid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='Уникальный ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('status', models.CharField(choices=[('staged', 'Ожидает подтверждения'), ('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершено'), ('failed', 'Ошибка')], db_index=True, default='staged', max_length=10, verbose_name='Статус')),
+                ('file_name', models.CharField(blank=True, max_length=255, verbose_name='Файл')),
+                ('staged_path', models.CharField(blank=True, max_length=500, verbose_name='Подготовленные данные')),
+                ('total_categories', models.PositiveIntegerField(default=0, verbose_name='Категорий в файле')),
+                ('total_products', models.PositiveIntegerField(default=0, verbose_name='Товаров в файле')),
+                ('processed_rows', models.PositiveIntegerField(default=0, verbose_name='Обработано строк')),
+                ('preview', models.JSONField(blank=True, default=dict, verbose_name='Предпросмотр')),
+                ('statistics', models.JSONField(blank=True, default=dict, verbose_name='Статистика')),
+                ('results', models.JSONField(blank=True, default=dict, verbose_name='Результаты по строкам')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Ошибки')),
+                ('error', models.TextField(blank=True, verbose_name='Критическая ошибка')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Обработчик')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начало')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя контрольная точка')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Запустил')),
+            ],
+            options={
+                'verbose_name': 'Задание импорта',
+                'verbose_name_plural': 'Задания импорта',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# 🔄 Индекс курсора ленты изменений (updated_at, uid)
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_importjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated_at', 'uid'], name='products_product_feed_idx'),
+        ),
+    ]
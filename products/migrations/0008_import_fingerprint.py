@@ -0,0 +1,33 @@
+# 🔑 Отпечатки строк импорта у категорий и товаров
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='import_synced_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='import_synced_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# 📄 Индексы курсорной пагинации каталога: (ключ сортировки, uid)
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_import_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['created_at', 'uid'], name='products_product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['price', 'uid'], name='products_product_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['product_name', 'uid'], name='products_product_name_idx'),
+        ),
+    ]
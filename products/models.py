@@ -10,10 +10,11 @@ from django.utils.text import slugify
 from django.utils.html import mark_safe
 from django.contrib.auth.models import User
 from django_ckeditor_5.fields import CKEditor5Field
-from django.db.models import Q
+from django.db.models import Q, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 
 # 🆕 КРИТИЧНЫЙ ИМПОРТ: Кастомное хранилище без суффиксов
-from .storage import OverwriteStorage
+from .storage import OverwriteStorage, get_image_storage
 
 # 🏠 Описание каталога автоковриков
 class AutoCatalogDescription(BaseModel):
@@ -135,10 +136,10 @@ class Category(BaseModel):
         help_text="Автоматически генерируется из названия"
     )
 
-    # 🖼️ ИСПРАВЛЕНО: Подключено OverwriteStorage для точных имён файлов
+    # 🖼️ OverwriteStorage (точные имена) или ContentAddressedStorage - см. get_image_storage
     category_image = models.ImageField(
         upload_to="categories",
-        storage=OverwriteStorage(),  # 🎯 КЛЮЧЕВОЕ ИЗМЕНЕНИЕ!
+        storage=get_image_storage,
         verbose_name="Изображение категории",
         help_text="Рекомендуемый размер: 800x400 px. Файл сохранится с точным именем"
     )
@@ -224,6 +225,10 @@ class Category(BaseModel):
         help_text="Описание для поисковых систем (до 160 символов)"
     )
 
+    # 🔑 Отпечаток строки последнего импорта (products/import_processor.py)
+    import_fingerprint = models.CharField(max_length=40, blank=True, default='', editable=False)
+    import_synced_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     def convert_youtube_links(self, content):
         """🎬 Автоматическая конверсия YouTube ссылок в responsive iframe"""
         if not content:
@@ -375,6 +380,19 @@ class KitVariant(BaseModel):
         ordering = ['order', 'name']
 
 
+class ProductQuerySet(models.QuerySet):
+    """🔍 QuerySet товаров с выборкой для карточек каталога"""
+
+    def cards(self):
+        """
+        🃏 Карточки каталога одним запросом
+
+        Категория подтягивается JOIN-ом, фото - из колонки main_image,
+        тяжелое описание не загружается. prefetch_related не нужен.
+        """
+        return self.select_related('category').defer('product_desription')
+
+
 class Product(BaseModel):
     """🛍️ Основная модель товаров с поддержкой лодок"""
     product_name = models.CharField(max_length=100, verbose_name="Название товара")
@@ -430,6 +448,22 @@ class Product(BaseModel):
         help_text="SEO описание для поисковых систем"
     )
 
+    # 🖼️ Фото для карточек: путь к главному (или первому) изображению
+    main_image = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Фото карточки",
+        help_text="Обновляется автоматически при сохранении и удалении изображений товара"
+    )
+
+    # 🔑 Отпечаток строки последнего импорта: повторный импорт той же строки пропускается
+    import_fingerprint = models.CharField(max_length=40, blank=True, default='', editable=False)
+    import_synced_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
     # 🛥️ НОВЫЕ МЕТОДЫ ДЛЯ ЛОДОК
     def is_boat_product(self):
         """🛥️ Проверка является ли товар лодочным"""
@@ -468,7 +502,9 @@ class Product(BaseModel):
     # ✅ СУЩЕСТВУЮЩИЕ МЕТОДЫ ЦЕН И КОМПЛЕКТАЦИЙ
     def get_product_price_by_kit(self, kit_code='salon'):
         """🛒 Получает цену товара с учетом выбранной комплектации"""
-        kit = KitVariant.objects.filter(code=kit_code).first()
+        # 🗂️ Комплектации берем из процессного реестра - без запроса к БД
+        from products.registry import registry
+        kit = registry.get_kit(kit_code)
         if kit:
             return float(kit.price_modifier)
         return float(self.price) if self.price else 0
@@ -490,27 +526,27 @@ class Product(BaseModel):
 
     # 🔄 МЕТОДЫ ДЛЯ РАБОТЫ С РЕЙТИНГАМИ И ОТЗЫВАМИ (используют common.ProductReview)
     def get_rating(self):
-        """⭐ Рассчитывает средний рейтинг товара на основе отзывов"""
+        """⭐ Средний рейтинг товара по одобренным отзывам (из денормализованных агрегатов)"""
+        # 📈 Значение уже пришло аннотацией ProductRating.annotate_queryset()
+        if 'rating_avg' in self.__dict__:
+            return self.__dict__['rating_avg'] or 0
         # Импортируем здесь чтобы избежать циклического импорта
-        from django.contrib.contenttypes.models import ContentType
         try:
-            from common.models import ProductReview
-            ct = ContentType.objects.get_for_model(self)
-            reviews = ProductReview.objects.filter(content_type=ct, object_id=self.uid)
-            if reviews.count() > 0:
-                total = sum(int(review.stars) for review in reviews)
-                return total / reviews.count()
+            from common.models import ProductRating
+            rating = ProductRating.for_instance(self)
+            return rating.rating_avg if rating else 0
         except ImportError:
             pass
         return 0
 
     def get_reviews_count(self):
-        """📝 Возвращает количество отзывов"""
-        from django.contrib.contenttypes.models import ContentType
+        """📝 Возвращает количество одобренных отзывов"""
+        if 'rating_count' in self.__dict__:
+            return self.__dict__['rating_count'] or 0
         try:
-            from common.models import ProductReview
-            ct = ContentType.objects.get_for_model(self)
-            return ProductReview.objects.filter(content_type=ct, object_id=self.uid).count()
+            from common.models import ProductRating
+            rating = ProductRating.for_instance(self)
+            return rating.rating_count if rating else 0
         except ImportError:
             pass
         return 0
@@ -520,21 +556,50 @@ class Product(BaseModel):
         return self.newest_product
 
     # 🖼️ МЕТОДЫ ДЛЯ РАБОТЫ С ИЗОБРАЖЕНИЯМИ
+    def _get_prefetched_images(self):
+        """🖼️ Изображения из prefetch_related('product_images') или None, если их не загружали"""
+        prefetched = getattr(self, '_prefetched_objects_cache', {})
+        if 'product_images' in prefetched:
+            return list(prefetched['product_images'])
+        return None
+
     def get_main_image(self):
-        """🖼️ Возвращает главное изображение товара"""
+        """🖼️ Возвращает главное изображение товара (из prefetch без запроса)"""
+        images = self._get_prefetched_images()
+        if images is not None:
+            return next((image for image in images if image.is_main), None)
         return self.product_images.filter(is_main=True).first()
 
     def get_gallery_images(self):
         """🖼️ Возвращает дополнительные изображения для галереи"""
+        images = self._get_prefetched_images()
+        if images is not None:
+            return [image for image in images if not image.is_main]
         return self.product_images.filter(is_main=False)
 
     def get_main_image_url(self):
-        """🖼️ Возвращает URL главного изображения или заглушки"""
-        main_image = self.get_main_image()
-        if main_image and main_image.image:
-            return main_image.image.url
+        """🖼️ Возвращает URL фото карточки или заглушки (без запросов к БД)"""
+        if self.main_image:
+            return ProductImage._meta.get_field('image').storage.url(self.main_image)
         return '/media/images/placeholder-product.jpg'
 
+    @classmethod
+    def refresh_main_images(cls, product_ids):
+        """
+        🔄 Пересчитывает колонку main_image одним UPDATE
+
+        Берется главное изображение, а если его нет - самое раннее.
+        Вызывается сигналами ProductImage (products/signals.py).
+        """
+        first_image = (
+            ProductImage.objects.filter(product=OuterRef('pk'))
+            .order_by('-is_main', 'created_at')
+            .values('image')[:1]
+        )
+        return cls.objects.filter(pk__in=product_ids).update(
+            main_image=Coalesce(Subquery(first_image), Value(''))
+        )
+
     def has_main_image(self):
         """✅ Проверяет наличие главного изображения"""
         return self.get_main_image() is not None
@@ -543,18 +608,26 @@ class Product(BaseModel):
         verbose_name = "Товар"
         verbose_name_plural = "Товары"
         ordering = ['-created_at', 'product_name']
+        indexes = [
+            # 🔄 Курсор ленты изменений (common/change_feed.py)
+            models.Index(fields=['updated_at', 'uid'], name='products_product_feed_idx'),
+            # 📄 Курсорная пагинация каталога (common/pagination.py)
+            models.Index(fields=['created_at', 'uid'], name='products_product_created_idx'),
+            models.Index(fields=['price', 'uid'], name='products_product_price_idx'),
+            models.Index(fields=['product_name', 'uid'], name='products_product_name_idx'),
+        ]
 
 
 class ProductImage(BaseModel):
-    """🖼️ Модель изображений товаров с OverwriteStorage"""
+    """🖼️ Модель изображений товаров (OverwriteStorage или контентно-адресуемое хранилище)"""
     product = models.ForeignKey(
         Product, on_delete=models.CASCADE,
         related_name='product_images', verbose_name="Товар")
 
-    # 🖼️ ИСПРАВЛЕНО: Подключено OverwriteStorage для точных имён файлов
+    # 🖼️ OverwriteStorage (точные имена) или ContentAddressedStorage - см. get_image_storage
     image = models.ImageField(
         upload_to='product',
-        storage=OverwriteStorage(),  # 🎯 КЛЮЧЕВОЕ ИЗМЕНЕНИЕ!
+        storage=get_image_storage,
         verbose_name="Изображение",
         help_text="Файл сохранится с точным именем без хеш-суффиксов"
     )
@@ -722,4 +795,85 @@ class Color(BaseModel):
     class Meta:
         verbose_name = "Цвет"
         verbose_name_plural = "Цвета"
-        ordering = ['color_type', 'display_order', 'name']
\ No newline at end of file
+        ordering = ['color_type', 'display_order', 'name']
+
+# 📥 Фоновые задания импорта
+class ImportJob(BaseModel):
+    """
+    📥 Задание импорта товаров из Excel/CSV
+
+    Разобранные строки лежат в файле staged_path (JSONL: категории, затем
+    товары), а не в сессии. Обработчик (manage.py process_import_jobs)
+    импортирует их пакетами; processed_rows - контрольная точка, которая
+    сохраняется в той же транзакции, что и пакет, поэтому после сбоя
+    задание продолжается с первой незафиксированной строки.
+    """
+
+    STATUS_STAGED = 'staged'
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_STAGED, 'Ожидает подтверждения'),
+        (STATUS_QUEUED, 'В очереди'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_DONE, 'Завершено'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_STAGED,
+        db_index=True,
+        verbose_name="Статус"
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='import_jobs',
+        verbose_name="Запустил"
+    )
+    file_name = models.CharField(max_length=255, blank=True, verbose_name="Файл")
+    staged_path = models.CharField(max_length=500, blank=True, verbose_name="Подготовленные данные")
+
+    total_categories = models.PositiveIntegerField(default=0, verbose_name="Категорий в файле")
+    total_products = models.PositiveIntegerField(default=0, verbose_name="Товаров в файле")
+    processed_rows = models.PositiveIntegerField(default=0, verbose_name="Обработано строк")
+
+    preview = models.JSONField(default=dict, blank=True, verbose_name="Предпросмотр")
+    statistics = models.JSONField(default=dict, blank=True, verbose_name="Статистика")
+    results = models.JSONField(default=dict, blank=True, verbose_name="Результаты по строкам")
+    errors = models.JSONField(default=list, blank=True, verbose_name="Ошибки")
+    error = models.TextField(blank=True, verbose_name="Критическая ошибка")
+
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Обработчик")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Начало")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Последняя контрольная точка")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Окончание")
+
+    @property
+    def total_rows(self) -> int:
+        return self.total_categories + self.total_products
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    def progress_percent(self) -> float:
+        """📊 Процент выполнения"""
+        if not self.total_rows:
+            return 100.0 if self.is_finished else 0.0
+        return round(100.0 * self.processed_rows / self.total_rows, 1)
+
+    def __str__(self):
+        return f"Импорт {self.file_name or self.uid} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = "Задание импорта"
+        verbose_name_plural = "Задания импорта"
+        ordering = ['-created_at']
@@ -0,0 +1,238 @@
+# 📁 products/registry.py
+# 🗂️ Процессный реестр комплектаций (KitVariant) и цветов (Color)
+# ⚡ Таблицы крошечные и почти не меняются - держим их в памяти процесса
+# 🔄 Инвалидация между воркерами по версии данных в БД (число строк и последний updated_at)
+#
+# Версия читается из самих таблиц, а не из кэша: кэш по умолчанию (LocMem)
+# у каждого процесса свой, и сброс в одном воркере не дошел бы до остальных.
+
+import threading
+import time
+import logging
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# ⏱️ Как часто (в секундах) сверять версию снимка с БД. 0 - на каждом обращении
+REGISTRY_CHECK_INTERVAL = getattr(settings, 'PRODUCTS_REGISTRY_CHECK_INTERVAL', 2.0)
+
+
+class ImageRef:
+    """🖼️ Легковесная ссылка на изображение (совместима с {{ obj.image.url }} в шаблонах)"""
+
+    __slots__ = ('name', 'url')
+
+    def __init__(self, field_file):
+        self.name = field_file.name if field_file else ''
+        try:
+            self.url = field_file.url if field_file else ''
+        except ValueError:
+            self.url = ''
+
+    def __bool__(self):
+        return bool(self.name)
+
+    def __str__(self):
+        return self.name
+
+
+class KitEntry:
+    """📦 Компактная копия KitVariant для расчета цен и конфигуратора"""
+
+    __slots__ = ('uid', 'name', 'code', 'price_modifier', 'order', 'image', 'is_option', 'description')
+
+    def __init__(self, kit):
+        self.uid = kit.uid
+        self.name = kit.name
+        self.code = kit.code
+        self.price_modifier = kit.price_modifier if kit.price_modifier is not None else Decimal('0')
+        self.order = kit.order
+        self.image = ImageRef(kit.image)
+        self.is_option = kit.is_option
+        self.description = kit.description
+
+    @property
+    def pk(self):
+        return self.uid
+
+    def __str__(self):
+        price_info = f" (+{self.price_modifier} BYN)" if self.price_modifier > 0 else ""
+        option_mark = " [ОПЦИЯ]" if self.is_option else ""
+        return f"{self.name}{price_info}{option_mark}"
+
+
+class ColorEntry:
+    """🎨 Компактная копия Color для конфигуратора"""
+
+    __slots__ = ('uid', 'name', 'hex_code', 'color_type', 'display_order', 'is_available',
+                 'carpet_image', 'border_image')
+
+    def __init__(self, color):
+        self.uid = color.uid
+        self.name = color.name
+        self.hex_code = color.hex_code
+        self.color_type = color.color_type
+        self.display_order = color.display_order
+        self.is_available = color.is_available
+        self.carpet_image = ImageRef(color.carpet_image)
+        self.border_image = ImageRef(color.border_image)
+
+    @property
+    def pk(self):
+        return self.uid
+
+    def get_image_url(self):
+        """🎯 URL изображения в зависимости от типа (как Color.get_image_url)"""
+        if self.color_type == 'carpet' and self.carpet_image:
+            return self.carpet_image.url
+        elif self.color_type == 'border' and self.border_image:
+            return self.border_image.url
+        return ""
+
+    def __str__(self):
+        return self.name
+
+
+class _Snapshot:
+    """📸 Неизменяемый снимок реестра - подменяется целиком при перезагрузке"""
+
+    __slots__ = ('version', 'kits_by_code', 'kits_by_uid', 'kits', 'colors_by_uid', 'colors_by_type')
+
+    def __init__(self, version, kits: List[KitEntry], colors: List[ColorEntry]):
+        self.version = version
+        self.kits = tuple(kits)
+        self.kits_by_code = {kit.code: kit for kit in kits}
+        self.kits_by_uid = {str(kit.uid): kit for kit in kits}
+        self.colors_by_uid = {str(color.uid): color for color in colors}
+        by_type: Dict[str, List[ColorEntry]] = {}
+        for color in colors:
+            by_type.setdefault(color.color_type, []).append(color)
+        self.colors_by_type = {key: tuple(value) for key, value in by_type.items()}
+
+
+class CatalogRegistry:
+    """
+    🗂️ Реестр комплектаций и цветов
+
+    Загружается один раз на процесс; перезагружается, когда версия данных
+    в БД отличается от версии загруженного снимка.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[_Snapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    # ==================== ВЕРСИОНИРОВАНИЕ ====================
+
+    @staticmethod
+    def _current_version():
+        """🔑 Версия данных: число строк и последний updated_at комплектаций и цветов"""
+        from django.db.models import Count, Max
+        from products.models import KitVariant, Color
+
+        parts = []
+        for model in (KitVariant, Color):
+            stats = model.objects.aggregate(count=Count('pk'), last=Max('updated_at'))
+            parts.append(f"{stats['count']}|{stats['last'].isoformat() if stats['last'] else ''}")
+        return ';'.join(parts)
+
+    def invalidate(self):
+        """🔄 Сбросить локальный снимок (следующее обращение перезагрузит данные)"""
+        self._snapshot = None
+        self._checked_at = 0.0
+
+    def _get_snapshot(self) -> _Snapshot:
+        snapshot = self._snapshot
+        now = time.monotonic()
+
+        if snapshot is not None and now - self._checked_at < REGISTRY_CHECK_INTERVAL:
+            return snapshot
+
+        version = self._current_version()
+        self._checked_at = now
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._load(version)
+                self._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def _load(version) -> _Snapshot:
+        """📥 Загрузка всех комплектаций и цветов двумя запросами"""
+        from products.models import KitVariant, Color
+
+        kits = [KitEntry(kit) for kit in KitVariant.objects.order_by('order', 'name')]
+        colors = [ColorEntry(color) for color in Color.objects.order_by('display_order', 'name')]
+        logger.debug(f"🗂️ Реестр загружен (версия {version}): комплектаций {len(kits)}, цветов {len(colors)}")
+        return _Snapshot(version, kits, colors)
+
+    # ==================== КОМПЛЕКТАЦИИ ====================
+
+    def get_kit(self, code) -> Optional[KitEntry]:
+        """📦 Комплектация или опция по символьному коду"""
+        if not code:
+            return None
+        return self._get_snapshot().kits_by_code.get(code)
+
+    def get_kit_by_uid(self, uid) -> Optional[KitEntry]:
+        """📦 Комплектация по UUID"""
+        if not uid:
+            return None
+        return self._get_snapshot().kits_by_uid.get(str(uid))
+
+    def get_option(self, code) -> Optional[KitEntry]:
+        """➕ Дополнительная опция (is_option=True) по коду"""
+        kit = self.get_kit(code)
+        return kit if kit and kit.is_option else None
+
+    def get_kits(self, is_option: Optional[bool] = None) -> Tuple[KitEntry, ...]:
+        """📋 Комплектации в порядке сортировки (is_option=None - все)"""
+        kits = self._get_snapshot().kits
+        if is_option is None:
+            return kits
+        return tuple(kit for kit in kits if kit.is_option == is_option)
+
+    # ==================== ЦВЕТА ====================
+
+    def get_color_by_uid(self, uid) -> Optional[ColorEntry]:
+        """🎨 Цвет по UUID"""
+        if not uid:
+            return None
+        return self._get_snapshot().colors_by_uid.get(str(uid))
+
+    def get_colors(self, color_type: str, available_only: bool = False) -> Tuple[ColorEntry, ...]:
+        """🎨 Цвета заданного типа ('carpet' / 'border') в порядке отображения"""
+        colors = self._get_snapshot().colors_by_type.get(color_type, ())
+        if available_only:
+            return tuple(color for color in colors if color.is_available)
+        return colors
+
+    def get_initial_color(self, color_type: str) -> Optional[ColorEntry]:
+        """🎯 Цвет по умолчанию: первый доступный, иначе просто первый"""
+        colors = self.get_colors(color_type)
+        for color in colors:
+            if color.is_available:
+                return color
+        return colors[0] if colors else None
+
+
+# 🌐 Единственный экземпляр на процесс
+registry = CatalogRegistry()
+
+
+def bump_registry_version():
+    """
+    🔄 Перезагрузить реестр текущего процесса сразу после изменения
+
+    Остальные воркеры увидят новую версию данных в БД при следующей
+    сверке (не позже REGISTRY_CHECK_INTERVAL секунд).
+    """
+    registry.invalidate()
@@ -0,0 +1,44 @@
+# 📁 products/signals.py
+# 🔔 Сигналы приложения products
+# 🗂️ Инвалидация реестра комплектаций и цветов при изменениях в админке
+# 🖼️ Поддержка колонки Product.main_image при изменении изображений
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import KitVariant, Color, Product, ProductImage
+from .registry import bump_registry_version
+
+
+@receiver(post_save, sender=KitVariant)
+@receiver(post_delete, sender=KitVariant)
+@receiver(post_save, sender=Color)
+@receiver(post_delete, sender=Color)
+def invalidate_registry(sender, **kwargs):
+    """
+    🔄 Увеличивает версию реестра после фиксации транзакции
+
+    Args:
+        sender: Класс модели (KitVariant или Color)
+        **kwargs: Дополнительные аргументы сигнала
+    """
+    if kwargs.get('raw'):
+        return
+    transaction.on_commit(bump_registry_version)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def refresh_product_main_image(sender, instance, **kwargs):
+    """
+    🖼️ Поддерживает колонку Product.main_image для карточек каталога
+
+    Args:
+        sender: Класс модели ProductImage
+        instance: Сохраненное или удаленное изображение
+        **kwargs: Дополнительные аргументы сигнала
+    """
+    if kwargs.get('raw'):
+        return
+    Product.refresh_main_images([instance.product_id])
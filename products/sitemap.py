@@ -0,0 +1,61 @@
+# 📁 products/sitemap.py
+# 🗺️ Карта сайта каталога автоковриков: товары и категории
+# 📄 Разбиение на страницы по 50 000 URL (Sitemap.limit) выполняет common/sitemaps.py
+
+from django.contrib.sitemaps import Sitemap
+from django.urls import reverse
+
+from .models import Category, Product
+
+
+class ProductSitemap(Sitemap):
+    """🛍️ Карта сайта для товаров (/products/<slug>/)"""
+    changefreq = "weekly"
+    priority = 0.8
+
+    def items(self):
+        """📋 Товары активных категорий; новые - в конце, страницы карты не сдвигаются"""
+        return (
+            Product.objects.filter(category__is_active=True)
+            .exclude(slug__isnull=True).exclude(slug='')
+            .only('slug', 'updated_at')
+            .order_by('created_at', 'uid')
+        )
+
+    def lastmod(self, obj):
+        """📅 Дата последнего изменения"""
+        return obj.updated_at
+
+    def location(self, obj):
+        """🔗 URL товара"""
+        return reverse('get_product', kwargs={'slug': obj.slug})
+
+
+class CategorySitemap(Sitemap):
+    """📂 Карта сайта для категорий автоковриков"""
+    changefreq = "weekly"
+    priority = 0.6
+
+    def items(self):
+        """📋 Активные категории"""
+        return (
+            Category.objects.filter(is_active=True)
+            .exclude(slug__isnull=True).exclude(slug='')
+            .only('slug', 'updated_at')
+            .order_by('created_at', 'uid')
+        )
+
+    def lastmod(self, obj):
+        """📅 Дата последнего изменения"""
+        return obj.updated_at
+
+    def location(self, obj):
+        """🔗 URL категории"""
+        return reverse('products_by_category', kwargs={'slug': obj.slug})
+
+
+# 🗺️ Карты сайта каталога автоковриков (подключены в common/sitemaps.py)
+products_sitemaps = {
+    'products': ProductSitemap,
+    'product-categories': CategorySitemap,
+}
@@ -3,8 +3,11 @@
 # 💾 Кастомное хранилище для точных имён файлов БЕЗ хеш-суффиксов
 
 import os
+import re
 import time
+import hashlib
 import logging
+import posixpath
 import tempfile
 import shutil
 from django.core.files.storage import FileSystemStorage
@@ -430,11 +433,111 @@ class SecureOverwriteStorage(OverwriteStorage):
         return super().save(name, content, max_length)
 
 
+# ==================== КОНТЕНТНО-АДРЕСУЕМОЕ ХРАНИЛИЩЕ ====================
+
+# 🔢 Длина имени-отпечатка (hex-символы SHA-256)
+CONTENT_HASH_LENGTH = 40
+
+# 📋 Имя вида product/ab/ab12...ef.jpg
+CONTENT_ADDRESSED_NAME_RE = re.compile(
+    r'^(?:.+/)?(?P<prefix>[0-9a-f]{2})/(?P=prefix)[0-9a-f]{%d}\.[0-9a-z]+$' % (CONTENT_HASH_LENGTH - 2)
+)
+
+def is_content_addressed(name: str) -> bool:
+    """🔍 Лежит ли файл под именем-отпечатком содержимого"""
+    return bool(name) and bool(CONTENT_ADDRESSED_NAME_RE.match(name))
+
+
+def content_addressed_name(directory: str, digest: str, extension: str) -> str:
+    """📛 Имя файла по отпечатку: <папка>/<2 символа>/<отпечаток>.<расширение>"""
+    digest = digest[:CONTENT_HASH_LENGTH]
+    extension = extension.lower().lstrip('.')
+    return posixpath.join(directory, digest[:2], f"{digest}.{extension}")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    🔐 Хранилище, адресующее файлы по SHA-256 содержимого
+
+    В отличие от OverwriteStorage:
+    - 🧬 Имя файла = отпечаток содержимого: одинаковые фото сохраняются один раз
+    - ♾️ Файл по имени никогда не меняется - URL можно кэшировать навсегда
+      (Cache-Control: immutable), замена фото дает новый URL
+    - ⚡ Запись за один проход: хеш считается при копировании во временный файл,
+      без удаления старых файлов и повторных попыток с задержками
+
+    Удаление - no-op: один файл может использоваться несколькими записями.
+    Перенос старых файлов: python manage.py migrate_to_content_storage
+    """
+
+    def get_available_name(self, name, max_length=None):
+        """🎯 Итоговое имя определяется в _save() по содержимому"""
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1] or '.bin'
+
+        temp_dir = self.path(directory) if directory else self.location
+        os.makedirs(temp_dir, exist_ok=True)
+
+        hasher = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    hasher.update(chunk)
+                    temp_file.write(chunk)
+
+            final_name = content_addressed_name(directory, hasher.hexdigest(), extension)
+            final_path = self.path(final_name)
+
+            if os.path.exists(final_path):
+                # 🧬 Такое содержимое уже сохранено - переиспользуем файл
+                os.unlink(temp_path)
+                logger.info(f"♻️ Файл уже в хранилище: {name} → {final_name}")
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(temp_path, final_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(final_path, self.file_permissions_mode)
+                logger.info(f"💾 Файл сохранён по отпечатку: {name} → {final_name}")
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        return final_name
+
+    def delete(self, name):
+        """🗑️ Файл может разделяться записями - неиспользуемые удаляет команда миграции (--gc)"""
+        logger.debug(f"⏭️ Удаление из контентного хранилища пропущено: {name}")
+
+
+# 🗂️ Хранилища, которыми управляет проект (для статусов в админке)
+MANAGED_STORAGE_CLASSES = ('OverwriteStorage', 'ContentAddressedStorage')
+
+
+def get_image_storage():
+    """
+    🗂️ Хранилище изображений товаров и категорий
+
+    settings.MEDIA_CONTENT_ADDRESSED = True включает ContentAddressedStorage,
+    иначе используется OverwriteStorage (точные имена файлов).
+    """
+    if getattr(settings, 'MEDIA_CONTENT_ADDRESSED', False):
+        return content_addressed_storage
+    return default_overwrite_storage
+
+
 # 🎯 Предустановленные экземпляры для разных целей
 
 # 📁 Стандартное хранилище для изображений товаров и категорий
 default_overwrite_storage = OverwriteStorage()
 
+# 🔐 Контентно-адресуемое хранилище (settings.MEDIA_CONTENT_ADDRESSED)
+content_addressed_storage = ContentAddressedStorage()
+
 # 🔒 Безопасное хранилище для пользовательских загрузок
 secure_image_storage = SecureOverwriteStorage(
     allowed_extensions=['.jpg', '.jpeg', '.png', '.webp'],
@@ -493,4 +596,19 @@ document_storage = SecureOverwriteStorage(
 # - Атомарные операции сохранения
 # - Fallback на стандартные методы при ошибках
 # - Детальное логирование всех операций
-# - Полная обратная совместимость
\ No newline at end of file
+# - Полная обратная совместимость
+
+# 🔐 CONTENT-ADDRESSED РЕЖИМ (settings.MEDIA_CONTENT_ADDRESSED = True):
+#
+# - BMW.png → product/3f/3fa9...c1.png (отпечаток SHA-256 содержимого)
+# - Повторная загрузка того же фото → тот же файл, без копии
+# - Новое фото → новое имя и новый URL, старый URL не меняется никогда
+# - Перенос существующих файлов: python manage.py migrate_to_content_storage
+#
+# 🌐 Отдача с вечным кэшем (nginx):
+# location /media/ {
+#     alias /path/to/public/media/;
+#     location ~ /[0-9a-f]{2}/[0-9a-f]{40}\.[0-9a-z]+$ {
+#         add_header Cache-Control "public, max-age=31536000, immutable";
+#     }
+# }
@@ -1,3 +1,620 @@
-from django.test import TestCase
+# 📁 products/tests.py
+# 🧪 Тесты каталога автоковриков: реестр, импорт, экспорт, фиды, карты сайта
 
-# Create your tests here.
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import export_utils, image_utils, import_jobs
+from .import_processor import ProductImportProcessor, classify_import_rows
+from .import_utils import CSV_SAMPLE_SIZE, read_excel_file, separate_categories_and_products
+from .models import Category, Color, ImportJob, KitVariant, Product, ProductImage
+from .registry import CatalogRegistry
+from .sitemap import CategorySitemap, ProductSitemap
+from .storage import ContentAddressedStorage, is_content_addressed
+
+
+def create_product(sku='10001', category=None, **fields):
+    """🛍️ Товар для тестов (категория создается при необходимости)"""
+    if category is None:
+        category, _ = Category.objects.get_or_create(category_name='BMW', defaults={'slug': 'bmw'})
+    fields.setdefault('product_name', f'Коврик {sku}')
+    fields.setdefault('slug', f'kovrik-{sku}')
+    fields.setdefault('price', 100)
+    return Product.objects.create(product_sku=sku, category=category, **fields)
+
+
+@mock.patch('products.registry.REGISTRY_CHECK_INTERVAL', 0)
+class CatalogRegistryTests(TestCase):
+    """🗂️ Процессный реестр комплектаций и цветов (user-002)"""
+
+    def setUp(self):
+        self.salon = KitVariant.objects.create(name='Салон', code='salon', order=1)
+        KitVariant.objects.create(name='Подпятник', code='heel', order=2, is_option=True)
+        Color.objects.create(name='Черный', hex_code='#000000', color_type='carpet', display_order=2)
+        Color.objects.create(name='Серый', hex_code='#777777', color_type='carpet', display_order=1,
+                             is_available=False)
+
+    def test_lookups_and_ordering(self):
+        registry = CatalogRegistry()
+
+        self.assertEqual(registry.get_kit('salon').name, 'Салон')
+        self.assertEqual(registry.get_kit_by_uid(self.salon.pk).code, 'salon')
+        self.assertIsNone(registry.get_option('salon'))
+        self.assertEqual(registry.get_option('heel').code, 'heel')
+        self.assertEqual([kit.code for kit in registry.get_kits(is_option=False)], ['salon'])
+        self.assertEqual([color.name for color in registry.get_colors('carpet')], ['Серый', 'Черный'])
+        self.assertEqual([color.name for color in registry.get_colors('carpet', available_only=True)], ['Черный'])
+        self.assertEqual(registry.get_initial_color('carpet').name, 'Черный')
+
+    def test_snapshot_is_reused_until_data_changes(self):
+        registry = CatalogRegistry()
+        registry.get_kit('salon')
+
+        # 🔑 Одна проверка версии, без перезагрузки таблиц
+        with self.assertNumQueries(2):
+            registry.get_kit('salon')
+
+    def test_other_process_sees_save_and_delete(self):
+        worker = CatalogRegistry()
+        self.assertEqual(worker.get_kit('salon').name, 'Салон')
+
+        self.salon.name = 'Салон премиум'
+        self.salon.save()
+        self.assertEqual(worker.get_kit('salon').name, 'Салон премиум')
+
+        self.salon.delete()
+        self.assertIsNone(worker.get_kit('salon'))
+
+
+class MainImageTests(TestCase):
+    """🖼️ Колонка main_image для карточек каталога (user-008)"""
+
+    def setUp(self):
+        self.product = create_product()
+
+    def main_image(self):
+        return Product.objects.values_list('main_image', flat=True).get(pk=self.product.pk)
+
+    def test_column_follows_image_changes(self):
+        self.assertEqual(self.main_image(), '')
+
+        first = ProductImage.objects.create(product=self.product, image='product/a.jpg')
+        self.assertEqual(self.main_image(), 'product/a.jpg')
+
+        second = ProductImage.objects.create(product=self.product, image='product/b.jpg', is_main=True)
+        self.assertEqual(self.main_image(), 'product/b.jpg')
+
+        second.delete()
+        self.assertEqual(self.main_image(), 'product/a.jpg')
+        first.delete()
+        self.assertEqual(self.main_image(), '')
+
+    def test_cards_render_without_per_card_queries(self):
+        for index in range(3):
+            product = create_product(str(10010 + index))
+            ProductImage.objects.create(product=product, image=f'product/{index}.jpg', is_main=True)
+
+        with self.assertNumQueries(1):
+            cards = list(Product.objects.cards())
+            urls = [card.get_main_image_url() for card in cards]
+            names = [card.category.category_name for card in cards]
+
+        self.assertEqual(names, ['BMW'] * 4)
+        self.assertEqual(sum(url.endswith('placeholder-product.jpg') for url in urls), 1)
+
+
+class ContentAddressedStorageTests(TestCase):
+    """🔐 Хранилище по отпечатку содержимого и перенос старых файлов (user-010)"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+
+    def write(self, name, data):
+        path = os.path.join(self.media, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(data)
+
+    def test_identical_content_shares_one_file(self):
+        storage = ContentAddressedStorage(location=self.media)
+
+        first = storage.save('product/BMW.png', ContentFile(b'abc'))
+        second = storage.save('product/Audi.PNG', ContentFile(b'abc'))
+        other = storage.save('product/BMW.png', ContentFile(b'abd'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(is_content_addressed(first))
+        self.assertTrue(first.startswith('product/ba/ba7816bf'))
+        self.assertTrue(first.endswith('.png'))
+
+        # 🔒 Удаление - no-op: файл может разделяться записями
+        storage.delete(first)
+        self.assertTrue(storage.exists(first))
+
+    def test_name_detection(self):
+        self.assertFalse(is_content_addressed('product/a.jpg'))
+        self.assertFalse(is_content_addressed(''))
+        self.assertTrue(is_content_addressed('product/ab/ab' + '0' * 38 + '.jpg'))
+
+    def test_migration_command_renames_and_collects_garbage(self):
+        for name, data in [('product/a.jpg', b'1'), ('product/b.jpg', b'1'),
+                           ('product/c.jpg', b'2'), ('categories/k.jpg', b'3')]:
+            self.write(name, data)
+        category = Category.objects.create(category_name='BMW', slug='bmw', category_image='categories/k.jpg')
+        product = create_product(category=category)
+        for name in ['product/a.jpg', 'product/b.jpg', 'product/c.jpg', 'product/gone.jpg']:
+            ProductImage.objects.create(product=product, image=name, is_main=name.endswith('c.jpg'))
+
+        with override_settings(MEDIA_ROOT=self.media):
+            call_command('migrate_to_content_storage', '--dry-run', stdout=StringIO())
+            self.assertEqual(ProductImage.objects.filter(image='product/a.jpg').count(), 1)
+
+            # 🗑️ Исходные файлы удаляются только после фиксации транзакции
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('migrate_to_content_storage', stdout=StringIO())
+
+            images = sorted(ProductImage.objects.values_list('image', flat=True))
+            main_image = Product.objects.values_list('main_image', flat=True).get(pk=product.pk)
+            category.refresh_from_db()
+
+            # 🧬 a.jpg и b.jpg совпадают по содержимому, отсутствующий файл не трогается
+            self.assertEqual(len(set(images)), 3)
+            self.assertIn('product/gone.jpg', images)
+            self.assertEqual(images.count(images[0]), 2)
+            self.assertTrue(is_content_addressed(main_image))
+            self.assertTrue(is_content_addressed(category.category_image.name))
+            self.assertFalse(os.path.exists(os.path.join(self.media, 'product/a.jpg')))
+            self.assertTrue(os.path.exists(os.path.join(self.media, main_image)))
+
+            orphan = 'product/ff/' + 'f' * 40 + '.jpg'
+            self.write(orphan, b'x')
+            call_command('migrate_to_content_storage', '--gc', stdout=StringIO())
+
+        self.assertFalse(os.path.exists(os.path.join(self.media, orphan)))
+        self.assertTrue(os.path.exists(os.path.join(self.media, main_image)))
+
+
+@mock.patch('common.image_derivatives.DERIVATIVES_ON_UPLOAD', False)
+class ImageZipIngestTests(TestCase):
+    """🚀 Потоковая распаковка ZIP с изображениями (user-011)"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+        Category.objects.create(category_name='BMW', slug='bmw')
+
+    def make_zip(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for index in range(20):
+                archive.writestr(f'photos/p{index}.jpg', os.urandom(10000))
+            archive.writestr('BMW.png', b'x' * 1000)
+            archive.writestr('__MACOSX/._p0.jpg', b'1')
+            archive.writestr('readme.txt', b'text')
+            archive.writestr('a/dup.jpg', b'first')
+            archive.writestr('b/dup.jpg', b'second')
+            archive.writestr('empty.jpg', b'')
+        return SimpleUploadedFile('images.zip', buffer.getvalue())
+
+    def test_files_are_streamed_into_media_folders(self):
+        upload = self.make_zip()
+        report = image_utils.ingest_images_zip(upload, memory_limit=64 * 1024, chunk_size=16 * 1024)
+
+        self.assertEqual(report['processed'], 22)
+        self.assertEqual(report['saved'], 22)
+        self.assertEqual(report['categories'], 1)
+        self.assertEqual(report['products'], 21)
+        self.assertEqual(report['errors'], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.media, 'categories', 'BMW.png')))
+
+        # 🏁 При совпадении имен побеждает последний файл архива
+        with open(os.path.join(self.media, 'product', 'dup.jpg'), 'rb') as file:
+            self.assertEqual(file.read(), b'second')
+        statuses = {result['name']: result['status'] for result in report['files']}
+        self.assertEqual(statuses['a/dup.jpg'], 'duplicate')
+        self.assertEqual(statuses['empty.jpg'], 'error')
+
+    def test_unchanged_files_are_not_rewritten(self):
+        upload = self.make_zip()
+        image_utils.ingest_images_zip(upload)
+
+        upload.seek(0)
+        report = image_utils.ingest_images_zip(upload)
+
+        self.assertEqual(report['saved'], 0)
+        self.assertEqual(report['unchanged'], 22)
+        upload.seek(0)
+        self.assertEqual(image_utils.process_images_zip(upload), 22)
+
+
+class ImportFileReadingTests(TestCase):
+    """📄 Потоковое чтение Excel/CSV для импорта (user-012)"""
+
+    CSV = 'id;name;title;price\n1.BMW;BMW;;\n10001;Коврик;t;"1 500"\n;;;\n10002;Второй;;\n2.AUDI\n20001;A;;3\n'
+
+    def read(self, name, data):
+        success, rows = read_excel_file(SimpleUploadedFile(name, data))
+        self.assertTrue(success, rows)
+        return separate_categories_and_products(rows)
+
+    def test_csv_in_both_encodings(self):
+        for encoding in ('utf-8-sig', 'cp1251'):
+            with self.subTest(encoding=encoding):
+                categories, products, invalid = self.read('catalog.csv', self.CSV.encode(encoding))
+
+                self.assertEqual([category['category_name'] for category in categories], ['BMW', 'AUDI'])
+                self.assertEqual(
+                    [(product['sku'], product['name'], product['price'], product['category_name'])
+                     for product in products],
+                    [('10001', 'Коврик', 1500.0, 'BMW'), ('10002', 'Второй', 0.0, 'BMW'), ('20001', 'A', 3.0, 'AUDI')],
+                )
+                self.assertEqual(invalid, [])
+
+    def test_encoding_is_detected_past_the_ascii_head(self):
+        # 🔤 Первая кириллица - далеко за пределами первого блока
+        head = 'id;name;title\n' + ''.join(f'{index};Item {index};t\n' for index in range(1, 10001))
+        for encoding in ('cp1251', 'utf-8'):
+            with self.subTest(encoding=encoding):
+                data = (head + '20001;Коврик;т\n').encode(encoding)
+                self.assertGreater(len(data), CSV_SAMPLE_SIZE)
+
+                success, rows = read_excel_file(SimpleUploadedFile('catalog.csv', data))
+                self.assertTrue(success)
+                self.assertEqual(list(rows)[-1]['name'], 'Коврик')
+
+    def test_xlsx_rows(self):
+        import openpyxl
+
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(['id', 'name', 'title', 'price', 'description', 'meta', 'image'])
+        sheet.append(['1.BMW', 'BMW'])
+        for index in range(1, 51):
+            sheet.append([10000 + index, f'Коврик {index}', 't', '1 200,50', 'desc', 'meta', f'p{index}.jpg'])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        categories, products, invalid = self.read('catalog.xlsx', buffer.getvalue())
+
+        self.assertEqual(len(categories), 1)
+        self.assertEqual(len(products), 50)
+        self.assertEqual(products[0]['sku'], '10001')
+        self.assertEqual(products[0]['price'], 1200.5)
+        self.assertEqual(products[-1]['image'], 'p50.jpg')
+
+    def test_broken_files_are_reported(self):
+        self.assertFalse(read_excel_file(SimpleUploadedFile('catalog.csv', b'id;name\n'))[0])
+        self.assertFalse(read_excel_file(SimpleUploadedFile('catalog.xlsx', b'garbage'))[0])
+
+
+def import_row(sku, name, price, image='', row_number=2):
+    """📋 Строка товара в формате separate_categories_and_products()"""
+    return {
+        'sku': sku, 'original_sku': sku, 'name': name, 'title': '', 'price': price,
+        'description': '', 'meta_description': '', 'image': image,
+        'category_name': 'BMW', 'category_sku': 1, 'row_number': row_number,
+    }
+
+
+IMPORT_CATEGORY = {
+    'category_name': 'BMW', 'category_sku': 1, 'name': '', 'title': '', 'description': '',
+    'meta_description': '', 'image': '', 'row_number': 1,
+}
+
+
+@mock.patch('common.image_derivatives.DERIVATIVES_ON_UPLOAD', False)
+class ImportTestCase(TestCase):
+    """🧪 Импорт в обоих режимах на временном MEDIA_ROOT"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(self.media, 'product'))
+        for name in ('a.jpg', 'b.jpg'):
+            with open(os.path.join(self.media, 'product', name), 'wb') as file:
+                file.write(b'x' * 100)
+
+    def run_import(self, products, bulk=True, categories=(IMPORT_CATEGORY,)):
+        result = ProductImportProcessor(bulk=bulk).process_structured_data(
+            [dict(row) for row in categories], [dict(row) for row in products], []
+        )
+        self.assertTrue(result['success'], result.get('error'))
+        return result
+
+    def snapshot(self):
+        return sorted(
+            (product.product_sku, product.product_name, product.slug, product.price, product.main_image,
+             tuple(sorted((image.image.name, image.is_main) for image in product.product_images.all())))
+            for product in Product.objects.prefetch_related('product_images')
+        )
+
+    def reset_catalog(self):
+        Product.objects.all().delete()
+        Category.objects.all().delete()
+
+    def statuses(self, result):
+        return [row['status'] for row in result['product_results']]
+
+
+class BulkImportParityTests(ImportTestCase):
+    """🚀 Массовый импорт совпадает с построчным (user-013)"""
+
+    ROWS = [
+        import_row('10001', 'Mat A', 10, 'a.jpg', 2),
+        import_row('10002', 'Mat B', 20, 'b.jpg', 3),
+        import_row('10001', 'Mat A2', 11, 'b.jpg', 4),
+        import_row('10003', 'Mat C', 1, 'missing.jpg', 5),
+    ]
+
+    def both_modes(self, runs):
+        outcome = {}
+        for bulk in (False, True):
+            self.reset_catalog()
+            results = [self.run_import(rows, bulk=bulk) for rows in runs]
+            outcome[bulk] = (
+                [self.statuses(result) for result in results],
+                [{key: value for key, value in result['statistics'].items() if key.startswith('products_')}
+                 for result in results],
+                self.snapshot(),
+            )
+        return outcome[False], outcome[True]
+
+    def test_results_and_data_match_row_mode(self):
+        legacy, bulk = self.both_modes([self.ROWS, self.ROWS])
+
+        self.assertEqual(legacy, bulk)
+        self.assertEqual(bulk[0][0], ['created', 'created', 'updated', 'created'])
+        # 🏁 Последняя строка SKU побеждает, ее фото становится главным
+        self.assertEqual(bulk[2][0], (
+            '10001', 'Mat A2', 'mat-a2-10001', 11, 'product/b.jpg',
+            (('product/a.jpg', False), ('product/b.jpg', True)),
+        ))
+
+    def test_duplicate_skus_in_one_file(self):
+        def rows(change):
+            return [
+                import_row('1', 'A', 1 + change), import_row('2', 'B', 2), import_row('1', 'A2', 3),
+                import_row('3', 'C', 3), import_row('3', 'C', 3),
+                import_row('4', 'D', 4), import_row('4', 'D', 4), import_row('4', 'D2', 4 + change),
+            ]
+
+        legacy, bulk = self.both_modes([rows(0), rows(0), rows(1)])
+
+        self.assertEqual(legacy, bulk)
+        self.assertEqual(bulk[0][1], ['updated', 'unchanged', 'updated', 'unchanged',
+                                      'unchanged', 'updated', 'unchanged', 'updated'])
+        self.assertEqual([row[:4] for row in bulk[2]],
+                         [('1', 'A2', 'a2-1', 3), ('2', 'B', 'b-2', 2), ('3', 'C', 'c-3', 3), ('4', 'D2', 'd2-4', 5)])
+
+
+class ImportJobTests(ImportTestCase):
+    """⏯️ Фоновые задания импорта с контрольными точками (user-014)"""
+
+    def setUp(self):
+        super().setUp()
+        staging = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, staging, ignore_errors=True)
+        patcher = mock.patch('products.import_jobs.STAGING_DIR', staging)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stage(self, count):
+        products = [import_row(str(100000 + index), f'Prod {index}', index, row_number=index + 2)
+                    for index in range(count)]
+        return import_jobs.stage_import([dict(IMPORT_CATEGORY)], products, [], {}, 'catalog.csv')
+
+    def test_only_queued_jobs_are_claimed_once(self):
+        job = self.stage(10)
+        self.assertEqual(job.status, 'staged')
+        self.assertEqual(job.total_rows, 11)
+        self.assertTrue(os.path.exists(job.staged_path))
+        self.assertIsNone(import_jobs.claim_job())
+
+        self.assertTrue(import_jobs.queue_job(job))
+        self.assertFalse(import_jobs.queue_job(job))
+
+        claimed = import_jobs.claim_job(worker='w1')
+        self.assertEqual((claimed.status, claimed.worker), ('running', 'w1'))
+        self.assertIsNone(import_jobs.claim_job(worker='w2'))
+
+    def test_failed_job_resumes_from_checkpoint(self):
+        job = self.stage(25)
+        import_jobs.queue_job(job)
+        original = ProductImportProcessor.import_products_chunk
+        calls = []
+
+        def crash_on_third_chunk(processor, chunk):
+            calls.append(len(chunk))
+            if len(calls) == 3:
+                raise RuntimeError('boom')
+            return original(processor, chunk)
+
+        with mock.patch.object(ProductImportProcessor, 'import_products_chunk', crash_on_third_chunk):
+            job = import_jobs.run_job(import_jobs.claim_job(worker='w1'), chunk_size=10)
+
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.processed_rows, 21)
+        self.assertEqual(Product.objects.count(), 20)
+
+        self.assertTrue(import_jobs.requeue_job(job))
+        job = import_jobs.run_job(import_jobs.claim_job(worker='w2'), chunk_size=10)
+
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.processed_rows, 26)
+        self.assertEqual(job.statistics['products_created'], 25)
+        self.assertEqual(Product.objects.count(), 25)
+        self.assertFalse(os.path.exists(job.staged_path))
+        self.assertEqual(import_jobs.job_progress(job)['percent'], 100.0)
+
+    def test_stale_job_is_taken_over_and_old_worker_fenced(self):
+        job = self.stage(5)
+        import_jobs.queue_job(job)
+        first = import_jobs.claim_job(worker='A')
+        ImportJob.objects.filter(pk=first.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        second = import_jobs.claim_job(worker='B')
+        self.assertEqual(second.worker, 'B')
+
+        # 🚧 Прежний исполнитель не пишет ни строки
+        first = import_jobs.run_job(first, worker='A')
+        self.assertEqual(first.processed_rows, 0)
+        self.assertEqual(Product.objects.count(), 0)
+
+        second = import_jobs.run_job(second, worker='B')
+        self.assertEqual(second.status, 'done')
+        self.assertEqual(Product.objects.count(), 5)
+
+
+class ExportTests(TestCase):
+    """📤 Потоковый экспорт каталога (user-015)"""
+
+    def setUp(self):
+        self.categories = [
+            Category.objects.create(category_name=f'C{index}', slug=f'c{index}', category_sku=index + 1)
+            for index in range(3)
+        ]
+        Category.objects.create(category_name='Off', slug='off', category_sku=10, is_active=False)
+        for index in range(12):
+            create_product(str(1000 + index), category=self.categories[index % 3], price=index,
+                           product_desription='<p>Описание</p>')
+
+    def test_rows_are_read_in_constant_queries(self):
+        with self.assertNumQueries(2):
+            rows = list(export_utils.iter_export_rows())
+
+        self.assertEqual(len(rows), 15)
+        self.assertEqual(rows[0]['identifier'], '1.C0')
+        self.assertEqual([row['identifier'] for row in rows[1:5]], ['1000', '1003', '1006', '1009'])
+        self.assertEqual(rows[1]['description'], 'Описание')
+
+    def test_export_reads_back_through_the_importer(self):
+        for export_format in ('xlsx', 'csv'):
+            with self.subTest(export_format=export_format):
+                chunks, _, extension = export_utils.stream_export(export_format)
+                data = b''.join(chunks)
+
+                success, rows = read_excel_file(SimpleUploadedFile(f'export.{extension}', data))
+                self.assertTrue(success, rows)
+                categories, products, invalid = separate_categories_and_products(rows)
+                self.assertEqual(len(categories), 3)
+                self.assertEqual(len(products), 12)
+                self.assertEqual(invalid, [])
+
+    def test_export_view_streams_the_file(self):
+        client = self.client
+        client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+        response = client.get('/products/export/', {'format': 'jsonl'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 15)
+        self.assertEqual(json.loads(lines[1])['identifier'], '1000')
+
+        self.assertEqual(client.get('/products/export/', {'format': 'bad'}).status_code, 302)
+
+
+class SitemapItemsTests(TestCase):
+    """🗺️ Товары и категории в карте сайта (user-018)"""
+
+    def test_hidden_and_slugless_items_are_excluded(self):
+        category = Category.objects.create(category_name='BMW', slug='bmw')
+        hidden = Category.objects.create(category_name='Off', slug='off', is_active=False)
+        listed = create_product('1', category=category)
+        create_product('2', category=hidden)
+        slugless = create_product('3', category=category)
+        Product.objects.filter(pk=slugless.pk).update(slug='')
+
+        self.assertEqual([product.pk for product in ProductSitemap().items()], [listed.pk])
+        self.assertEqual([item.pk for item in CategorySitemap().items()], [category.pk])
+        self.assertEqual(ProductSitemap().location(listed), f'/products/{listed.slug}/')
+
+
+class ImportFingerprintTests(ImportTestCase):
+    """🧬 Пропуск неизмененных строк по отпечаткам (user-019)"""
+
+    def rows(self, changed_price=100):
+        return [import_row(f'S{index}', f'Mat {index}', changed_price if index == 3 else 100)
+                for index in range(6)]
+
+    def test_unchanged_rows_are_skipped(self):
+        for bulk in (False, True):
+            with self.subTest(bulk=bulk):
+                self.reset_catalog()
+                self.run_import(self.rows(), bulk=bulk)
+                stamps = dict(Product.objects.values_list('product_sku', 'updated_at'))
+
+                preview = classify_import_rows([dict(IMPORT_CATEGORY)], self.rows(150))
+                self.assertEqual((preview['products_changed'], preview['products_unchanged']), (1, 5))
+
+                result = self.run_import(self.rows(150), bulk=bulk)
+                self.assertEqual(self.statuses(result), ['unchanged'] * 3 + ['updated'] + ['unchanged'] * 2)
+                self.assertEqual(result['category_results'][0]['status'], 'unchanged')
+                changed = [sku for sku, updated_at in Product.objects.values_list('product_sku', 'updated_at')
+                           if updated_at != stamps[sku]]
+                self.assertEqual(changed, ['S3'])
+
+    def test_manual_edit_invalidates_fingerprint(self):
+        for bulk in (False, True):
+            with self.subTest(bulk=bulk):
+                self.reset_catalog()
+                self.run_import(self.rows(), bulk=bulk)
+
+                product = Product.objects.get(product_sku='S1')
+                product.product_name = 'Правка в админке'
+                product.save()
+
+                result = self.run_import(self.rows(), bulk=bulk)
+                self.assertEqual(self.statuses(result)[1], 'updated')
+                self.assertEqual(Product.objects.get(product_sku='S1').product_name, 'Mat 1')
+                self.assertEqual(self.statuses(self.run_import(self.rows(), bulk=bulk)), ['unchanged'] * 6)
+
+    def test_missing_images_are_retried(self):
+        category = dict(IMPORT_CATEGORY, image='late-category.jpg')
+        rows = [import_row('1', 'A', 1, 'late.jpg')]
+        late_files = [os.path.join(self.media, 'product', 'late.jpg'),
+                      os.path.join(self.media, 'categories', 'late-category.jpg')]
+        for bulk in (False, True):
+            with self.subTest(bulk=bulk):
+                self.reset_catalog()
+                statuses = []
+                for step in range(3):
+                    if step == 1:
+                        for path in late_files:
+                            os.makedirs(os.path.dirname(path), exist_ok=True)
+                            with open(path, 'wb') as file:
+                                file.write(b'x' * 100)
+                    result = self.run_import(rows, bulk=bulk, categories=[category])
+                    statuses.append((result['category_results'][0]['status'], self.statuses(result)[0],
+                                     Product.objects.get().product_images.count(),
+                                     bool(Category.objects.get().category_image)))
+                for path in late_files:
+                    os.remove(path)
+
+                # 🖼️ Фото появилось позже - строка не считается неизмененной, пока оно не привязано
+                self.assertEqual(statuses, [('created', 'created', 0, False), ('updated', 'updated', 1, True),
+                                            ('unchanged', 'unchanged', 1, True)])
@@ -12,6 +12,8 @@ from .admin_views import (
     import_preview_view,
     execute_import_view,
     import_results_view,
+    import_job_progress_view,
+    import_job_status,
     ajax_validate_file
 )
 
@@ -35,6 +37,8 @@ urlpatterns = [
     path('import/execute/', execute_import_view, name='import_execute'),
     path('import/results/', import_results_view, name='import_results'),
     path('import/validate/', ajax_validate_file, name='import_validate'),
+    path('import/jobs/<uuid:job_uid>/', import_job_progress_view, name='import_job_progress'),
+    path('import/jobs/<uuid:job_uid>/status/', import_job_status, name='import_job_status'),
 
     # 📤 ЭКСПОРТ ТОВАРОВ - новые URL
     path('export/', export_excel_view, name='export_excel'),
@@ -68,6 +72,8 @@ urlpatterns = [
 # ✅ http://localhost:8000/products/import/execute/ - выполнение импорта
 # ✅ http://localhost:8000/products/import/results/ - результаты
 # ✅ http://localhost:8000/products/import/validate/ - AJAX валидация
+# ✅ http://localhost:8000/products/import/jobs/<uid>/ - прогресс задания импорта
+# ✅ http://localhost:8000/products/import/jobs/<uid>/status/ - AJAX прогресс (скорость, ETA)
 
 # 🔧 ИЗМЕНЕНИЯ В ЭТОМ ФАЙЛЕ:
 #
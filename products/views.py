@@ -5,19 +5,17 @@
 # 🎯 УЛУЧШЕНО: Производительность запросов, обработка ошибок, логирование
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponseRedirect, JsonResponse
+from django.http import HttpResponseRedirect, JsonResponse, Http404
 from django.contrib import messages
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Q, Avg
+from django.db.models import Avg
 from django.contrib.contenttypes.models import ContentType
 from django.views.decorators.http import require_POST
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
-from django.core.cache import cache
 from django.views.decorators.csrf import csrf_protect
-from django.views.decorators.cache import cache_page
 import json
 import time
 import logging
@@ -25,13 +23,19 @@ import logging
 # 🛍️ Модели товаров
 from products.models import (
     Product,
-    KitVariant,
-    Color,
     Category,
 )
+from products.registry import registry
 
 # 🤝 Импорт универсальных моделей из common
-from common.models import ProductReview
+from common.models import ProductReview, ProductRating, ReviewCounters
+from common import rate_limit
+from common.search import search_queryset
+from common.pagination import paginate_catalog, render_cursor_fragment
+from common.product_snapshot import get_product_snapshot
+from common.page_cache import (
+    tagged_cache_page, category_tag, KITS_TAG, PRODUCTS_CATALOG_TAG, PRODUCT_CATEGORIES_TAG
+)
 
 # 👤 Модели пользователей и корзины
 from accounts.models import Cart, CartItem
@@ -55,32 +59,7 @@ def get_client_ip(request):
     return ip
 
 
-def check_review_rate_limit(ip_address, user=None):
-    """
-    🛡️ Проверка rate limiting для отзывов
-
-    Ограничения:
-    - Анонимные пользователи: 3 отзыва в час с одного IP
-    - Авторизованные пользователи: 5 отзывов в час
-    """
-    if user and user.is_authenticated:
-        cache_key = f"review_limit_user_{user.id}"
-        limit = 5
-    else:
-        cache_key = f"review_limit_ip_{ip_address}"
-        limit = 3
-
-    current_count = cache.get(cache_key, 0)
-
-    if current_count >= limit:
-        return False
-
-    # Увеличиваем счетчик на час
-    cache.set(cache_key, current_count + 1, 3600)
-    return True
-
-
-@cache_page(60 * 15)  # Кэш каталога на 15 минут
+@tagged_cache_page(tags=[PRODUCTS_CATALOG_TAG, PRODUCT_CATEGORIES_TAG, KITS_TAG])
 def products_catalog(request):
     """🛍️ Главная страница каталога товаров с оптимизацией"""
     search_query = request.GET.get("search", "")
@@ -88,18 +67,25 @@ def products_catalog(request):
     category_filter = request.GET.get("category", "")
     per_page = request.GET.get("per_page", "12")
 
-    # 🚀 Оптимизированный запрос с prefetch
-    products = Product.objects.all().select_related("category").prefetch_related("product_images")
+    # 🚀 Карточки одним запросом: фото из колонки main_image, без prefetch изображений
+    products = Product.objects.cards()
+    # ⭐ Рейтинг из денормализованных агрегатов - без запросов на каждую карточку
+    products = ProductRating.annotate_queryset(products)
 
     if search_query:
-        products = products.filter(
-            Q(product_name__icontains=search_query)
-            | Q(product_desription__icontains=search_query)
-        )
+        # 🔍 Полнотекстовый поиск с морфологией и опечатками (вместо icontains)
+        products = search_queryset(products, search_query)
 
     if category_filter:
         products = products.filter(category__slug=category_filter)
 
+    min_rating = request.GET.get("min_rating", "")
+    if min_rating:
+        try:
+            products = products.filter(rating_avg__gte=float(min_rating))
+        except ValueError:
+            pass
+
     sort_options = {
         "name": "product_name",
         "-name": "-product_name",
@@ -107,28 +93,22 @@ def products_catalog(request):
         "-price": "-price",
         "newest": "-created_at",
         "oldest": "created_at",
+        "rating": ("-rating_avg", "-rating_count"),
+        "popular": ("-rating_count", "-rating_avg"),
     }
-    products = products.order_by(sort_options.get(sort_by, "-created_at"))
-
-    if per_page == "all":
-        total_products = products.count()
-        if total_products > 500:
-            messages.warning(request, f"Показано первые 500 из {total_products} товаров.")
-            per_page_num = 500
-        else:
-            per_page_num = total_products or 1
-    else:
-        try:
-            per_page_num = int(per_page)
-            if per_page_num not in [12, 24, 48, 96]:
-                per_page_num = 12
-        except (ValueError, TypeError):
-            per_page_num = 12
-
-    # Пагинация
-    paginator = Paginator(products, per_page_num)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    sort_fields = sort_options.get(sort_by, "-created_at")
+    if isinstance(sort_fields, str):
+        sort_fields = (sort_fields,)
+    if search_query and "sort" not in request.GET:
+        # 🎯 При поиске без явной сортировки - по релевантности
+        sort_fields = ("-search_rank",)
+    products = products.order_by(*sort_fields)
+
+    # 📄 Классическая или курсорная пагинация (?pagination=cursor)
+    pagination = paginate_catalog(request, products, sort_by, per_page)
+    if pagination["cursor_page"] and request.GET.get("fragment"):
+        # 🧩 Бесконечная прокрутка: только карточки следующей порции
+        return render_cursor_fragment(request, "product_parts/product_cards.html", pagination["cursor_page"])
 
     # Активные категории с кэшированием
     categories = (
@@ -137,21 +117,31 @@ def products_catalog(request):
     )
 
     context = {
-        "page_obj": page_obj,
-        "products": page_obj.object_list,
+        "page_obj": pagination["page_obj"],
+        "products": pagination["products"],
+        "cursor_page": pagination["cursor_page"],
         "categories": categories,
         "search_query": search_query,
         "sort_by": sort_by,
         "category_filter": category_filter,
         "per_page": per_page,
-        "total_products": paginator.count,
-        "current_page": page_obj.number,
-        "total_pages": paginator.num_pages,
+        "total_products": pagination["total_products"],
+        "current_page": pagination["current_page"],
+        "total_pages": pagination["total_pages"],
     }
 
     return render(request, "product/catalog.html", context)
 
 
+def _category_page_tags(request, slug):
+    """🏷️ Теги страницы категории (None - категории нет, кэш не нужен)"""
+    category_uid = Category.objects.filter(slug=slug).values_list("uid", flat=True).first()
+    if category_uid is None:
+        return None
+    return [category_tag(category_uid), PRODUCT_CATEGORIES_TAG, KITS_TAG]
+
+
+@tagged_cache_page(tags=_category_page_tags)
 def products_by_category(request, slug):
     """📂 Каталог товаров в выбранной категории"""
     category = get_object_or_404(Category, slug=slug)
@@ -166,15 +156,20 @@ def products_by_category(request, slug):
 
     products = (
         Product.objects.filter(category=category)
-        .select_related("category")
-        .prefetch_related("product_images")
+        .cards()
     )
+    products = ProductRating.annotate_queryset(products)
 
     if search_query:
-        products = products.filter(
-            Q(product_name__icontains=search_query)
-            | Q(product_desription__icontains=search_query)
-        )
+        # 🔍 Полнотекстовый поиск с морфологией и опечатками (вместо icontains)
+        products = search_queryset(products, search_query)
+
+    min_rating = request.GET.get("min_rating", "")
+    if min_rating:
+        try:
+            products = products.filter(rating_avg__gte=float(min_rating))
+        except ValueError:
+            pass
 
     sort_options = {
         "name": "product_name",
@@ -183,27 +178,22 @@ def products_by_category(request, slug):
         "-price": "-price",
         "newest": "-created_at",
         "oldest": "created_at",
+        "rating": ("-rating_avg", "-rating_count"),
+        "popular": ("-rating_count", "-rating_avg"),
     }
-    products = products.order_by(sort_options.get(sort_by, "-created_at"))
-
-    if per_page == "all":
-        total_products = products.count()
-        if total_products > 500:
-            messages.warning(request, f"Показано первые 500 из {total_products} товаров.")
-            per_page_num = 500
-        else:
-            per_page_num = total_products or 1
-    else:
-        try:
-            per_page_num = int(per_page)
-            if per_page_num not in [12, 24, 48, 96]:
-                per_page_num = 12
-        except (ValueError, TypeError):
-            per_page_num = 12
-
-    paginator = Paginator(products, per_page_num)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    sort_fields = sort_options.get(sort_by, "-created_at")
+    if isinstance(sort_fields, str):
+        sort_fields = (sort_fields,)
+    if search_query and "sort" not in request.GET:
+        # 🎯 При поиске без явной сортировки - по релевантности
+        sort_fields = ("-search_rank",)
+    products = products.order_by(*sort_fields)
+
+    # 📄 Классическая или курсорная пагинация (?pagination=cursor)
+    pagination = paginate_catalog(request, products, sort_by, per_page)
+    if pagination["cursor_page"] and request.GET.get("fragment"):
+        # 🧩 Бесконечная прокрутка: только карточки следующей порции
+        return render_cursor_fragment(request, "product_parts/product_cards.html", pagination["cursor_page"])
 
     categories = (
         Category.objects.filter(is_active=True)
@@ -212,15 +202,16 @@ def products_by_category(request, slug):
 
     context = {
         "category": category,
-        "page_obj": page_obj,
-        "products": page_obj.object_list,
+        "page_obj": pagination["page_obj"],
+        "products": pagination["products"],
+        "cursor_page": pagination["cursor_page"],
         "categories": categories,
         "search_query": search_query,
         "sort_by": sort_by,
         "per_page": per_page,
-        "total_products": paginator.count,
-        "current_page": page_obj.number,
-        "total_pages": paginator.num_pages,
+        "total_products": pagination["total_products"],
+        "current_page": pagination["current_page"],
+        "total_pages": pagination["total_pages"],
         "page_title": category.page_title or category.category_name,
         "meta_title": category.get_seo_title(),
         "meta_description": category.get_seo_description(),
@@ -238,26 +229,20 @@ def get_product(request, slug):
     ✅ ИСПРАВЛЕНО: Добавлены все отсутствующие return statements
     """
 
-    product = get_object_or_404(
-        Product.objects.select_related('category').prefetch_related('product_images'),
-        slug=slug
-    )
+    # 📸 Снимок страницы из кэша: товар, изображения, отзывы, рейтинг, похожие товары
+    snapshot = get_product_snapshot(Product, slug)
+    if snapshot is None:
+        raise Http404("Товар не найден")
+    product = snapshot.product
 
     # 📝 Проверяем тип товара и настраиваем конфигурацию
     if product.is_boat_product():
         # ================== ЛОГИКА ДЛЯ ЛОДОК ==================
-        carpet_colors = Color.objects.filter(
-            color_type='carpet',
-            is_available=True
-        ).order_by('display_order')
+        carpet_colors = registry.get_colors('carpet', available_only=True)
+        border_colors = registry.get_colors('border', available_only=True)
 
-        border_colors = Color.objects.filter(
-            color_type='border',
-            is_available=True
-        ).order_by('display_order')
-
-        initial_carpet_color = carpet_colors.first()
-        initial_border_color = border_colors.first()
+        initial_carpet_color = carpet_colors[0] if carpet_colors else None
+        initial_border_color = border_colors[0] if border_colors else None
 
         sorted_kit_variants = []
         additional_options = []
@@ -281,10 +266,11 @@ def get_product(request, slug):
 
     else:
         # ================== ЛОГИКА ДЛЯ АВТОМОБИЛЕЙ ==================
-        sorted_kit_variants = KitVariant.objects.filter(is_option=False).order_by('order')
-        additional_options = KitVariant.objects.filter(is_option=True).order_by('order')
+        # 🗂️ Комплектации и цвета - из процессного реестра, без запросов к БД
+        sorted_kit_variants = registry.get_kits(is_option=False)
+        additional_options = registry.get_kits(is_option=True)
 
-        podpyatnik_option = KitVariant.objects.filter(code='podpyatnik', is_option=True).first()
+        podpyatnik_option = registry.get_option('podpyatnik')
         if not podpyatnik_option:
             podpyatnik_option = type('obj', (object,), {
                 'name': 'Подпятник',
@@ -292,11 +278,11 @@ def get_product(request, slug):
                 'code': 'podpyatnik'
             })
 
-        carpet_colors = Color.objects.filter(color_type='carpet').order_by('display_order')
-        border_colors = Color.objects.filter(color_type='border').order_by('display_order')
+        carpet_colors = registry.get_colors('carpet')
+        border_colors = registry.get_colors('border')
 
-        initial_carpet_color = carpet_colors.filter(is_available=True).first() or carpet_colors.first()
-        initial_border_color = border_colors.filter(is_available=True).first() or border_colors.first()
+        initial_carpet_color = registry.get_initial_color('carpet')
+        initial_border_color = registry.get_initial_color('border')
 
         in_cart = False
         if request.user.is_authenticated:
@@ -310,7 +296,9 @@ def get_product(request, slug):
                 ).exists()
 
         selected_kit, updated_price = None, product.price
-        default_kit = sorted_kit_variants.filter(code='salon').first()
+        default_kit = registry.get_kit('salon')
+        if default_kit and default_kit.is_option:
+            default_kit = None
         kit_code = request.GET.get('kit') or (default_kit.code if default_kit else None)
 
         if kit_code:
@@ -319,18 +307,9 @@ def get_product(request, slug):
 
     # ================== 🔒 ПОЛНАЯ СИСТЕМА ОТЗЫВОВ С МОДЕРАЦИЕЙ ==================
 
-    # 👁️ Получаем ТОЛЬКО одобренные отзывы для публичного отображения
-    try:
-        reviews = product.reviews.filter(is_approved=True).order_by('-date_added')
-        has_reviews = product.reviews.filter(is_approved=True).exists()
-    except AttributeError:
-        product_content_type = ContentType.objects.get_for_model(Product)
-        reviews = ProductReview.objects.filter(
-            content_type=product_content_type,
-            object_id=product.uid,
-            is_approved=True
-        ).order_by('-date_added')
-        has_reviews = reviews.exists()
+    # 👁️ Одобренные отзывы (первая страница) - из снимка
+    reviews = snapshot.reviews
+    has_reviews = snapshot.has_reviews
 
     # 📝 УНИВЕРСАЛЬНАЯ СИСТЕМА ОТЗЫВОВ - поддержка анонимных и зарегистрированных пользователей
     user_existing_review = None
@@ -360,17 +339,21 @@ def get_product(request, slug):
             client_ip = get_client_ip(request)
             logger.info(f"🌐 IP адрес: {client_ip}")
 
-            rate_limit_check = check_review_rate_limit(client_ip, request.user)
+            rate_limit_result = rate_limit.hit('review', request)
+            rate_limit_check = rate_limit_result['allowed']
             logger.info(f"🛡️ Rate limit проверка: {'✅ ОК' if rate_limit_check else '❌ БЛОКИРОВКА'}")
 
             if not rate_limit_check:
                 logger.warning("❌ ОТЗЫВ ЗАБЛОКИРОВАН RATE LIMITING")
+                retry_minutes = max(1, rate_limit_result['retry_after'] // 60)
                 if request.user.is_authenticated:
                     messages.error(request,
-                                   "⚠️ Вы превысили лимит отзывов. Попробуйте позже (максимум 5 отзывов в час).")
+                                   f"⚠️ Вы превысили лимит отзывов (максимум {rate_limit_result['limit']} в час). "
+                                   f"Попробуйте через {retry_minutes} мин.")
                 else:
                     messages.error(request,
-                                   "⚠️ Превышен лимит анонимных отзывов с вашего IP. Попробуйте позже (максимум 3 отзыва в час).")
+                                   f"⚠️ Превышен лимит анонимных отзывов с вашего IP (максимум {rate_limit_result['limit']} в час). "
+                                   f"Попробуйте через {retry_minutes} мин.")
                 logger.info("🔄 РЕДИРЕКТ из-за rate limiting")
                 return redirect('get_product', slug=slug)
 
@@ -500,17 +483,12 @@ def get_product(request, slug):
 
     # ================== 🔄 ПОДГОТОВКА КОНТЕКСТА (ВСЕГДА ВЫПОЛНЯЕТСЯ) ==================
 
-    # 🔄 Похожие товары с оптимизацией
-    similar_products = Product.objects.filter(
-        category=product.category
-    ).exclude(uid=product.uid).select_related('category').prefetch_related('product_images')[:4]
-
-
     # 📋 Контекст для шаблона
     context = {
         'product': product,
         'reviews': reviews,
-        'similar_products': similar_products,
+        'reviews_count': snapshot.reviews_count,
+        'similar_products': snapshot.similar_products,
 
         # 📝 Типы товаров
         'is_boat_product': product.is_boat_product(),
@@ -540,7 +518,7 @@ def get_product(request, slug):
         'user_has_pending_review': user_has_pending_review,
         'form_load_time': time.time(),  # Для анти-спам защиты
         'has_reviews': has_reviews,
-        'rating_percentage': (product.get_rating() / 5) * 100 if has_reviews else 0,
+        'rating_percentage': snapshot.rating_percentage,
 
         # 👤 Информация о пользователе
         'is_anonymous_user': not request.user.is_authenticated,
@@ -574,18 +552,24 @@ def add_to_cart(request, uid):
             if not kit_code:
                 messages.warning(request, 'Пожалуйста, выберите комплектацию!')
                 return redirect(request.META.get('HTTP_REFERER'))
-            kit_variant = get_object_or_404(KitVariant, code=kit_code)
+            kit_variant = registry.get_kit(kit_code)
+            if not kit_variant:
+                raise Http404("Комплектация не найдена")
 
         carpet_color = None
         if carpet_color_id:
-            carpet_color = get_object_or_404(Color, uid=carpet_color_id)
+            carpet_color = registry.get_color_by_uid(carpet_color_id)
+            if not carpet_color:
+                raise Http404("Цвет коврика не найден")
             if not carpet_color.is_available:
                 messages.warning(request, f'Цвет коврика "{carpet_color.name}" временно недоступен.')
                 return redirect(request.META.get('HTTP_REFERER'))
 
         border_color = None
         if border_color_id:
-            border_color = get_object_or_404(Color, uid=border_color_id)
+            border_color = registry.get_color_by_uid(border_color_id)
+            if not border_color:
+                raise Http404("Цвет окантовки не найден")
             if not border_color.is_available:
                 messages.warning(request, f'Цвет окантовки "{border_color.name}" временно недоступен.')
                 return redirect(request.META.get('HTTP_REFERER'))
@@ -611,13 +595,18 @@ def add_to_cart(request, uid):
 
         product_content_type = ContentType.objects.get_for_model(Product)
 
+        # 🗂️ Записи реестра - не модели, поэтому сравниваем и сохраняем по *_id
+        kit_variant_id = kit_variant.uid if kit_variant else None
+        carpet_color_id = carpet_color.uid if carpet_color else None
+        border_color_id = border_color.uid if border_color else None
+
         existing_item = CartItem.objects.filter(
             cart=cart,
             content_type=product_content_type,
             object_id=product.uid,
-            kit_variant=kit_variant,
-            carpet_color=carpet_color,
-            border_color=border_color,
+            kit_variant_id=kit_variant_id,
+            carpet_color_id=carpet_color_id,
+            border_color_id=border_color_id,
             has_podpyatnik=has_podp
         ).first()
 
@@ -630,9 +619,9 @@ def add_to_cart(request, uid):
                 cart=cart,
                 content_type=product_content_type,
                 object_id=product.uid,
-                kit_variant=kit_variant,
-                carpet_color=carpet_color,
-                border_color=border_color,
+                kit_variant_id=kit_variant_id,
+                carpet_color_id=carpet_color_id,
+                border_color_id=border_color_id,
                 has_podpyatnik=has_podp,
                 quantity=quantity
             )
@@ -876,31 +865,30 @@ def pending_reviews(request):
         is_approved=False
     ).order_by('-date_added').select_related('user', 'content_type')
 
-    # 🎯 ЦЕНТРАЛИЗОВАННАЯ ОБРАБОТКА: Добавляем информацию о товарах к отзывам
+    # Пагинация для большого количества отзывов
+    paginator = Paginator(pending_reviews, 20)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
+
+    # 🎯 ЦЕНТРАЛИЗОВАННАЯ ОБРАБОТКА: Добавляем информацию о товарах к отзывам текущей страницы
     from common.utils import get_product_by_review
 
-    for review in pending_reviews:
+    for review in page_obj.object_list:
         product, product_type, url_prefix, images_field = get_product_by_review(review)
         review.cached_product = product
         review.product_type = product_type
         review.product_url_prefix = url_prefix
         review.images_field = images_field
 
-    # 📊 Статистика
+    # 📊 Статистика: строка счетчиков + отзывы за сегодня по индексу (is_approved, date_added)
+    moderation_stats = ProductReview.get_moderation_stats()
     stats = {
-        'total_pending': pending_reviews.count(),
-        'today_pending': pending_reviews.filter(
-            date_added__date=timezone.now().date()
-        ).count(),
-        'total_approved': ProductReview.objects.filter(is_approved=True).count(),
-        'total_reviews': ProductReview.objects.count(),
+        'total_pending': moderation_stats['pending'],
+        'today_pending': moderation_stats['today_pending'],
+        'total_approved': moderation_stats['approved'],
+        'total_reviews': moderation_stats['total'],
     }
 
-    # Пагинация для большого количества отзывов
-    paginator = Paginator(pending_reviews, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
     context = {
         'pending_reviews': page_obj.object_list,
         'page_obj': page_obj,
@@ -954,7 +942,11 @@ def bulk_moderate_reviews(request):
             if hasattr(ProductReview, 'moderated_at'):
                 update_fields['moderated_at'] = timezone.now()
 
+            # ⭐ update() обходит сигналы - пересчитываем агрегаты рейтинга вручную
+            rated_objects = ProductRating.get_review_objects(reviews)
             updated = reviews.update(**update_fields)
+            ProductRating.recalculate_many(rated_objects)
+            ReviewCounters.recalculate()
             processed_count = updated
             message = f'Одобрено отзывов: {processed_count}'
 
@@ -1002,28 +994,38 @@ def bulk_moderate_reviews(request):
 
 @staff_member_required
 def reviews_statistics(request):
-    """📊 Статистика отзывов для администраторов"""
-    from django.db.models import Count, Avg
-    from datetime import datetime, timedelta
-
-    # Общая статистика
-    total_reviews = ProductReview.objects.count()
-    approved_reviews = ProductReview.objects.filter(is_approved=True).count()
-    pending_reviews = ProductReview.objects.filter(is_approved=False).count()
-
-    # Статистика по периодам
-    today = timezone.now().date()
-    week_ago = today - timedelta(days=7)
-    month_ago = today - timedelta(days=30)
+    """
+    📊 Статистика отзывов для администраторов
 
-    today_reviews = ProductReview.objects.filter(date_added__date=today).count()
-    week_reviews = ProductReview.objects.filter(date_added__date__gte=week_ago).count()
-    month_reviews = ProductReview.objects.filter(date_added__date__gte=month_ago).count()
+    Периоды и графики читаются из дневных сводок (common/rollups.py),
+    период дашборда - GET-параметры start и end (YYYY-MM-DD, по умолчанию 30 дней).
+    """
+    from django.db.models import Count, Sum
+    from datetime import timedelta
+    from common import rollups
 
-    # Средние оценки
-    avg_rating = ProductReview.objects.filter(is_approved=True).aggregate(
-        avg_rating=Avg('stars')
-    )['avg_rating'] or 0
+    try:
+        start, end = rollups.parse_range(request.GET.get('start'), request.GET.get('end'))
+    except ValueError as e:
+        messages.error(request, f'Некорректный период: {e}')
+        start, end = rollups.parse_range(None, None)
+
+    # Общая статистика - из материализованных счетчиков
+    moderation_stats = ReviewCounters.get_stats()
+    total_reviews = moderation_stats['total']
+    approved_reviews = moderation_stats['approved']
+    pending_reviews = moderation_stats['pending']
+
+    # Статистика по периодам - из дневных сводок (сегодня считается по таблице отзывов)
+    today = timezone.localdate()
+    daily_reviews = rollups.review_summary(today - timedelta(days=30), today)['daily']
+    today_reviews = daily_reviews[-1]['reviews']
+    week_reviews = sum(row['reviews'] for row in daily_reviews[-8:])
+    month_reviews = sum(row['reviews'] for row in daily_reviews)
+
+    # Средняя оценка одобренных отзывов - из агрегатов рейтинга товаров
+    rating_totals = ProductRating.objects.aggregate(rating_sum=Sum('rating_sum'), rating_count=Sum('rating_count'))
+    avg_rating = (rating_totals['rating_sum'] or 0) / rating_totals['rating_count'] if rating_totals['rating_count'] else 0
 
     # Топ пользователей по количеству отзывов
     top_reviewers = ProductReview.objects.filter(
@@ -1032,7 +1034,7 @@ def reviews_statistics(request):
     ).values(
         'user__username', 'user__first_name', 'user__last_name'
     ).annotate(
-        review_count=Count('id')
+        review_count=Count('uid')
     ).order_by('-review_count')[:10]
 
     context = {
@@ -1043,8 +1045,11 @@ def reviews_statistics(request):
         'week_reviews': week_reviews,
         'month_reviews': month_reviews,
         'avg_rating': round(avg_rating, 2),
-        'approval_rate': round((approved_reviews / total_reviews * 100) if total_reviews > 0 else 0, 1),
+        'approval_rate': moderation_stats['approval_rate'],
+        'spam_rate': moderation_stats['spam_rate'],
+        'suspicious_reviews': moderation_stats['suspicious'],
         'top_reviewers': top_reviewers,
+        'dashboard': rollups.dashboard(start, end),
     }
 
     return render(request, 'admin/reviews_statistics.html', context)